@@ -0,0 +1,45 @@
+"""Daily latency sketches and a status/started_at index for agent runs
+
+Revision ID: a2b3c4d5e6f7
+Revises: f1a2b3c4d5e6
+Create Date: 2025-12-15 09:00:00.000000
+
+Adds agent_metrics_daily.latency_sketch, a mergeable quantile sketch of the
+day's latencies, so budget gates can read true p95/p99 over a date range
+instead of averaging daily percentiles. Existing days keep their p95/p99
+columns; the gate falls back to them for days without a sketch.
+
+Adds (status, started_at) on agent_audit_log so the regression detector's
+"latest N succeeded runs" window is an index range scan.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "a2b3c4d5e6f7"
+down_revision = "f1a2b3c4d5e6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "agent_metrics_daily",
+        sa.Column(
+            "latency_sketch",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_agent_audit_log_status_started_at",
+        "agent_audit_log",
+        ["status", "started_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_agent_audit_log_status_started_at", table_name="agent_audit_log")
+    op.drop_column("agent_metrics_daily", "latency_sketch")
@@ -0,0 +1,53 @@
+"""Partition emails by month of received_at
+
+Revision ID: a3b4c5d6e7f8
+Revises: a2b3c4d5e6f7
+Create Date: 2025-12-18 09:00:00.000000
+
+Converts emails into a table partitioned by RANGE (received_at), one
+partition per month, with an (owner_email, received_at) index on each. See
+app/core/email_partitions.py for how keys and foreign keys change.
+
+The conversion is an online copy-and-swap; this migration only runs its
+first and last steps. The bulk copy is an operator step that commits batch
+by batch outside of any migration:
+
+    python -m scripts.partition_emails prepare
+    python -m scripts.partition_emails copy
+    alembic upgrade head   # swaps under a short lock
+
+An empty or small emails table is swapped straight away. With more than
+email_partitions.SWAP_CATCHUP_ROWS rows left to copy the upgrade fails
+(rolling back its prepare) and asks for the copy step instead. After the
+swap it validates the foreign keys re-pointed at email_keys.
+
+No-op on SQLite and other non-Postgres databases.
+"""
+
+from alembic import op
+
+from app.core import email_partitions
+
+# revision identifiers, used by Alembic.
+revision = "a3b4c5d6e7f8"
+down_revision = "a2b3c4d5e6f7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if not email_partitions.is_postgres(conn):
+        return
+    if email_partitions.status(conn) == "partitioned":
+        return
+    email_partitions.prepare(conn)
+    email_partitions.swap(conn)
+    email_partitions.validate_foreign_keys(conn)
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    if not email_partitions.is_postgres(conn):
+        return
+    email_partitions.revert(conn)
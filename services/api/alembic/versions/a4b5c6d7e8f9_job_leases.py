@@ -0,0 +1,39 @@
+"""Leases for scheduled jobs shared by all API workers
+
+Revision ID: a4b5c6d7e8f9
+Revises: a3b4c5d6e7f8
+Create Date: 2025-12-20 09:00:00.000000
+
+Every API worker runs the APScheduler jobs. app.core.job_locks claims one
+job_leases row per job (lease holder and expiry, plus the trigger time of the
+latest claimed run) so each trigger runs on one worker only, and the last
+run's duration and outcome are visible to all of them.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "a4b5c6d7e8f9"
+down_revision = "a3b4c5d6e7f8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "job_leases",
+        sa.Column("job_id", sa.String(length=128), primary_key=True),
+        sa.Column("holder", sa.String(length=255), nullable=True),
+        sa.Column("locked_until", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_fire_time", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_duration_seconds", sa.Float(), nullable=True),
+        sa.Column("last_status", sa.String(length=16), nullable=True),
+        sa.Column("last_success_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("job_leases")
@@ -0,0 +1,56 @@
+"""Add incremental aggregation state to form_profiles
+
+Revision ID: e7f8a9b0c1d2
+Revises: 990a4d77d1af
+Create Date: 2025-12-10 09:00:00.000000
+
+Adds event_count and field_votes so learning sync can fold each batch of
+autofill events into FormProfile as a delta instead of waiting for the
+nightly aggregator.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "e7f8a9b0c1d2"
+down_revision = "990a4d77d1af"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "form_profiles",
+        sa.Column("event_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "form_profiles",
+        sa.Column(
+            "field_votes",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=False,
+            server_default="{}",
+        ),
+    )
+
+    # Seed counts so the first delta merges weight existing averages correctly
+    op.execute(
+        """
+        UPDATE form_profiles p
+        SET event_count = e.n
+        FROM (
+            SELECT host, schema_hash, COUNT(*) AS n
+            FROM autofill_events
+            GROUP BY host, schema_hash
+        ) e
+        WHERE p.host = e.host AND p.schema_hash = e.schema_hash
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("form_profiles", "field_votes")
+    op.drop_column("form_profiles", "event_count")
@@ -0,0 +1,48 @@
+"""Persist opportunity eligibility on emails
+
+Revision ID: f1a2b3c4d5e6
+Revises: e7f8a9b0c1d2
+Create Date: 2025-12-11 09:00:00.000000
+
+Adds emails.opportunity_state plus an (owner_email, opportunity_state,
+received_at) index so /api/opportunities can page with one indexed query
+instead of filtering every email of the last six months in Python.
+
+Classified emails are seeded here. Unclassified emails need the Python
+heuristics; run scripts/backfill_opportunity_state.py after upgrading.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "f1a2b3c4d5e6"
+down_revision = "e7f8a9b0c1d2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "emails",
+        sa.Column("opportunity_state", sa.String(length=16), nullable=True),
+    )
+    op.create_index(
+        "ix_emails_owner_opportunity_received",
+        "emails",
+        ["owner_email", "opportunity_state", "received_at"],
+    )
+
+    op.execute("""
+        UPDATE emails
+        SET opportunity_state = CASE
+            WHEN is_real_opportunity THEN 'classifier'
+            ELSE 'excluded'
+        END
+        WHERE is_real_opportunity IS NOT NULL
+        """)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_emails_owner_opportunity_received", table_name="emails")
+    op.drop_column("emails", "opportunity_state")
@@ -15,9 +15,6 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 from collections import Counter
 
-from sklearn.linear_model import LogisticRegression
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.preprocessing import StandardScaler
 import numpy as np
 
 from app.models_al import LabeledExample
@@ -108,6 +105,10 @@ class HeuristicTrainer:
     """Train deterministic models on labeled examples."""
 
     def __init__(self, db_session):
+        # sklearn is imported here, not at module level: it costs ~1.5s and
+        # this module is reachable from the API's router imports.
+        from sklearn.preprocessing import StandardScaler
+
         self.db = db_session
         self.scaler = StandardScaler()
 
@@ -155,6 +156,9 @@ class HeuristicTrainer:
         X_scaled = self.scaler.fit_transform(X)
 
         # Train model
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.tree import DecisionTreeClassifier
+
         if model_type == "logistic":
             model = LogisticRegression(random_state=42, max_iter=1000)
         elif model_type == "tree":
@@ -0,0 +1,403 @@
+"""
+Agent v2 - Today triage engine
+
+Builds the "Today" panel (one preview card set per scan intent) from a single
+Elasticsearch ``_msearch`` instead of one full orchestrator run per intent:
+
+1. One msearch covering every intent's email_search, the follow-up queue
+   search and the recent-mail window used by security_scan
+2. Per-intent tool results derived from those responses; the only extra I/O
+   (applications lookup, domain risk cache) runs concurrently
+3. Deterministic cards from the orchestrator's IntentSpec builders - no RAG,
+   no LLM synthesis (Today is always preview_only)
+4. Result cached per user for a short TTL; new mail invalidates it
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from elasticsearch import AsyncElasticsearch
+
+from app.agent.metrics import record_agent_run, record_tool_call
+from app.agent.orchestrator import INTENT_SPECS, MailboxAgentOrchestrator
+from app.agent.tools import (
+    SECURITY_SCAN_RECENT_SEARCH,
+    build_email_search_body,
+    lookup_applications_by_thread,
+    parse_email_search_hits,
+    security_scan_emails,
+)
+from app.db import SessionLocal
+from app.es import ES_ENABLED, ES_URL
+from app.schemas_agent import (
+    ApplicationsLookupResult,
+    EmailSearchParams,
+    EmailSearchResult,
+    ToolResult,
+)
+
+logger = logging.getLogger(__name__)
+
+# Fixed list of scan intents for Today view (display order)
+TODAY_INTENTS = (
+    "followups",
+    "bills",
+    "interviews",
+    "unsubscribe",
+    "clean_promos",
+    "suspicious",
+)
+
+# Same result sizes the orchestrator plans for these intents
+_MAX_RESULTS = {"suspicious": 50}
+_DEFAULT_MAX_RESULTS = 20
+
+# Extra searches sharing the msearch round-trip
+_FOLLOWUP_QUEUE = "followup_queue"
+_FOLLOWUP_QUEUE_QUERY = "Get my follow-up queue"
+_SECURITY_RECENT = "security_recent"
+
+TODAY_CACHE_TTL_SECONDS = int(os.getenv("AGENT_TODAY_CACHE_TTL_SECONDS", "60"))
+TODAY_CACHE_MAX_ENTRIES = int(os.getenv("AGENT_TODAY_CACHE_MAX_ENTRIES", "1000"))
+
+# (user_id, time_window_days) -> (expires_at, payload), least recently used
+# first
+_today_cache: "OrderedDict[Tuple[str, int], Tuple[float, Dict[str, Any]]]" = (
+    OrderedDict()
+)
+
+
+def invalidate_today_cache(user_id: str) -> None:
+    """Drop cached Today results for a user (call after new mail is indexed)."""
+    for key in [k for k in _today_cache if k[0] == user_id]:
+        _today_cache.pop(key, None)
+
+
+def _cache_get(key: Tuple[str, int]) -> Optional[Dict[str, Any]]:
+    item = _today_cache.get(key)
+    if item is None:
+        return None
+    if item[0] <= time.monotonic():
+        del _today_cache[key]
+        return None
+    _today_cache.move_to_end(key)
+    return item[1]
+
+
+def _cache_put(key: Tuple[str, int], payload: Dict[str, Any]) -> None:
+    """Store a result; expired entries go first, then the least recently used."""
+    now = time.monotonic()
+    for stale in [
+        k for k, (expires_at, _) in _today_cache.items() if expires_at <= now
+    ]:
+        del _today_cache[stale]
+    _today_cache[key] = (now + TODAY_CACHE_TTL_SECONDS, payload)
+    _today_cache.move_to_end(key)
+    while len(_today_cache) > TODAY_CACHE_MAX_ENTRIES:
+        _today_cache.popitem(last=False)
+
+
+def _search_plan(time_window_days: int) -> Dict[str, EmailSearchParams]:
+    """email_search params for every search Today needs, keyed by name."""
+    plan = {
+        intent: EmailSearchParams(
+            query_text=f"Show {intent}",
+            time_window_days=time_window_days,
+            max_results=_MAX_RESULTS.get(intent, _DEFAULT_MAX_RESULTS),
+        )
+        for intent in TODAY_INTENTS
+    }
+    plan[_FOLLOWUP_QUEUE] = EmailSearchParams(
+        query_text=_FOLLOWUP_QUEUE_QUERY,
+        time_window_days=time_window_days,
+        max_results=_DEFAULT_MAX_RESULTS,
+    )
+    plan[_SECURITY_RECENT] = EmailSearchParams(**SECURITY_SCAN_RECENT_SEARCH)
+    return plan
+
+
+def _search_result(
+    params: EmailSearchParams, response: Optional[Dict[str, Any]], error: str
+) -> ToolResult:
+    """Wrap one msearch response the way the email_search tool would."""
+    if response is None or "error" in response:
+        reason = (response or {}).get("error") or error
+        return ToolResult(
+            tool_name="email_search",
+            status="error",
+            summary="Email search failed",
+            error_message=str(reason),
+        )
+
+    emails, total_found = parse_email_search_hits(response)
+    return ToolResult(
+        tool_name="email_search",
+        status="success",
+        summary=f"Found {total_found} emails matching '{params.query_text}'",
+        data=EmailSearchResult(
+            emails=emails,
+            total_found=total_found,
+            query_used=params.query_text,
+            filters_applied=params.dict(),
+        ).dict(),
+    )
+
+
+def _emails(result: ToolResult) -> List[Dict[str, Any]]:
+    if result.status != "success":
+        return []
+    return result.data.get("emails", [])
+
+
+class TodayTriageEngine:
+    """Shared-scan preview engine behind ``POST /v2/agent/today``."""
+
+    def __init__(self, orchestrator: MailboxAgentOrchestrator):
+        # Only the deterministic IntentSpec card builders are used
+        self.orchestrator = orchestrator
+
+    async def run(self, user_id: str, time_window_days: int) -> Dict[str, Any]:
+        """
+        Return Today intents plus the follow-up queue for a user.
+
+        Shape: ``{"intents": [{"intent", "summary", "threads"}, ...],
+        "followup_queue": {"threads": [...], "time_window_days": N}}``.
+        Served from cache when a fresh entry exists.
+        """
+        key = (user_id, time_window_days)
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached
+
+        start = time.perf_counter()
+        status = "success"
+        try:
+            result = await self._compute(user_id, time_window_days)
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            duration_ms = int((time.perf_counter() - start) * 1000)
+            record_agent_run(
+                intent="today",
+                mode="preview_only",
+                status=status,
+                duration_ms=duration_ms,
+            )
+
+        _cache_put(key, result)
+        return result
+
+    async def _compute(self, user_id: str, time_window_days: int) -> Dict[str, Any]:
+        plan = _search_plan(time_window_days)
+        searches = await self._msearch(user_id, plan)
+
+        outcomes = await asyncio.gather(
+            *(
+                self._build_intent(intent, searches, time_window_days)
+                for intent in TODAY_INTENTS
+            ),
+            return_exceptions=True,
+        )
+
+        intents = []
+        for intent, outcome in zip(TODAY_INTENTS, outcomes):
+            if isinstance(outcome, BaseException):
+                # Omit failed intent from results (graceful degradation)
+                logger.error(
+                    f"Today: intent '{intent}' failed: {outcome}",
+                    exc_info=outcome,
+                    extra={"user_id": user_id, "intent": intent},
+                )
+                continue
+            intents.append(outcome)
+
+        logger.info(
+            f"Today: completed for user={user_id}, "
+            f"{len(intents)}/{len(TODAY_INTENTS)} intents succeeded"
+        )
+
+        return {
+            "intents": intents,
+            "followup_queue": {
+                "threads": self._followup_queue_threads(
+                    searches[_FOLLOWUP_QUEUE], time_window_days
+                ),
+                "time_window_days": time_window_days,
+            },
+        }
+
+    async def _msearch(
+        self, user_id: str, plan: Dict[str, EmailSearchParams]
+    ) -> Dict[str, ToolResult]:
+        """Run every planned search in one ``_msearch`` round-trip."""
+        names = list(plan)
+        responses: List[Optional[Dict[str, Any]]] = [None] * len(names)
+        error = "ES is disabled"
+
+        if ES_ENABLED:
+            searches: List[Dict[str, Any]] = []
+            for name in names:
+                searches.append({"index": "gmail_emails"})
+                searches.append(build_email_search_body(plan[name], user_id))
+
+            started = datetime.utcnow()
+            es = AsyncElasticsearch(ES_URL)
+            try:
+                result = await es.msearch(searches=searches)
+                responses = list(result.get("responses", responses))
+                tool_status = "success"
+            except Exception as e:
+                logger.error(f"Today: msearch failed: {e}", exc_info=True)
+                error = str(e)
+                tool_status = "error"
+            finally:
+                await es.close()
+            record_tool_call(
+                "email_msearch",
+                tool_status,
+                int((datetime.utcnow() - started).total_seconds() * 1000),
+            )
+
+        return {
+            name: _search_result(plan[name], response, error)
+            for name, response in zip(names, responses)
+        }
+
+    async def _build_intent(
+        self,
+        intent: str,
+        searches: Dict[str, ToolResult],
+        time_window_days: int,
+    ) -> Dict[str, Any]:
+        search = searches[intent]
+        tool_results = [search]
+
+        if intent == "suspicious":
+            tool_results.append(
+                await self._security_scan(search, searches[_SECURITY_RECENT])
+            )
+        elif intent == "followups":
+            tool_results.append(await self._applications_lookup(search))
+
+        spec = INTENT_SPECS[intent]
+        metrics = self.orchestrator._build_metrics_from_spec(
+            spec=spec, tool_results=tool_results, time_window_days=time_window_days
+        )
+        cards = self.orchestrator._build_cards_from_spec(
+            spec=spec,
+            tool_results=tool_results,
+            metrics=metrics,
+            time_window_days=time_window_days,
+        )
+
+        # Extract summary + threads from cards
+        summary = {"count": 0, "time_window_days": time_window_days}
+        threads: List[Dict[str, Any]] = []
+        for card in cards:
+            if card.meta and "count" in card.meta:
+                summary["count"] = card.meta["count"]
+                summary["time_window_days"] = card.meta.get(
+                    "time_window_days", time_window_days
+                )
+            if card.kind == "thread_list" and card.threads:
+                threads = card.threads[:5]  # Limit to 5 threads per intent
+
+        return {"intent": intent, "summary": summary, "threads": threads}
+
+    async def _security_scan(
+        self, search: ToolResult, recent: ToolResult
+    ) -> ToolResult:
+        """Mirror the security_scan tool as planned after an email_search."""
+        if _emails(search):
+            # security_scan is handed the search's email_ids, and fetching
+            # emails by id is not implemented there yet (scans nothing)
+            return await security_scan_emails([])
+
+        if recent.status != "success":
+            return ToolResult(
+                tool_name="security_scan",
+                status="error",
+                summary="Failed to fetch emails for scanning",
+                error_message=recent.error_message,
+            )
+        return await security_scan_emails(_emails(recent))
+
+    async def _applications_lookup(self, search: ToolResult) -> ToolResult:
+        """Link followup threads to tracked applications (DB, off the loop)."""
+        thread_ids = {e["thread_id"] for e in _emails(search) if e.get("thread_id")}
+        if not thread_ids:
+            return ToolResult(
+                tool_name="applications_lookup",
+                status="error",
+                summary="email_ids must be provided",
+                error_message="Missing required email_ids parameter",
+            )
+
+        def lookup() -> List[Dict[str, Any]]:
+            db = SessionLocal()
+            try:
+                return lookup_applications_by_thread(db, thread_ids, max_results=50)
+            finally:
+                db.close()
+
+        try:
+            applications = await asyncio.to_thread(lookup)
+        except Exception as e:
+            logger.error(f"Applications lookup failed: {e}", exc_info=True)
+            return ToolResult(
+                tool_name="applications_lookup",
+                status="error",
+                summary="Applications lookup failed",
+                error_message=str(e),
+            )
+
+        return ToolResult(
+            tool_name="applications_lookup",
+            status="success",
+            summary=(
+                f"Found {len(applications)} applications linked to selected emails"
+            ),
+            data=ApplicationsLookupResult(
+                applications=applications,
+                total_found=len(applications),
+            ).dict(),
+        )
+
+    def _followup_queue_threads(
+        self, search: ToolResult, time_window_days: int
+    ) -> List[Dict[str, Any]]:
+        """Follow-up queue threads, as ``get_followup_queue`` returns them."""
+        spec = INTENT_SPECS["followups"]
+        metrics = self.orchestrator._build_metrics_from_spec(
+            spec=spec, tool_results=[search], time_window_days=time_window_days
+        )
+        cards = self.orchestrator._build_cards_from_spec(
+            spec=spec,
+            tool_results=[search],
+            metrics=metrics,
+            time_window_days=time_window_days,
+        )
+
+        threads = []
+        for card in cards:
+            if card.kind == "thread_list" and card.threads:
+                for thread in card.threads:
+                    threads.append(
+                        {
+                            "thread_id": thread.get("thread_id")
+                            or thread.get("threadId", ""),
+                            "subject": thread.get("subject", ""),
+                            "snippet": thread.get("snippet", ""),
+                            "from": thread.get("from", ""),
+                            "last_message_at": thread.get("lastMessageAt"),
+                            "gmail_url": thread.get("gmailUrl"),
+                            "priority": thread.get("priority", 50),
+                        }
+                    )
+        return threads
@@ -9,7 +9,7 @@ Implements core tools:
 - profile_stats: Get inbox analytics
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 from datetime import datetime, timedelta
 
@@ -29,7 +29,7 @@ from app.schemas_agent import (
 )
 from app.es import ES_URL, ES_ENABLED
 from elasticsearch import AsyncElasticsearch
-from app.agent.redis_cache import get_domain_risk, set_domain_risk
+from app.agent.redis_cache import get_domain_risk, get_redis_client, set_domain_risk
 from app.agent.metrics import (
     mailbox_agent_tool_calls_total,
     mailbox_agent_tool_latency_seconds,
@@ -113,53 +113,7 @@ class ToolRegistry:
 
             es = AsyncElasticsearch(ES_URL)
 
-            # Build query
-            must = []
-            filters = [
-                # IMPORTANT: user_id is text field, use match
-                {"match": {"user_id": user_id}}
-            ]
-
-            # Full-text search on subject + body, or match_all if empty
-            if search_params.query_text and search_params.query_text != "*":
-                must.append(
-                    {
-                        "multi_match": {
-                            "query": search_params.query_text,
-                            "fields": ["subject^3", "body_text"],
-                        }
-                    }
-                )
-            else:
-                must.append({"match_all": {}})
-
-            # Time window filter
-            if search_params.time_window_days:
-                since = datetime.utcnow() - timedelta(
-                    days=search_params.time_window_days
-                )
-                filters.append({"range": {"received_at": {"gte": since.isoformat()}}})
-
-            # Optional labels filter (only if explicitly provided)
-            if search_params.labels:
-                filters.append({"terms": {"labels": search_params.labels}})
-
-            # Optional risk filter (only if explicitly provided)
-            if search_params.risk_min is not None:
-                filters.append(
-                    {"range": {"risk_score": {"gte": search_params.risk_min}}}
-                )
-
-            es_query = {
-                "query": {
-                    "bool": {
-                        "must": must,
-                        "filter": filters,
-                    }
-                },
-                "sort": [{"received_at": "desc"}],
-                "size": search_params.max_results,
-            }
+            es_query = build_email_search_body(search_params, user_id)
 
             # Debug logging
             logger.info(f"email_search ES query: {es_query}")
@@ -167,27 +121,9 @@ class ToolRegistry:
             # Execute search
             result = await es.search(index="gmail_emails", body=es_query)
 
-            # Parse results
-            hits = result.get("hits", {}).get("hits", [])
-            total_found = result.get("hits", {}).get("total", {}).get("value", 0)
-
-            logger.info(f"email_search: total={total_found}, returned={len(hits)}")
-
-            emails = []
-            for hit in hits:
-                source = hit["_source"]
-                emails.append(
-                    {
-                        "id": source.get("gmail_id") or hit["_id"],
-                        "thread_id": source.get("thread_id", ""),
-                        "subject": source.get("subject", ""),
-                        "sender": source.get("sender", ""),
-                        "received_at": source.get("received_at"),
-                        "snippet": source.get("body_text", "")[:200],
-                        "risk_score": source.get("risk_score", 0),
-                        "labels": source.get("labels", []),
-                    }
-                )
+            emails, total_found = parse_email_search_hits(result)
+
+            logger.info(f"email_search: total={total_found}, returned={len(emails)}")
 
             await es.close()
 
@@ -317,12 +253,7 @@ class ToolRegistry:
             if not scan_params.email_ids:
                 # Use email_search to get recent emails
                 search_result = await self._email_search(
-                    {
-                        "query_text": "*",
-                        "time_window_days": 7,
-                        "max_results": 50,
-                    },
-                    user_id,
+                    dict(SECURITY_SCAN_RECENT_SEARCH), user_id
                 )
 
                 if search_result.status != "success":
@@ -339,84 +270,7 @@ class ToolRegistry:
                 # TODO: Fetch specific emails by IDs from DB
                 emails = []
 
-            if not emails:
-                return ToolResult(
-                    tool_name="security_scan",
-                    status="success",
-                    summary="No emails found to scan",
-                    data=SecurityScanResult(
-                        scanned_count=0,
-                        risky_emails=[],
-                        safe_emails=[],
-                        domains_checked=[],
-                    ).dict(),
-                )
-
-            # Simple risk scoring stub (TODO: implement proper EmailRiskAnalyzer)
-            # For now, use DB risk_score if available, else assign based on sender domain
-
-            risky_emails = []
-            safe_emails = []
-            domains_checked = set()
-
-            for email in emails:
-                sender = email.get("sender", "")
-                if not sender:
-                    continue
-
-                # Extract domain from sender
-                domain = sender.split("@")[-1] if "@" in sender else sender
-                domains_checked.add(domain)
-
-                # Use DB risk_score if available
-                risk_score = email.get("risk_score", 0) / 100.0  # Normalize to 0-1
-
-                # Check Redis cache first
-                cached_risk = await get_domain_risk(domain)
-                if cached_risk is not None:
-                    risk_score = cached_risk.risk_score
-                else:
-                    # Cache the domain risk for future use
-                    await set_domain_risk(
-                        domain,
-                        DomainRiskCache(
-                            domain=domain,
-                            risk_score=risk_score,
-                            first_seen_at=datetime.utcnow(),
-                            last_seen_at=datetime.utcnow(),
-                            email_count=1,
-                            flags=[],
-                            evidence={},
-                        ),
-                    )
-
-                # Categorize email
-                email_with_risk = {
-                    **email,
-                    "risk_score": risk_score,
-                    "sender_domain": domain,
-                }
-
-                if risk_score >= 0.5:  # High risk threshold
-                    risky_emails.append(email_with_risk)
-                else:
-                    safe_emails.append(email_with_risk)
-
-            scanned_count = len(emails)
-            risky_count = len(risky_emails)
-            summary = f"Scanned {scanned_count} emails: {risky_count} risky, {scanned_count - risky_count} safe"
-
-            return ToolResult(
-                tool_name="security_scan",
-                status="success",
-                summary=summary,
-                data=SecurityScanResult(
-                    scanned_count=scanned_count,
-                    risky_emails=risky_emails[:10],  # Limit to top 10 risky
-                    safe_emails=safe_emails[:5],  # Show 5 safe samples
-                    domains_checked=list(domains_checked),
-                ).dict(),
-            )
+            return await security_scan_emails(emails)
 
         except Exception as e:
             logger.error(f"Security scan failed: {e}", exc_info=True)
@@ -478,36 +332,10 @@ class ToolRegistry:
                             if tid:
                                 thread_ids.add(tid)
 
-                # Query applications by thread_id
-                query = (
-                    db.query(models.Application)
-                    .filter(models.Application.thread_id.in_(list(thread_ids)))
-                    .order_by(models.Application.created_at.desc())
-                    .limit(app_params.max_results)
+                applications_data = lookup_applications_by_thread(
+                    db, thread_ids, app_params.max_results
                 )
 
-                apps = query.all()
-
-                # Serialize applications
-                applications_data = []
-                for app in apps:
-                    applications_data.append(
-                        {
-                            "id": app.id,
-                            "company": app.company,
-                            "role": app.role,
-                            "status": app.status.value if app.status else None,
-                            "source": app.source,
-                            "thread_id": app.thread_id,
-                            "created_at": app.created_at.isoformat()
-                            if app.created_at
-                            else None,
-                            "updated_at": app.updated_at.isoformat()
-                            if app.updated_at
-                            else None,
-                        }
-                    )
-
                 summary = f"Found {len(applications_data)} applications linked to selected emails"
 
                 return ToolResult(
@@ -639,6 +467,209 @@ class ToolRegistry:
 # Tool Utilities
 # ============================================================================
 
+# Recent-mail window security_scan falls back to when it has no email_ids
+SECURITY_SCAN_RECENT_SEARCH: Dict[str, Any] = {
+    "query_text": "*",
+    "time_window_days": 7,
+    "max_results": 50,
+}
+
+
+def build_email_search_body(
+    search_params: EmailSearchParams, user_id: str
+) -> Dict[str, Any]:
+    """Build the email_search ES request body for one user."""
+    must = []
+    filters = [
+        # IMPORTANT: user_id is text field, use match
+        {"match": {"user_id": user_id}}
+    ]
+
+    # Full-text search on subject + body, or match_all if empty
+    if search_params.query_text and search_params.query_text != "*":
+        must.append(
+            {
+                "multi_match": {
+                    "query": search_params.query_text,
+                    "fields": ["subject^3", "body_text"],
+                }
+            }
+        )
+    else:
+        must.append({"match_all": {}})
+
+    # Time window filter
+    if search_params.time_window_days:
+        since = datetime.utcnow() - timedelta(days=search_params.time_window_days)
+        filters.append({"range": {"received_at": {"gte": since.isoformat()}}})
+
+    # Optional labels filter (only if explicitly provided)
+    if search_params.labels:
+        filters.append({"terms": {"labels": search_params.labels}})
+
+    # Optional risk filter (only if explicitly provided)
+    if search_params.risk_min is not None:
+        filters.append({"range": {"risk_score": {"gte": search_params.risk_min}}})
+
+    return {
+        "query": {
+            "bool": {
+                "must": must,
+                "filter": filters,
+            }
+        },
+        "sort": [{"received_at": "desc"}],
+        "size": search_params.max_results,
+    }
+
+
+def parse_email_search_hits(
+    result: Dict[str, Any],
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Map an email_search ES response to (emails, total_found)."""
+    hits = result.get("hits", {}).get("hits", [])
+    total_found = result.get("hits", {}).get("total", {}).get("value", 0)
+
+    emails = []
+    for hit in hits:
+        source = hit["_source"]
+        emails.append(
+            {
+                "id": source.get("gmail_id") or hit["_id"],
+                "thread_id": source.get("thread_id", ""),
+                "subject": source.get("subject", ""),
+                "sender": source.get("sender", ""),
+                "received_at": source.get("received_at"),
+                "snippet": source.get("body_text", "")[:200],
+                "risk_score": source.get("risk_score", 0),
+                "labels": source.get("labels", []),
+            }
+        )
+    return emails, total_found
+
+
+async def security_scan_emails(emails: List[Dict[str, Any]]) -> ToolResult:
+    """
+    Score already-fetched emails and build the security_scan result.
+
+    Uses DB risk_score when the sender domain isn't cached yet; each domain
+    is read from (and, on a miss, written to) Redis once per scan.
+    """
+    if not emails:
+        return ToolResult(
+            tool_name="security_scan",
+            status="success",
+            summary="No emails found to scan",
+            data=SecurityScanResult(
+                scanned_count=0,
+                risky_emails=[],
+                safe_emails=[],
+                domains_checked=[],
+            ).dict(),
+        )
+
+    # Simple risk scoring stub (TODO: implement proper EmailRiskAnalyzer)
+    # For now, use DB risk_score if available, else assign based on sender domain
+
+    risky_emails = []
+    safe_emails = []
+    # Cached risk per domain for this scan (None = Redis has nothing for it)
+    domain_risk: Dict[str, Optional[float]] = {}
+    caching = get_redis_client() is not None
+
+    for email in emails:
+        sender = email.get("sender", "")
+        if not sender:
+            continue
+
+        # Extract domain from sender
+        domain = sender.split("@")[-1] if "@" in sender else sender
+
+        # Use DB risk_score if available
+        risk_score = email.get("risk_score", 0) / 100.0  # Normalize to 0-1
+
+        if domain not in domain_risk:
+            # Check Redis cache first
+            cached_risk = await get_domain_risk(domain)
+            if cached_risk is not None:
+                domain_risk[domain] = cached_risk.risk_score
+            else:
+                # Cache the domain risk for future use
+                await set_domain_risk(
+                    domain,
+                    DomainRiskCache(
+                        domain=domain,
+                        risk_score=risk_score,
+                        first_seen_at=datetime.utcnow(),
+                        last_seen_at=datetime.utcnow(),
+                        email_count=1,
+                        flags=[],
+                        evidence={},
+                    ),
+                )
+                domain_risk[domain] = risk_score if caching else None
+
+        if domain_risk[domain] is not None:
+            risk_score = domain_risk[domain]
+
+        # Categorize email
+        email_with_risk = {
+            **email,
+            "risk_score": risk_score,
+            "sender_domain": domain,
+        }
+
+        if risk_score >= 0.5:  # High risk threshold
+            risky_emails.append(email_with_risk)
+        else:
+            safe_emails.append(email_with_risk)
+
+    scanned_count = len(emails)
+    risky_count = len(risky_emails)
+    summary = (
+        f"Scanned {scanned_count} emails: {risky_count} risky, "
+        f"{scanned_count - risky_count} safe"
+    )
+
+    return ToolResult(
+        tool_name="security_scan",
+        status="success",
+        summary=summary,
+        data=SecurityScanResult(
+            scanned_count=scanned_count,
+            risky_emails=risky_emails[:10],  # Limit to top 10 risky
+            safe_emails=safe_emails[:5],  # Show 5 safe samples
+            domains_checked=list(domain_risk),
+        ).dict(),
+    )
+
+
+def lookup_applications_by_thread(
+    db, thread_ids, max_results: int
+) -> List[Dict[str, Any]]:
+    """Serialize the newest applications linked to any of ``thread_ids``."""
+    apps = (
+        db.query(models.Application)
+        .filter(models.Application.thread_id.in_(list(thread_ids)))
+        .order_by(models.Application.created_at.desc())
+        .limit(max_results)
+        .all()
+    )
+
+    return [
+        {
+            "id": app.id,
+            "company": app.company,
+            "role": app.role,
+            "status": app.status.value if app.status else None,
+            "source": app.source,
+            "thread_id": app.thread_id,
+            "created_at": app.created_at.isoformat() if app.created_at else None,
+            "updated_at": app.updated_at.isoformat() if app.updated_at else None,
+        }
+        for app in apps
+    ]
+
 
 def build_es_query(
     query_text: str,
@@ -8,17 +8,23 @@ Aggregates AutofillEvent rows into FormProfile statistics:
 - Average completion time
 - Phase 5.0: Style performance tracking and preferred_style_id selection
 
+Learning sync folds each batch of events into its FormProfile as a delta
+(apply_event_deltas); the periodic run recomputes every profile from grouped
+SQL over the lookback window.
+
 Run via cron or CLI to periodically update profiles.
 """
 
-from collections import Counter as CollectionsCounter, defaultdict
+from collections import defaultdict
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
 import logging
+import time
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import case, func, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from .db import SessionLocal
 from .models_learning_db import AutofillEvent, FormProfile, GenStyle
@@ -214,87 +220,66 @@ class StyleStats:
         return self.helpful / self.total_runs
 
 
-def _compute_style_stats(
-    db: Session, lookback_days: int
-) -> Dict[Tuple[str, str], Dict[str, StyleStats]]:
-    """
-    Aggregate AutofillEvent by (host, schema_hash, gen_style_id).
-
-    Returns a dict: {(host, schema_hash): {style_id: StyleStats}}
-
-    Args:
-        db: Database session
-        lookback_days: Number of days to look back (0 = all time)
+# Accumulator slots: [total_runs, helpful, unhelpful, edit_sum, edit_count]
+_RUNS, _HELPFUL, _UNHELPFUL, _EDIT_SUM, _EDIT_N = range(5)
 
-    Returns:
-        Mapping of (host, schema) to style performance stats
-    """
-    query = db.query(
-        AutofillEvent.host,
-        AutofillEvent.schema_hash,
-        AutofillEvent.gen_style_id,
-        AutofillEvent.feedback_status,
-        AutofillEvent.edit_chars,
-    ).filter(AutofillEvent.gen_style_id.isnot(None))
 
-    # Filter by date if needed
-    if lookback_days > 0:
-        cutoff = datetime.utcnow() - timedelta(days=lookback_days)
-        query = query.filter(AutofillEvent.created_at >= cutoff)
+def _new_acc() -> List[float]:
+    return [0, 0, 0, 0, 0]
 
-    # Aggregate results
-    by_profile: Dict[Tuple[str, str], Dict[str, StyleStats]] = defaultdict(dict)
 
-    for host, schema_hash, style_id, feedback_status, edit_chars in query:
-        key = (host, schema_hash)
+def _add_acc(acc: List[float], row: Sequence[Any]) -> None:
+    for i, value in enumerate(row):
+        acc[i] += value or 0
 
-        if style_id not in by_profile[key]:
-            by_profile[key][style_id] = StyleStats(style_id=style_id)
 
-        st = by_profile[key][style_id]
-        st.total_runs += 1
+def _acc_to_stats(style_id: str, acc: List[float]) -> StyleStats:
+    return StyleStats(
+        style_id=style_id,
+        helpful=int(acc[_HELPFUL]),
+        unhelpful=int(acc[_UNHELPFUL]),
+        total_runs=int(acc[_RUNS]),
+        avg_edit_chars=(acc[_EDIT_SUM] / acc[_EDIT_N]) if acc[_EDIT_N] else 0.0,
+    )
 
-        # Count feedback
-        if feedback_status == "helpful":
-            st.helpful += 1
-        elif feedback_status == "unhelpful":
-            st.unhelpful += 1
 
-        # Running average of edit_chars
-        if edit_chars is not None:
-            n = st.total_runs
-            st.avg_edit_chars = ((st.avg_edit_chars * (n - 1)) + edit_chars) / n
+@dataclass
+class StyleStatsTables:
+    """Style rollups at every level used by _pick_style_for_profile."""
 
-    return by_profile
+    form: Dict[Tuple[str, str], Dict[str, StyleStats]]
+    family: Dict[Tuple[str, str], StyleStats]
+    segment: Dict[Tuple[str, str, str], StyleStats]
+    # Most common segment_key per (host, schema_hash), all time
+    profile_segments: Dict[Tuple[str, str], str]
 
 
-def _compute_family_style_stats(
-    db: Session, lookback_days: int
-) -> Dict[Tuple[str, str], StyleStats]:
+def _compute_all_style_stats(db: Session, lookback_days: int) -> StyleStatsTables:
     """
-    Aggregate AutofillEvent by (host_family, gen_style_id).
+    Compute form, family and segment style stats in one pass.
 
-    This enables cross-form generalization: if we don't have enough data
-    for a specific form, we can use family-level statistics.
+    The database groups the lookback window by
+    (host, schema_hash, segment_key, gen_style_id); the handful of resulting
+    rows are then rolled up into all three levels with small list
+    accumulators, instead of scanning the raw events once per level.
 
     Args:
         db: Database session
         lookback_days: Number of days to look back (0 = all time)
 
     Returns:
-        Mapping of (family, style_id) to aggregated StyleStats
-
-    Example:
-        {
-            ("greenhouse", "friendly_bullets_v1"): StyleStats(...),
-            ("lever", "professional_narrative_v1"): StyleStats(...),
-        }
+        StyleStatsTables with all rollups
     """
     query = db.query(
         AutofillEvent.host,
+        AutofillEvent.schema_hash,
+        AutofillEvent.segment_key,
         AutofillEvent.gen_style_id,
-        AutofillEvent.feedback_status,
-        AutofillEvent.edit_chars,
+        func.count(AutofillEvent.id),
+        func.sum(case((AutofillEvent.feedback_status == "helpful", 1), else_=0)),
+        func.sum(case((AutofillEvent.feedback_status == "unhelpful", 1), else_=0)),
+        func.sum(AutofillEvent.edit_chars),
+        func.count(AutofillEvent.edit_chars),
     ).filter(AutofillEvent.gen_style_id.isnot(None))
 
     # Filter by date if needed
@@ -302,109 +287,121 @@ def _compute_family_style_stats(
         cutoff = datetime.utcnow() - timedelta(days=lookback_days)
         query = query.filter(AutofillEvent.created_at >= cutoff)
 
-    # Aggregate by family
-    family_stats: Dict[Tuple[str, str], StyleStats] = {}
+    query = query.group_by(
+        AutofillEvent.host,
+        AutofillEvent.schema_hash,
+        AutofillEvent.segment_key,
+        AutofillEvent.gen_style_id,
+    )
 
-    for host, style_id, feedback_status, edit_chars in query:
-        if not host or not style_id:
-            continue
+    form_acc: Dict[Tuple[str, str], Dict[str, List[float]]] = defaultdict(dict)
+    family_acc: Dict[Tuple[str, str], List[float]] = {}
+    segment_acc: Dict[Tuple[str, str, str], List[float]] = {}
+
+    for host, schema_hash, segment_key, style_id, *counts in query:
+        styles = form_acc[(host, schema_hash)]
+        _add_acc(styles.setdefault(style_id, _new_acc()), counts)
 
-        family = get_host_family(host)
+        family = get_host_family(host) if host else None
         if not family:
             continue  # Host doesn't belong to any recognized family
+        _add_acc(family_acc.setdefault((family, style_id), _new_acc()), counts)
+
+        if segment_key:
+            key = (family, segment_key, style_id)
+            _add_acc(segment_acc.setdefault(key, _new_acc()), counts)
+
+    # Most common segment per profile (one grouped query, not one per profile)
+    profile_segments: Dict[Tuple[str, str], str] = {}
+    best_counts: Dict[Tuple[str, str], int] = {}
+    segment_rows = (
+        db.query(
+            AutofillEvent.host,
+            AutofillEvent.schema_hash,
+            AutofillEvent.segment_key,
+            func.count(AutofillEvent.id),
+        )
+        .filter(AutofillEvent.segment_key.isnot(None))
+        .group_by(
+            AutofillEvent.host, AutofillEvent.schema_hash, AutofillEvent.segment_key
+        )
+    )
+    for host, schema_hash, segment_key, count in segment_rows:
+        key = (host, schema_hash)
+        if count > best_counts.get(key, 0):
+            best_counts[key] = count
+            profile_segments[key] = segment_key
+
+    return StyleStatsTables(
+        form={
+            key: {sid: _acc_to_stats(sid, acc) for sid, acc in styles.items()}
+            for key, styles in form_acc.items()
+        },
+        family={key: _acc_to_stats(key[1], acc) for key, acc in family_acc.items()},
+        segment={key: _acc_to_stats(key[2], acc) for key, acc in segment_acc.items()},
+        profile_segments=profile_segments,
+    )
 
-        key = (family, style_id)
 
-        if key not in family_stats:
-            family_stats[key] = StyleStats(style_id=style_id)
+# Style tables cached between aggregator runs, keyed by lookback window.
+# Entries live for the TTL; a learning sync in this process drops them
+# explicitly, and the TTL bounds how stale they get from writes elsewhere
+# (other workers, in-place updates). A per-call freshness query over
+# autofill_events would cost about as much as the rollup it saves.
+STYLE_STATS_CACHE_TTL_SECONDS = 900
+_style_stats_cache: Dict[int, Tuple[float, StyleStatsTables]] = {}
 
-        st = family_stats[key]
-        st.total_runs += 1
 
-        # Count feedback
-        if feedback_status == "helpful":
-            st.helpful += 1
-        elif feedback_status == "unhelpful":
-            st.unhelpful += 1
+def invalidate_style_stats_cache() -> None:
+    """Drop cached style tables (call after new events are persisted)."""
+    _style_stats_cache.clear()
 
-        # Running average of edit_chars
-        if edit_chars is not None:
-            n = st.total_runs
-            st.avg_edit_chars = ((st.avg_edit_chars * (n - 1)) + edit_chars) / n
 
-    return family_stats
+def get_style_stats_tables(db: Session, lookback_days: int) -> StyleStatsTables:
+    """Return style tables for the window, recomputing only when stale."""
+    cached = _style_stats_cache.get(lookback_days)
+    now = time.monotonic()
+    if cached is not None and now - cached[0] < STYLE_STATS_CACHE_TTL_SECONDS:
+        return cached[1]
 
+    tables = _compute_all_style_stats(db, lookback_days)
+    _style_stats_cache[lookback_days] = (now, tables)
+    return tables
 
-def _compute_segment_style_stats(
+
+def _compute_style_stats(
     db: Session, lookback_days: int
-) -> Dict[Tuple[str, str, str], StyleStats]:
+) -> Dict[Tuple[str, str], Dict[str, StyleStats]]:
     """
-    Aggregate AutofillEvent by (host_family, segment_key, gen_style_id).
-
-    This enables segment-aware tuning: different styles may work better
-    for different role levels (e.g., interns vs seniors).
-
-    Args:
-        db: Database session
-        lookback_days: Number of days to look back (0 = all time)
-
-    Returns:
-        Mapping of (family, segment_key, style_id) to aggregated StyleStats
+    Aggregate AutofillEvent by (host, schema_hash, gen_style_id).
 
-    Example:
-        {
-            ("greenhouse", "senior", "professional_narrative_v1"): StyleStats(...),
-            ("greenhouse", "intern", "friendly_bullets_v1"): StyleStats(...),
-            ("lever", "senior", "concise_bullets_v1"): StyleStats(...),
-        }
+    Returns a dict: {(host, schema_hash): {style_id: StyleStats}}
     """
-    query = db.query(
-        AutofillEvent.host,
-        AutofillEvent.segment_key,
-        AutofillEvent.gen_style_id,
-        AutofillEvent.feedback_status,
-        AutofillEvent.edit_chars,
-    ).filter(
-        AutofillEvent.gen_style_id.isnot(None),
-        AutofillEvent.segment_key.isnot(None),  # Skip events without segment
-    )
+    return _compute_all_style_stats(db, lookback_days).form
 
-    # Filter by date if needed
-    if lookback_days > 0:
-        cutoff = datetime.utcnow() - timedelta(days=lookback_days)
-        query = query.filter(AutofillEvent.created_at >= cutoff)
 
-    # Aggregate by (family, segment, style)
-    segment_stats: Dict[Tuple[str, str, str], StyleStats] = {}
-
-    for host, segment_key, style_id, feedback_status, edit_chars in query:
-        if not host or not segment_key or not style_id:
-            continue
-
-        family = get_host_family(host)
-        if not family:
-            continue  # Host doesn't belong to any recognized family
-
-        key = (family, segment_key, style_id)
-
-        if key not in segment_stats:
-            segment_stats[key] = StyleStats(style_id=style_id)
+def _compute_family_style_stats(
+    db: Session, lookback_days: int
+) -> Dict[Tuple[str, str], StyleStats]:
+    """
+    Aggregate AutofillEvent by (host_family, gen_style_id).
 
-        st = segment_stats[key]
-        st.total_runs += 1
+    This enables cross-form generalization: if we don't have enough data
+    for a specific form, we can use family-level statistics.
+    """
+    return _compute_all_style_stats(db, lookback_days).family
 
-        # Count feedback
-        if feedback_status == "helpful":
-            st.helpful += 1
-        elif feedback_status == "unhelpful":
-            st.unhelpful += 1
 
-        # Running average of edit_chars
-        if edit_chars is not None:
-            n = st.total_runs
-            st.avg_edit_chars = ((st.avg_edit_chars * (n - 1)) + edit_chars) / n
+def _compute_segment_style_stats(
+    db: Session, lookback_days: int
+) -> Dict[Tuple[str, str, str], StyleStats]:
+    """
+    Aggregate AutofillEvent by (host_family, segment_key, gen_style_id).
 
-    return segment_stats
+    This enables segment-aware tuning: different styles may work better
+    for different role levels (e.g., interns vs seniors).
+    """
+    return _compute_all_style_stats(db, lookback_days).segment
 
 
 def _pick_best_style(styles: Dict[str, StyleStats]) -> Optional[StyleStats]:
@@ -554,10 +551,11 @@ def _update_style_hints(db: Session, lookback_days: int = 30) -> int:
     Returns:
         Number of profiles updated with style hints
     """
-    # Compute style performance at all levels
-    form_stats = _compute_style_stats(db, lookback_days)
-    family_stats = _compute_family_style_stats(db, lookback_days)
-    segment_stats = _compute_segment_style_stats(db, lookback_days)  # Phase 5.2
+    # Style performance at all levels (cached until new events arrive)
+    tables = get_style_stats_tables(db, lookback_days)
+    form_stats = tables.form
+    family_stats = tables.family
+    segment_stats = tables.segment  # Phase 5.2
 
     if not form_stats and not family_stats and not segment_stats:
         logger.info("No style data found, skipping style hint updates")
@@ -568,21 +566,8 @@ def _update_style_hints(db: Session, lookback_days: int = 30) -> int:
 
     updated = 0
     for profile in profiles:
-        # Phase 5.2: Derive segment_key for this profile
-        # We need to get a representative event to extract segment
-        # For now, use the most common segment_key for this profile
-        segment_key = (
-            db.query(AutofillEvent.segment_key)
-            .filter(
-                AutofillEvent.host == profile.host,
-                AutofillEvent.schema_hash == profile.schema_hash,
-                AutofillEvent.segment_key.isnot(None),
-            )
-            .order_by(func.count(AutofillEvent.id).desc())
-            .group_by(AutofillEvent.segment_key)
-            .first()
-        )
-        segment_key = segment_key[0] if segment_key else None
+        # Phase 5.2: Most common segment_key for this profile
+        segment_key = tables.profile_segments.get((profile.host, profile.schema_hash))
 
         # Use hierarchical selection (form → segment → family)
         best, meta = _pick_style_for_profile(
@@ -667,196 +652,263 @@ def _update_style_hints(db: Session, lookback_days: int = 30) -> int:
     return updated
 
 
-def _compute_canonical_map(events: List[AutofillEvent]) -> Dict[str, str]:
-    """
-    Build canonical selector->semantic mapping.
-
-    We look at final_map for each event, count (selector, semantic) pairs,
-    and pick the most common semantic for each selector.
+def _edit_chars(edit_stats: Optional[Mapping[str, Any]]) -> int:
+    """Total characters changed (added + deleted) for one event."""
+    edit_stats = edit_stats or {}
+    return int(edit_stats.get("total_chars_added", 0)) + int(
+        edit_stats.get("total_chars_deleted", 0)
+    )
 
-    Example:
-        Event 1: {"input[name='first']": "first_name"}
-        Event 2: {"input[name='first']": "first_name"}
-        Event 3: {"input[name='first']": "given_name"}
-        Result: {"input[name='first']": "first_name"}  # 2 votes wins
-    """
-    counts: Dict[str, CollectionsCounter] = defaultdict(CollectionsCounter)
 
-    for ev in events:
-        final_map = ev.final_map or {}
-        for selector, semantic in final_map.items():
-            if not semantic:
-                continue
-            counts[selector][semantic] += 1
+def _edit_chars_sql():
+    """SQL expression equivalent of _edit_chars over AutofillEvent.edit_stats."""
+    return func.coalesce(
+        AutofillEvent.edit_stats["total_chars_added"].as_integer(), 0
+    ) + func.coalesce(AutofillEvent.edit_stats["total_chars_deleted"].as_integer(), 0)
 
-    canonical: Dict[str, str] = {}
-    for selector, c in counts.items():
-        if not c:
-            continue
-        # Pick semantic with highest count; ties resolved arbitrarily
-        semantic, _ = c.most_common(1)[0]
-        canonical[selector] = semantic
 
-    return canonical
+def _canonical_from_votes(votes: Mapping[str, Mapping[str, int]]) -> Dict[str, str]:
+    """Pick the most voted semantic per selector (ties: lowest semantic)."""
+    return {
+        selector: min(counts.items(), key=lambda kv: (-kv[1], kv[0]))[0]
+        for selector, counts in votes.items()
+        if counts
+    }
 
 
-def _compute_stats(events: List[AutofillEvent]) -> Tuple[float, float, int]:
+def apply_event_deltas(
+    db: Session, host: str, schema_hash: str, events: Sequence[Mapping[str, Any]]
+) -> FormProfile:
     """
-    Returns (success_rate, avg_edit_chars, avg_duration_ms).
+    Fold a batch of new events for one form into its FormProfile.
 
-    Success rate: % of events with status='ok'
-    Avg edit chars: Average total characters changed (added + deleted)
-    Avg duration: Average milliseconds from autofill to completion
+    Averages are merged using the stored event_count, and selector votes are
+    added to field_votes, so the profile stays current between aggregator
+    runs without re-reading past events. Profile stats cover the form's
+    full event history, the same as aggregate_autofill_profiles, so the
+    nightly pass reconciles them rather than resetting them. Costs one
+    upsert and one locked read regardless of batch size; the caller commits.
+
+    Args:
+        db: Database session
+        host: Form host
+        schema_hash: Form schema hash
+        events: Event dicts with status, edit_stats, duration_ms, final_map
+
+    Returns:
+        The updated FormProfile
     """
+    now = datetime.utcnow()
+
+    # Create the row if missing without racing concurrent syncs
+    db.execute(
+        pg_insert(FormProfile)
+        .values(host=host, schema_hash=schema_hash, fields={}, last_seen_at=now)
+        .on_conflict_do_nothing(index_elements=["host", "schema_hash"])
+    )
+    profile = (
+        db.query(FormProfile)
+        .filter(FormProfile.host == host, FormProfile.schema_hash == schema_hash)
+        .with_for_update()
+        .one()
+    )
+    profile.last_seen_at = now
     if not events:
-        return 0.0, 0.0, 0
+        return profile
 
-    total = len(events)
-    success = sum(1 for ev in events if ev.status == "ok")
+    n = profile.event_count or 0
+    m = len(events)
+    total = n + m
 
-    total_edit_chars = 0
-    total_duration = 0
+    ok = sum(1 for ev in events if ev.get("status") == "ok")
+    edits = sum(_edit_chars(ev.get("edit_stats")) for ev in events)
+    duration = sum(int(ev.get("duration_ms") or 0) for ev in events)
 
+    profile.success_rate = ((profile.success_rate or 0.0) * n + ok) / total
+    profile.avg_edit_chars = ((profile.avg_edit_chars or 0.0) * n + edits) / total
+    profile.avg_duration_ms = int(
+        ((profile.avg_duration_ms or 0) * n + duration) / total
+    )
+    profile.event_count = total
+
+    votes: Dict[str, Dict[str, int]] = {
+        selector: dict(counts)
+        for selector, counts in (profile.field_votes or {}).items()
+    }
+    touched = set()
     for ev in events:
-        edit_stats = ev.edit_stats or {}
-        total_edit_chars += int(edit_stats.get("total_chars_added", 0)) + int(
-            edit_stats.get("total_chars_deleted", 0)
-        )
-        total_duration += int(ev.duration_ms or 0)
+        for selector, semantic in (ev.get("final_map") or {}).items():
+            if not semantic:
+                continue
+            counts = votes.setdefault(selector, {})
+            counts[semantic] = counts.get(semantic, 0) + 1
+            touched.add(selector)
 
-    success_rate = success / total
-    avg_edit_chars = total_edit_chars / total
-    avg_duration_ms = int(total_duration / total)
+    if touched:
+        # Reassign (not mutate) so SQLAlchemy flushes the JSONB columns
+        profile.field_votes = votes
+        canonical = _canonical_from_votes({s: votes[s] for s in touched})
+        profile.fields = {**(profile.fields or {}), **canonical}
 
-    return success_rate, avg_edit_chars, avg_duration_ms
+    return profile
 
 
-def _update_gen_style_weights(db: Session, host: str, schema_hash: str) -> None:
+def _active_forms_filter(cutoff: Optional[datetime]):
+    """
+    Restrict AutofillEvent rows to forms with at least one event since cutoff.
+
+    Returns None when cutoff is None (every form is active).
+    """
+    if cutoff is None:
+        return None
+    recent = aliased(AutofillEvent)
+    return tuple_(AutofillEvent.host, AutofillEvent.schema_hash).in_(
+        select(recent.host, recent.schema_hash).where(recent.created_at >= cutoff)
+    )
+
+
+def _update_gen_style_weights(db: Session, cutoff: Optional[datetime] = None) -> None:
     """
     Optional simple style ranking per host/schema.
 
-    Computes reward ~ inverse edit_chars and bumps prior_weight.
-    Lower edit distance = better style = higher weight.
+    Computes reward ~ inverse edit_chars over each form's full history and
+    bumps prior_weight once per (host, schema_hash) the style was used on.
+    Only forms with events since cutoff are considered. Lower edit distance
+    = better style = higher weight.
 
     This is a simple heuristic; Phase 3.0 will use proper A/B testing.
     """
-    # Group events by gen_style_id and compute avg edit chars
-    # Note: This is simplified - works on both SQLite and PostgreSQL
-    events = (
-        db.query(AutofillEvent)
-        .filter(
-            AutofillEvent.host == host,
-            AutofillEvent.schema_hash == schema_hash,
-            AutofillEvent.gen_style_id.isnot(None),
-        )
-        .all()
-    )
-
-    # Group by style and calculate averages
-    style_stats: Dict[str, List[float]] = defaultdict(list)
-    for ev in events:
-        edit_stats = ev.edit_stats or {}
-        total_edits = int(edit_stats.get("total_chars_added", 0)) + int(
-            edit_stats.get("total_chars_deleted", 0)
+    query = db.query(
+        AutofillEvent.gen_style_id,
+        func.avg(_edit_chars_sql()),
+    ).filter(AutofillEvent.gen_style_id.isnot(None))
+    active = _active_forms_filter(cutoff)
+    if active is not None:
+        query = query.filter(active)
+    rows = query.group_by(
+        AutofillEvent.host, AutofillEvent.schema_hash, AutofillEvent.gen_style_id
+    ).all()
+    if not rows:
+        return
+
+    styles = {
+        style.id: style
+        for style in db.query(GenStyle).filter(
+            GenStyle.id.in_({style_id for style_id, _ in rows})
         )
-        style_stats[ev.gen_style_id].append(float(total_edits))
-
-    for gen_style_id, edit_list in style_stats.items():
-        if not edit_list:
-            continue
+    }
 
-        style = db.query(GenStyle).filter(GenStyle.id == gen_style_id).first()
+    for gen_style_id, avg_edit_chars in rows:
+        style = styles.get(gen_style_id)
         if not style:
             continue
 
-        avg_edit_chars = sum(edit_list) / len(edit_list)
-
         # Crude heuristic: lower edits → higher weight
         # Reward = 1 / (1 + avg_edits), multiply weight by (1 + reward * 0.1)
-        reward = 1.0 / (1.0 + avg_edit_chars)
+        reward = 1.0 / (1.0 + float(avg_edit_chars or 0.0))
         style.prior_weight = float(style.prior_weight or 1.0) * (1.0 + reward * 0.1)
 
     db.flush()
 
 
+# One pass: all-time (selector, semantic) votes per form active since cutoff
+FIELD_VOTES_SQL = text("""
+    SELECT e.host, e.schema_hash, kv.key AS selector, kv.value AS semantic,
+           COUNT(*) AS votes
+    FROM autofill_events e
+    CROSS JOIN LATERAL jsonb_each_text(e.final_map) AS kv
+    WHERE (
+        CAST(:cutoff AS timestamptz) IS NULL
+        OR EXISTS (
+            SELECT 1 FROM autofill_events r
+            WHERE r.host = e.host AND r.schema_hash = e.schema_hash
+              AND r.created_at >= :cutoff
+        )
+    )
+      AND kv.value IS NOT NULL AND kv.value <> ''
+    GROUP BY e.host, e.schema_hash, kv.key, kv.value
+    """)
+
+
 def aggregate_autofill_profiles(db: Session, *, days: int = 30) -> int:
     """
-    Aggregate AutofillEvent into FormProfile for last N days.
-
-    For each unique (host, schema_hash) pair:
-    1. Load all events
-    2. Compute canonical field mappings
-    3. Compute success_rate, avg_edit_chars, avg_duration_ms
-    4. Upsert FormProfile
-    5. Update GenStyle weights
-    6. Phase 5.0: Update style_hint with preferred_style_id
+    Recompute FormProfile stats for forms with events in the last N days.
+
+    Profile stats, selector votes and style weights cover each form's full
+    event history, matching the running totals that apply_event_deltas
+    keeps at sync time; this pass reconciles them, so profiles don't shift
+    when it runs. ``days`` only selects which forms are refreshed and sets
+    the style-hint lookback.
+
+    Runs a fixed number of grouped queries, independent of the number of
+    forms:
+    1. success/edit/duration totals per (host, schema_hash)
+    2. (selector, semantic) votes per form for canonical mappings
+    3. one load of the affected FormProfiles, then upsert in memory
+    4. GenStyle weights from per-form, per-style average edits
+    5. Phase 5.0: Update style_hint with preferred_style_id
 
     Args:
         db: Database session
-        days: Look back N days (0 = all events)
+        days: Refresh forms active in the last N days (0 = all forms)
 
     Returns:
         Number of profiles updated
     """
-    # Get distinct (host, schema_hash) pairs
-    query = db.query(
+    cutoff = datetime.utcnow() - timedelta(days=days) if days > 0 else None
+
+    totals_query = db.query(
         AutofillEvent.host,
         AutofillEvent.schema_hash,
-    ).distinct()
-
-    # Filter by date if days > 0
-    if days > 0:
-        cutoff = datetime.utcnow() - timedelta(days=days)
-        query = query.filter(AutofillEvent.created_at >= cutoff)
-
-    pairs = query.all()
-    updated = 0
-
-    for host, schema_hash in pairs:
-        # Load all events for this form
-        events_query = db.query(AutofillEvent).filter(
-            AutofillEvent.host == host,
-            AutofillEvent.schema_hash == schema_hash,
-        )
-
-        if days > 0:
-            cutoff = datetime.utcnow() - timedelta(days=days)
-            events_query = events_query.filter(AutofillEvent.created_at >= cutoff)
-
-        events = events_query.all()
-
-        if not events:
-            continue
+        func.count(AutofillEvent.id),
+        func.sum(case((AutofillEvent.status == "ok", 1), else_=0)),
+        func.sum(_edit_chars_sql()),
+        func.sum(func.coalesce(AutofillEvent.duration_ms, 0)),
+    )
+    active = _active_forms_filter(cutoff)
+    if active is not None:
+        totals_query = totals_query.filter(active)
+    totals = totals_query.group_by(AutofillEvent.host, AutofillEvent.schema_hash).all()
+
+    if not totals:
+        style_updates = _update_style_hints(db, lookback_days=days)
+        logger.info(f"Updated style hints for {style_updates} profiles")
+        return 0
 
-        # Compute aggregates
-        canonical_map = _compute_canonical_map(events)
-        success_rate, avg_edit_chars, avg_duration_ms = _compute_stats(events)
+    votes: Dict[Tuple[str, str], Dict[str, Dict[str, int]]] = defaultdict(dict)
+    for host, schema_hash, selector, semantic, count in db.execute(
+        FIELD_VOTES_SQL, {"cutoff": cutoff}
+    ):
+        votes[(host, schema_hash)].setdefault(selector, {})[semantic] = int(count)
 
-        # Upsert profile
-        profile = (
-            db.query(FormProfile)
-            .filter(
-                FormProfile.host == host,
-                FormProfile.schema_hash == schema_hash,
-            )
-            .first()
-        )
+    hosts = {host for host, *_ in totals}
+    profiles = {
+        (p.host, p.schema_hash): p
+        for p in db.query(FormProfile).filter(FormProfile.host.in_(hosts))
+    }
 
+    updated = 0
+    now = datetime.utcnow()
+    for host, schema_hash, total, ok, edits, duration in totals:
+        key = (host, schema_hash)
+        profile = profiles.get(key)
         if not profile:
-            profile = FormProfile(
-                host=host,
-                schema_hash=schema_hash,
-            )
+            profile = FormProfile(host=host, schema_hash=schema_hash)
             db.add(profile)
+            profiles[key] = profile
+
+        form_votes = votes.get(key, {})
+        canonical_map = _canonical_from_votes(form_votes)
+        success_rate = int(ok or 0) / total
+        avg_edit_chars = float(edits or 0) / total
 
         profile.fields = canonical_map
+        profile.field_votes = form_votes
+        profile.event_count = total
         profile.success_rate = success_rate
         profile.avg_edit_chars = avg_edit_chars
-        profile.avg_duration_ms = avg_duration_ms
-        profile.last_seen_at = datetime.utcnow()
-
-        # Update style weights
-        _update_gen_style_weights(db, host, schema_hash)
+        profile.avg_duration_ms = int(int(duration or 0) / total)
+        profile.last_seen_at = now
 
         updated += 1
         logger.info(
@@ -865,6 +917,11 @@ def aggregate_autofill_profiles(db: Session, *, days: int = 30) -> int:
             f"{avg_edit_chars:.1f} avg edits"
         )
 
+    db.flush()
+
+    # Update style weights
+    _update_gen_style_weights(db, cutoff)
+
     # Phase 5.0: Update style hints for all profiles
     style_updates = _update_style_hints(db, lookback_days=days)
     logger.info(f"Updated style hints for {style_updates} profiles")
@@ -8,7 +8,7 @@ and determine if they represent real job opportunities.
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional, Literal, Protocol, Any
+from typing import Optional, Literal, Protocol, Any, Sequence
 
 from app.models import Email
 from app.config import get_agent_settings
@@ -211,6 +211,33 @@ class HybridEmailClassifier:
         # Live ML
         return ml_result
 
+    def classify_batch(self, emails: Sequence[Email]) -> list[ClassificationResult]:
+        """
+        Classify many emails at once.
+
+        Equivalent to calling ``classify`` per email, but the ML path runs a
+        single vectorizer ``transform`` + ``predict_proba`` over every email
+        that isn't settled by the hard rules. Accepts ORM objects or
+        projected rows with ``subject``, ``body_text`` and ``sender``.
+        """
+        results: list[Optional[ClassificationResult]] = [
+            _apply_high_precision_rules(email) for email in emails
+        ]
+        pending = [i for i, r in enumerate(results) if r is None]
+
+        if self.ml_model is None or self.vectorizer is None or self.mode == "ml_shadow":
+            # Shadow mode serves heuristics; the ML score would be discarded
+            for i in pending:
+                results[i] = self._heuristic_only(emails[i])
+            return results  # type: ignore[return-value]
+
+        if pending:
+            texts = [self._build_text(emails[i]) for i in pending]
+            probas = self.ml_model.predict_proba(self.vectorizer.transform(texts))
+            for i, proba in zip(pending, probas):
+                results[i] = self._ml_result(float(proba[1]))
+        return results  # type: ignore[return-value]
+
     def _heuristic_only(self, email: Email) -> ClassificationResult:
         """
         Your existing heuristic pipeline wrapped into the new interface.
@@ -296,7 +323,10 @@ class HybridEmailClassifier:
         proba = self.ml_model.predict_proba(features)[0]
 
         # Assuming binary classifier: proba[1] is "is_real_opportunity"
-        opp_prob = float(proba[1])
+        return self._ml_result(float(proba[1]))
+
+    def _ml_result(self, opp_prob: float) -> ClassificationResult:
+        """Map the opportunity probability to a ClassificationResult."""
         is_opp = opp_prob >= 0.5
 
         # For v1, keep category simple: opportunity vs newsletter_marketing
@@ -96,6 +96,23 @@ class AgentSettings(BaseSettings):
     AUTO_DELETE_ARCHIVED_AFTER_DAYS: int = 90  # Auto-delete archived apps after Y days
     ARCHIVE_GRACE_UNDO_HOURS: int = 48  # Grace period to undo archive (hours)
 
+    # emails table partitions (app.core.email_partitions, Postgres only)
+    EMAIL_PARTITION_MONTHS_AHEAD: int = 3  # Monthly partitions created in advance
+    EMAIL_PARTITION_RETENTION_MONTHS: int | None = None  # Detach older months (off)
+    EMAIL_PARTITION_DROP_EXPIRED: bool = False  # Drop instead of keeping as archive
+
+    # SQL query accounting (app.core.query_stats)
+    QUERY_STATS_HEADERS: bool = APP_ENV not in ("prod", "production")  # X-DB-* headers
+    N_PLUS_ONE_THRESHOLD: int = 10  # Same statement more often than this is flagged
+    N_PLUS_ONE_RAISE: bool = False  # Raise NPlusOneError instead of warning (tests)
+
+    # Scheduled jobs (app.scheduler, app.core.job_locks)
+    SCHEDULER_MAX_WORKERS: int = 4  # Threads running jobs in each API worker
+    SCHEDULER_MISFIRE_GRACE_SEC: int = 300  # Late runs within this still start
+    SCHEDULER_JITTER_SEC: int = 30  # Random delay spreading cron starts
+    SCHEDULER_LOCK_TTL_SEC: int = 300  # Job lease lifetime, renewed while running
+    SCHEDULER_LOCK_REDIS_URL: str | None = None  # Redis leases instead of job_leases
+
     # Authentication & Session Management
     GOOGLE_CLIENT_ID: str | None = None  # Google OAuth client ID
     GOOGLE_CLIENT_SECRET: str | None = None  # Google OAuth client secret
@@ -128,6 +145,8 @@ class AgentSettings(BaseSettings):
     RATE_LIMIT_WINDOW_SEC: int = 60  # Rate limit window in seconds
     RATE_LIMIT_MAX_REQ: int = 60  # Max requests per window per IP
     RATE_LIMIT_REDIS_URL: str | None = None  # Redis URL for distributed rate limiting
+    RATE_LIMIT_PREFETCH: int = 4  # Requests' worth of Redis tokens reserved per worker
+    RATE_LIMIT_LEASE_SEC: float = 1.0  # How long reserved tokens stay usable locally
 
     # reCAPTCHA Protection
     RECAPTCHA_ENABLED: int = 0  # Enable reCAPTCHA verification (disabled by default)
@@ -0,0 +1,705 @@
+"""
+Monthly RANGE (received_at) partitions for the ``emails`` table.
+
+Almost every hot query reads one user's emails over a ``received_at`` range.
+On one big heap that means vacuuming and bloating every index for the whole
+history, and per-user analytics scanning all of it. Partitioning by month
+lets the planner prune to the months a query asks for, keeps each
+partition's indexes small, and lets old months be detached instead of
+deleted row by row.
+
+Converting an existing table is an online copy-and-swap, safe to interrupt
+and resume at any step. ``scripts/partition_emails.py`` runs the steps; the
+``a3b4c5d6e7f8`` migration only runs ``prepare`` and ``swap``, so the bulk
+copy happens outside of it:
+
+1. ``prepare``: create ``emails_partitioned`` (same columns, monthly
+   partitions covering existing data plus ``months_ahead``, a DEFAULT
+   partition for NULL/out-of-range dates, the same indexes), the
+   ``email_keys`` table, and a trigger mirroring every write on ``emails``
+   into the partitioned table.
+2. ``copy_batch``: copy rows in id order, ``batch_size`` at a time, each
+   batch its own short transaction. Progress lives in
+   ``emails_partition_progress`` so a restart picks up where it stopped.
+3. ``swap``: under a brief ACCESS EXCLUSIVE lock, check row counts, rename
+   the tables and indexes and keep the old heap as
+   ``emails_unpartitioned`` until ``drop_retired``. It refuses to run while
+   more than ``SWAP_CATCHUP_ROWS`` rows are left to copy.
+4. ``validate_foreign_keys``: validate the re-pointed foreign keys (see
+   below) without blocking writes.
+
+Postgres can't enforce uniqueness across partitions unless the partition
+key is part of the key, so the partitioned table itself only has ``UNIQUE
+NULLS NOT DISTINCT (id, received_at)``. Global uniqueness lives in
+``email_keys`` (``id`` primary key, ``gmail_id`` unique, plus
+``received_at``), a plain table a trigger keeps in step with every insert,
+update and delete on the partitioned table; a duplicate ``id`` or
+``gmail_id`` fails the write just as the old constraints did. Foreign keys
+from other tables to ``emails.id`` are re-pointed at ``email_keys.id`` with
+their ON DELETE actions intact, so inserts and updates of referencing rows
+are still checked and deleting an email still cascades. ``revert`` undoes
+all of it.
+
+Everything here is Postgres-only; callers check ``is_postgres`` first and
+SQLite/dev databases keep the plain table.
+"""
+
+import json
+import logging
+import re
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+PARENT = "emails"
+STAGING = "emails_partitioned"
+RETIRED = "emails_unpartitioned"
+DEFAULT_PARTITION = "emails_default"
+PROGRESS = "emails_partition_progress"
+MIRROR = "emails_partition_mirror"
+KEYS = "email_keys"
+KEYS_SYNC = "email_keys_sync"
+ROW_KEY = "uq_emails_id_received_at"
+
+MONTHS_AHEAD = 3
+BATCH_SIZE = 5000
+# Most rows swap copies itself while holding its lock
+SWAP_CATCHUP_ROWS = 10 * BATCH_SIZE
+
+# Indexes the partitioned table gets on top of the ones copied from emails
+EXTRA_INDEXES = {
+    "ix_emails_owner_received": "CREATE INDEX ix_emails_owner_received "
+    "ON public.emails USING btree (owner_email, received_at)",
+}
+
+_REFERENCES = re.compile(r"REFERENCES (?:\w+\.)?emails\(id\)")
+_PARTITION_NAME = re.compile(r"^emails_p(\d{4})_(\d{2})$")
+_INDEX_DEF = re.compile(
+    r"^CREATE (UNIQUE )?INDEX (\S+) ON (?:ONLY )?(\S+) USING (\w+) "
+    # Key columns: balanced parentheses, one level deep (lower(sender), ...)
+    r"\(([^()]*(?:\([^()]*\)[^()]*)*)\)(.*)$"
+)
+
+
+def is_postgres(conn: Connection) -> bool:
+    return conn.dialect.name == "postgresql"
+
+
+# -- naming and DDL -----------------------------------------------------------
+
+
+def month_start(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"emails_p{month:%Y_%m}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    match = _PARTITION_NAME.match(name)
+    return date(int(match[1]), int(match[2]), 1) if match else None
+
+
+def partition_ddl(parent: str, month: date) -> str:
+    """``CREATE TABLE`` for the month starting at ``month`` (UTC bounds)."""
+    return (
+        f"CREATE TABLE {partition_name(month)} PARTITION OF {parent} "
+        f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+        f"TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+    )
+
+
+def staging_index_name(name: str) -> str:
+    return f"{name[:60]}__p"
+
+
+def partitioned_index_ddl(indexdef: str, table: str) -> Tuple[str, str]:
+    """Rewrite an ``emails`` index definition for the partitioned table.
+
+    Returns ``(staging index name, DDL)``. Unique indexes get ``received_at``
+    appended, as Postgres requires the partition key in unique indexes.
+    """
+    match = _INDEX_DEF.match(indexdef)
+    if not match:
+        raise ValueError(f"Unsupported index definition: {indexdef}")
+    unique, name, _, method, columns, rest = match.groups()
+    if unique and "received_at" not in re.split(r"[\s,]+", columns):
+        columns = f"{columns}, received_at"
+    staged = staging_index_name(name)
+    return staged, (
+        f"CREATE {unique or ''}INDEX IF NOT EXISTS {staged} "
+        f"ON {table} USING {method} ({columns}){rest}"
+    )
+
+
+def repointed_fk_ddl(definition: str) -> str:
+    """Point a foreign key on ``emails(id)`` at ``email_keys(id)``.
+
+    Added ``NOT VALID`` so the swap doesn't scan the referencing table under
+    its lock; ``validate_foreign_keys`` checks existing rows afterwards.
+    """
+    ddl, count = _REFERENCES.subn(f"REFERENCES {KEYS}(id)", definition)
+    if not count:
+        raise ValueError(f"Not a foreign key on emails(id): {definition}")
+    return ddl if ddl.endswith(" NOT VALID") else f"{ddl} NOT VALID"
+
+
+# -- introspection ------------------------------------------------------------
+
+
+def _exists(conn: Connection, relation: str) -> bool:
+    return (
+        conn.execute(text("SELECT to_regclass(:r)"), {"r": relation}).scalar()
+        is not None
+    )
+
+
+def _is_partitioned(conn: Connection, relation: str) -> bool:
+    return bool(
+        conn.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table "
+                "WHERE partrelid = to_regclass(:r)"
+            ),
+            {"r": relation},
+        ).scalar()
+    )
+
+
+def status(conn: Connection) -> str:
+    """``plain``, ``copying`` (between prepare and swap) or ``partitioned``."""
+    if _is_partitioned(conn, PARENT):
+        return "partitioned"
+    if _exists(conn, STAGING):
+        return "copying"
+    return "plain"
+
+
+def _indexes(conn: Connection, table: str) -> List[Dict[str, str]]:
+    rows = conn.execute(
+        text("""
+            SELECT i.relname AS name, pg_get_indexdef(i.oid) AS def
+            FROM pg_index x
+            JOIN pg_class i ON i.oid = x.indexrelid
+            WHERE x.indrelid = to_regclass(:t) AND NOT x.indisprimary
+            ORDER BY i.relname
+            """),
+        {"t": table},
+    )
+    return [dict(r._mapping) for r in rows]
+
+
+def _constraints(conn: Connection, table: str, kind: str) -> List[Dict[str, str]]:
+    rows = conn.execute(
+        text("""
+            SELECT conname AS name, pg_get_constraintdef(oid) AS def
+            FROM pg_constraint
+            WHERE conrelid = to_regclass(:t) AND contype = :kind
+            ORDER BY conname
+            """),
+        {"t": table, "kind": kind},
+    )
+    return [dict(r._mapping) for r in rows]
+
+
+def _inbound_fks(conn: Connection, table: str) -> List[Dict[str, str]]:
+    """Single-column foreign keys from other tables to ``table``."""
+    rows = conn.execute(
+        text("""
+            SELECT c.conname AS name,
+                   c.conrelid::regclass::text AS "table",
+                   a.attname AS "column",
+                   c.confdeltype AS on_delete,
+                   pg_get_constraintdef(c.oid) AS def
+            FROM pg_constraint c
+            JOIN pg_attribute a
+              ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+            WHERE c.contype = 'f' AND c.confrelid = to_regclass(:t)
+              AND c.conrelid <> c.confrelid
+            ORDER BY c.conname
+            """),
+        {"t": table},
+    )
+    return [dict(r._mapping) for r in rows]
+
+
+def _partitions(conn: Connection, table: str) -> List[str]:
+    rows = conn.execute(
+        text("""
+            SELECT c.relname FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(:t)
+            ORDER BY c.relname
+            """),
+        {"t": table},
+    )
+    return [r[0] for r in rows]
+
+
+def _progress(conn: Connection, lock: bool = False):
+    return conn.execute(
+        text(
+            f"SELECT last_id, indexes, inbound_fks FROM {PROGRESS} WHERE id = 1"
+            + (" FOR UPDATE" if lock else "")
+        )
+    ).first()
+
+
+# -- partition management -----------------------------------------------------
+
+
+def _create_partition(conn: Connection, table: str, month: date) -> bool:
+    """Create one month's partition, moving its rows out of the DEFAULT one."""
+    name = partition_name(month)
+    if _exists(conn, name):
+        return False
+    bounds = {
+        "lo": datetime(month.year, month.month, 1, tzinfo=timezone.utc),
+        "hi": datetime.combine(
+            add_months(month, 1), datetime.min.time(), tzinfo=timezone.utc
+        ),
+    }
+    in_range = "received_at >= :lo AND received_at < :hi"
+    stranded = (
+        _exists(conn, DEFAULT_PARTITION)
+        and conn.execute(
+            text(f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_range} LIMIT 1"), bounds
+        ).scalar()
+    )
+    if not stranded:
+        conn.execute(text(partition_ddl(table, month)))
+        return True
+    # Postgres refuses a new partition whose range has rows in DEFAULT
+    conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {DEFAULT_PARTITION}"))
+    conn.execute(text(partition_ddl(table, month)))
+    # One statement, so the key trigger sees each row moved, not duplicated
+    conn.execute(
+        text(f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION} WHERE {in_range} RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+            """),
+        bounds,
+    )
+    conn.execute(
+        text(f"ALTER TABLE {table} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+    )
+    return True
+
+
+def _partitioned_table(conn: Connection) -> Optional[str]:
+    state = status(conn)
+    if state == "partitioned":
+        return PARENT
+    return STAGING if state == "copying" else None
+
+
+def ensure_partitions(
+    conn: Connection, months_ahead: int = MONTHS_AHEAD, today: Optional[date] = None
+) -> List[str]:
+    """Create this month's partition and the next ``months_ahead`` if missing;
+    returns the names created."""
+    table = _partitioned_table(conn)
+    if table is None:
+        return []
+    current = month_start(today or datetime.now(timezone.utc))
+    month = current
+    created = []
+    while month <= add_months(current, months_ahead):
+        if _create_partition(conn, table, month):
+            created.append(partition_name(month))
+        month = add_months(month, 1)
+    if created:
+        logger.info(f"Created email partitions: {', '.join(created)}")
+    return created
+
+
+def detach_expired(
+    conn: Connection,
+    retention_months: int,
+    drop: bool = False,
+    today: Optional[date] = None,
+) -> List[str]:
+    """Detach partitions wholly older than ``retention_months``.
+
+    Detached months are renamed ``emails_archive_YYYY_MM`` and keep their
+    ``email_keys`` rows, so rows in tables that referenced them are left as
+    they are. With ``drop`` they are dropped and their keys deleted, which
+    applies the referencing tables' ON DELETE actions.
+    """
+    if retention_months < 1:
+        raise ValueError("retention_months must be at least 1")
+    if _partitioned_table(conn) != PARENT:
+        return []
+    cutoff = add_months(
+        month_start(today or datetime.now(timezone.utc)), -retention_months
+    )
+    detached = []
+    for name in _partitions(conn, PARENT):
+        month = partition_month(name)
+        if month is None or add_months(month, 1) > cutoff:
+            continue
+        conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+        if drop:
+            conn.execute(
+                text(f"DELETE FROM {KEYS} WHERE id IN (SELECT id FROM {name})")
+            )
+            conn.execute(text(f"DROP TABLE {name}"))
+        else:
+            conn.execute(
+                text(f"ALTER TABLE {name} RENAME TO emails_archive_{month:%Y_%m}")
+            )
+        detached.append(name)
+    if detached:
+        action = "Dropped" if drop else "Detached"
+        logger.info(f"{action} expired email partitions: {', '.join(detached)}")
+    return detached
+
+
+# -- copy and swap ------------------------------------------------------------
+
+
+def prepare(
+    conn: Connection, months_ahead: int = MONTHS_AHEAD, today: Optional[date] = None
+) -> None:
+    """Create the partitioned staging table and start mirroring writes."""
+    if status(conn) == "partitioned":
+        return
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {PROGRESS} (
+            id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+            last_id BIGINT NOT NULL DEFAULT 0,
+            indexes JSONB,
+            inbound_fks JSONB,
+            started_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            swapped_at TIMESTAMPTZ
+        )
+        """))
+    conn.execute(text(f"INSERT INTO {PROGRESS} (id) VALUES (1) ON CONFLICT DO NOTHING"))
+    if _exists(conn, STAGING):
+        return
+
+    indexes = _indexes(conn, PARENT)
+    conn.execute(
+        text(f"UPDATE {PROGRESS} SET indexes = CAST(:indexes AS JSONB), last_id = 0"),
+        {"indexes": json.dumps(indexes)},
+    )
+    conn.execute(text(f"""
+        CREATE TABLE {STAGING} (
+            LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+            INCLUDING STORAGE INCLUDING COMMENTS
+        ) PARTITION BY RANGE (received_at)
+        """))
+    conn.execute(
+        text(
+            f"ALTER TABLE {STAGING} ADD CONSTRAINT {ROW_KEY} "
+            "UNIQUE NULLS NOT DISTINCT (id, received_at)"
+        )
+    )
+    conn.execute(
+        text(
+            f"CREATE TABLE {KEYS} AS SELECT id, gmail_id, received_at "
+            f"FROM {PARENT} WITH NO DATA"
+        )
+    )
+    conn.execute(
+        text(
+            f"ALTER TABLE {KEYS} ADD PRIMARY KEY (id), "
+            f"ADD CONSTRAINT {KEYS}_gmail_id_key UNIQUE (gmail_id)"
+        )
+    )
+    for fk in _constraints(conn, PARENT, "f"):
+        conn.execute(
+            text(f"ALTER TABLE {STAGING} ADD CONSTRAINT {fk['name']} {fk['def']}")
+        )
+
+    # Only months that have mail; a later month's rows wait in DEFAULT
+    # until ensure_partitions creates their partition
+    months = conn.execute(text(f"""
+        SELECT DISTINCT CAST(date_trunc('month', received_at AT TIME ZONE 'UTC')
+                             AS date)
+        FROM {PARENT} WHERE received_at IS NOT NULL
+        """)).scalars()
+    for month in sorted(months):
+        _create_partition(conn, STAGING, month)
+    ensure_partitions(conn, months_ahead, today=today)
+    conn.execute(
+        text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {STAGING} DEFAULT")
+    )
+
+    known = {index["name"] for index in indexes}
+    extra = [{"name": n, "def": d} for n, d in EXTRA_INDEXES.items() if n not in known]
+    for index in indexes + extra:
+        # Created on the parent, so every partition gets its own copy
+        conn.execute(text(partitioned_index_ddl(index["def"], STAGING)[1]))
+
+    conn.execute(text(_keys_sync_ddl(STAGING)))
+    conn.execute(text(f"""
+        CREATE TRIGGER {KEYS_SYNC}
+        AFTER INSERT OR UPDATE OR DELETE ON {STAGING}
+        FOR EACH ROW EXECUTE FUNCTION {KEYS_SYNC}()
+        """))
+    conn.execute(text(f"""
+        CREATE OR REPLACE FUNCTION {MIRROR}() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM {STAGING}
+                WHERE id = OLD.id
+                  AND received_at IS NOT DISTINCT FROM OLD.received_at;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO {STAGING} SELECT (NEW).* ON CONFLICT DO NOTHING;
+            END IF;
+            RETURN NULL;
+        END $$ LANGUAGE plpgsql
+        """))
+    conn.execute(text(f"""
+        CREATE TRIGGER {MIRROR}
+        AFTER INSERT OR UPDATE OR DELETE ON {PARENT}
+        FOR EACH ROW EXECUTE FUNCTION {MIRROR}()
+        """))
+    logger.info(f"Prepared {STAGING}; copying rows from {PARENT}")
+
+
+def copy_batch(conn: Connection, batch_size: int = BATCH_SIZE) -> int:
+    """Copy the next ``batch_size`` rows by id; returns how many were read.
+
+    FOR SHARE holds off concurrent updates of the batch's rows until it
+    commits, after which the mirror trigger replaces the copies.
+    """
+    last_id = _progress(conn, lock=True).last_id
+    row = conn.execute(
+        text(f"""
+            WITH batch AS (
+                SELECT * FROM {PARENT} WHERE id > :last_id
+                ORDER BY id LIMIT :limit FOR SHARE
+            ), copied AS (
+                INSERT INTO {STAGING} SELECT * FROM batch ON CONFLICT DO NOTHING
+            )
+            SELECT count(*) AS n, max(id) AS last_id FROM batch
+            """),
+        {"last_id": last_id, "limit": batch_size},
+    ).first()
+    if row.n:
+        conn.execute(
+            text(f"UPDATE {PROGRESS} SET last_id = :last_id WHERE id = 1"),
+            {"last_id": row.last_id},
+        )
+    return row.n
+
+
+def remaining(conn: Connection) -> int:
+    """Rows of ``emails`` the copy hasn't reached yet."""
+    last_id = _progress(conn).last_id
+    return conn.execute(
+        text(f"SELECT count(*) FROM {PARENT} WHERE id > :last_id"),
+        {"last_id": last_id},
+    ).scalar()
+
+
+def _keys_sync_ddl(table: str) -> str:
+    """Trigger function keeping ``email_keys`` in step with ``table``."""
+    # A row moved to another partition by an UPDATE is deleted and re-inserted;
+    # the re-inserted row is visible by the time AFTER triggers run
+    return f"""
+        CREATE OR REPLACE FUNCTION {KEYS_SYNC}() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' THEN
+                UPDATE {KEYS}
+                SET id = NEW.id, gmail_id = NEW.gmail_id,
+                    received_at = NEW.received_at
+                WHERE id = OLD.id;
+            ELSIF TG_OP = 'DELETE' THEN
+                IF NOT EXISTS (SELECT 1 FROM {table} WHERE id = OLD.id) THEN
+                    DELETE FROM {KEYS} WHERE id = OLD.id;
+                END IF;
+            ELSE
+                INSERT INTO {KEYS} (id, gmail_id, received_at)
+                VALUES (NEW.id, NEW.gmail_id, NEW.received_at)
+                ON CONFLICT (id) DO NOTHING;
+                IF NOT FOUND THEN
+                    IF (SELECT count(*) FROM {table} WHERE id = NEW.id) > 1 THEN
+                        RAISE EXCEPTION 'emails id % already exists', NEW.id
+                        USING ERRCODE = 'unique_violation';
+                    END IF;
+                    UPDATE {KEYS}
+                    SET gmail_id = NEW.gmail_id, received_at = NEW.received_at
+                    WHERE id = NEW.id;
+                END IF;
+            END IF;
+            RETURN NULL;
+        END $$ LANGUAGE plpgsql
+        """
+
+
+def swap(
+    conn: Connection,
+    lock_timeout: str = "5s",
+    max_catchup: int = SWAP_CATCHUP_ROWS,
+) -> None:
+    """Make the partitioned table ``emails``; the old heap is kept aside.
+
+    Raises ``RuntimeError`` when more than ``max_catchup`` rows are left to
+    copy, rather than copying them under the lock.
+    """
+    if status(conn) != "copying":
+        return
+    left = remaining(conn)
+    if left > max_catchup:
+        raise RuntimeError(
+            f"{left} rows of {PARENT} are not copied yet; run "
+            "`python -m scripts.partition_emails copy` before swapping"
+        )
+    conn.execute(text(f"SET LOCAL lock_timeout = '{lock_timeout}'"))
+    conn.execute(text(f"LOCK TABLE {PARENT} IN ACCESS EXCLUSIVE MODE"))
+    # The trigger mirrored every write since prepare; this catches up on
+    # rows older than it that the copy hasn't reached
+    while copy_batch(conn):
+        pass
+    source, copied, keyed = conn.execute(
+        text(
+            f"SELECT (SELECT count(*) FROM {PARENT}), "
+            f"(SELECT count(*) FROM {STAGING}), (SELECT count(*) FROM {KEYS})"
+        )
+    ).first()
+    if not source == copied == keyed:
+        raise RuntimeError(
+            f"{STAGING} has {copied} rows and {KEYS} {keyed} but {PARENT} has "
+            f"{source}; not swapping"
+        )
+
+    inbound = _inbound_fks(conn, PARENT)
+    conn.execute(
+        text(
+            f"UPDATE {PROGRESS} SET inbound_fks = CAST(:fks AS JSONB), "
+            "swapped_at = now() WHERE id = 1"
+        ),
+        {"fks": json.dumps(inbound)},
+    )
+    for fk in inbound:
+        conn.execute(text(f"ALTER TABLE {fk['table']} DROP CONSTRAINT {fk['name']}"))
+        conn.execute(
+            text(
+                f"ALTER TABLE {fk['table']} ADD CONSTRAINT {fk['name']} "
+                f"{repointed_fk_ddl(fk['def'])}"
+            )
+        )
+    for fk in _constraints(conn, PARENT, "f"):
+        conn.execute(text(f"ALTER TABLE {PARENT} DROP CONSTRAINT {fk['name']}"))
+    conn.execute(text(f"DROP TRIGGER {MIRROR} ON {PARENT}"))
+    conn.execute(text(f"DROP FUNCTION {MIRROR}()"))
+
+    sequence = conn.execute(
+        text(f"SELECT pg_get_serial_sequence('{PARENT}', 'id')")
+    ).scalar()
+    names = [index["name"] for index in _progress(conn).indexes or []]
+    names += [n for n in EXTRA_INDEXES if n not in names]
+    for name in names:
+        conn.execute(text(f"ALTER INDEX IF EXISTS {name} RENAME TO {name[:60]}__u"))
+        conn.execute(text(f"ALTER INDEX {staging_index_name(name)} RENAME TO {name}"))
+    for pkey in _constraints(conn, PARENT, "p"):
+        conn.execute(
+            text(
+                f"ALTER TABLE {PARENT} RENAME CONSTRAINT {pkey['name']} "
+                f"TO {RETIRED}_pkey"
+            )
+        )
+    conn.execute(text(f"ALTER TABLE {PARENT} RENAME TO {RETIRED}"))
+    conn.execute(text(f"ALTER TABLE {STAGING} RENAME TO {PARENT}"))
+    if sequence:
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {PARENT}.id"))
+
+    # The key trigger now has to look rows up under the new name
+    conn.execute(text(_keys_sync_ddl(PARENT)))
+    logger.info(f"Swapped in partitioned {PARENT}; old table kept as {RETIRED}")
+
+
+def validate_foreign_keys(conn: Connection) -> List[str]:
+    """Validate the foreign keys ``swap`` re-pointed at ``email_keys``.
+
+    Takes only SHARE UPDATE EXCLUSIVE locks on the referencing tables, so
+    writes carry on while their rows are checked. Returns the names
+    validated.
+    """
+    if status(conn) != "partitioned":
+        return []
+    names = []
+    for fk in _progress(conn).inbound_fks or []:
+        conn.execute(
+            text(f"ALTER TABLE {fk['table']} VALIDATE CONSTRAINT {fk['name']}")
+        )
+        names.append(fk["name"])
+    return names
+
+
+def drop_retired(conn: Connection) -> bool:
+    """Drop the pre-partitioning heap once the swap has been verified."""
+    if status(conn) != "partitioned" or not _exists(conn, RETIRED):
+        return False
+    conn.execute(text(f"DROP TABLE {RETIRED}"))
+    return True
+
+
+def revert(conn: Connection) -> None:
+    """Turn ``emails`` back into a plain table (or abandon a conversion)."""
+    state = status(conn)
+    if state == "copying":
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {MIRROR} ON {PARENT}"))
+        conn.execute(text(f"DROP FUNCTION IF EXISTS {MIRROR}()"))
+        conn.execute(text(f"DROP TABLE {STAGING}"))
+        conn.execute(text(f"DROP FUNCTION IF EXISTS {KEYS_SYNC}()"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {KEYS}"))
+    if state != "partitioned":
+        conn.execute(text(f"DROP TABLE IF EXISTS {PROGRESS}"))
+        return
+
+    progress = _progress(conn)
+    indexes: List[Dict[str, Any]] = progress.indexes or []
+    inbound: List[Dict[str, Any]] = progress.inbound_fks or []
+    outbound = _constraints(conn, PARENT, "f")
+    sequence = conn.execute(
+        text(f"SELECT pg_get_serial_sequence('{PARENT}', 'id')")
+    ).scalar()
+
+    conn.execute(text(f"LOCK TABLE {PARENT} IN ACCESS EXCLUSIVE MODE"))
+    conn.execute(text(f"DROP TABLE IF EXISTS {RETIRED}"))
+    conn.execute(text(f"""
+        CREATE TABLE {RETIRED} (
+            LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+            INCLUDING STORAGE INCLUDING COMMENTS
+        )
+        """))
+    conn.execute(text(f"INSERT INTO {RETIRED} SELECT * FROM {PARENT}"))
+    if sequence:
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {RETIRED}.id"))
+    conn.execute(text(f"DROP TABLE {PARENT}"))
+    conn.execute(text(f"DROP FUNCTION IF EXISTS {KEYS_SYNC}()"))
+    # Also drops the foreign keys swap pointed at it; they are re-added below
+    conn.execute(text(f"DROP TABLE {KEYS} CASCADE"))
+    conn.execute(text(f"ALTER TABLE {RETIRED} RENAME TO {PARENT}"))
+    conn.execute(
+        text(f"ALTER TABLE {PARENT} ADD CONSTRAINT {PARENT}_pkey PRIMARY KEY (id)")
+    )
+    for index in indexes:
+        conn.execute(text(index["def"]))
+    for fk in outbound:
+        conn.execute(
+            text(f"ALTER TABLE {PARENT} ADD CONSTRAINT {fk['name']} {fk['def']}")
+        )
+    for fk in inbound:
+        conn.execute(
+            text(f"ALTER TABLE {fk['table']} ADD CONSTRAINT {fk['name']} {fk['def']}")
+        )
+    conn.execute(text(f"DROP TABLE {PROGRESS}"))
+    logger.info(f"Reverted {PARENT} to a plain table")
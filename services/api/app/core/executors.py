@@ -9,12 +9,119 @@ Implements thin adapters for executing each ActionType:
 - Attachment quarantine
 
 All executors return (success: bool, error: str | None)
+
+Gmail label changes (archive, label, move) go through the
+batching queue in core.gmail_batch: single actions enqueue and wait for their
+own outcome, and ``execute_actions`` submits a whole set at once so it costs
+one Gmail/DB/ES round trip per 1,000 emails instead of one per email.
 """
 
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .gmail_batch import (
+    ARCHIVE,
+    QUARANTINE,
+    LabelChange,
+    ModifyRequest,
+    add_label,
+    get_batcher,
+    move_to,
+)
+
+
+def _label_change(action_type: str, params: Dict[str, Any]):
+    """(LabelChange | None, error) for Gmail label actions; (None, None) otherwise."""
+    if action_type == "archive_email":
+        return ARCHIVE, None
+    if action_type == "label_email":
+        label = params.get("label")
+        return (add_label(label), None) if label else (None, "Missing 'label' param")
+    if action_type == "move_to_folder":
+        folder = params.get("folder")
+        return (move_to(folder), None) if folder else (None, "Missing 'folder' param")
+    return None, None
+
+
+def _resolve_emails(email_ids: Sequence[int]) -> Dict[int, Tuple[str, Optional[str]]]:
+    """``{email_id: (gmail_id, owner_email)}`` in one query."""
+    from ..db import SessionLocal
+    from ..models import Email
+
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(Email.id, Email.gmail_id, Email.owner_email)
+            .filter(Email.id.in_(list(set(email_ids))))
+            .all()
+        )
+    finally:
+        db.close()
+    return {row.id: (row.gmail_id, row.owner_email) for row in rows}
+
+
+def apply_label_changes(
+    changes: Sequence[Tuple[int, LabelChange]], user_email: Optional[str] = None
+) -> List[Tuple[bool, Optional[str]]]:
+    """
+    Apply Gmail label changes to emails (by DB id) through the batcher.
+
+    Args:
+        changes: (email_id, LabelChange) pairs
+        user_email: Acting user; defaults to each email's owner
+
+    Returns:
+        One (success, error_msg) per change, in order
+    """
+    results: List[Tuple[bool, Optional[str]]] = [(False, "Email not found")] * len(
+        changes
+    )
+    try:
+        emails = _resolve_emails([email_id for email_id, _ in changes])
+    except Exception as e:
+        return [(False, str(e))] * len(changes)
+
+    requests, slots = [], []
+    for i, (email_id, change) in enumerate(changes):
+        gmail_id, owner = emails.get(email_id, (None, None))
+        if gmail_id and (user_email or owner):
+            requests.append(ModifyRequest(user_email or owner, gmail_id, change))
+            slots.append(i)
+    for i, future in zip(slots, get_batcher().submit_many(requests)):
+        try:
+            outcome = future.result()
+            results[i] = (outcome.ok, outcome.error)
+        except Exception as e:
+            results[i] = (False, str(e))
+    return results
+
+
+def execute_actions(
+    proposed_actions: Sequence, user=None
+) -> List[Tuple[bool, Optional[str]]]:
+    """
+    Execute several proposed actions; Gmail label changes are batched.
 
-# Gmail API imports (will be injected/imported from services)
-# from ..services.gmail_service import gmail_service
+    Returns one (success, error_msg) per action, in order.
+    """
+    results: List[Optional[Tuple[bool, Optional[str]]]] = [None] * len(proposed_actions)
+    batched: List[Tuple[int, Tuple[int, LabelChange]]] = []
+    for i, pa in enumerate(proposed_actions):
+        try:
+            change, error = _label_change(pa.action.value, pa.params or {})
+        except Exception as e:
+            change, error = None, str(e)
+        if change is not None:
+            batched.append((i, (pa.email_id, change)))
+        else:
+            results[i] = (False, error) if error else _execute_one(pa, user)
+
+    if batched:
+        outcomes = apply_label_changes(
+            [item for _, item in batched], getattr(user, "email", None)
+        )
+        for (i, _), outcome in zip(batched, outcomes):
+            results[i] = outcome
+    return results
 
 
 def execute_action(proposed_action, user=None) -> Tuple[bool, Optional[str]]:
@@ -28,26 +135,16 @@ def execute_action(proposed_action, user=None) -> Tuple[bool, Optional[str]]:
     Returns:
         (success: bool, error_msg: str | None)
     """
+    return execute_actions([proposed_action], user)[0]
+
+
+def _execute_one(proposed_action, user=None) -> Tuple[bool, Optional[str]]:
+    """Execute an action that isn't a Gmail label change."""
     try:
         action_type = proposed_action.action.value
         email_id = proposed_action.email_id
         params = proposed_action.params or {}
 
-        if action_type == "archive_email":
-            return gmail_archive(email_id), None
-
-        if action_type == "label_email":
-            label = params.get("label")
-            if not label:
-                return False, "Missing 'label' param"
-            return gmail_label(email_id, label), None
-
-        if action_type == "move_to_folder":
-            folder = params.get("folder")
-            if not folder:
-                return False, "Missing 'folder' param"
-            return gmail_move(email_id, folder), None
-
         if action_type == "unsubscribe_via_header":
             return try_list_unsubscribe(email_id), None
 
@@ -77,62 +174,23 @@ def execute_action(proposed_action, user=None) -> Tuple[bool, Optional[str]]:
 
 def gmail_archive(email_id: int) -> bool:
     """
-    Archive an email (remove INBOX label, add ARCHIVED).
-
-    Implementation:
-    1. Load Email from DB
-    2. Call Gmail API modify() to remove INBOX, add ARCHIVED
-    3. Update local labels in DB
+    Archive an email (remove the INBOX label) in Gmail and the local mirror.
     """
-    try:
-        # TODO: Implement with gmail_service
-        # email = db.get(Email, email_id)
-        # gmail_service.archive_message(email.gmail_id)
-        print(f"[EXECUTOR] Archiving email {email_id}")
-        return True
-    except Exception as e:
-        print(f"[EXECUTOR] Archive failed: {e}")
-        return False
+    return apply_label_changes([(email_id, ARCHIVE)])[0][0]
 
 
 def gmail_label(email_id: int, label: str) -> bool:
     """
-    Add a label to an email.
-
-    Implementation:
-    1. Load Email from DB
-    2. Call Gmail API modify() to add label
-    3. Update local labels in DB
+    Add a label to an email in Gmail and the local mirror.
     """
-    try:
-        # TODO: Implement with gmail_service
-        # email = db.get(Email, email_id)
-        # gmail_service.modify_labels(email.gmail_id, add_labels=[label])
-        print(f"[EXECUTOR] Labeling email {email_id} with '{label}'")
-        return True
-    except Exception as e:
-        print(f"[EXECUTOR] Label failed: {e}")
-        return False
+    return apply_label_changes([(email_id, add_label(label))])[0][0]
 
 
 def gmail_move(email_id: int, folder: str) -> bool:
     """
-    Move an email to a folder (label in Gmail).
-
-    Implementation:
-    1. Load Email from DB
-    2. Call Gmail API modify() to add folder label, remove INBOX
-    3. Update local labels in DB
+    Move an email to a folder (add the folder label, remove INBOX).
     """
-    try:
-        # TODO: Implement with gmail_service
-        # email = db.get(Email, email_id)
-        # gmail_service.modify_labels(email.gmail_id, add_labels=[folder], remove_labels=["INBOX"])
-        print(f"[EXECUTOR] Moving email {email_id} to folder '{folder}'")
-        return True
-    except Exception as e:
-        print(f"[EXECUTOR] Move failed: {e}")
-        return False
+    return apply_label_changes([(email_id, move_to(folder))])[0][0]
 
 
 def try_list_unsubscribe(email_id: int) -> bool:
@@ -267,25 +325,16 @@ def quarantine_email(email_id: int) -> bool:
     Quarantine an email and its attachments.
 
     Implementation:
-    1. Load Email from DB
-    2. Set quarantined=True in DB
-    3. Move attachments to safe storage (/data/quarantine/)
-    4. Add QUARANTINED label in Gmail
+    1. Pull it out of the Gmail inbox and set quarantined=True in DB and ES
+       (batched, see core.gmail_batch.QUARANTINE)
+    2. Move attachments to safe storage (/data/quarantine/)
     """
     try:
-        # TODO: Implement with db and storage
-        # email = db.get(Email, email_id)
-        # email.quarantined = True
-        # db.commit()
-
-        # # Move attachments
+        # TODO: Move attachments
         # for attachment in email.raw.get("payload", {}).get("parts", []):
         #     if attachment.get("filename"):
         #         move_attachment_to_quarantine(email_id, attachment)
-
-        # gmail_service.modify_labels(email.gmail_id, add_labels=["QUARANTINED"])
-        print(f"[EXECUTOR] Quarantining email {email_id}")
-        return True
+        return apply_label_changes([(email_id, QUARANTINE)])[0][0]
     except Exception as e:
         print(f"[EXECUTOR] Quarantine failed: {e}")
         return False
@@ -0,0 +1,622 @@
+"""
+Batched Gmail label changes.
+
+Archive, label, move and quarantine actions used to cost one Gmail
+``messages.modify`` call, one DB write and one ES update per email, so a
+policy firing on a few thousand promos made thousands of round trips and ran
+into Gmail's per-user quota.
+
+``GmailModifyBatcher`` collects requests for a short window and groups them
+by (user, label change). Each group of up to 1,000 messages becomes:
+
+- one ``users.messages.batchModify`` call,
+- one ``UPDATE emails ... WHERE gmail_id = ANY(:ids) AND owner_email =
+  :owner`` (plus, for label changes, re-deriving ``opportunity_state`` in
+  the same transaction: the raw UPDATE bypasses the ORM listener that keeps
+  it in sync with labels),
+- one Elasticsearch ``_bulk`` request, whose script leaves documents of
+  other owners untouched.
+
+Every write is scoped to the requesting user, so a gmail_id that belongs
+to someone else fails instead of changing their mail.
+
+Label and folder names (``add_label("auto-promos")``) are resolved to the
+account's label IDs before calling Gmail, which only accepts IDs: from a
+per-account cache filled by ``users.labels.list``, creating labels that
+don't exist yet. The local mirror stores the same IDs, as Gmail sync does.
+
+Gmail calls are paced by a per-user token bucket over Gmail quota units.
+429/5xx responses are retried with exponential backoff and full jitter. A
+batch rejected because of particular messages (an invalid or unknown id) is
+split in half until they are isolated, and only single messages fall back
+to ``messages.modify``; any other error fails the whole batch at once, since
+smaller batches would fail the same way. Every request gets its own
+``ModifyOutcome`` through a future.
+
+Users without a Gmail connection get the local (DB + ES) changes only, which
+is what the inbox actions did before.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from queue import Empty, Queue
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+
+from ..services.opportunity_state import email_opportunity_state
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_IDS = 1000  # batchModify limit
+# Gmail API quota units: 250/s per user; batchModify costs 50, modify 5
+QUOTA_UNITS_PER_SECOND = 250
+BATCH_MODIFY_UNITS = 50
+MODIFY_UNITS = 5
+LABELS_LIST_UNITS = 1
+LABELS_CREATE_UNITS = 5
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Gmail's own labels, whose IDs are their names
+SYSTEM_LABELS = frozenset(
+    {"INBOX", "SPAM", "TRASH", "UNREAD", "STARRED", "IMPORTANT", "SENT", "DRAFT"}
+)
+
+ES_SCRIPT = """
+if (ctx._source.owner_email != params.owner) { ctx.op = 'noop'; return; }
+if (ctx._source.labels == null) { ctx._source.labels = [] }
+ctx._source.labels.removeAll(params.remove);
+for (String label : params.add) {
+  if (!ctx._source.labels.contains(label)) { ctx._source.labels.add(label) }
+}
+ctx._source.putAll(params.fields);
+"""
+
+
+@dataclass(frozen=True)
+class LabelChange:
+    """What a request does to one message; equal changes batch together.
+
+    Attributes:
+        add, remove: Gmail label names or IDs (resolved to IDs before use)
+        db_fields: ``emails`` columns to set alongside ``labels``
+        es_fields: Search-index fields to set alongside ``labels``
+        es_stamp: Search-index field set to the time the batch ran
+    """
+
+    add: Tuple[str, ...] = ()
+    remove: Tuple[str, ...] = ()
+    db_fields: Tuple[Tuple[str, Any], ...] = ()
+    es_fields: Tuple[Tuple[str, Any], ...] = ()
+    es_stamp: Optional[str] = None
+
+
+ARCHIVE = LabelChange(
+    remove=("INBOX",), es_fields=(("user_archived", True),), es_stamp="archived_at"
+)
+# Gmail has no quarantine: pull the message out of the inbox and flag it locally
+QUARANTINE = LabelChange(
+    remove=("INBOX",),
+    db_fields=(("quarantined", True),),
+    es_fields=(("quarantined", True),),
+    es_stamp="quarantined_at",
+)
+MARK_SAFE = LabelChange(
+    remove=("SPAM",),
+    db_fields=(("quarantined", False),),
+    es_fields=(("quarantined", False), ("user_overrode_safe", True)),
+    es_stamp="marked_safe_at",
+)
+
+
+def add_label(label: str) -> LabelChange:
+    return LabelChange(add=(label,))
+
+
+def move_to(folder: str) -> LabelChange:
+    return LabelChange(add=(folder,), remove=("INBOX",))
+
+
+@dataclass(frozen=True)
+class ModifyRequest:
+    user_email: str
+    gmail_id: str
+    change: LabelChange
+
+
+@dataclass
+class ModifyOutcome:
+    """Result for one request.
+
+    ``ok`` means Gmail applied the change (or, for users without Gmail, the
+    local mirror did). ``mirror_error`` reports a local DB/ES update that
+    failed after Gmail succeeded; the next sync repairs it.
+    """
+
+    gmail_id: str
+    ok: bool
+    error: Optional[str] = None
+    mirror_error: Optional[str] = None
+
+
+class TokenBucket:
+    """Thread-safe token bucket; ``acquire`` blocks until tokens are free."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, units: float) -> None:
+        units = min(units, self.capacity)
+        while True:
+            with self._lock:
+                now = self._clock()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                # Tolerance: refill arithmetic can land a hair under ``units``
+                if self.tokens >= units - 1e-9:
+                    self.tokens = max(0.0, self.tokens - units)
+                    return
+                wait = (units - self.tokens) / self.rate
+            self._sleep(wait)
+
+
+def _http_status(exc: Exception) -> Optional[int]:
+    """Status of a googleapiclient HttpError (or anything shaped like one)."""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "resp", None), "status", None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _message_specific(exc: Exception) -> bool:
+    """Whether a Gmail error blames some of the batch's messages.
+
+    Gmail rejects a batch holding a malformed or unknown message id with
+    400 "Invalid id value" (404 for a single message). Other 4xx (a bad
+    label, auth, permissions) apply to the request as a whole.
+    """
+    status = _http_status(exc)
+    reason = str(getattr(exc, "reason", "") or exc).lower()
+    return status == 404 or (status == 400 and "invalid id" in reason)
+
+
+def gmail_service_for(user_email: str):
+    """Gmail API client for ``user_email``; None if they haven't connected Gmail."""
+    from googleapiclient.discovery import build
+
+    from ..db import SessionLocal
+    from ..gmail_service import _get_creds
+
+    db = SessionLocal()
+    try:
+        creds = _get_creds(db, user_email)
+    except ValueError:
+        return None
+    finally:
+        db.close()
+    return build("gmail", "v1", credentials=creds, cache_discovery=False)
+
+
+class GmailModifyBatcher:
+    """Coalesces Gmail label changes into batched Gmail, DB and ES writes."""
+
+    def __init__(
+        self,
+        service_for: Callable[[str], Any] = gmail_service_for,
+        session_factory: Optional[Callable[[], Any]] = None,
+        es_client: Any = None,
+        index: Optional[str] = None,
+        window: float = 0.05,
+        max_batch: int = MAX_BATCH_IDS,
+        quota_units_per_second: float = QUOTA_UNITS_PER_SECOND,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 32.0,
+        workers: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.service_for = service_for
+        self.session_factory = session_factory
+        self.es = es_client
+        self.index = index
+        self.window = window
+        self.max_batch = max_batch
+        self.quota_units_per_second = quota_units_per_second
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._clock = clock
+        self._sleep = sleep
+        self._queue: Queue = Queue()
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="gmail-batch")
+        self._buckets: Dict[str, TokenBucket] = {}
+        # Per account: label name (and ID) -> label ID
+        self._label_ids: Dict[str, Dict[str, str]] = {}
+        self._user_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._lock = threading.Lock()
+        self._dispatcher: Optional[threading.Thread] = None
+
+    # -- public API -------------------------------------------------------
+
+    def submit(self, request: ModifyRequest) -> Future:
+        return self.submit_many([request])[0]
+
+    def submit_many(self, requests: Sequence[ModifyRequest]) -> List[Future]:
+        futures = [Future() for _ in requests]
+        if requests:
+            self._ensure_dispatcher()
+            self._queue.put(list(zip(requests, futures)))
+        return futures
+
+    def execute(
+        self, requests: Sequence[ModifyRequest], timeout: Optional[float] = None
+    ) -> List[ModifyOutcome]:
+        """Submit ``requests`` and wait for their outcomes (same order)."""
+        return [f.result(timeout) for f in self.submit_many(requests)]
+
+    def close(self) -> None:
+        """Flush what's queued and stop the dispatcher."""
+        with self._lock:
+            dispatcher, self._dispatcher = self._dispatcher, None
+        if dispatcher is not None:
+            self._queue.put(None)
+            dispatcher.join()
+        self._pool.shutdown(wait=True)
+
+    # -- dispatch ---------------------------------------------------------
+
+    def _ensure_dispatcher(self) -> None:
+        with self._lock:
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(
+                    target=self._dispatch, name="gmail-batch-dispatch", daemon=True
+                )
+                self._dispatcher.start()
+
+    def _dispatch(self) -> None:
+        pending: Dict[Tuple[str, LabelChange], List] = defaultdict(list)
+        opened: Dict[Tuple[str, LabelChange], float] = {}
+        while True:
+            timeout = None
+            if opened:
+                timeout = max(0.0, min(opened.values()) + self.window - self._clock())
+            try:
+                items = self._queue.get(timeout=timeout)
+            except Empty:
+                items = []
+            if items is None:
+                for key in list(pending):
+                    self._flush(key, pending.pop(key))
+                return
+            for request, future in items:
+                key = (request.user_email, request.change)
+                pending[key].append((request, future))
+                opened.setdefault(key, self._clock())
+                if len(pending[key]) >= self.max_batch:
+                    self._flush(key, pending[key][: self.max_batch])
+                    pending[key] = pending[key][self.max_batch :]
+            now = self._clock()
+            for key in list(opened):
+                if not pending[key]:
+                    del pending[key], opened[key]
+                elif now - opened[key] >= self.window:
+                    self._flush(key, pending.pop(key))
+                    del opened[key]
+
+    def _flush(self, key: Tuple[str, LabelChange], items: List) -> None:
+        self._pool.submit(self._run_batch, key[0], key[1], items)
+
+    # -- one batch --------------------------------------------------------
+
+    def _run_batch(self, user_email: str, change: LabelChange, items: List) -> None:
+        ids = list(dict.fromkeys(request.gmail_id for request, _ in items))
+        with self._lock:
+            user_lock = self._user_locks[user_email]
+        try:
+            # One batch per user at a time keeps that user's changes in order
+            with user_lock:
+                outcomes = self._apply(user_email, change, ids)
+        except Exception as e:
+            logger.exception("Gmail batch for %s failed", user_email)
+            outcomes = {i: ModifyOutcome(i, ok=False, error=str(e)) for i in ids}
+        for request, future in items:
+            future.set_result(outcomes[request.gmail_id])
+
+    def _apply(
+        self, user_email: str, change: LabelChange, ids: List[str]
+    ) -> Dict[str, ModifyOutcome]:
+        service = self.service_for(user_email)
+        failed: Dict[str, str] = {}
+        if service:
+            try:
+                change = self._resolve_labels(service, user_email, change)
+            except Exception as e:
+                logger.warning(
+                    "Resolving Gmail labels for %s failed: %s", user_email, e
+                )
+                status = _http_status(e)
+                error = f"labels: HTTP {status}: {e}" if status else f"labels: {e}"
+                return {i: ModifyOutcome(i, ok=False, error=error) for i in ids}
+            failed = self._modify(service, user_email, change, ids)
+        done = [i for i in ids if i not in failed]
+
+        mirror_failed: Dict[str, str] = {}
+        if done:
+            try:
+                self._update_db(user_email, change, done)
+            except Exception as e:
+                logger.warning("Label update of %d emails failed: %s", len(done), e)
+                mirror_failed = {i: f"db: {e}" for i in done}
+            for gmail_id, error in self._update_es(user_email, change, done).items():
+                mirror_failed.setdefault(gmail_id, error)
+
+        outcomes = {i: ModifyOutcome(i, ok=False, error=e) for i, e in failed.items()}
+        for gmail_id in done:
+            error = mirror_failed.get(gmail_id)
+            if service is None:
+                outcomes[gmail_id] = ModifyOutcome(gmail_id, ok=not error, error=error)
+            else:
+                outcomes[gmail_id] = ModifyOutcome(
+                    gmail_id, ok=True, mirror_error=error
+                )
+        return outcomes
+
+    def _bucket(self, user_email: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(user_email)
+            if bucket is None:
+                bucket = self._buckets[user_email] = TokenBucket(
+                    self.quota_units_per_second, clock=self._clock, sleep=self._sleep
+                )
+            return bucket
+
+    def _resolve_labels(
+        self, service, user_email: str, change: LabelChange
+    ) -> LabelChange:
+        """``change`` with label names replaced by the account's label IDs."""
+
+        def resolve(names: Tuple[str, ...]) -> Tuple[str, ...]:
+            return tuple(self._label_id(service, user_email, n) for n in names)
+
+        return replace(change, add=resolve(change.add), remove=resolve(change.remove))
+
+    def _label_id(self, service, user_email: str, name: str) -> str:
+        if name in SYSTEM_LABELS or name.startswith("CATEGORY_"):
+            return name
+        known = self._label_ids.get(user_email)
+        if known is None or name not in known:
+            known = self._list_labels(service, user_email)
+        if name not in known:
+            self._bucket(user_email).acquire(LABELS_CREATE_UNITS)
+            try:
+                created = (
+                    service.users()
+                    .labels()
+                    .create(
+                        userId="me",
+                        body={
+                            "name": name,
+                            "labelListVisibility": "labelShow",
+                            "messageListVisibility": "show",
+                        },
+                    )
+                    .execute()
+                )
+                known[name] = known[created["id"]] = created["id"]
+            except Exception as e:
+                if _http_status(e) != 409:  # 409: created meanwhile
+                    raise
+                known = self._list_labels(service, user_email)
+        return known[name]
+
+    def _list_labels(self, service, user_email: str) -> Dict[str, str]:
+        self._bucket(user_email).acquire(LABELS_LIST_UNITS)
+        res = service.users().labels().list(userId="me").execute()
+        known: Dict[str, str] = {}
+        for label in res.get("labels", []):
+            known[label["name"]] = known[label["id"]] = label["id"]
+        self._label_ids[user_email] = known
+        return known
+
+    def _modify(
+        self, service, user_email: str, change: LabelChange, ids: List[str]
+    ) -> Dict[str, str]:
+        """Apply ``change`` to ``ids`` in Gmail; returns ``{gmail_id: error}``."""
+        failed: Dict[str, str] = {}
+        chunks = [
+            ids[i : i + self.max_batch] for i in range(0, len(ids), self.max_batch)
+        ]
+        while chunks:
+            chunk = chunks.pop()
+            error = self._call_with_retries(service, user_email, change, chunk)
+            if error is None:
+                continue
+            message, per_message = error
+            if len(chunk) == 1 and per_message:
+                failed[chunk[0]] = message
+            elif per_message:
+                # Isolate the messages that make the batch fail
+                middle = len(chunk) // 2
+                chunks += [chunk[middle:], chunk[:middle]]
+            else:
+                # Not about particular messages: the rest would fail alike
+                for gmail_id in chunk + [i for c in chunks for i in c]:
+                    failed[gmail_id] = message
+                chunks = []
+                # A label deleted in Gmail is re-resolved next time
+                self._label_ids.pop(user_email, None)
+        return failed
+
+    def _call_with_retries(
+        self, service, user_email: str, change: LabelChange, chunk: List[str]
+    ) -> Optional[Tuple[str, bool]]:
+        """None on success, else ``(error, whether it blames messages)``."""
+        units = MODIFY_UNITS if len(chunk) == 1 else BATCH_MODIFY_UNITS
+        for attempt in range(self.max_retries + 1):
+            self._bucket(user_email).acquire(units)
+            try:
+                self._call(service, change, chunk)
+                return None
+            except Exception as e:
+                status = _http_status(e)
+                if status not in RETRYABLE_STATUS or attempt == self.max_retries:
+                    message = f"HTTP {status}: {e}" if status else str(e)
+                    return message, _message_specific(e)
+                delay = min(self.backoff_cap, self.backoff_base * 2**attempt)
+                self._sleep(random.uniform(0, delay))
+        return None  # unreachable
+
+    @staticmethod
+    def _call(service, change: LabelChange, chunk: List[str]) -> None:
+        body = {"addLabelIds": list(change.add), "removeLabelIds": list(change.remove)}
+        messages = service.users().messages()
+        if len(chunk) == 1:
+            messages.modify(userId="me", id=chunk[0], body=body).execute()
+        else:
+            messages.batchModify(userId="me", body={"ids": chunk, **body}).execute()
+
+    def _update_db(self, user_email: str, change: LabelChange, ids: List[str]) -> None:
+        """One UPDATE (and one opportunity_state refresh) for the whole batch."""
+        if self.session_factory is None:
+            return
+        assignments = []
+        params: Dict[str, Any] = {"ids": ids, "owner": user_email}
+        if change.add or change.remove:
+            assignments.append(
+                "labels = ARRAY(SELECT DISTINCT label FROM unnest(array_cat("
+                "COALESCE(labels, ARRAY[]::varchar[]), CAST(:add AS varchar[])"
+                ")) AS label WHERE NOT (label = ANY(CAST(:remove AS varchar[]))))"
+            )
+            params.update(add=list(change.add), remove=list(change.remove))
+        for column, value in change.db_fields:
+            assignments.append(f"{column} = :set_{column}")
+            params[f"set_{column}"] = value
+        if not assignments:
+            return
+        sql = (
+            f"UPDATE emails SET {', '.join(assignments)} "
+            "WHERE gmail_id = ANY(:ids) AND owner_email = :owner"
+        )
+        db = self.session_factory()
+        try:
+            db.execute(text(sql), params)
+            if change.add or change.remove:
+                self._refresh_opportunity_state(db, user_email, ids)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def _refresh_opportunity_state(db, user_email: str, ids: List[str]) -> None:
+        """Re-derive ``opportunity_state`` of ``ids`` after their labels changed.
+
+        Does what the Email ``before_update`` listener does for ORM updates.
+        Classified emails are skipped: their state ignores labels.
+        """
+        rows = db.execute(
+            text(
+                "SELECT id, subject, sender, body_text, labels, category, "
+                "opportunity_state FROM emails "
+                "WHERE gmail_id = ANY(:ids) AND owner_email = :owner "
+                "AND is_real_opportunity IS NULL"
+            ),
+            {"ids": ids, "owner": user_email},
+        ).all()
+        changed = []
+        for row in rows:
+            email = SimpleNamespace(is_real_opportunity=None, **row._mapping)
+            state = email_opportunity_state(email)
+            if state != row.opportunity_state:
+                changed.append({"id": row.id, "state": state})
+        if changed:
+            db.execute(
+                text("UPDATE emails SET opportunity_state = :state WHERE id = :id"),
+                changed,
+            )
+
+    def _update_es(
+        self, user_email: str, change: LabelChange, ids: List[str]
+    ) -> Dict[str, str]:
+        """One bulk request for the whole batch; returns ``{gmail_id: error}``."""
+        if self.es is None:
+            return {}
+        fields = dict(change.es_fields)
+        if change.es_stamp:
+            fields[change.es_stamp] = datetime.now(timezone.utc).isoformat()
+        script = {
+            "source": ES_SCRIPT,
+            "lang": "painless",
+            "params": {
+                "owner": user_email,
+                "add": list(change.add),
+                "remove": list(change.remove),
+                "fields": fields,
+            },
+        }
+        operations: List[Dict[str, Any]] = []
+        for gmail_id in ids:
+            operations.append({"update": {"_index": self.index, "_id": gmail_id}})
+            operations.append({"script": script})
+        try:
+            res = self.es.bulk(operations=operations, refresh=True)
+        except Exception as e:
+            logger.warning("Search index update of %d emails failed: %s", len(ids), e)
+            return {gmail_id: f"es: {e}" for gmail_id in ids}
+        failed = {}
+        for item in res.get("items", []):
+            result = item.get("update", {})
+            if result.get("error"):
+                error = result["error"]
+                reason = error.get("reason") if isinstance(error, dict) else error
+                failed[result.get("_id")] = f"es: {reason}"
+            elif result.get("result") == "noop":
+                failed[result.get("_id")] = f"es: not owned by {user_email}"
+        return failed
+
+
+_batcher: Optional[GmailModifyBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher() -> GmailModifyBatcher:
+    """Process-wide batcher writing to the app database and search index."""
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            from ..db import SessionLocal
+            from ..es import ES_ENABLED, INDEX, es
+
+            _batcher = GmailModifyBatcher(
+                session_factory=SessionLocal,
+                es_client=es if ES_ENABLED else None,
+                index=INDEX,
+            )
+        return _batcher
@@ -0,0 +1,382 @@
+"""Run scheduled jobs once per trigger across API workers.
+
+Every API worker starts its own APScheduler (``app.scheduler``), so each
+trigger fires once per worker. Before running, a worker takes the job's
+lease and claims the trigger's *slot* (its un-jittered fire time):
+
+- LeaseTableBackend: one ``job_leases`` row per job, claimed with a single
+  conditional UPDATE (the lease is free or expired, and no earlier run
+  claimed this slot or a later one). Works on Postgres and SQLite.
+- RedisLockBackend: ``SET NX PX`` on the job's lock key, then the slot
+  fence under that lock (SCHEDULER_LOCK_REDIS_URL).
+
+Workers that lose either race skip the run; one whose timer fires after the
+winner finished still sees the claimed slot and skips. The holder renews the
+lease every third of its TTL while the job runs, so a run longer than the
+job's interval (or the TTL) never overlaps with itself. A crashed holder's
+lease expires after the TTL.
+
+Runs are exported as Prometheus metrics: duration, last success, failures,
+and skips by reason (``locked``: another run holds the lease, ``claimed``:
+the slot already ran, ``error``: the lock backend failed).
+"""
+
+import copy
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+from app.core.metrics import (
+    scheduler_job_duration_seconds,
+    scheduler_job_failures_total,
+    scheduler_job_last_success_timestamp,
+    scheduler_job_skipped_total,
+)
+
+logger = logging.getLogger(__name__)
+
+ACQUIRED = "acquired"
+LOCKED = "locked"
+CLAIMED = "claimed"
+ERROR = "error"
+
+OK = "ok"
+FAILED = "failed"
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    """SQLite hands back naive datetimes; everything here is UTC."""
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=timezone.utc)
+
+
+def default_holder() -> str:
+    """Identify this worker in lease rows and ``list_scheduled_jobs``."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+def trigger_slot(trigger, now: datetime, lookback: timedelta) -> Optional[datetime]:
+    """Latest fire time of ``trigger`` at or before ``now``, ignoring jitter.
+
+    Every worker computes the same slot for one trigger however its own
+    jittered start was delayed. None if the trigger did not fire within
+    ``lookback``.
+    """
+    trigger = copy.copy(trigger)
+    trigger.jitter = None
+    slot = None
+    fire = trigger.get_next_fire_time(None, now - lookback)
+    while fire is not None and fire <= now:
+        slot = fire
+        fire = trigger.get_next_fire_time(fire, fire + timedelta(microseconds=1))
+    return slot.astimezone(timezone.utc) if slot else None
+
+
+class LeaseTableBackend:
+    """Leases and slot claims in the ``job_leases`` table."""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+
+    def _claim(self, conn, job_id: str, holder: str, slot: datetime, ttl: float):
+        from app.models import JobLease
+
+        now = utcnow()
+        return conn.execute(
+            update(JobLease)
+            .where(
+                JobLease.job_id == job_id,
+                or_(JobLease.locked_until.is_(None), JobLease.locked_until < now),
+                or_(JobLease.last_fire_time.is_(None), JobLease.last_fire_time < slot),
+            )
+            .values(
+                holder=holder,
+                locked_until=now + timedelta(seconds=ttl),
+                last_fire_time=slot,
+                last_started_at=now,
+            )
+        ).rowcount
+
+    def acquire(self, job_id: str, holder: str, slot: datetime, ttl: float) -> str:
+        from app.models import JobLease
+
+        with self.engine.begin() as conn:
+            if self._claim(conn, job_id, holder, slot, ttl):
+                return ACQUIRED
+            row = conn.execute(
+                select(JobLease.locked_until).where(JobLease.job_id == job_id)
+            ).first()
+        if row is not None:
+            locked = row.locked_until and _utc(row.locked_until) >= utcnow()
+            return LOCKED if locked else CLAIMED
+
+        # First run of this job anywhere: create its row, then race for it
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(JobLease.__table__.insert().values(job_id=job_id))
+        except IntegrityError:
+            pass  # Another worker created it
+        return self.acquire(job_id, holder, slot, ttl)
+
+    def renew(self, job_id: str, holder: str, ttl: float) -> bool:
+        from app.models import JobLease
+
+        with self.engine.begin() as conn:
+            return bool(
+                conn.execute(
+                    update(JobLease)
+                    .where(JobLease.job_id == job_id, JobLease.holder == holder)
+                    .values(locked_until=utcnow() + timedelta(seconds=ttl))
+                ).rowcount
+            )
+
+    def release(self, job_id: str, holder: str, status: str, duration: float) -> None:
+        from app.models import JobLease
+
+        now = utcnow()
+        values: Dict[str, Any] = {
+            "holder": None,
+            "locked_until": None,
+            "last_finished_at": now,
+            "last_status": status,
+            "last_duration_seconds": duration,
+        }
+        if status == OK:
+            values["last_success_at"] = now
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(JobLease)
+                .where(JobLease.job_id == job_id, JobLease.holder == holder)
+                .values(**values)
+            )
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        from app.models import JobLease
+
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(JobLease).where(JobLease.job_id == job_id)
+            ).first()
+        if row is None:
+            return {}
+        locked = row.locked_until and _utc(row.locked_until) >= utcnow()
+        return {
+            "lock_holder": row.holder if locked else None,
+            "last_status": row.last_status,
+            "last_duration_seconds": row.last_duration_seconds,
+            "last_started_at": _utc(row.last_started_at),
+            "last_success_at": _utc(row.last_success_at),
+        }
+
+
+# Only the holder may extend or drop a lock
+RENEW_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisLockBackend:
+    """Leases as ``SET NX PX`` keys; the slot fence is checked under the lock."""
+
+    def __init__(self, client, prefix: str = "jobs:"):
+        self.client = client
+        self.prefix = prefix
+        self._renew = client.register_script(RENEW_LUA)
+        self._release = client.register_script(RELEASE_LUA)
+
+    def _key(self, job_id: str, kind: str) -> str:
+        return f"{self.prefix}{job_id}:{kind}"
+
+    def acquire(self, job_id: str, holder: str, slot: datetime, ttl: float) -> str:
+        lock = self._key(job_id, "lock")
+        if not self.client.set(lock, holder, nx=True, px=int(ttl * 1000)):
+            return LOCKED
+        fence = self._key(job_id, "slot")
+        last = self.client.get(fence)
+        if last is not None and float(last) >= slot.timestamp():
+            self._release(keys=[lock], args=[holder])
+            return CLAIMED
+        self.client.set(fence, slot.timestamp())
+        self.client.hset(
+            self._key(job_id, "last"), mapping={"started_at": utcnow().timestamp()}
+        )
+        return ACQUIRED
+
+    def renew(self, job_id: str, holder: str, ttl: float) -> bool:
+        return bool(
+            self._renew(
+                keys=[self._key(job_id, "lock")], args=[holder, int(ttl * 1000)]
+            )
+        )
+
+    def release(self, job_id: str, holder: str, status: str, duration: float) -> None:
+        last = {"status": status, "duration": duration}
+        if status == OK:
+            last["success_at"] = utcnow().timestamp()
+        self.client.hset(self._key(job_id, "last"), mapping=last)
+        self._release(keys=[self._key(job_id, "lock")], args=[holder])
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        def text(value):
+            return value.decode() if isinstance(value, bytes) else value
+
+        def when(value):
+            if value is None:
+                return None
+            return datetime.fromtimestamp(float(value), timezone.utc)
+
+        holder = self.client.get(self._key(job_id, "lock"))
+        last = {
+            text(k): text(v)
+            for k, v in (self.client.hgetall(self._key(job_id, "last")) or {}).items()
+        }
+        duration = last.get("duration")
+        return {
+            "lock_holder": text(holder),
+            "last_status": last.get("status"),
+            "last_duration_seconds": float(duration) if duration else None,
+            "last_started_at": when(last.get("started_at")),
+            "last_success_at": when(last.get("success_at")),
+        }
+
+
+class JobCoordinator:
+    """Run jobs under their lease, renewing it while they run.
+
+    Args:
+        backend: LeaseTableBackend or RedisLockBackend shared by all workers
+        holder: This worker's identity (default: host, pid and a random tag)
+        ttl: Lease lifetime in seconds; renewed every ``ttl / 3`` while running
+    """
+
+    def __init__(self, backend, holder: Optional[str] = None, ttl: float = 300.0):
+        self.backend = backend
+        self.holder = holder or default_holder()
+        self.ttl = ttl
+
+    def run(self, job_id: str, func: Callable[[], Any], slot: datetime) -> str:
+        """Run ``func`` if this worker wins ``slot``.
+
+        Returns ``ok`` or ``failed`` for a run, else the skip reason
+        (``locked``, ``claimed`` or ``error``). Job exceptions are logged
+        and counted, never raised: the scheduler would only log them again.
+        """
+        try:
+            acquired = self.backend.acquire(job_id, self.holder, slot, self.ttl)
+        except Exception as e:
+            logger.error(f"Job {job_id}: lock backend failed, skipping run: {e}")
+            acquired = ERROR
+        if acquired != ACQUIRED:
+            logger.info(f"Job {job_id}: skipped ({acquired}) for {slot.isoformat()}")
+            scheduler_job_skipped_total.labels(job=job_id, reason=acquired).inc()
+            return acquired
+
+        stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._renew_until,
+            args=(job_id, stop),
+            name=f"job-lease-{job_id}",
+            daemon=True,
+        )
+        heartbeat.start()
+        status = FAILED
+        start = perf_counter()
+        try:
+            func()
+            status = OK
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}", exc_info=True)
+        finally:
+            duration = perf_counter() - start
+            stop.set()
+            heartbeat.join()
+            self._finish(job_id, status, duration)
+        return status
+
+    def _renew_until(self, job_id: str, stop: threading.Event) -> None:
+        while not stop.wait(self.ttl / 3):
+            try:
+                if not self.backend.renew(job_id, self.holder, self.ttl):
+                    logger.warning(f"Job {job_id}: lease lost while running")
+            except Exception as e:
+                logger.warning(f"Job {job_id}: lease renewal failed: {e}")
+
+    def _finish(self, job_id: str, status: str, duration: float) -> None:
+        scheduler_job_duration_seconds.labels(job=job_id).observe(duration)
+        if status == OK:
+            scheduler_job_last_success_timestamp.labels(
+                job=job_id
+            ).set_to_current_time()
+        else:
+            scheduler_job_failures_total.labels(job=job_id).inc()
+        try:
+            self.backend.release(job_id, self.holder, status, duration)
+        except Exception as e:
+            # The lease expires after its TTL
+            logger.error(f"Job {job_id}: failed to release lease: {e}")
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        """Lock holder and last run of ``job_id``, as seen by all workers."""
+        try:
+            return self.backend.status(job_id)
+        except Exception as e:
+            logger.warning(f"Job {job_id}: lease status unavailable: {e}")
+            return {}
+
+
+def build_backend(redis_url: Optional[str]):
+    """Redis leases when a URL is configured, the lease table otherwise."""
+    from app.db import engine
+
+    if redis_url:
+        try:
+            import redis
+
+            backend = RedisLockBackend(redis.from_url(redis_url))
+            logger.info("Scheduler job locks using Redis")
+            return backend
+        except Exception as e:
+            logger.error(f"Failed to initialize Redis job locks: {e}")
+    return LeaseTableBackend(engine)
+
+
+_coordinator: Optional[JobCoordinator] = None
+_coordinator_lock = threading.Lock()
+
+
+def get_coordinator() -> JobCoordinator:
+    """Process-wide coordinator configured from SCHEDULER_LOCK_* settings."""
+    global _coordinator
+    with _coordinator_lock:
+        if _coordinator is None:
+            from app.config import agent_settings
+
+            _coordinator = JobCoordinator(
+                build_backend(agent_settings.SCHEDULER_LOCK_REDIS_URL),
+                ttl=agent_settings.SCHEDULER_LOCK_TTL_SEC,
+            )
+        return _coordinator
@@ -2,11 +2,22 @@
 Phase 6: Online learner for per-user personalization.
 
 Learns feature weights from user approve/reject feedback using online gradient descent.
+
+Scoring reads a user's whole weight vector once into an in-process cache
+instead of querying one row per feature. A cached vector is trusted for
+LEARNER_WEIGHTS_TTL_SECONDS; after that it is revalidated against a cheap
+version token (row count + latest updated_at) and only reloaded when the
+weights actually changed. Feedback applied through update_user_weights drops
+the cached vector immediately.
 """
 
+import os
+import time
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from ..models import UserWeight
@@ -14,6 +25,12 @@ from ..models import UserWeight
 # Learning rate for online gradient descent
 ETA = 0.2
 
+# How long a cached weight vector is used without revalidating it
+WEIGHTS_TTL_SECONDS = float(os.getenv("LEARNER_WEIGHTS_TTL_SECONDS", "30"))
+
+# user_id -> (version token, checked_at monotonic seconds, feature -> weight)
+_weights_cache: Dict[str, Tuple[Tuple[int, Any], float, Dict[str, float]]] = {}
+
 
 def featureize(email: Any) -> List[str]:
     """
@@ -88,6 +105,77 @@ def featureize(email: Any) -> List[str]:
     return feats
 
 
+def _weights_version(db: Session, user_id: str) -> Tuple[int, Any]:
+    """Version token for a user's weights: (row count, latest updated_at)."""
+    count, latest = (
+        db.query(func.count(UserWeight.id), func.max(UserWeight.updated_at))
+        .filter(UserWeight.user_id == user_id)
+        .one()
+    )
+    return int(count or 0), latest
+
+
+def _fetch_user_weights(db: Session, user_id: str) -> Dict[str, float]:
+    """Read a user's whole weight vector in one query."""
+    rows = (
+        db.query(UserWeight.feature, UserWeight.weight)
+        .filter(UserWeight.user_id == user_id)
+        .all()
+    )
+    return {feature: weight or 0.0 for feature, weight in rows}
+
+
+def _weights_upsert(user_id: str, feats: List[str], delta: float, now: datetime):
+    """INSERT ... ON CONFLICT statement adding ``delta`` to each feature weight."""
+    stmt = pg_insert(UserWeight).values(
+        [
+            {"user_id": user_id, "feature": f, "weight": delta, "updated_at": now}
+            for f in feats
+        ]
+    )
+    return stmt.on_conflict_do_update(
+        constraint="uq_user_feature",
+        set_={
+            "weight": func.coalesce(UserWeight.weight, 0.0) + stmt.excluded.weight,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+
+
+def invalidate_user_weights(user_id: Optional[str] = None) -> None:
+    """Drop the cached weight vector for one user (or every user)."""
+    if user_id is None:
+        _weights_cache.clear()
+    else:
+        _weights_cache.pop(user_id, None)
+
+
+def load_user_weights(db: Session, user_id: str) -> Dict[str, float]:
+    """
+    Get a user's full weight vector (feature -> weight), cached in process.
+
+    Args:
+        db: Database session
+        user_id: User identifier (email)
+
+    Returns:
+        Dict of learned weights; treat it as read-only
+    """
+    now = time.monotonic()
+    cached = _weights_cache.get(user_id)
+    if cached and now - cached[1] < WEIGHTS_TTL_SECONDS:
+        return cached[2]
+
+    version = _weights_version(db, user_id)
+    if cached and cached[0] == version:
+        _weights_cache[user_id] = (version, now, cached[2])
+        return cached[2]
+
+    weights = _fetch_user_weights(db, user_id)
+    _weights_cache[user_id] = (version, now, weights)
+    return weights
+
+
 def update_user_weights(db: Session, user_id: str, email: Any, label: int) -> None:
     """
     Update user feature weights using online gradient descent.
@@ -98,26 +186,28 @@ def update_user_weights(db: Session, user_id: str, email: Any, label: int) -> No
     - y (label) = +1 for approve (good), -1 for reject (bad)
     - x = 1 for feature presence (binary features)
 
+    All features are written with one INSERT ... ON CONFLICT DO UPDATE, so
+    concurrent feedback for the same user adds up instead of racing.
+
     Args:
         db: Database session
         user_id: User identifier (email)
         email: Email object or dict
         label: +1 for approve, -1 for reject
     """
-    feats = featureize(email)
+    feats = list(dict.fromkeys(featureize(email)))
+    if not feats:
+        return
 
-    for f in feats:
-        # Get or create weight entry
-        row = db.query(UserWeight).filter_by(user_id=user_id, feature=f).one_or_none()
-        if not row:
-            row = UserWeight(user_id=user_id, feature=f, weight=0.0)
-            db.add(row)
+    # Apply gradient update: w ← w + η * y * x (where x=1)
+    db.execute(_weights_upsert(user_id, feats, ETA * label * 1.0, datetime.utcnow()))
+    db.commit()
+    invalidate_user_weights(user_id)
 
-        # Apply gradient update: w ← w + η * y * x (where x=1)
-        row.weight = row.weight + ETA * label * 1.0
-        row.updated_at = datetime.utcnow()
 
-    db.commit()
+def score_with_weights(weights: Dict[str, float], feats: Iterable[str]) -> float:
+    """Sum the weights of the given features from an already-loaded vector."""
+    return sum(weights.get(f, 0.0) for f in feats)
 
 
 def score_ctx_with_user(db: Session, user_id: str, feats: List[str]) -> float:
@@ -132,12 +222,29 @@ def score_ctx_with_user(db: Session, user_id: str, feats: List[str]) -> float:
     Returns:
         Sum of weights for all features present
     """
-    tot = 0.0
-    for f in feats:
-        w = db.query(UserWeight).filter_by(user_id=user_id, feature=f).one_or_none()
-        if w:
-            tot += w.weight
-    return tot
+    if not feats:
+        return 0.0
+    return score_with_weights(load_user_weights(db, user_id), feats)
+
+
+def score_batch_with_user(
+    db: Session, user_id: str, feat_lists: Sequence[List[str]]
+) -> List[float]:
+    """
+    Score many contexts for one user against a single load of their weights.
+
+    Args:
+        db: Database session
+        user_id: User identifier (email)
+        feat_lists: One feature list per context (from featureize())
+
+    Returns:
+        One score per feature list, in order
+    """
+    if not feat_lists:
+        return []
+    weights = load_user_weights(db, user_id)
+    return [score_with_weights(weights, feats) for feats in feat_lists]
 
 
 def get_user_preferences(
@@ -1,99 +1,325 @@
 """Rate limiting middleware for API endpoints.
 
-Provides in-memory token bucket rate limiting for /auth/* endpoints.
-Protects against brute force attacks and abuse during high traffic.
+Limits /auth/* and /api/suggest per client IP with a GCRA (generic cell rate
+algorithm) limiter, a sliding-window equivalent that stores one timestamp per
+key: the "theoretical arrival time" (TAT) of the next request.
+
+Backends:
+- MemoryBackend: per-process dict with TTL eviction of idle keys.
+- RedisBackend: shared across workers (RATE_LIMIT_REDIS_URL); each decision is
+  a single Lua round-trip. Workers pre-allocate small token leases so most
+  requests are decided locally, and fall back to the in-process backend if
+  Redis is unavailable.
 """
 
-import time
-import hashlib
 import logging
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
+
 from app.config import agent_settings
-from app.core.metrics import rate_limit_exceeded_total, rate_limit_allowed_total
+from app.core.metrics import (
+    rate_limit_allowed_total,
+    rate_limit_backend_errors_total,
+    rate_limit_exceeded_total,
+)
 
 logger = logging.getLogger(__name__)
 
 
-class MemoryBucket:
-    """In-memory token bucket rate limiter.
+def gcra(
+    tat: Optional[float], now: float, interval: float, window: float, units: int
+) -> Tuple[bool, float, float]:
+    """Apply one GCRA step.
+
+    Args:
+        tat: Stored theoretical arrival time for the key (None if unseen)
+        now: Current time in seconds
+        interval: Seconds per unit (window / capacity)
+        window: Time window in seconds (burst of ``capacity`` units)
+        units: Units requested
 
-    Uses a simple token bucket algorithm with per-IP, per-path tracking.
-    For multi-instance deployments, use Redis-backed implementation.
+    Returns:
+        (allowed, new_tat, retry_after). ``new_tat`` equals ``tat`` when
+        the request is denied.
     """
+    base = max(tat or now, now)
+    new_tat = base + interval * units
+    allow_at = new_tat - window
+    if allow_at > now:
+        return False, base, allow_at - now
+    return True, new_tat, 0.0
 
-    def __init__(self, capacity: int, window: int):
-        """Initialize bucket limiter.
 
-        Args:
-            capacity: Maximum requests allowed per window
-            window: Time window in seconds
-        """
-        self.capacity = capacity
-        self.window = window
-        self.tokens = {}  # {key: {"ts": timestamp, "count": count}}
-        logger.info(f"Rate limiter initialized: {capacity} req/{window}sec")
+# Same step as gcra(); values are stored as strings with a PX expiry so idle
+# keys disappear on their own.
+GCRA_LUA = """
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local window = tonumber(ARGV[3])
+local units = tonumber(ARGV[4])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+  tat = now
+end
+local new_tat = tat + interval * units
+local allow_at = new_tat - window
+if allow_at > now then
+  return {0, tostring(allow_at - now)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX',
+           math.max(1, math.ceil((new_tat - now) * 1000)))
+return {1, '0'}
+"""
 
-    def _key(self, ip: str, path: str) -> str:
-        """Generate unique key for IP + path combination.
 
-        Args:
-            ip: Client IP address
-            path: Request path
+@dataclass(frozen=True)
+class RateLimitDecision:
+    allowed: bool
+    retry_after: float = 0.0
 
-        Returns:
-            SHA256 hash of IP:path
-        """
-        return hashlib.sha256(f"{ip}:{path}".encode()).hexdigest()
 
-    def allow(self, ip: str, path: str) -> bool:
-        """Check if request is allowed under rate limit.
+class MemoryBackend:
+    """In-process GCRA store with TTL eviction.
 
-        Args:
-            ip: Client IP address
-            path: Request path
+    A key whose TAT is in the past carries no state, so it is dropped by a
+    periodic sweep instead of being kept forever.
+    """
 
-        Returns:
-            True if request allowed, False if rate limited
-        """
-        now = int(time.time())
-        key = self._key(ip, path)
-        bucket = self.tokens.get(key)
-
-        # New window or expired bucket
-        if not bucket or now - bucket["ts"] >= self.window:
-            self.tokens[key] = {"ts": now, "count": 1}
-            return True
-
-        # Within window, check capacity
-        if bucket["count"] < self.capacity:
-            bucket["count"] += 1
-            return True
-
-        # Rate limited
-        logger.warning(
-            f"Rate limit exceeded: {ip} on {path} ({bucket['count']}/{self.capacity})"
+    remote = False
+
+    def __init__(self, sweep_interval: float = 60.0):
+        self.sweep_interval = sweep_interval
+        self.tats: Dict[str, float] = {}
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    def _sweep(self, now: float) -> None:
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.sweep_interval
+        expired = [key for key, tat in self.tats.items() if tat <= now]
+        for key in expired:
+            del self.tats[key]
+
+    async def take(
+        self, key: str, interval: float, window: float, units: int
+    ) -> Tuple[bool, float]:
+        now = time.monotonic()
+        self._sweep(now)
+        allowed, new_tat, retry_after = gcra(
+            self.tats.get(key), now, interval, window, units
         )
-        return False
+        if allowed:
+            self.tats[key] = new_tat
+        return allowed, retry_after
+
+
+class RedisBackend:
+    """Shared GCRA store; one EVALSHA per decision."""
+
+    remote = True
+
+    def __init__(self, client, prefix: str = "rl:"):
+        self.prefix = prefix
+        self._script = client.register_script(GCRA_LUA)
+
+    async def take(
+        self, key: str, interval: float, window: float, units: int
+    ) -> Tuple[bool, float]:
+        allowed, retry_after = await self._script(
+            keys=[self.prefix + key], args=[time.time(), interval, window, units]
+        )
+        return bool(int(allowed)), float(retry_after)
+
+
+@dataclass
+class _Lease:
+    units: int
+    expires_at: float
+
+
+class RateLimiter:
+    """GCRA limiter over a backend, with local leases for remote backends.
+
+    With a remote backend each worker reserves ``prefetch`` requests' worth of
+    units at once and spends them locally for up to ``lease_seconds``; denials
+    are remembered locally for the same period. Backend errors fall back to
+    the in-process backend so limits keep applying per worker.
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        prefetch: int = 1,
+        lease_seconds: float = 1.0,
+    ):
+        self.fallback = MemoryBackend()
+        self.backend = backend or self.fallback
+        self.prefetch = max(1, prefetch) if self.backend.remote else 1
+        self.lease_seconds = lease_seconds
+        self._leases: Dict[str, _Lease] = {}
+        self._blocked: Dict[str, float] = {}
+        self._next_sweep = time.monotonic() + 60.0
+
+    def _sweep(self, now: float) -> None:
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + 60.0
+        self._leases = {k: v for k, v in self._leases.items() if v.expires_at > now}
+        self._blocked = {k: t for k, t in self._blocked.items() if t > now}
+
+    async def _take(
+        self, key: str, interval: float, window: float, units: int
+    ) -> Tuple[bool, float]:
+        try:
+            return await self.backend.take(key, interval, window, units)
+        except Exception as exc:
+            rate_limit_backend_errors_total.inc()
+            logger.warning(f"Rate limit backend failed, using local limits: {exc}")
+            return await self.fallback.take(key, interval, window, units)
+
+    async def hit(
+        self, key: str, capacity: int, window: int, cost: int = 1
+    ) -> RateLimitDecision:
+        """Consume ``cost`` units for ``key`` under ``capacity`` per ``window``."""
+        interval = window / capacity
+        if self.prefetch == 1:
+            allowed, retry_after = await self._take(key, interval, window, cost)
+            return RateLimitDecision(allowed, retry_after)
+
+        now = time.monotonic()
+        self._sweep(now)
+
+        blocked_until = self._blocked.get(key)
+        if blocked_until is not None and blocked_until > now:
+            return RateLimitDecision(False, blocked_until - now)
+
+        lease = self._leases.get(key)
+        if lease and lease.expires_at > now and lease.units >= cost:
+            lease.units -= cost
+            return RateLimitDecision(True)
+
+        # Reserve a batch; near the limit fall back to exactly this request
+        batch = cost * self.prefetch
+        allowed, retry_after = await self._take(key, interval, window, batch)
+        if not allowed:
+            batch = cost
+            allowed, retry_after = await self._take(key, interval, window, batch)
+
+        if not allowed:
+            self._leases.pop(key, None)
+            self._blocked[key] = now + min(retry_after, self.lease_seconds)
+            return RateLimitDecision(False, retry_after)
+
+        self._blocked.pop(key, None)
+        if batch > cost:
+            self._leases[key] = _Lease(batch - cost, now + self.lease_seconds)
+        return RateLimitDecision(True)
+
+
+@dataclass
+class RateLimitRule:
+    """Limit for requests whose path starts with ``prefix``.
+
+    ``costs`` maps path prefixes to weights; the longest match wins and
+    unlisted paths cost 1.
+    """
+
+    prefix: str
+    capacity: int
+    window: int
+    costs: Dict[str, int] = field(default_factory=dict)
+
+    def matches(self, path: str) -> bool:
+        return path.startswith(self.prefix)
+
+    def cost_for(self, path: str) -> int:
+        best, cost = "", 1
+        for prefix, weight in self.costs.items():
+            if path.startswith(prefix) and len(prefix) > len(best):
+                best, cost = prefix, weight
+        return cost
+
+
+# Auth endpoints that do real work (token exchange, session creation)
+AUTH_ROUTE_COSTS = {
+    "/auth/google/callback": 2,
+    "/auth/demo/start": 2,
+}
+
+
+def default_rules(capacity: int, window: int) -> List[RateLimitRule]:
+    """Suggest gets stricter limits (20 req/min as recommended)."""
+    return [
+        RateLimitRule("/api/suggest", capacity=20, window=60),
+        RateLimitRule("/auth/", capacity, window, costs=dict(AUTH_ROUTE_COSTS)),
+    ]
+
+
+def build_limiter(
+    redis_url: Optional[str], prefetch: int = 1, lease_seconds: float = 1.0
+) -> RateLimiter:
+    """Redis-backed limiter when a URL is configured, in-process otherwise."""
+    if not redis_url:
+        return RateLimiter()
+    try:
+        import redis.asyncio as redis
+
+        client = redis.from_url(redis_url)
+        backend = RedisBackend(client)
+    except Exception as exc:
+        logger.error(f"Failed to initialize Redis rate limiter: {exc}")
+        return RateLimiter()
+    logger.info("Rate limiter using Redis backend")
+    return RateLimiter(backend, prefetch=prefetch, lease_seconds=lease_seconds)
+
+
+def _client_ip(request: Request) -> str:
+    # Extract real client IP from X-Forwarded-For header (first IP in chain)
+    forwarded_for = request.headers.get("X-Forwarded-For")
+    if forwarded_for:
+        # Take first IP (actual client), not last (proxy)
+        return forwarded_for.split(",")[0].strip()
+    return request.client.host if request.client else "0.0.0.0"
 
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
-    """FastAPI middleware for rate limiting auth endpoints.
+    """FastAPI middleware for rate limiting auth and suggest endpoints.
 
-    Limits requests to /auth/* paths based on IP address.
+    Limits each (IP, path) pair by the first matching rule.
     Returns 429 Too Many Requests when limit exceeded.
     """
 
-    def __init__(self, app, capacity: int, window: int):
+    def __init__(
+        self,
+        app,
+        capacity: int,
+        window: int,
+        redis_url: Optional[str] = None,
+        prefetch: int = 1,
+        lease_seconds: float = 1.0,
+        limiter: Optional[RateLimiter] = None,
+        rules: Optional[List[RateLimitRule]] = None,
+    ):
         """Initialize middleware.
 
         Args:
             app: FastAPI application
-            capacity: Max requests per window
-            window: Time window in seconds
+            capacity: Max requests per window for /auth/*
+            window: Time window in seconds for /auth/*
+            redis_url: Share limits across workers through this Redis
+            prefetch: Requests' worth of units each worker reserves per Redis call
+            lease_seconds: How long reserved units (and denials) are kept locally
+            limiter: Use this limiter instead of building one
+            rules: Override the default rules
         """
         super().__init__(app)
-        self.mem = MemoryBucket(capacity, window)
+        self.rules = rules or default_rules(capacity, window)
+        self.limiter = limiter or build_limiter(redis_url, prefetch, lease_seconds)
         logger.info("Rate limit middleware registered")
 
     async def dispatch(self, request: Request, call_next):
@@ -110,59 +336,29 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             return await call_next(request)
 
         path = request.url.path
+        rule = next((r for r in self.rules if r.matches(path)), None)
+        if rule is None:
+            return await call_next(request)
+
+        ip = _client_ip(request)
+        decision = await self.limiter.hit(
+            f"{ip}:{path}", rule.capacity, rule.window, rule.cost_for(path)
+        )
+        metric_path = rule.prefix if rule.prefix == "/api/suggest" else path
 
-        # Only limit auth endpoints and suggest endpoint (prevent spam)
-        if path.startswith("/auth/") or path.startswith("/api/suggest"):
-            # Extract real client IP from X-Forwarded-For header (first IP in chain)
-            forwarded_for = request.headers.get("X-Forwarded-For")
-            if forwarded_for:
-                # Take first IP (actual client), not last (proxy)
-                ip = forwarded_for.split(",")[0].strip()
-            else:
-                ip = request.client.host if request.client else "0.0.0.0"
-
-            # Use stricter limits for suggest endpoint (20 req/min as recommended)
-            if path.startswith("/api/suggest"):
-                # Create separate bucket with tighter limits for suggest
-                suggest_capacity = 20
-                suggest_window = 60  # 1 minute
-                if not hasattr(self, "suggest_bucket"):
-                    self.suggest_bucket = MemoryBucket(suggest_capacity, suggest_window)
-
-                if not self.suggest_bucket.allow(ip, path):
-                    logger.warning(f"Suggest rate limit exceeded: {ip} on {path}")
-                    ip_prefix = (
-                        ".".join(ip.split(".")[:2]) + ".*.*" if "." in ip else "unknown"
-                    )
-                    rate_limit_exceeded_total.labels(
-                        path="/api/suggest", ip_prefix=ip_prefix
-                    ).inc()
-                    return Response(
-                        "Too Many Requests - Please slow down",
-                        status_code=429,
-                        headers={"Retry-After": "60"},
-                    )
-                rate_limit_allowed_total.labels(path="/api/suggest").inc()
-            else:
-                # Auth endpoints use default limits
-                if not self.mem.allow(ip, path):
-                    logger.warning(f"Rate limit exceeded: {ip} on {path}")
-                    # Track metric with IP prefix for privacy (first 2 octets only)
-                    ip_prefix = (
-                        ".".join(ip.split(".")[:2]) + ".*.*" if "." in ip else "unknown"
-                    )
-                    rate_limit_exceeded_total.labels(
-                        path=path, ip_prefix=ip_prefix
-                    ).inc()
-                    return Response(
-                        "Too Many Requests - Please slow down",
-                        status_code=429,
-                        headers={
-                            "Retry-After": str(agent_settings.RATE_LIMIT_WINDOW_SEC)
-                        },
-                    )
-
-                # Request allowed
-                rate_limit_allowed_total.labels(path=path).inc()
+        if not decision.allowed:
+            logger.warning(f"Rate limit exceeded: {ip} on {path}")
+            # Track metric with IP prefix for privacy (first 2 octets only)
+            ip_prefix = ".".join(ip.split(".")[:2]) + ".*.*" if "." in ip else "unknown"
+            rate_limit_exceeded_total.labels(
+                path=metric_path, ip_prefix=ip_prefix
+            ).inc()
+            return Response(
+                "Too Many Requests - Please slow down",
+                status_code=429,
+                headers={"Retry-After": str(max(1, math.ceil(decision.retry_after)))},
+            )
 
+        # Request allowed
+        rate_limit_allowed_total.labels(path=metric_path).inc()
         return await call_next(request)
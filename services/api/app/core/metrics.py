@@ -10,7 +10,13 @@ This module provides counters and gauges for monitoring:
 Metrics are exposed via /metrics endpoint for Prometheus scraping.
 """
 
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
 from fastapi import APIRouter, Response
 import time
 
@@ -61,6 +67,11 @@ rate_limit_allowed_total = Counter(
     ["path"],
 )
 
+rate_limit_backend_errors_total = Counter(
+    "applylens_rate_limit_backend_errors_total",
+    "Rate limit decisions that fell back to in-process limits after a backend error",
+)
+
 # Authentication Metrics
 auth_attempt_total = Counter(
     "applylens_auth_attempt_total",
@@ -136,6 +147,110 @@ applications_created_from_thread_total = Counter(
     "Total number of applications created from mailbox threads",
 )
 
+# Cache Metrics (app.utils.cache); namespace is the key prefix before ":"
+cache_requests_total = Counter(
+    "applylens_cache_requests_total",
+    "Cache lookups by tier (local, redis) and result (hit, miss, error)",
+    ["namespace", "tier", "result"],
+)
+
+cache_latency_seconds = Histogram(
+    "applylens_cache_latency_seconds",
+    "Latency of cache operations (get, set, compute)",
+    ["namespace", "op"],
+)
+
+cache_early_refresh_total = Counter(
+    "applylens_cache_early_refresh_total",
+    "Background refreshes started before expiry to avoid stampedes",
+    ["namespace"],
+)
+
+# Auto-match Scheduler Metrics (app.services.opportunity_auto_match)
+auto_match_queue_depth = Gauge(
+    "applylens_auto_match_queue_depth",
+    "Users waiting for their next auto-match slice",
+)
+
+auto_match_opportunities_total = Counter(
+    "applylens_auto_match_opportunities_total",
+    "Opportunities matched by the nightly auto-match run",
+)
+
+auto_match_slices_total = Counter(
+    "applylens_auto_match_slices_total",
+    "Per-user auto-match slices by outcome (ok, error)",
+    ["outcome"],
+)
+
+auto_match_slice_seconds = Histogram(
+    "applylens_auto_match_slice_seconds",
+    "Duration of one per-user auto-match slice",
+)
+
+# Autocomplete Index Metrics (app.logic.suggest_index)
+suggest_index_entries = Gauge(
+    "applylens_suggest_index_entries",
+    "Entries held by the in-process autocomplete index, all users",
+)
+
+suggest_index_users = Gauge(
+    "applylens_suggest_index_users",
+    "Users with an autocomplete index in memory",
+)
+
+suggest_requests_total = Counter(
+    "applylens_suggest_requests_total",
+    "Suggest requests by where they were answered (local, es)",
+    ["source"],
+)
+
+# SQL Query Accounting Metrics (app.core.query_stats); route is the template
+db_queries_per_request = Histogram(
+    "applylens_db_queries_per_request",
+    "SQL statements executed per HTTP request",
+    ["route"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+
+db_time_per_request_seconds = Histogram(
+    "applylens_db_time_per_request_seconds",
+    "Time spent in SQL statements per HTTP request",
+    ["route"],
+)
+
+db_n_plus_one_total = Counter(
+    "applylens_db_n_plus_one_total",
+    "Statements repeated past N_PLUS_ONE_THRESHOLD in one request or job",
+    ["context"],
+)
+
+# Scheduler Metrics (app.core.job_locks); job is the APScheduler job id
+scheduler_job_duration_seconds = Histogram(
+    "applylens_scheduler_job_duration_seconds",
+    "Duration of scheduled job runs",
+    ["job"],
+    buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600),
+)
+
+scheduler_job_last_success_timestamp = Gauge(
+    "applylens_scheduler_job_last_success_timestamp_seconds",
+    "Unix time of the job's last successful run on this worker",
+    ["job"],
+)
+
+scheduler_job_failures_total = Counter(
+    "applylens_scheduler_job_failures_total",
+    "Scheduled job runs that raised",
+    ["job"],
+)
+
+scheduler_job_skipped_total = Counter(
+    "applylens_scheduler_job_skipped_total",
+    "Scheduled runs skipped by reason (locked, claimed, error)",
+    ["job", "reason"],
+)
+
 
 # Helper Functions
 def track_crypto_operation(operation: str):
@@ -0,0 +1,304 @@
+"""SQL query accounting and N+1 detection.
+
+A cursor-level hook on the engine (installed by ``app.db``) counts every
+statement executed while a ``track_queries`` context is active: its number,
+the time spent in the database and how often each statement *fingerprint*
+(the SQL with literals, placeholders and expanded IN lists collapsed) ran.
+
+Contexts are opened by ``QueryAccountingMiddleware`` for each HTTP request
+(exported as Prometheus histograms per route template and, outside
+production, as ``X-DB-Queries`` / ``X-DB-Time-Ms`` response headers), by the
+scheduler for each job, and by scripts around their work. They are stored in
+a contextvar, so sync endpoints running in the threadpool and async code
+awaiting in the same request share one context.
+
+A fingerprint executed more than ``N_PLUS_ONE_THRESHOLD`` times in a context
+is reported once, with the stack of its first call site. With
+``N_PLUS_ONE_RAISE`` (meant for tests) it raises ``NPlusOneError`` instead.
+"""
+
+import logging
+import re
+import sys
+import sysconfig
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache, wraps
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import agent_settings
+
+logger = logging.getLogger(__name__)
+
+QUERIES_HEADER = "X-DB-Queries"
+TIME_HEADER = "X-DB-Time-Ms"
+
+# Frames from these directories are left out of reported call sites
+_LIBRARY_DIRS = tuple(
+    {sysconfig.get_paths()[key] for key in ("stdlib", "purelib", "platlib")}
+)
+_STACK_DEPTH = 12
+
+_current: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+
+
+class NPlusOneError(RuntimeError):
+    """A statement ran more than ``N_PLUS_ONE_THRESHOLD`` times in one context."""
+
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|\?")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROWS = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """Normalize a statement so repeats with different values compare equal.
+
+    String and number literals and bound parameters become ``?``; a
+    parenthesized list of them (an expanded ``IN``, one ``VALUES`` row)
+    becomes ``(?)`` and repeated rows collapse to one.
+    """
+    sql = _STRING.sub("?", statement)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _LIST.sub("(?)", sql)
+    sql = _ROWS.sub("(?)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+@dataclass
+class QueryStats:
+    """Statements executed in one request, job or script run.
+
+    Attributes:
+        name: What is being accounted (route template, job or script name)
+        threshold: Repeats of one fingerprint tolerated before flagging
+        raise_on_n_plus_one: Raise ``NPlusOneError`` instead of logging
+        count: Statements executed
+        seconds: Time spent executing them
+        fingerprints: Executions per fingerprint
+        call_sites: ``(file, line, function)`` frames of the first execution
+            of each fingerprint, innermost first
+        flagged: Fingerprints reported as N+1
+    """
+
+    name: str
+    threshold: int = field(default_factory=lambda: agent_settings.N_PLUS_ONE_THRESHOLD)
+    raise_on_n_plus_one: bool = field(
+        default_factory=lambda: agent_settings.N_PLUS_ONE_RAISE
+    )
+    count: int = 0
+    seconds: float = 0.0
+    fingerprints: Dict[str, int] = field(default_factory=dict)
+    call_sites: Dict[str, List[Tuple[str, int, str]]] = field(default_factory=dict)
+    flagged: List[str] = field(default_factory=list)
+
+    @property
+    def milliseconds(self) -> float:
+        return self.seconds * 1000
+
+    def record(self, statement: str, seconds: float) -> None:
+        """Account one execution; flag its fingerprint past the threshold."""
+        self.count += 1
+        self.seconds += seconds
+        fp = fingerprint(statement)
+        fingerprints = self.fingerprints
+        if fp in fingerprints:
+            n = fingerprints[fp] = fingerprints[fp] + 1
+            if n == self.threshold + 1:
+                self._flag(fp)
+        else:
+            fingerprints[fp] = 1
+            self.call_sites[fp] = _call_site()
+
+    def merge(self, other: "QueryStats") -> None:
+        """Add a nested context's statements to this one."""
+        self.count += other.count
+        self.seconds += other.seconds
+        for fp, n in other.fingerprints.items():
+            self.fingerprints[fp] = self.fingerprints.get(fp, 0) + n
+            self.call_sites.setdefault(fp, other.call_sites.get(fp, []))
+        self.flagged.extend(f for f in other.flagged if f not in self.flagged)
+
+    def repeated(self, limit: int = 5) -> List[Tuple[str, int]]:
+        """The ``limit`` most executed fingerprints with their counts."""
+        top = sorted(self.fingerprints.items(), key=lambda kv: kv[1], reverse=True)
+        return top[:limit]
+
+    def summary(self) -> str:
+        """Multi-line report of the counts, for logs and assertion messages."""
+        lines = [f"{self.count} queries in {self.milliseconds:.1f} ms ({self.name})"]
+        lines += [f"  {n:>5} x {fp[:200]}" for fp, n in self.repeated()]
+        return "\n".join(lines)
+
+    def _flag(self, fp: str) -> None:
+        self.flagged.append(fp)
+        message = (
+            f"Possible N+1 in {self.name}: statement ran more than "
+            f"{self.threshold} times\n  {fp[:500]}\nFirst call site:\n"
+            + format_call_site(self.call_sites.get(fp, []))
+        )
+        if self.raise_on_n_plus_one:
+            raise NPlusOneError(message)
+        logger.warning(message)
+
+
+def _call_site() -> List[Tuple[str, int, str]]:
+    """Application frames of the current stack, innermost first."""
+    frames = []
+    frame = sys._getframe(2)
+    while frame is not None and len(frames) < _STACK_DEPTH:
+        code = frame.f_code
+        if (
+            not code.co_filename.startswith(_LIBRARY_DIRS)
+            and code.co_filename != __file__
+        ):
+            frames.append((code.co_filename, frame.f_lineno, code.co_name))
+        frame = frame.f_back
+    return frames
+
+
+def format_call_site(frames: List[Tuple[str, int, str]]) -> str:
+    """Render ``QueryStats.call_sites`` frames like a traceback."""
+    return "\n".join(
+        f'  File "{filename}", line {lineno}, in {name}'
+        for filename, lineno, name in reversed(frames)
+    )
+
+
+def current() -> Optional[QueryStats]:
+    """The active context's stats, if any."""
+    return _current.get()
+
+
+@contextmanager
+def track_queries(
+    name: str,
+    threshold: Optional[int] = None,
+    raise_on_n_plus_one: Optional[bool] = None,
+) -> Iterator[QueryStats]:
+    """Account the statements executed inside the block.
+
+    Also usable as a decorator (``@track_queries("job_name")``). A context
+    opened inside another one (a request inside a test's budget) inherits
+    its N+1 settings and is merged into it on exit, so the outer context
+    covers everything its block ran.
+    """
+    parent = _current.get()
+    stats = QueryStats(name)
+    if parent is not None:
+        stats.threshold = parent.threshold
+        stats.raise_on_n_plus_one = parent.raise_on_n_plus_one
+    if threshold is not None:
+        stats.threshold = threshold
+    if raise_on_n_plus_one is not None:
+        stats.raise_on_n_plus_one = raise_on_n_plus_one
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+        if parent is not None:
+            parent.merge(stats)
+        elif stats.flagged:
+            from app.core.metrics import db_n_plus_one_total
+
+            db_n_plus_one_total.labels(context=stats.name).inc(len(stats.flagged))
+
+
+def _accounted(execute: Callable) -> Callable:
+    """Wrap a dialect ``do_execute*`` method to record into the context."""
+
+    @wraps(execute)
+    def accounted(cursor, statement, *args):
+        stats = _current.get()
+        if stats is None:
+            return execute(cursor, statement, *args)
+        start = perf_counter()
+        try:
+            return execute(cursor, statement, *args)
+        finally:
+            stats.record(statement, perf_counter() - start)
+
+    return accounted
+
+
+def install(engine: Engine) -> None:
+    """Account the statements ``engine`` executes (idempotent).
+
+    Wraps the dialect's ``do_execute``, ``do_executemany`` and
+    ``do_execute_no_params`` instead of listening for
+    ``before/after_cursor_execute``: any engine listener routes every
+    statement through SQLAlchemy's event dispatch (about 7 microseconds, a
+    quarter of a trivial SQLite query) where the wrappers cost under one.
+    """
+    dialect = engine.dialect
+    if getattr(dialect, "_query_stats_installed", False):
+        return
+    for name in ("do_execute", "do_executemany", "do_execute_no_params"):
+        setattr(dialect, name, _accounted(getattr(dialect, name)))
+    dialect._query_stats_installed = True
+
+
+def route_template(scope: Scope, routed: Scope) -> str:
+    """The matched route's full path template, e.g. ``/api/opportunities/{id}``.
+
+    ``scope`` is the request scope as received, ``routed`` the same scope
+    after routing. Resolved the way the HTTP metrics group paths, so both
+    share labels (``routed["route"]`` lacks included routers' prefixes).
+    """
+    from starlette_exporter.middleware import get_matching_route_path
+
+    router = routed.get("router")
+    if routed.get("endpoint") is None or router is None:
+        return "unmatched"
+    try:
+        return get_matching_route_path(scope, router.routes) or "unmatched"
+    except Exception:
+        return "unmatched"
+
+
+class QueryAccountingMiddleware:
+    """Account each HTTP request's statements under its route template.
+
+    Feeds ``db_queries_per_request`` / ``db_time_per_request_seconds`` and,
+    when ``headers`` is set, adds the counts to the response headers.
+    """
+
+    def __init__(self, app: ASGIApp, headers: bool = False):
+        self.app = app
+        self.headers = headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        from app.core.metrics import db_queries_per_request, db_time_per_request_seconds
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start" and self.headers:
+                headers = MutableHeaders(scope=message)
+                headers[QUERIES_HEADER] = str(stats.count)
+                headers[TIME_HEADER] = f"{stats.milliseconds:.1f}"
+            await send(message)
+
+        # Logged N+1s name the raw path; metrics use the route template
+        received = dict(scope)
+        with track_queries(f"{scope['method']} {scope['path']}") as stats:
+            try:
+                await self.app(scope, receive, send_with_headers)
+            finally:
+                stats.name = route = route_template(received, scope)
+                db_queries_per_request.labels(route=route).observe(stats.count)
+                db_time_per_request_seconds.labels(route=route).observe(stats.seconds)
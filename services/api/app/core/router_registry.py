@@ -0,0 +1,243 @@
+"""Lazy router registration.
+
+Importing every router module at startup pulls in most of the codebase (and
+sklearn, BigQuery, ...) before the app can answer a health check. Instead,
+``app.main`` registers routers here as ``"module:attr"`` targets together with
+the URL prefixes they serve. Each registration holds its place in the route
+table with a slot that never matches; the router module is imported and
+included in place of its slot the first time a request hits one of its
+prefixes, when the OpenAPI schema is built, or when ``preload`` runs in the
+background after startup.
+
+Because a router replaces its own slot, route order (and so which router wins
+an overlapping path) is the same as with eager ``include_router`` calls.
+"""
+
+import asyncio
+import importlib
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from fastapi import FastAPI
+from starlette.routing import BaseRoute, Match, NoMatchFound
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LazyRouter:
+    """One or more deferred ``app.include_router`` calls, loaded together.
+
+    Attributes:
+        targets: ``"package.module:attr"`` of each APIRouter, in include order
+        prefixes: URL prefixes (as served, including ``prefix``) that route
+            to these routers; a request under any of them loads the entry
+        prefix: Passed to each ``include_router``
+        optional: Skip the whole entry (with a log line) if any of its
+            modules fails to import
+        requires: Further modules the entry needs; imported first, and an
+            ImportError skips the entry like one from a target
+        setup: Called with ``{module name: module}`` once included
+    """
+
+    targets: Tuple[str, ...]
+    prefixes: Tuple[str, ...]
+    prefix: str = ""
+    optional: bool = False
+    requires: Tuple[str, ...] = ()
+    setup: Optional[Callable[[Dict[str, Any]], None]] = None
+    loaded: bool = field(default=False, init=False)
+    slot: "_Slot" = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.slot = _Slot(self)
+
+    @property
+    def name(self) -> str:
+        return ", ".join(self.targets)
+
+    def serves(self, path: str) -> bool:
+        return any(
+            path == p or path.startswith(p.rstrip("/") + "/") for p in self.prefixes
+        )
+
+
+class _Slot(BaseRoute):
+    """Placeholder keeping a lazy router's position in the route table."""
+
+    def __init__(self, entry: LazyRouter):
+        self.entry = entry
+
+    def matches(self, scope: Scope) -> Tuple[Match, Scope]:
+        return Match.NONE, {}
+
+    def url_path_for(self, name: str, /, **path_params: Any):
+        raise NoMatchFound(name, path_params)
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        raise RuntimeError(f"lazy router slot {self.entry.name} was routed to")
+
+    def __repr__(self) -> str:
+        return f"<LazyRouter slot {self.entry.name}>"
+
+
+class RouterRegistry:
+    """Lazy routers of one FastAPI app, loaded on first use."""
+
+    def __init__(self, app: FastAPI):
+        self.app = app
+        self.entries: List[LazyRouter] = []
+        self.started = False
+        self._lock: Optional[asyncio.Lock] = None
+        app.router.on_startup.insert(0, self._mark_started)
+
+        generate_openapi = app.openapi
+
+        def openapi() -> Dict[str, Any]:
+            self.load_all()
+            return generate_openapi()
+
+        app.openapi = openapi
+
+    def _mark_started(self) -> None:
+        self.started = True
+
+    def register(
+        self,
+        targets: Union[str, Tuple[str, ...]],
+        prefixes: Tuple[str, ...],
+        *,
+        prefix: str = "",
+        optional: bool = False,
+        requires: Tuple[str, ...] = (),
+        setup: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> LazyRouter:
+        if isinstance(targets, str):
+            targets = (targets,)
+        entry = LazyRouter(targets, prefixes, prefix, optional, requires, setup)
+        self.entries.append(entry)
+        self.app.router.routes.append(entry.slot)
+        return entry
+
+    def pending(self, path: Optional[str] = None) -> List[LazyRouter]:
+        return [
+            e for e in self.entries if not e.loaded and (path is None or e.serves(path))
+        ]
+
+    # -- loading ---------------------------------------------------------
+
+    def _include(self, entry: LazyRouter, modules: Optional[Dict[str, Any]]) -> None:
+        """Include the entry's routers in place of its slot.
+
+        Synchronous: on the event loop no request can observe the route
+        table between the includes and the splice.
+        """
+        if entry.loaded:
+            return
+        entry.loaded = True
+        routes = self.app.router.routes
+        mark = len(routes)
+        handlers = len(self.app.router.on_startup)
+        for target in entry.targets if modules is not None else ():
+            module_name, _, attr = target.partition(":")
+            self.app.include_router(
+                getattr(modules[module_name], attr), prefix=entry.prefix
+            )
+        added = routes[mark:]
+        startup = self.app.router.on_startup[handlers:]
+        del routes[mark:]
+        position = routes.index(entry.slot)
+        self.app.router.routes = routes[:position] + added + routes[position + 1 :]
+        self.app.router._mark_routes_changed()
+
+        if modules is not None and entry.setup is not None:
+            entry.setup(modules)
+        if self.started:
+            # The app's own startup already ran; start what these routers added
+            for handler in startup:
+                result = handler()
+                if asyncio.iscoroutine(result):
+                    try:
+                        asyncio.get_running_loop().create_task(result)
+                    except RuntimeError:
+                        result.close()
+                        logger.warning(
+                            "Router %s loaded outside the event loop; "
+                            "its startup handler %s did not run",
+                            entry.name,
+                            handler.__name__,
+                        )
+
+    def _import(self, entry: LazyRouter) -> Optional[Dict[str, Any]]:
+        """Import the entry's modules; None if an optional entry failed."""
+        names = [t.partition(":")[0] for t in entry.targets]
+        start = time.perf_counter()
+        try:
+            modules = {
+                name: importlib.import_module(name)
+                for name in (*entry.requires, *names)
+            }
+        except ImportError as e:
+            if not entry.optional:
+                raise
+            logger.info("Skipping optional router %s: %s", entry.name, e)
+            return None
+        logger.debug(
+            "Imported router %s in %.0f ms",
+            entry.name,
+            (time.perf_counter() - start) * 1000,
+        )
+        return modules
+
+    def load(self, entry: LazyRouter) -> None:
+        if not entry.loaded:
+            self._include(entry, self._import(entry))
+
+    def load_all(self) -> None:
+        for entry in self.pending():
+            self.load(entry)
+
+    async def load_async(self, entries: List[LazyRouter]) -> None:
+        """Import ``entries`` off the event loop, then include them in order."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            for entry in entries:
+                if entry.loaded:
+                    continue
+                module = await asyncio.to_thread(self._import, entry)
+                self._include(entry, module)
+
+    async def preload(self) -> None:
+        """Load every remaining router, one at a time, in registration order."""
+        for entry in self.pending():
+            try:
+                await self.load_async([entry])
+            except Exception:
+                logger.error("Failed to load router %s", entry.name, exc_info=True)
+
+
+class LazyRouterMiddleware:
+    """Load the lazy routers serving a request's path before routing it.
+
+    Added last so it is the outermost middleware: everything inside it
+    (including Prometheus path grouping) sees the loaded routes.
+    """
+
+    def __init__(self, app: ASGIApp, registry: RouterRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] in ("http", "websocket"):
+            path = scope["path"]
+            if path == self.registry.app.openapi_url:
+                entries = self.registry.pending()
+            else:
+                entries = self.registry.pending(path)
+            if entries:
+                await self.registry.load_async(entries)
+        await self.app(scope, receive, send)
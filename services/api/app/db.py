@@ -5,9 +5,11 @@ from typing import Any, Dict, List, Optional
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import declarative_base, sessionmaker
 
+from .core import query_stats
 from .settings import settings
 
 engine = create_engine(settings.sql_database_url, pool_pre_ping=True)
+query_stats.install(engine)  # per-request/job query counts, N+1 detection
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
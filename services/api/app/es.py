@@ -114,6 +114,13 @@ SETTINGS_AND_MAPPINGS = {
             "source_confidence": {"type": "float"},
             "received_at": {"type": "date"},
             "message_id": {"type": "keyword"},
+            # Reply metrics, computed at ingest (app.ingest.gmail_metrics).
+            # time_to_response_hours backs the ttr_* sorts as a doc-values sort.
+            "first_user_reply_at": {"type": "date"},
+            "last_user_reply_at": {"type": "date"},
+            "user_reply_count": {"type": "integer"},
+            "replied": {"type": "boolean"},
+            "time_to_response_hours": {"type": "float"},
         }
     },
 }
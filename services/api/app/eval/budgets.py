@@ -16,10 +16,11 @@ Gates enforce budgets in CI:
 
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from ..models import AgentMetricsDaily
+from ..observability.sketch import LatencySketch
 
 
 @dataclass
@@ -427,12 +428,7 @@ class GateEvaluator:
         latencies_avg = [
             m.avg_latency_ms for m in metrics if m.avg_latency_ms is not None
         ]
-        latencies_p95 = [
-            m.p95_latency_ms for m in metrics if m.p95_latency_ms is not None
-        ]
-        latencies_p99 = [
-            m.p99_latency_ms for m in metrics if m.p99_latency_ms is not None
-        ]
+        p50_latency, p95_latency, p99_latency = self._latency_percentiles(metrics)
         costs = [m.avg_cost_per_run for m in metrics if m.avg_cost_per_run is not None]
 
         invariants_passed = sum(m.invariants_passed for m in metrics)
@@ -449,18 +445,44 @@ class GateEvaluator:
             "avg_latency_ms": sum(latencies_avg) / len(latencies_avg)
             if latencies_avg
             else None,
-            "p95_latency_ms": sum(latencies_p95) / len(latencies_p95)
-            if latencies_p95
-            else None,
-            "p99_latency_ms": sum(latencies_p99) / len(latencies_p99)
-            if latencies_p99
-            else None,
+            "p50_latency_ms": p50_latency,
+            "p95_latency_ms": p95_latency,
+            "p99_latency_ms": p99_latency,
             "avg_cost_per_run": sum(costs) / len(costs) if costs else None,
             "invariants_passed": invariants_passed,
             "invariants_failed": invariants_failed,
             "days_evaluated": len(metrics),
         }
 
+    @staticmethod
+    def _latency_percentiles(
+        metrics: List[AgentMetricsDaily],
+    ) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        """
+        p50/p95/p99 latency over all days, from their merged sketches.
+
+        Percentiles don't average: one day at 10x p95 in a week moves the
+        week's p95 far more than 1/7th of the way. Days recorded before
+        sketches existed only have their own percentiles; with any such day
+        in range, the worst day's value is used (conservative, never diluted).
+        """
+        sketched = [m for m in metrics if m.latency_sketch]
+        legacy = [m for m in metrics if not m.latency_sketch]
+        merged = LatencySketch.merged(
+            LatencySketch.from_dict(m.latency_sketch) for m in sketched
+        )
+        values = []
+        for q, column in (
+            (0.5, "median_latency_ms"),
+            (0.95, "p95_latency_ms"),
+            (0.99, "p99_latency_ms"),
+        ):
+            candidates = [getattr(m, column) for m in legacy]
+            candidates.append(merged.quantile(q))
+            candidates = [v for v in candidates if v is not None]
+            values.append(max(candidates) if candidates else None)
+        return tuple(values)
+
 
 def format_gate_report(evaluation: Dict[str, Any]) -> str:
     """
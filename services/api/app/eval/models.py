@@ -72,6 +72,7 @@ class Judge(BaseModel):
     
     name: str  # e.g., "risk_accuracy_judge"
     agent: str  # Which agent this judges
+    version: str = "1"  # Bump when scoring changes; invalidates cached results
     categories: List[str] = []  # Categories it can judge
     
     # Judge behavior
@@ -95,6 +96,7 @@ class Invariant(BaseModel):
     name: str
     agent: str
     description: str
+    version: str = "1"  # Bump when the check changes; invalidates cached results
     severity: Literal["critical", "high", "medium", "low"] = "high"
     
     def check(self, task: EvalTask, output: Dict[str, Any]) -> tuple[bool, str]:
@@ -154,6 +156,16 @@ class EvalRun(BaseModel):
     # Breakdown by difficulty
     quality_by_difficulty: Dict[str, float] = {}
     
+    # Suite timing
+    wall_time_ms: float = 0.0  # Start to finish of the whole run
+    task_time_ms: float = 0.0  # Sum of latencies of tasks actually executed
+    parallelism: float = 0.0  # task_time_ms / wall_time_ms
+    cache_hits: int = 0  # Tasks answered from the result cache
+    
+    @property
+    def cache_hit_rate(self) -> float:
+        return self.cache_hits / self.total_tasks if self.total_tasks else 0.0
+    
     def add_result(self, result: EvalResult) -> None:
         """Add a result and update aggregates."""
         self.results.append(result)
@@ -205,4 +217,9 @@ class EvalRun(BaseModel):
             "invariants_failed": self.invariants_failed,
             "failed_invariant_ids": self.failed_invariant_ids,
             "quality_by_difficulty": self.quality_by_difficulty,
+            "wall_time_ms": self.wall_time_ms,
+            "task_time_ms": self.task_time_ms,
+            "parallelism": self.parallelism,
+            "cache_hits": self.cache_hits,
+            "cache_hit_rate": self.cache_hit_rate,
         }
@@ -0,0 +1,75 @@
+"""
+Content-addressed cache of eval task results.
+
+A result is stored under a hash of everything that determines it: the task
+(objective, context, expected output, invariants), the agent version and the
+versions of the judge and invariants that scored it. Rerunning a suite skips
+tasks whose key is already cached; changing any of those inputs changes the
+key, so stale results are never served.
+
+Backed by a local SQLite file, so it survives across CI runs when the file
+is kept in the workspace cache.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+from .judges import get_invariant, get_judge
+from .models import EvalResult, EvalTask
+
+
+def task_cache_key(task: EvalTask, agent_version: str) -> Optional[str]:
+    """Content hash for ``task``; None if its judge or invariants are unknown."""
+    try:
+        judge = get_judge(task.agent)
+        invariants = [get_invariant(i) for i in task.invariants]
+    except ValueError:
+        return None
+    material = {
+        "task": task.model_dump(mode="json"),
+        "agent_version": agent_version,
+        "judge": [judge.name, judge.version],
+        "invariants": [[i.id, i.version] for i in invariants],
+    }
+    raw = json.dumps(material, sort_keys=True, default=str).encode()
+    return hashlib.sha256(raw).hexdigest()
+
+
+class EvalResultCache:
+    """SQLite-backed ``key -> EvalResult`` store."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS eval_results ("
+            " key TEXT PRIMARY KEY, result TEXT NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[EvalResult]:
+        row = self._conn.execute(
+            "SELECT result FROM eval_results WHERE key = ?", (key,)
+        ).fetchone()
+        return EvalResult.model_validate_json(row[0]) if row else None
+
+    def put(self, key: str, result: EvalResult) -> None:
+        """Stage a result; written on ``flush``."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO eval_results (key, result, stored_at)"
+            " VALUES (?, ?, ?)",
+            (key, result.model_dump_json(), time.time()),
+        )
+
+    def flush(self) -> None:
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
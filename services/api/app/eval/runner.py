@@ -7,16 +7,38 @@ The runner:
 3. Checks invariants
 4. Aggregates results
 5. Exports JSONL for trend analysis
+
+Tasks run concurrently (``concurrency`` at a time) in a thread pool, or a
+process pool for CPU-bound judges. Each task has its own timeout and error
+isolation: a failing or hanging task is recorded as failed with its error
+and duration, and the suite carries on. Results are reported in suite order
+regardless of completion order. With a result cache, tasks whose inputs,
+agent version and judge version are unchanged are not run again.
+
+Usage:
+    python -m app.eval.runner --agent inbox.triage --concurrency 20
+    python -m app.eval.runner --cache eval_results/cache.sqlite --shard 1/4
 """
 
+import argparse
+import asyncio
+import hashlib
+import inspect
 import json
+import os
+import sys
 import time
 import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from .models import EvalTask, EvalResult, EvalSuite, EvalRun
 from .judges import get_judge, get_invariant
+from .result_cache import EvalResultCache, task_cache_key
+
+DEFAULT_CONCURRENCY = int(os.getenv("EVAL_CONCURRENCY", "8"))
+DEFAULT_TASK_TIMEOUT_S = float(os.getenv("EVAL_TASK_TIMEOUT_S", "120"))
 
 
 class MockAgentExecutor:
@@ -27,6 +49,9 @@ class MockAgentExecutor:
     For CI/testing, we generate deterministic mock outputs.
     """
 
+    # Part of the result cache key; bump when the mock outputs change
+    version = "mock-1"
+
     def execute(
         self, agent: str, objective: str, context: Dict[str, Any]
     ) -> Dict[str, Any]:
@@ -222,11 +247,117 @@ class MockAgentExecutor:
         }
 
 
+def judge_output(
+    task: EvalTask, output: Dict[str, Any], latency_ms: float
+) -> EvalResult:
+    """Score an agent output with the task's judge and invariants."""
+    judge = get_judge(task.agent)
+    quality_score, reasoning = judge.score(task, output)
+
+    # Check invariants
+    passed_invariants = []
+    failed_invariants = []
+
+    for inv_id in task.invariants:
+        invariant = get_invariant(inv_id)
+        passed, reason = invariant.check(task, output)
+
+        if passed:
+            passed_invariants.append(inv_id)
+        else:
+            failed_invariants.append(inv_id)
+
+    # Create result
+    return EvalResult(
+        task_id=task.id,
+        agent=task.agent,
+        success=True,
+        output=output,
+        error=None,
+        latency_ms=latency_ms,
+        cost_weight=1.0,  # Mock cost
+        quality_score=quality_score,
+        judge_reasoning=reasoning,
+        passed_invariants=passed_invariants,
+        failed_invariants=failed_invariants,
+        difficulty=task.difficulty,
+        tags=task.tags,
+    )
+
+
+def failed_result(task: EvalTask, error: str, latency_ms: float) -> EvalResult:
+    return EvalResult(
+        task_id=task.id,
+        agent=task.agent,
+        success=False,
+        output=None,
+        error=error,
+        latency_ms=latency_ms,
+        cost_weight=0.0,
+        quality_score=0.0,
+        judge_reasoning=f"Execution failed: {error}",
+        passed_invariants=[],
+        failed_invariants=task.invariants,
+        difficulty=task.difficulty,
+        tags=task.tags,
+    )
+
+
+def evaluate_task(executor, task: EvalTask) -> EvalResult:
+    """Execute and score one task (module-level so process pools can run it)."""
+    start_time = time.time()
+
+    try:
+        # Execute agent
+        output = executor.execute(task.agent, task.objective, task.context)
+
+        # Calculate latency
+        latency_ms = (time.time() - start_time) * 1000
+
+        return judge_output(task, output, latency_ms)
+
+    except Exception as e:
+        return failed_result(task, str(e), (time.time() - start_time) * 1000)
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """``"i/n"`` (1-based) -> (i, n)."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"Shard must look like i/n, got {value!r}")
+    if not 1 <= index <= count:
+        raise ValueError(f"Shard index must be in 1..{count}, got {index}")
+    return index, count
+
+
+def shard_tasks(tasks: List[EvalTask], shard: Tuple[int, int]) -> List[EvalTask]:
+    """Tasks of shard ``i`` of ``n``, assigned by a hash of the task id.
+
+    Assignment doesn't depend on task order, so machines that load the suite
+    differently still split it the same way.
+    """
+    index, count = shard
+    return [
+        task
+        for task in tasks
+        if int(hashlib.sha1(task.id.encode()).hexdigest(), 16) % count == index - 1
+    ]
+
+
 class EvalRunner:
     """Runner for executing evaluation suites."""
 
     def __init__(
-        self, use_mock_executor: bool = True, output_dir: Optional[Path] = None
+        self,
+        use_mock_executor: bool = True,
+        output_dir: Optional[Path] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        task_timeout_s: Optional[float] = DEFAULT_TASK_TIMEOUT_S,
+        mode: str = "thread",
+        cache: Optional[EvalResultCache] = None,
+        executor=None,
+        agent_version: Optional[str] = None,
     ):
         """
         Initialize eval runner.
@@ -234,22 +365,47 @@ class EvalRunner:
         Args:
             use_mock_executor: If True, use mock executor for testing
             output_dir: Directory for JSONL exports (default: eval_results/)
+            concurrency: Tasks run at the same time
+            task_timeout_s: Per-task timeout; None disables it
+            mode: "thread", or "process" for CPU-bound judges
+            cache: Result cache; unchanged tasks are not run again
+            executor: Agent executor (overrides use_mock_executor)
+            agent_version: Agent version/config hash for the cache key
+                (default: the executor's ``version`` attribute)
         """
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown mode: {mode}")
         self.use_mock_executor = use_mock_executor
-        self.executor = MockAgentExecutor() if use_mock_executor else None
+        self.executor = executor or (MockAgentExecutor() if use_mock_executor else None)
         self.output_dir = output_dir or Path("eval_results")
         self.output_dir.mkdir(exist_ok=True)
+        self.concurrency = max(1, concurrency)
+        self.task_timeout_s = task_timeout_s
+        self.mode = mode
+        self.cache = cache
+        self.agent_version = agent_version or str(
+            getattr(self.executor, "version", type(self.executor).__name__)
+        )
 
-    def run_suite(self, suite: EvalSuite) -> EvalRun:
+    def run_suite(
+        self, suite: EvalSuite, shard: Optional[Tuple[int, int]] = None
+    ) -> EvalRun:
         """
         Execute an eval suite.
 
         Args:
             suite: The eval suite to run
+            shard: Only run shard (i, n) of the suite's tasks
 
         Returns:
             EvalRun with all results
         """
+        return asyncio.run(self.run_suite_async(suite, shard))
+
+    async def run_suite_async(
+        self, suite: EvalSuite, shard: Optional[Tuple[int, int]] = None
+    ) -> EvalRun:
+        """``run_suite`` for callers that already run an event loop."""
         run_id = str(uuid.uuid4())[:8]
         run = EvalRun(
             run_id=run_id,
@@ -257,18 +413,33 @@ class EvalRunner:
             agent=suite.agent,
             timestamp=datetime.utcnow(),
         )
+        tasks = shard_tasks(suite.tasks, shard) if shard else list(suite.tasks)
 
-        print(f"\n🏃 Running eval suite: {suite.name} ({len(suite.tasks)} tasks)")
+        shard_note = f", shard {shard[0]}/{shard[1]}" if shard else ""
+        print(f"\n🏃 Running eval suite: {suite.name} ({len(tasks)} tasks{shard_note})")
 
-        for task in suite.tasks:
-            result = self._run_task(task)
+        started = time.perf_counter()
+        results, cached = await self._run_tasks(tasks)
+        run.wall_time_ms = (time.perf_counter() - started) * 1000
+
+        for task, result, hit in zip(tasks, results, cached):
             run.add_result(result)
 
             status = "✅" if result.success else "❌"
+            source = " (cached)" if hit else ""
             print(
-                f"  {status} {task.id}: score={result.quality_score:.1f}, latency={result.latency_ms:.0f}ms"
+                f"  {status} {task.id}: score={result.quality_score:.1f}, "
+                f"latency={result.latency_ms:.0f}ms{source}"
             )
 
+        run.cache_hits = sum(cached)
+        run.task_time_ms = sum(
+            r.latency_ms for r, hit in zip(results, cached) if not hit
+        )
+        run.parallelism = (
+            run.task_time_ms / run.wall_time_ms if run.wall_time_ms else 0.0
+        )
+
         # Export results
         self._export_run(run)
 
@@ -277,69 +448,88 @@ class EvalRunner:
 
         return run
 
-    def _run_task(self, task: EvalTask) -> EvalResult:
-        """Execute a single eval task."""
+    async def _run_tasks(
+        self, tasks: List[EvalTask]
+    ) -> Tuple[List[EvalResult], List[bool]]:
+        """Results in task order, plus which of them came from the cache."""
+        results: List[Optional[EvalResult]] = [None] * len(tasks)
+        cached = [False] * len(tasks)
+        keys: List[Optional[str]] = [None] * len(tasks)
+        pending = []
+        for i, task in enumerate(tasks):
+            if self.cache is not None:
+                keys[i] = task_cache_key(task, self.agent_version)
+                hit = self.cache.get(keys[i]) if keys[i] else None
+                if hit is not None:
+                    results[i], cached[i] = hit, True
+                    continue
+            pending.append(i)
+
+        if pending:
+            pool_cls = (
+                ProcessPoolExecutor if self.mode == "process" else ThreadPoolExecutor
+            )
+            pool = pool_cls(max_workers=min(self.concurrency, len(pending)))
+            slots = asyncio.Semaphore(self.concurrency)
+            try:
+                done = await asyncio.gather(
+                    *(self._run_one(tasks[i], pool, slots) for i in pending)
+                )
+            finally:
+                # Don't wait for tasks that timed out and are still running
+                pool.shutdown(wait=False, cancel_futures=True)
+            for i, result in zip(pending, done):
+                results[i] = result
+                if self.cache is not None and keys[i] and result.success:
+                    self.cache.put(keys[i], result)
+            if self.cache is not None:
+                self.cache.flush()
+
+        return results, cached
+
+    async def _run_one(
+        self, task: EvalTask, pool: Executor, slots: asyncio.Semaphore
+    ) -> EvalResult:
+        """One task with its own timeout; never raises."""
+        loop = asyncio.get_running_loop()
+        await slots.acquire()
         start_time = time.time()
-
+        if inspect.iscoroutinefunction(getattr(self.executor, "execute", None)):
+            work = asyncio.ensure_future(self._evaluate_async(task, pool))
+        else:
+            work = loop.run_in_executor(pool, evaluate_task, self.executor, task)
+        # A worker stuck past its timeout keeps its slot until it returns,
+        # so later tasks never queue behind it on the clock
+        work.add_done_callback(lambda _: slots.release())
         try:
-            # Execute agent
-            output = self.executor.execute(task.agent, task.objective, task.context)
-
-            # Calculate latency
-            latency_ms = (time.time() - start_time) * 1000
-
-            # Score output with judge
-            judge = get_judge(task.agent)
-            quality_score, reasoning = judge.score(task, output)
-
-            # Check invariants
-            passed_invariants = []
-            failed_invariants = []
-
-            for inv_id in task.invariants:
-                invariant = get_invariant(inv_id)
-                passed, reason = invariant.check(task, output)
-
-                if passed:
-                    passed_invariants.append(inv_id)
-                else:
-                    failed_invariants.append(inv_id)
-
-            # Create result
-            return EvalResult(
-                task_id=task.id,
-                agent=task.agent,
-                success=True,
-                output=output,
-                error=None,
-                latency_ms=latency_ms,
-                cost_weight=1.0,  # Mock cost
-                quality_score=quality_score,
-                judge_reasoning=reasoning,
-                passed_invariants=passed_invariants,
-                failed_invariants=failed_invariants,
-                difficulty=task.difficulty,
-                tags=task.tags,
+            return await asyncio.wait_for(
+                asyncio.shield(work), timeout=self.task_timeout_s
             )
+        except asyncio.TimeoutError:
+            if isinstance(work, asyncio.Task):
+                work.cancel()
+            return failed_result(
+                task,
+                f"Timed out after {self.task_timeout_s}s",
+                (time.time() - start_time) * 1000,
+            )
+        except Exception as e:  # e.g. a process pool worker died
+            return failed_result(task, str(e), (time.time() - start_time) * 1000)
 
-        except Exception as e:
+    async def _evaluate_async(self, task: EvalTask, pool: Executor) -> EvalResult:
+        """``evaluate_task`` for executors with an async ``execute``."""
+        loop = asyncio.get_running_loop()
+        start_time = time.time()
+        try:
+            output = await self.executor.execute(
+                task.agent, task.objective, task.context
+            )
             latency_ms = (time.time() - start_time) * 1000
-
-            return EvalResult(
-                task_id=task.id,
-                agent=task.agent,
-                success=False,
-                output=None,
-                error=str(e),
-                latency_ms=latency_ms,
-                cost_weight=0.0,
-                quality_score=0.0,
-                judge_reasoning=f"Execution failed: {e}",
-                passed_invariants=[],
-                failed_invariants=task.invariants,
-                difficulty=task.difficulty,
-                tags=task.tags,
+            return await loop.run_in_executor(
+                pool, judge_output, task, output, latency_ms
             )
+        except Exception as e:
+            return failed_result(task, str(e), (time.time() - start_time) * 1000)
 
     def _export_run(self, run: EvalRun) -> None:
         """Export run results to JSONL."""
@@ -373,6 +563,11 @@ class EvalRunner:
         print(f"Avg quality score: {run.avg_quality_score:.1f}/100")
         print(f"Avg latency: {run.avg_latency_ms:.0f}ms")
         print(f"Total cost weight: {run.total_cost_weight:.2f}")
+        print(
+            f"Wall time: {run.wall_time_ms:.0f}ms "
+            f"(task time {run.task_time_ms:.0f}ms, parallelism {run.parallelism:.1f}x, "
+            f"cache hits {run.cache_hits}/{run.total_tasks} = {run.cache_hit_rate:.0%})"
+        )
         print("\nInvariants:")
         print(f"  ✅ Passed: {run.invariants_passed}")
         print(f"  ❌ Failed: {run.invariants_failed}")
@@ -386,3 +581,55 @@ class EvalRunner:
                 print(f"  {diff}: {score:.1f}/100")
 
         print(f"{'='*60}\n")
+
+
+def main(argv=None) -> int:
+    from .tasks import (
+        get_inbox_suite,
+        get_insights_suite,
+        get_knowledge_suite,
+        get_warehouse_suite,
+    )
+
+    suites = {
+        "inbox.triage": get_inbox_suite,
+        "knowledge.update": get_knowledge_suite,
+        "insights.write": get_insights_suite,
+        "warehouse.health": get_warehouse_suite,
+    }
+    parser = argparse.ArgumentParser(description="Run agent eval suites")
+    parser.add_argument("--agent", choices=[*suites, "all"], default="all")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TASK_TIMEOUT_S,
+        help="Per-task timeout in seconds (0 disables)",
+    )
+    parser.add_argument("--mode", choices=["thread", "process"], default="thread")
+    parser.add_argument(
+        "--cache", type=Path, default=None, help="SQLite result cache file"
+    )
+    parser.add_argument("--shard", type=parse_shard, default=None, help="i/n")
+    parser.add_argument("--output-dir", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    cache = EvalResultCache(args.cache) if args.cache else None
+    runner = EvalRunner(
+        output_dir=args.output_dir,
+        concurrency=args.concurrency,
+        task_timeout_s=args.timeout or None,
+        mode=args.mode,
+        cache=cache,
+    )
+    names = list(suites) if args.agent == "all" else [args.agent]
+    try:
+        runs = [runner.run_suite(suites[name](), shard=args.shard) for name in names]
+    finally:
+        if cache is not None:
+            cache.close()
+    return 0 if all(run.success_rate == 1.0 for run in runs) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
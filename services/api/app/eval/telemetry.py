@@ -17,6 +17,7 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List
 from sqlalchemy.orm import Session
 from ..models import AgentMetricsDaily
+from ..observability.sketch import LatencySketch
 from .models import EvalTask, EvalResult
 from .judges import get_judge, get_invariant
 import random
@@ -235,18 +236,25 @@ class OnlineEvaluator:
 
         metrics.quality_samples += 1
 
-        # Update latency metrics (simple running average)
+        # Update latency metrics: running average plus the day's sketch,
+        # which gives exact-enough percentiles and merges across days
         if metrics.total_runs == 0:
             metrics.avg_latency_ms = result.latency_ms
-            metrics.median_latency_ms = result.latency_ms
-            metrics.p95_latency_ms = result.latency_ms
-            metrics.p99_latency_ms = result.latency_ms
         else:
             n = metrics.total_runs
             metrics.avg_latency_ms = (
                 metrics.avg_latency_ms * n + result.latency_ms
             ) / (n + 1)
 
+        sketch = LatencySketch.from_dict(metrics.latency_sketch)
+        sketch.add(result.latency_ms)
+        metrics.latency_sketch = sketch.to_dict()  # reassign so it's flushed
+        (
+            metrics.median_latency_ms,
+            metrics.p95_latency_ms,
+            metrics.p99_latency_ms,
+        ) = sketch.percentiles(0.5, 0.95, 0.99)
+
         # Update cost
         metrics.total_cost_weight += result.cost_weight
         metrics.avg_cost_per_run = metrics.total_cost_weight / (metrics.total_runs + 1)
@@ -477,6 +485,35 @@ class MetricsAggregator:
             .all()
         )
 
+    def get_latency_sketch(
+        self,
+        agent: str,
+        start_date: datetime,
+        end_date: datetime,
+    ) -> LatencySketch:
+        """
+        Merged latency sketch of an agent's days in a date range.
+
+        Args:
+            agent: Agent identifier
+            start_date: Start date (inclusive)
+            end_date: End date (inclusive)
+
+        Returns:
+            Sketch over every run of those days (empty if none were sketched)
+        """
+        rows = (
+            self.db.query(AgentMetricsDaily.latency_sketch)
+            .filter(
+                AgentMetricsDaily.agent == agent,
+                AgentMetricsDaily.date >= start_date,
+                AgentMetricsDaily.date <= end_date,
+                AgentMetricsDaily.latency_sketch.isnot(None),
+            )
+            .all()
+        )
+        return LatencySketch.merged(LatencySketch.from_dict(r[0]) for r in rows)
+
     def get_weekly_summary(
         self,
         agent: str,
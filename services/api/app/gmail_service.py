@@ -6,7 +6,6 @@ import re
 from typing import Dict, List, Optional
 
 import bleach
-from bs4 import BeautifulSoup
 from dateutil.relativedelta import relativedelta
 from elasticsearch import Elasticsearch, helpers
 from google.auth.transport.requests import Request as GRequest
@@ -20,7 +19,8 @@ from .ingest.due_dates import (
     extract_earliest_due_date,
     extract_money_amounts,
 )
-from .ingest.gmail_metrics import compute_thread_reply_metrics
+from .ingest.gmail_metrics import compute_thread_reply_metrics, reply_fields
+from .logic.suggest_index import suggest_indexes
 from .models import Application, AppStatus, Email, OAuthToken
 from .security.analyzer import BlocklistProvider, EmailRiskAnalyzer
 from .core.crypto import Crypto
@@ -123,6 +123,8 @@ def _get_creds(db: Session, user_email: str) -> Credentials:
 
 
 def _strip_html(html: str) -> str:
+    from bs4 import BeautifulSoup  # deferred: heavy, only needed for HTML bodies
+
     soup = BeautifulSoup(html, "html.parser")
     text = soup.get_text(" ", strip=True)
     # light sanitize
@@ -380,13 +382,52 @@ def ensure_es_index():
                 "role": {"type": "text", "analyzer": "ats_analyzer"},
                 "source": {"type": "keyword"},
                 "source_confidence": {"type": "float"},
+                # Reply metrics; time_to_response_hours backs the ttr sorts
+                "first_user_reply_at": {"type": "date"},
+                "last_user_reply_at": {"type": "date"},
+                "user_reply_count": {"type": "integer"},
+                "replied": {"type": "boolean"},
+                "time_to_response_hours": {"type": "float"},
             }
         },
     )
 
 
-def index_bulk_emails(docs: List[dict]):
-    """Bulk index emails into Elasticsearch"""
+def thread_reply_updates(db: Session, docs: List[dict]) -> List[dict]:
+    """
+    Reply fields for thread messages that are not part of ``docs``.
+
+    A reply changes ``time_to_response_hours`` of the messages it answers, so
+    when a batch carries a replied thread, the earlier messages already in
+    the index get a partial update with the thread's new metrics.
+    """
+    metrics_by_thread = {
+        d["thread_id"]: d for d in docs if d.get("replied") and d.get("thread_id")
+    }
+    if not metrics_by_thread:
+        return []
+    batch_ids = {d["gmail_id"] for d in docs}
+    rows = (
+        db.query(Email.gmail_id, Email.thread_id, Email.received_at)
+        .filter(Email.thread_id.in_(list(metrics_by_thread)))
+        .all()
+    )
+    return [
+        {
+            "gmail_id": row.gmail_id,
+            **reply_fields(row.received_at, metrics_by_thread[row.thread_id]),
+        }
+        for row in rows
+        if row.gmail_id not in batch_ids
+    ]
+
+
+def index_bulk_emails(docs: List[dict], updates: Optional[List[dict]] = None):
+    """Bulk index emails into Elasticsearch.
+
+    ``updates`` are partial docs (keyed by ``gmail_id``) applied to messages
+    that are already indexed; ones that are not are skipped.
+    """
     if not docs:  # noqa: E701
         return
     es = es_client()
@@ -397,6 +438,19 @@ def index_bulk_emails(docs: List[dict]):
             {"_index": ES_INDEX, "_id": d["gmail_id"], "_op_type": "index", **d}
         )
     helpers.bulk(es, actions)
+    if updates:
+        update_actions = [
+            {
+                "_index": ES_INDEX,
+                "_id": u["gmail_id"],
+                "_op_type": "update",
+                "doc": {k: v for k, v in u.items() if k != "gmail_id"},
+            }
+            for u in updates
+        ]
+        _, errors = helpers.bulk(es, update_actions, raise_on_error=False)
+        if errors:
+            logger.info("Skipped %d reply updates for unindexed docs", len(errors))
 
 
 def gmail_backfill(db: Session, user_email: str, days: int = 60) -> int:
@@ -567,11 +621,8 @@ def gmail_backfill(db: Session, user_email: str, days: int = 60) -> int:
                     "role": role,
                     "source": source,
                     "source_confidence": source_conf,
-                    # NEW: Index reply metrics
-                    "first_user_reply_at": metrics["first_user_reply_at"],
-                    "last_user_reply_at": metrics["last_user_reply_at"],
-                    "user_reply_count": metrics["user_reply_count"],
-                    "replied": metrics["replied"],
+                    # NEW: Index reply metrics (incl. time_to_response_hours)
+                    **reply_fields(received_at, metrics),
                     # NEW: Index due dates and money amounts for bills
                     "dates": due_dates,
                     "money_amounts": money_amounts,
@@ -590,7 +641,13 @@ def gmail_backfill(db: Session, user_email: str, days: int = 60) -> int:
             )
 
     db.commit()
-    index_bulk_emails(es_docs)
+    index_bulk_emails(es_docs, thread_reply_updates(db, es_docs))
+    if es_docs:
+        # New mail: drop the cached Today triage for this user
+        from .agent.today import invalidate_today_cache
+
+        invalidate_today_cache(user_email)
+        suggest_indexes.add_emails(user_email, es_docs)
     return inserted
 
 
@@ -801,10 +858,7 @@ def gmail_backfill_with_progress(
                     "role": role,
                     "source": source,
                     "source_confidence": source_conf,
-                    "first_user_reply_at": metrics["first_user_reply_at"],
-                    "last_user_reply_at": metrics["last_user_reply_at"],
-                    "user_reply_count": metrics["user_reply_count"],
-                    "replied": metrics["replied"],
+                    **reply_fields(received_at, metrics),
                     "dates": due_dates,
                     "money_amounts": money_amounts,
                     "expires_at": earliest_due,
@@ -829,7 +883,13 @@ def gmail_backfill_with_progress(
             progress_callback(inserted, total_messages)
 
     db.commit()
-    index_bulk_emails(es_docs)
+    index_bulk_emails(es_docs, thread_reply_updates(db, es_docs))
+    if es_docs:
+        # New mail: drop the cached Today triage for this user
+        from .agent.today import invalidate_today_cache
+
+        invalidate_today_cache(user_email)
+        suggest_indexes.add_emails(user_email, es_docs)
 
     # Final progress update
     if progress_callback:
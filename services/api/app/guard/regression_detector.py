@@ -6,12 +6,13 @@ when regressions are detected across quality, latency, or cost dimensions.
 
 import logging
 from datetime import datetime, timedelta
-from statistics import mean
 from typing import Dict, List, Any, Optional
 
+from sqlalchemy import case, func, select
 from sqlalchemy.orm import Session
 
 from ..models import AgentAuditLog
+from ..observability.sketch import LOG_GAMMA, MIN_VALUE, LatencySketch
 from ..models_runtime import RuntimeSettingsDAO
 
 logger = logging.getLogger(__name__)
@@ -27,7 +28,9 @@ REGRESS_MIN_SAMPLE = 30  # minimum canary runs to judge
 class MetricsStore:
     """Aggregates planner metrics from audit logs.
 
-    Queries recent agent runs to compute V1 vs V2 statistics.
+    Queries recent agent runs to compute V1 vs V2 statistics. Latency
+    percentiles come from a sketch built SQL-side (app.observability.sketch),
+    so raw runs are never loaded.
     """
 
     def __init__(self, db_session: Session):
@@ -53,46 +56,74 @@ class MetricsStore:
                 "v2": {"samples": int, "quality": float, "latency_p95_ms": float, "cost_cents": float}
             }
         """
-        # Query recent runs
-        query = self.db.query(AgentAuditLog).filter(AgentAuditLog.status == "succeeded")
+        # Aggregate in SQL: per version, one row per latency bucket. Memory
+        # and transfer are bounded by the number of buckets, not runs.
+        query = select(
+            AgentAuditLog.plan["planner_meta"]["selected"].as_string().label("version"),
+            AgentAuditLog.duration_ms.label("duration_ms"),
+        ).where(AgentAuditLog.status == "succeeded")
 
         if window_minutes:
             cutoff = datetime.utcnow() - timedelta(minutes=window_minutes)
-            query = query.filter(AgentAuditLog.started_at >= cutoff)
+            query = query.where(AgentAuditLog.started_at >= cutoff)
 
-        runs = query.order_by(AgentAuditLog.started_at.desc()).limit(window_runs).all()
-
-        # Separate V1 and V2 runs based on planner_meta
-        v1_runs = []
-        v2_runs = []
-
-        for run in runs:
-            if run.plan and isinstance(run.plan, dict):
-                planner_meta = run.plan.get("planner_meta", {})
-                selected = planner_meta.get("selected")
-
-                if selected == "v1":
-                    v1_runs.append(run)
-                elif selected == "v2":
-                    v2_runs.append(run)
-
-        # Compute stats for each version
-        v1_stats = self._compute_stats(v1_runs, "v1")
-        v2_stats = self._compute_stats(v2_runs, "v2")
+        recent = (
+            query.order_by(AgentAuditLog.started_at.desc())
+            .limit(window_runs)
+            .subquery()
+        )
+        duration = recent.c.duration_ms
+        bucket = case(
+            (duration > MIN_VALUE, func.ceil(func.ln(duration) / LOG_GAMMA)),
+            else_=None,
+        ).label("bucket")
+        rows = self.db.execute(
+            select(
+                recent.c.version,
+                bucket,
+                func.count().label("runs"),
+                func.sum(func.coalesce(duration, 0)).label("total_ms"),
+                func.min(duration).label("min_ms"),
+                func.max(duration).label("max_ms"),
+            )
+            .where(recent.c.version.in_(("v1", "v2")))
+            .group_by(recent.c.version, bucket)
+        ).all()
+
+        runs = {"v1": 0, "v2": 0}
+        total_ms = {"v1": 0.0, "v2": 0.0}
+        sketches = {"v1": LatencySketch(), "v2": LatencySketch()}
+        for row in rows:
+            runs[row.version] += row.runs
+            # Runs without a duration count as zero cost
+            total_ms[row.version] += row.total_ms or 0.0
+            if row.bucket is not None:
+                sketches[row.version].add_bucket(
+                    row.bucket, row.runs, row.total_ms, row.min_ms, row.max_ms
+                )
 
-        return {"v1": v1_stats, "v2": v2_stats}
+        return {
+            version: self._compute_stats(
+                runs[version], total_ms[version], sketches[version]
+            )
+            for version in ("v1", "v2")
+        }
 
-    def _compute_stats(self, runs: List[AgentAuditLog], version: str) -> Dict[str, Any]:
-        """Compute aggregate statistics for a set of runs.
+    @staticmethod
+    def _compute_stats(
+        samples: int, total_ms: float, latency: LatencySketch
+    ) -> Dict[str, Any]:
+        """Aggregate statistics for one version.
 
         Args:
-            runs: List of audit log entries
-            version: "v1" or "v2"
+            samples: Number of runs of the version in the window
+            total_ms: Sum of their durations
+            latency: Sketch of their (positive) durations
 
         Returns:
             Stats: {samples, quality, latency_p95_ms, cost_cents}
         """
-        if not runs:
+        if not samples:
             return {
                 "samples": 0,
                 "quality": 0.0,
@@ -100,54 +131,21 @@ class MetricsStore:
                 "cost_cents": 0.0,
             }
 
-        # Extract metrics
-        quality_scores = []
-        latencies = []
-        costs = []
+        # Quality score (mock: use success=100, failure=0)
+        # In production, extract from run.artifacts["quality_score"]
+        quality = 100.0  # Placeholder
 
-        for run in runs:
-            # Quality score (mock: use success=100, failure=0)
-            # In production, extract from run.artifacts["quality_score"]
-            quality_scores.append(100.0)  # Placeholder
-
-            # Latency
-            if run.duration_ms:
-                latencies.append(run.duration_ms)
-
-            # Cost (mock: estimate from duration)
-            # In production, extract from run.artifacts["cost_cents"]
-            cost = (run.duration_ms or 0) / 1000.0 * 0.001  # Mock cost model
-            costs.append(cost)
-
-        # Compute aggregates
-        quality = mean(quality_scores) if quality_scores else 0.0
-        latency_p95 = self._percentile(latencies, 95) if latencies else 0.0
-        cost = mean(costs) if costs else 0.0
+        # Cost (mock: estimate from duration)
+        # In production, extract from run.artifacts["cost_cents"]
+        cost = total_ms / samples / 1000.0 * 0.001  # Mock cost model
 
         return {
-            "samples": len(runs),
+            "samples": samples,
             "quality": quality,
-            "latency_p95_ms": latency_p95,
+            "latency_p95_ms": latency.quantile(0.95) or 0.0,
             "cost_cents": cost,
         }
 
-    @staticmethod
-    def _percentile(values: List[float], percentile: int) -> float:
-        """Compute percentile of values.
-
-        Args:
-            values: List of numeric values
-            percentile: Percentile to compute (0-100)
-
-        Returns:
-            Percentile value
-        """
-        if not values:
-            return 0.0
-        sorted_values = sorted(values)
-        index = int(len(sorted_values) * (percentile / 100.0))
-        return sorted_values[min(index, len(sorted_values) - 1)]
-
 
 class RegressionDetector:
     """Detects regressions in planner V2 performance.
@@ -4,12 +4,12 @@ These endpoints follow Kubernetes best practices:
 - /healthz: Liveness probe (app is running)
 - /live: Alias for liveness
 - /ready: Readiness probe (app can serve traffic - DB & ES healthy)
+- /readyz: Startup probe (background warm-up finished)
 """
 
 import os
 
-from elasticsearch import Elasticsearch
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 from sqlalchemy import text
 
 from .db import SessionLocal
@@ -24,6 +24,13 @@ except ImportError:
         return "unknown"
 
 
+def _es_client(es_url: str):
+    # Imported on use: the ES client costs ~0.5s and /healthz must not wait
+    from elasticsearch import Elasticsearch
+
+    return Elasticsearch(es_url)
+
+
 def initialize_health_metrics():
     """Initialize health metrics on startup to avoid 0 values in Prometheus.
 
@@ -45,7 +52,7 @@ def initialize_health_metrics():
     if es_enabled:
         try:
             es_url = os.getenv("ES_URL", "http://es:9200")
-            es = Elasticsearch(es_url)
+            es = _es_client(es_url)
             if es.ping():
                 ES_UP.set(1)
             else:
@@ -59,6 +66,15 @@ def initialize_health_metrics():
 
 router = APIRouter(prefix="", tags=["health"])  # Root scope for K8s probes
 
+# Set by app.main once the background warm-up (ES index, scheduler, router
+# imports) has finished
+_warmed_up = False
+
+
+def mark_warmed_up(done: bool = True):
+    global _warmed_up
+    _warmed_up = done
+
 
 @router.get("/healthz")
 def healthz():
@@ -114,7 +130,7 @@ def ready():
     if es_enabled:
         try:
             es_url = os.getenv("ES_URL", "http://es:9200")
-            es = Elasticsearch(es_url)
+            es = _es_client(es_url)
             if es.ping():
                 es_status = "ok"
                 ES_UP.set(1)
@@ -155,6 +171,20 @@ def ready():
     return response
 
 
+@router.get("/readyz")
+def readyz(response: Response):
+    """Startup probe - 503 until the background warm-up has finished.
+
+    The app answers /healthz as soon as it starts; ES index setup, the
+    scheduler and router imports run afterwards in the background. Route
+    traffic here only once this returns 200.
+    """
+    if not _warmed_up:
+        response.status_code = 503
+        return {"status": "starting"}
+    return {"status": "ready"}
+
+
 @router.get("/status")
 def status():
     """Application status endpoint (alias for /ready with simpler response).
@@ -188,7 +218,7 @@ def status():
     if es_enabled:
         try:
             es_url = os.getenv("ES_URL", "http://es:9200")
-            es = Elasticsearch(es_url)
+            es = _es_client(es_url)
             if es.ping():
                 es_status = "ok"
                 ES_UP.set(1)
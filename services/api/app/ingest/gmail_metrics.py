@@ -100,3 +100,72 @@ def compute_thread_reply_metrics(
         "user_reply_count": out_count,
         "replied": replied,
     }
+
+
+def _as_utc(value: Any) -> Optional[datetime]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def time_to_response_hours(received_at: Any, first_reply_at: Any) -> Optional[float]:
+    """
+    Hours from a message's arrival to the user's first reply in its thread.
+
+    None when either timestamp is missing or the reply predates the message
+    (e.g. a later inbound message in an already-answered thread); those docs
+    have no value and sort last.
+    """
+    received = _as_utc(received_at)
+    first = _as_utc(first_reply_at)
+    if received is None or first is None or first < received:
+        return None
+    return (first - received).total_seconds() / 3600.0
+
+
+def reply_fields(received_at: Any, metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-message reply fields indexed alongside each email doc."""
+    return {
+        "first_user_reply_at": metrics["first_user_reply_at"],
+        "last_user_reply_at": metrics["last_user_reply_at"],
+        "user_reply_count": metrics["user_reply_count"],
+        "replied": metrics["replied"],
+        "time_to_response_hours": time_to_response_hours(
+            received_at, metrics["first_user_reply_at"]
+        ),
+    }
+
+
+_PAINLESS_TO_MILLIS = """
+  long toMillis(String v) {
+    if (!(v.endsWith('Z') || v.indexOf('+', 10) > 0 || v.lastIndexOf('-') > 18)) {
+      v = v + 'Z';
+    }
+    return ZonedDateTime.parse(v).toInstant().toEpochMilli();
+  }
+"""
+
+_PAINLESS_TIME_TO_RESPONSE = """
+  def r = ctx._source.received_at;
+  def f = ctx._source.first_user_reply_at;
+  if (r == null || f == null || toMillis(f) < toMillis(r)) {
+    ctx._source.remove('time_to_response_hours');
+  } else {
+    ctx._source.time_to_response_hours = (toMillis(f) - toMillis(r)) / 3600000.0;
+  }
+"""
+
+
+def time_to_response_script(prelude: str = "") -> str:
+    """
+    Painless update script that sets ``time_to_response_hours`` from the
+    doc's own ``received_at`` / ``first_user_reply_at``, matching
+    ``time_to_response_hours`` above. ``prelude`` runs first (e.g. to assign
+    fresh reply metrics from params).
+    """
+    return _PAINLESS_TO_MILLIS + prelude + _PAINLESS_TIME_TO_RESPONSE
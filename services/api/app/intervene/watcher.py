@@ -14,10 +14,10 @@ Background worker runs every N minutes, checks:
 
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import Iterable, List, Dict, Any, Optional, Set
 
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import case, func, text
 
 from app.db import SessionLocal
 from app.models_incident import Incident
@@ -39,6 +39,33 @@ except ImportError:
     ADAPTERS_AVAILABLE = False
 
 
+OPEN_STATUSES = ("open", "acknowledged", "mitigated")
+
+# Max incidents per key per rate-limit window
+RATE_LIMIT_MAX = 3
+
+# Latest failing result per invariant, computed in the database instead of
+# loading every recent EvalResult into Python.
+FAILING_INVARIANTS_SQL = text(
+    """
+    SELECT DISTINCT ON (inv->>'invariant_id')
+           inv->>'invariant_id' AS invariant_id,
+           inv AS inv_result,
+           r.id AS id,
+           r.agent AS agent,
+           r.task_id AS task_id,
+           r.created_at AS created_at
+    FROM eval_results r
+    CROSS JOIN LATERAL jsonb_array_elements(r.invariant_results::jsonb) AS inv
+    WHERE r.created_at >= :since
+      AND r.invariant_results IS NOT NULL
+      AND COALESCE((inv->>'passed')::boolean, true) = false
+      AND COALESCE(inv->>'invariant_id', '') <> ''
+    ORDER BY inv->>'invariant_id', r.created_at DESC
+    """
+)
+
+
 class InvariantWatcher:
     """
     Watches evaluation results and raises incidents on failures.
@@ -47,6 +74,10 @@ class InvariantWatcher:
     - Deduplication: Only create new incident if none open for same key
     - Rate limiting: Max N incidents per key per time window
     - Severity mapping: invariant priority → incident severity
+
+    Each check is set-based: candidate keys are computed first, then open and
+    rate-limited keys are fetched with one grouped query, and new incidents
+    are inserted with a single commit.
     """
 
     def __init__(self, db: Session):
@@ -64,46 +95,18 @@ class InvariantWatcher:
         """
         since = datetime.utcnow() - timedelta(minutes=lookback_minutes)
 
-        # Query recent eval results with invariant failures
-        results = (
-            self.db.query(EvalResult)
-            .filter(
-                EvalResult.created_at >= since, EvalResult.invariant_results.isnot(None)
-            )
-            .order_by(desc(EvalResult.created_at))
-            .all()
-        )
-
-        incidents = []
-        for result in results:
-            if not result.invariant_results:
-                continue
+        # One row per failing invariant key (latest failing result wins)
+        rows = self.db.execute(FAILING_INVARIANTS_SQL, {"since": since}).all()
+        candidates = {f"INV_{row.invariant_id}": row for row in rows}
 
-            for inv_result in result.invariant_results:
-                # Skip passed invariants
-                if inv_result.get("passed", True):
-                    continue
+        blocked = self._blocked_keys("invariant", candidates.keys(), hours=1)
 
-                inv_id = inv_result.get("invariant_id")
-                if not inv_id:
-                    continue
-
-                # Check if incident already open
-                key = f"INV_{inv_id}"
-                if self._has_open_incident("invariant", key):
-                    continue
-
-                # Check rate limit
-                if self._is_rate_limited("invariant", key, hours=1):
-                    logger.info(f"Rate limited incident for {key}")
-                    continue
-
-                # Create incident
-                incident = self._create_invariant_incident(result, inv_result)
-                incidents.append(incident)
-                logger.info(f"Created incident {incident.id} for {key}")
-
-        return incidents
+        pending = [
+            self._build_invariant_incident(row, dict(row.inv_result))
+            for key, row in candidates.items()
+            if key not in blocked
+        ]
+        return self._persist_incidents(pending)
 
     def check_budgets(self) -> List[Incident]:
         """
@@ -119,7 +122,7 @@ class InvariantWatcher:
             .all()
         )
 
-        incidents = []
+        candidates: Dict[str, Dict[str, Any]] = {}
         for setting in budget_settings:
             value = setting.value
             if not isinstance(value, dict):
@@ -132,23 +135,17 @@ class InvariantWatcher:
             if spent <= limit:
                 continue
 
-            # Extract agent/service from key
-            key = setting.key  # e.g., budget.planner.daily
-
-            # Check if incident already open
-            if self._has_open_incident("budget", key):
-                continue
-
-            # Check rate limit
-            if self._is_rate_limited("budget", key, hours=4):
-                continue
+            # Extract agent/service from key, e.g. budget.planner.daily
+            candidates[setting.key] = value
 
-            # Create incident
-            incident = self._create_budget_incident(key, value)
-            incidents.append(incident)
-            logger.info(f"Created budget incident {incident.id} for {key}")
+        blocked = self._blocked_keys("budget", candidates.keys(), hours=4)
 
-        return incidents
+        pending = [
+            self._build_budget_incident(key, value)
+            for key, value in candidates.items()
+            if key not in blocked
+        ]
+        return self._persist_incidents(pending)
 
     def check_planner_regressions(self) -> List[Incident]:
         """
@@ -164,7 +161,7 @@ class InvariantWatcher:
             .all()
         )
 
-        incidents = []
+        candidates: Dict[str, tuple] = {}
         for setting in canary_settings:
             value = setting.value
             if not isinstance(value, dict):
@@ -180,20 +177,66 @@ class InvariantWatcher:
             if len(parts) < 2:
                 continue
             version = parts[1]
-            key = f"planner:{version}"
+            candidates[f"planner:{version}"] = (version, value)
 
-            # Check if incident already open
-            if self._has_open_incident("planner", key):
-                continue
+        blocked = self._blocked_keys("planner", candidates.keys(), hours=2)
 
-            # Check rate limit
-            if self._is_rate_limited("planner", key, hours=2):
-                continue
+        pending = [
+            self._build_planner_incident(version, value)
+            for key, (version, value) in candidates.items()
+            if key not in blocked
+        ]
+        return self._persist_incidents(pending)
+
+    def _blocked_keys(self, kind: str, keys: Iterable[str], hours: int) -> Set[str]:
+        """
+        Return the subset of keys that already have an open incident or are
+        rate limited, using one grouped query for all keys.
+        """
+        keys = list(keys)
+        if not keys:
+            return set()
+
+        since = datetime.utcnow() - timedelta(hours=hours)
+        rows = (
+            self.db.query(
+                Incident.key,
+                func.sum(case((Incident.status.in_(OPEN_STATUSES), 1), else_=0)),
+                func.sum(case((Incident.created_at >= since, 1), else_=0)),
+            )
+            .filter(Incident.kind == kind, Incident.key.in_(keys))
+            .group_by(Incident.key)
+            .all()
+        )
 
-            # Create incident
-            incident = self._create_planner_incident(version, value)
-            incidents.append(incident)
-            logger.info(f"Created planner incident {incident.id} for {key}")
+        blocked = set()
+        for key, open_count, recent_count in rows:
+            if open_count:
+                blocked.add(key)
+            elif (recent_count or 0) >= RATE_LIMIT_MAX:
+                logger.info(f"Rate limited incident for {key}")
+                blocked.add(key)
+        return blocked
+
+    def _persist_incidents(self, incidents: List[Incident]) -> List[Incident]:
+        """Insert incidents with a single commit, then attach external issues."""
+        if not incidents:
+            return []
+
+        self.db.add_all(incidents)
+        self.db.commit()
+
+        linked = False
+        for incident in incidents:
+            issue_url = self._create_external_issue(incident)
+            if issue_url:
+                incident.issue_url = issue_url
+                linked = True
+            logger.info(
+                f"Created {incident.kind} incident {incident.id} for {incident.key}"
+            )
+        if linked:
+            self.db.commit()
 
         return incidents
 
@@ -204,7 +247,7 @@ class InvariantWatcher:
             .filter(
                 Incident.kind == kind,
                 Incident.key == key,
-                Incident.status.in_(["open", "acknowledged", "mitigated"]),
+                Incident.status.in_(OPEN_STATUSES),
             )
             .count()
         )
@@ -220,8 +263,8 @@ class InvariantWatcher:
             )
             .count()
         )
-        # Allow max 3 incidents per time window
-        return count >= 3
+        # Allow max RATE_LIMIT_MAX incidents per time window
+        return count >= RATE_LIMIT_MAX
 
     def _create_external_issue(self, incident: Incident) -> Optional[str]:
         """
@@ -288,6 +331,30 @@ class InvariantWatcher:
         self, eval_result: EvalResult, inv_result: Dict[str, Any]
     ) -> Incident:
         """Create incident for invariant failure."""
+        return self._persist_incidents(
+            [self._build_invariant_incident(eval_result, inv_result)]
+        )[0]
+
+    def _create_budget_incident(
+        self, key: str, budget_data: Dict[str, Any]
+    ) -> Incident:
+        """Create incident for budget overrun."""
+        return self._persist_incidents(
+            [self._build_budget_incident(key, budget_data)]
+        )[0]
+
+    def _create_planner_incident(
+        self, version: str, canary_data: Dict[str, Any]
+    ) -> Incident:
+        """Create incident for planner regression."""
+        return self._persist_incidents(
+            [self._build_planner_incident(version, canary_data)]
+        )[0]
+
+    def _build_invariant_incident(
+        self, eval_result: EvalResult, inv_result: Dict[str, Any]
+    ) -> Incident:
+        """Build (unsaved) incident for invariant failure."""
         inv_id = inv_result.get("invariant_id", "UNKNOWN")
         inv_name = inv_result.get("name", inv_id)
 
@@ -320,22 +387,12 @@ class InvariantWatcher:
             playbooks=["rerun_eval", "check_agent_config"],
         )
 
-        self.db.add(incident)
-        self.db.commit()
-        self.db.refresh(incident)
-
-        # Create external issue
-        issue_url = self._create_external_issue(incident)
-        if issue_url:
-            incident.issue_url = issue_url
-            self.db.commit()
-
         return incident
 
-    def _create_budget_incident(
+    def _build_budget_incident(
         self, key: str, budget_data: Dict[str, Any]
     ) -> Incident:
-        """Create incident for budget overrun."""
+        """Build (unsaved) incident for budget overrun."""
         spent = budget_data.get("spent", 0)
         limit = budget_data.get("limit", 0)
         overage = spent - limit
@@ -357,22 +414,12 @@ class InvariantWatcher:
             playbooks=["reduce_traffic", "increase_budget", "pause_agent"],
         )
 
-        self.db.add(incident)
-        self.db.commit()
-        self.db.refresh(incident)
-
-        # Create external issue
-        issue_url = self._create_external_issue(incident)
-        if issue_url:
-            incident.issue_url = issue_url
-            self.db.commit()
-
         return incident
 
-    def _create_planner_incident(
+    def _build_planner_incident(
         self, version: str, canary_data: Dict[str, Any]
     ) -> Incident:
-        """Create incident for planner regression."""
+        """Build (unsaved) incident for planner regression."""
         metrics = canary_data.get("metrics", {})
 
         # Regressions are sev2 (need rollback)
@@ -390,16 +437,6 @@ class InvariantWatcher:
             playbooks=["rollback_planner", "analyze_regression"],
         )
 
-        self.db.add(incident)
-        self.db.commit()
-        self.db.refresh(incident)
-
-        # Create external issue
-        issue_url = self._create_external_issue(incident)
-        if issue_url:
-            incident.issue_url = issue_url
-            self.db.commit()
-
         return incident
 
 
@@ -0,0 +1,329 @@
+"""
+Deep pagination for Elasticsearch listings (point-in-time + ``search_after``).
+
+Listings return an opaque ``next_cursor``; passing it back fetches the next
+page. How it works:
+
+- Every query is sorted with a deterministic tiebreaker (``received_at``
+  then ``gmail_id``), so ``search_after`` positions are exact.
+- The first page is a normal search against the live index, so fresh mail
+  and just-archived items are reflected immediately. Later pages run
+  inside a point-in-time (PIT) opened on the first follow-up and reused per
+  (user, query) until the last page, where it is closed. PITs left idle by
+  abandoned cursors are closed by ``sweep_idle_pits`` (scheduled every
+  minute). An expired PIT is reopened transparently.
+- Cursors are signed (HMAC) and bound to the user, the listing and a hash of
+  the query, so they can't be forged or replayed against another query.
+
+Usage:
+    pager = Pager(es, INDEX, user=user_email, scope="search", cursor=cursor)
+    page = pager.fetch(body, size=25)
+    page.hits, page.total, page.next_cursor
+
+Endpoints that return a bare JSON list send the cursor in the
+``X-Next-Cursor`` response header instead, keeping their response shape.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..config import agent_settings
+
+logger = logging.getLogger(__name__)
+
+PIT_KEEP_ALIVE = os.getenv("SEARCH_PIT_KEEP_ALIVE", "2m")
+PIT_IDLE_SECONDS = float(os.getenv("SEARCH_PIT_IDLE_SECONDS", "60"))
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Upper bound on refill round trips when a Python filter rejects hits
+MAX_BATCHES = 10
+
+TIEBREAKER = (
+    {"received_at": {"order": "desc", "missing": "_last", "unmapped_type": "date"}},
+    {"gmail_id": {"order": "asc", "missing": "_last", "unmapped_type": "keyword"}},
+)
+
+
+class InvalidCursor(ValueError):
+    """Cursor is malformed, tampered with, or belongs to another query/user."""
+
+
+def _secret() -> bytes:
+    return (os.getenv("SEARCH_CURSOR_SECRET") or agent_settings.SESSION_SECRET).encode()
+
+
+def _digest(value: Any) -> str:
+    raw = json.dumps(value, sort_keys=True, default=str).encode()
+    return hashlib.sha1(raw).hexdigest()[:16]
+
+
+def _sort_field(clause: Any) -> str:
+    return clause if isinstance(clause, str) else next(iter(clause))
+
+
+def with_tiebreaker(sort: Optional[List[Any]]) -> List[Any]:
+    """``sort`` (default: relevance) plus whichever tiebreaker fields it lacks."""
+    sort = list(sort or ["_score"])
+    present = {_sort_field(c) for c in sort}
+    return sort + [dict(c) for c in TIEBREAKER if _sort_field(c) not in present]
+
+
+@dataclass
+class CursorState:
+    scope: str
+    user: str  # digest of the user's email
+    query: str  # digest of the query body
+    search_after: List[Any]
+    pit_id: Optional[str]
+    started_at: str  # pinned "now" for time-relative scoring
+
+
+def encode_cursor(state: CursorState) -> str:
+    payload = json.dumps(
+        {
+            "s": state.scope,
+            "u": state.user,
+            "q": state.query,
+            "a": state.search_after,
+            "p": state.pit_id,
+            "t": state.started_at,
+        },
+        separators=(",", ":"),
+    ).encode()
+    sig = hmac.new(_secret(), payload, hashlib.sha256).digest()[:16]
+    b64 = base64.urlsafe_b64encode
+    return f"{b64(payload).decode().rstrip('=')}.{b64(sig).decode().rstrip('=')}"
+
+
+def _b64decode(part: str) -> bytes:
+    return base64.urlsafe_b64decode(part + "=" * (-len(part) % 4))
+
+
+def decode_cursor(cursor: str) -> CursorState:
+    try:
+        body, sig = cursor.split(".", 1)
+        payload = _b64decode(body)
+        expected = hmac.new(_secret(), payload, hashlib.sha256).digest()[:16]
+        if not hmac.compare_digest(expected, _b64decode(sig)):
+            raise InvalidCursor("cursor signature mismatch")
+        data = json.loads(payload)
+        return CursorState(
+            scope=data["s"],
+            user=data["u"],
+            query=data["q"],
+            search_after=data["a"],
+            pit_id=data.get("p"),
+            started_at=data["t"],
+        )
+    except InvalidCursor:
+        raise
+    except Exception as e:
+        raise InvalidCursor(f"malformed cursor: {e}") from e
+
+
+@dataclass
+class _OpenPit:
+    id: str
+    es: Any
+    last_used: float
+
+
+class PitRegistry:
+    """Open PITs per (user, query), shared by this process's requests."""
+
+    def __init__(self):
+        self._pits: Dict[Tuple[str, str], _OpenPit] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, es, index: str, key: Tuple[str, str]) -> str:
+        with self._lock:
+            pit = self._pits.get(key)
+            if pit is None:
+                opened = es.open_point_in_time(index=index, keep_alive=PIT_KEEP_ALIVE)
+                pit = self._pits[key] = _OpenPit(opened["id"], es, 0.0)
+            pit.last_used = time.monotonic()
+            return pit.id
+
+    def touch(self, key: Tuple[str, str], pit_id: str) -> None:
+        """Record use; ES may hand back a new id for the same PIT."""
+        with self._lock:
+            pit = self._pits.get(key)
+            if pit is not None:
+                pit.id = pit_id
+                pit.last_used = time.monotonic()
+
+    def forget(self, key: Tuple[str, str]) -> None:
+        with self._lock:
+            self._pits.pop(key, None)
+
+    def release(self, es, key: Tuple[str, str], pit_id: str) -> None:
+        """Close a PIT whose listing reached its last page."""
+        with self._lock:
+            pit = self._pits.get(key)
+            if pit is not None and pit.id == pit_id:
+                del self._pits[key]
+        _close(es, pit_id)
+
+    def sweep(self, idle_seconds: float = PIT_IDLE_SECONDS) -> int:
+        """Close PITs not used for ``idle_seconds``; returns how many."""
+        cutoff = time.monotonic() - idle_seconds
+        with self._lock:
+            idle = [(k, p) for k, p in self._pits.items() if p.last_used < cutoff]
+            for key, _ in idle:
+                del self._pits[key]
+        for _, pit in idle:
+            _close(pit.es, pit.id)
+        return len(idle)
+
+    def __len__(self) -> int:
+        return len(self._pits)
+
+
+def _close(es, pit_id: str) -> None:
+    try:
+        es.close_point_in_time(id=pit_id)
+    except Exception as e:  # already expired or ES unreachable
+        logger.debug(f"close_point_in_time failed: {e}")
+
+
+pits = PitRegistry()
+
+
+def sweep_idle_pits() -> int:
+    return pits.sweep()
+
+
+@dataclass
+class Page:
+    hits: List[Dict[str, Any]]
+    total: int
+    next_cursor: Optional[str]
+
+
+class Pager:
+    """One page of one listing; see the module docstring."""
+
+    def __init__(
+        self,
+        es,
+        index: str,
+        *,
+        user: str,
+        scope: str,
+        cursor: Optional[str] = None,
+        registry: PitRegistry = pits,
+    ):
+        self.es = es
+        self.index = index
+        self.scope = scope
+        self.user = _digest(user)
+        self.registry = registry
+        self.state = decode_cursor(cursor) if cursor else None
+        if self.state and (self.state.scope, self.state.user) != (scope, self.user):
+            raise InvalidCursor("cursor belongs to another listing or user")
+        self.started_at = (
+            self.state.started_at
+            if self.state
+            else datetime.now(timezone.utc).isoformat(timespec="seconds")
+        )
+
+    def fetch(
+        self,
+        body: Dict[str, Any],
+        size: int,
+        keep: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> Page:
+        """
+        Up to ``size`` hits after the cursor position.
+
+        ``keep`` is for filters that can't be expressed in the query: rejected
+        hits are skipped and further batches fetched until the page is full,
+        the results run out, or MAX_BATCHES round trips were made.
+        """
+        body = {k: v for k, v in body.items() if k not in ("size", "from")}
+        body["sort"] = with_tiebreaker(body.get("sort"))
+        query = _digest(body)
+        if self.state and self.state.query != query:
+            raise InvalidCursor("cursor belongs to a different query")
+
+        key = (self.user, query)
+        search_after = self.state.search_after if self.state else None
+        pit_id = None
+        if self.state:
+            pit_id = self.state.pit_id or self.registry.acquire(
+                self.es, self.index, key
+            )
+
+        kept: List[Dict[str, Any]] = []
+        total = 0
+        more = False
+        for batch in range(MAX_BATCHES):
+            request = {**body, "size": size - len(kept) + 1}
+            if search_after is not None:
+                request["search_after"] = search_after
+            res, pit_id = self._search(request, pit_id, key)
+            if batch == 0:
+                total = _total(res)
+            hits = res.get("hits", {}).get("hits", [])
+            for hit in hits:
+                if len(kept) == size:
+                    more = True  # look-ahead hit: not consumed
+                    break
+                search_after = hit.get("sort", search_after)
+                if keep is None or keep(hit):
+                    kept.append(hit)
+            if more or len(hits) < request["size"]:
+                break
+        else:
+            more = True  # refill budget spent; resume from here next time
+
+        next_cursor = None
+        if more:
+            next_cursor = encode_cursor(
+                CursorState(
+                    self.scope,
+                    self.user,
+                    query,
+                    search_after,
+                    pit_id,
+                    self.started_at,
+                )
+            )
+        elif pit_id:
+            self.registry.release(self.es, key, pit_id)
+        return Page(hits=kept, total=total, next_cursor=next_cursor)
+
+    def _search(self, request, pit_id, key):
+        from elasticsearch import NotFoundError  # app.main imports this module
+
+        if pit_id is None:
+            return self.es.search(index=self.index, body=request), None
+        try:
+            res = self._pit_search(request, pit_id)
+        except NotFoundError:
+            # PIT expired or swept: continue the same position on a fresh one
+            self.registry.forget(key)
+            pit_id = self.registry.acquire(self.es, self.index, key)
+            res = self._pit_search(request, pit_id)
+        pit_id = res.get("pit_id") or pit_id
+        self.registry.touch(key, pit_id)
+        return res, pit_id
+
+    def _pit_search(self, request, pit_id):
+        pit = {"id": pit_id, "keep_alive": PIT_KEEP_ALIVE}
+        return self.es.search(body={**request, "pit": pit})
+
+
+def _total(res: Dict[str, Any]) -> int:
+    total = res.get("hits", {}).get("total", 0)
+    return total.get("value", 0) if isinstance(total, dict) else int(total or 0)
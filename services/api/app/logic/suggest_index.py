@@ -0,0 +1,317 @@
+"""
+Per-user in-process autocomplete index for /suggest.
+
+Each user gets a sorted array of normalized suggestion strings (subjects,
+sender display names, companies and two-word subject shingles); a prefix
+lookup is two bisects plus a top-k over the matching slice. Entries are
+weighted by frequency and recency:
+
+    score = log2(count) + last_seen / RECENCY_HALF_LIFE
+
+so an entry seen one half-life more recently ranks like one seen twice as
+often. Scores don't depend on "now", so they never need recomputing.
+
+- An index is built lazily on the user's first suggest call from one ES
+  aggregation over their mail, then kept current by ``add_emails`` from the
+  ingest path (no rebuild needed for new mail).
+- Memory is bounded by a per-user entry cap (lowest scores are dropped) and
+  an LRU across users on the total entry count; sizes are exported as
+  Prometheus gauges.
+- Everything is keyed by the owner's email, so suggestions never cross
+  users.
+"""
+
+import heapq
+import logging
+import math
+import os
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..core.metrics import suggest_index_entries, suggest_index_users
+from .risk import parse_from
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES_PER_USER = int(os.getenv("SUGGEST_INDEX_MAX_ENTRIES", "100000"))
+MAX_TOTAL_ENTRIES = int(os.getenv("SUGGEST_INDEX_MAX_TOTAL_ENTRIES", "2000000"))
+RECENCY_HALF_LIFE = 7 * 86400.0  # seconds
+# Queries with more tokens than this look like body-text searches
+MAX_LOCAL_TOKENS = 3
+# Prefixes matching more entries than this memoize their top MEMO_K
+WIDE_PREFIX = 256
+MEMO_K = 32
+# Buckets per field in the build aggregation
+BUILD_BUCKETS = int(os.getenv("SUGGEST_INDEX_BUILD_BUCKETS", "5000"))
+
+_PREFIX_END = "\uffff"  # sorts after any text char
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def looks_like_body_search(q: str) -> bool:
+    return len(q.split()) > MAX_LOCAL_TOKENS
+
+
+def _timestamp(value: Any) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        dt = value
+    elif value:
+        try:
+            dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return 0.0
+    else:
+        return 0.0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _shingles(subject: str) -> List[str]:
+    # Word pairs inside the subject; the leading pair is a prefix of the
+    # subject entry itself
+    words = subject.split()
+    return [" ".join(words[i : i + 2]) for i in range(1, len(words) - 1)]
+
+
+class _Entry:
+    __slots__ = ("text", "count", "last_seen", "score")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.count = 0
+        self.last_seen = 0.0
+        self.score = 0.0
+
+    def add(self, count: int, seen: float) -> None:
+        self.count += count
+        self.last_seen = max(self.last_seen, seen)
+        self.score = math.log2(self.count) + self.last_seen / RECENCY_HALF_LIFE
+
+
+class UserSuggestIndex:
+    """Suggestion entries of one user, sorted by normalized text."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES_PER_USER):
+        self.max_entries = max_entries
+        self._entries: Dict[str, _Entry] = {}
+        self._keys: List[str] = []  # sorted normalized texts
+        self._scores: List[float] = []  # score of _keys[i]
+        # Wide prefix -> its top MEMO_K texts; dropped when an entry under
+        # the prefix changes
+        self._memo: Dict[str, List[str]] = {}
+        self._bulk = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, text: Optional[str], count: int = 1, seen: Any = None) -> None:
+        if not text:
+            return
+        text = " ".join(text.split())
+        key = text.lower()
+        if len(key) < 2:
+            return
+        entry = self._entries.get(key)
+        new = entry is None
+        if new:
+            entry = self._entries[key] = _Entry(text)
+        entry.add(count, _timestamp(seen))
+        if self._bulk:
+            return
+        i = bisect_left(self._keys, key)
+        if new:
+            self._keys.insert(i, key)
+            self._scores.insert(i, entry.score)
+        else:
+            self._scores[i] = entry.score
+        if self._memo:
+            for n in range(1, len(key) + 1):
+                self._memo.pop(key[:n], None)
+        if len(self._entries) > self.max_entries:
+            self._trim()
+
+    def add_subject(self, subject: Optional[str], count: int = 1, seen=None) -> None:
+        if not subject:
+            return
+        self.add(subject, count, seen)
+        for shingle in _shingles(subject):
+            self.add(shingle, count, seen)
+
+    def add_email(self, doc: Dict[str, Any]) -> None:
+        """Index the suggestion fields of one ES email doc."""
+        seen = doc.get("received_at")
+        self.add_subject(doc.get("subject"), seen=seen)
+        self.add(parse_from(doc.get("sender") or "")[0], seen=seen)
+        self.add(doc.get("company"), seen=seen)
+
+    @contextmanager
+    def bulk(self):
+        """Add many entries and sort once at the end, instead of per entry."""
+        self._bulk = True
+        try:
+            yield self
+        finally:
+            self._bulk = False
+            if len(self._entries) > self.max_entries:
+                self._trim()
+            else:
+                self._reindex()
+
+    def lookup(self, prefix: str, k: int) -> List[str]:
+        """Top ``k`` entries starting with ``prefix``, best score first."""
+        prefix = normalize(prefix)
+        if k <= MEMO_K and prefix in self._memo:
+            return self._memo[prefix][:k]
+        keys = self._keys
+        lo = bisect_left(keys, prefix)
+        hi = bisect_left(keys, prefix + _PREFIX_END, lo)
+        wide = hi - lo > WIDE_PREFIX and k <= MEMO_K
+        best = heapq.nlargest(
+            MEMO_K if wide else k, range(lo, hi), key=self._scores.__getitem__
+        )
+        texts = [self._entries[keys[i]].text for i in best]
+        if wide:
+            self._memo[prefix] = texts
+        return texts[:k]
+
+    def _trim(self) -> None:
+        # Drop a tenth at a time, so the sort is rebuilt rarely
+        keep = heapq.nlargest(
+            int(self.max_entries * 0.9), self._entries.items(), key=lambda i: i[1].score
+        )
+        self._entries = dict(keep)
+        self._reindex()
+
+    def _reindex(self) -> None:
+        self._keys = sorted(self._entries)
+        self._scores = [self._entries[key].score for key in self._keys]
+        self._memo.clear()
+
+
+def build_user_index(es, index: str, user_email: str) -> UserSuggestIndex:
+    """A user's index from one aggregation over their mail."""
+    last = {"last": {"max": {"field": "received_at"}}}
+
+    def terms(field):
+        return {"terms": {"field": field, "size": BUILD_BUCKETS}, "aggs": last}
+
+    res = es.search(
+        index=index,
+        body={
+            "size": 0,
+            "query": {"term": {"owner_email.keyword": user_email}},
+            "aggs": {
+                "subjects": terms("subject.raw"),
+                "senders": terms("sender.keyword"),
+                "companies": terms("company"),
+            },
+        },
+    )
+    aggs = res.get("aggregations", {})
+
+    def buckets(name):
+        for b in aggs.get(name, {}).get("buckets", []):
+            seen = (b.get("last") or {}).get("value")
+            yield b["key"], b["doc_count"], (seen or 0) / 1000.0
+
+    idx = UserSuggestIndex()
+    with idx.bulk():
+        for subject, count, seen in buckets("subjects"):
+            idx.add_subject(subject, count, seen)
+        for sender, count, seen in buckets("senders"):
+            idx.add(parse_from(sender)[0], count, seen)
+        for company, count, seen in buckets("companies"):
+            idx.add(company, count, seen)
+    return idx
+
+
+class SuggestIndexRegistry:
+    """Per-user indexes of this process, LRU-bounded by total entries."""
+
+    def __init__(self, max_total_entries: int = MAX_TOTAL_ENTRIES):
+        self.max_total_entries = max_total_entries
+        self._indexes: "OrderedDict[str, UserSuggestIndex]" = OrderedDict()
+        # Users whose index is being built -> emails ingested meanwhile
+        self._building: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, es, index: str, user_email: str, q: str, k: int):
+        """
+        Local suggestions for ``q``, building the user's index on first use.
+
+        Returns None while another request is building the index.
+        """
+        with self._lock:
+            idx = self._indexes.get(user_email)
+            if idx is not None:
+                self._indexes.move_to_end(user_email)
+                return idx.lookup(q, k)
+            if user_email in self._building:
+                return None
+            self._building[user_email] = []
+        try:
+            idx = build_user_index(es, index, user_email)
+        except Exception:
+            with self._lock:
+                self._building.pop(user_email, None)
+            raise
+        with self._lock:
+            for doc in self._building.pop(user_email, []):
+                idx.add_email(doc)
+            self._indexes[user_email] = idx
+            self._evict()
+            return idx.lookup(q, k)
+
+    def add_emails(self, user_email: str, docs: Iterable[Dict[str, Any]]) -> None:
+        """Apply newly indexed emails to the user's index, if it is loaded."""
+        with self._lock:
+            if user_email in self._building:
+                self._building[user_email].extend(docs)
+                return
+            idx = self._indexes.get(user_email)
+            if idx is None:
+                return  # built from ES, including these, on first use
+            for doc in docs:
+                idx.add_email(doc)
+            self._evict()
+
+    def drop(self, user_email: str) -> None:
+        with self._lock:
+            self._indexes.pop(user_email, None)
+            self._update_gauges()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+            self._building.clear()
+            self._update_gauges()
+
+    def total_entries(self) -> int:
+        return sum(len(idx) for idx in self._indexes.values())
+
+    def __contains__(self, user_email: str) -> bool:
+        return user_email in self._indexes
+
+    def _evict(self) -> None:
+        total = self.total_entries()
+        while total > self.max_total_entries and len(self._indexes) > 1:
+            _, idx = self._indexes.popitem(last=False)
+            total -= len(idx)
+        self._update_gauges(total)
+
+    def _update_gauges(self, total: Optional[int] = None) -> None:
+        suggest_index_users.set(len(self._indexes))
+        suggest_index_entries.set(self.total_entries() if total is None else total)
+
+
+suggest_indexes = SuggestIndexRegistry()
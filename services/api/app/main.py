@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 
@@ -19,27 +20,22 @@ from starlette_exporter import PrometheusMiddleware
 
 # Copilot: Ensure routers include gmail/backfill at /api/gmail/backfill and health/live endpoint.
 # Copilot: All routers should use proper prefixes and error logging with exc_info=True.
-from . import auth_google, health, oauth_google, routes_extract, routes_gmail
+# Only what the health, version and metrics endpoints need is imported here;
+# every other router is registered lazily below (see app.core.router_registry).
+from . import health
 from .db import Base, engine
-from .es import ensure_index
-from .routers import (
-    applications,
-    emails,
-    search,
-    suggest,
-    search_debug,
-    resume,
-    opportunities,
-)
+from .logic.paging import NEXT_CURSOR_HEADER
 from .routers import version as version_router
-from .routers import agent as agent_router
 from .settings import settings
 from .tracing import init_tracing
 from .config import agent_settings
 from .core.csrf import CSRFMiddleware
 from .core.limiter import RateLimitMiddleware
 from .core.metrics import metrics_router
-from .routers import dev_shims
+from .core.query_stats import QueryAccountingMiddleware
+from .core.router_registry import LazyRouterMiddleware, RouterRegistry
+
+logger = logging.getLogger(__name__)
 
 # CORS allowlist from environment (comma-separated)
 ALLOWED_ORIGINS = os.getenv("CORS_ALLOW_ORIGINS", "http://localhost:5175").split(",")
@@ -66,6 +62,11 @@ app.add_middleware(
     prefix="applylens_http",  # e.g. applylens_http_requests_total
 )
 
+# SQL query accounting per request (X-DB-Queries / X-DB-Time-Ms outside prod)
+app.add_middleware(
+    QueryAccountingMiddleware, headers=agent_settings.QUERY_STATS_HEADERS
+)
+
 # CORS middleware (must be before CSRF to handle preflight OPTIONS requests)
 if os.getenv("APPLYLENS_DEV") == "1":
     # Dev mode: Use regex to support wildcards (chrome-extension://* and localhost:*)
@@ -75,6 +76,7 @@ if os.getenv("APPLYLENS_DEV") == "1":
         allow_credentials=True,
         allow_methods=["GET", "POST", "PATCH", "DELETE", "OPTIONS"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],
     )
 else:
     # Production: Use explicit allowlist
@@ -84,6 +86,7 @@ else:
         allow_credentials=True,
         allow_methods=["GET", "POST", "PATCH", "DELETE", "OPTIONS"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],
     )
 
 # Rate limiting middleware (after CORS)
@@ -91,6 +94,9 @@ app.add_middleware(
     RateLimitMiddleware,
     capacity=agent_settings.RATE_LIMIT_MAX_REQ,
     window=agent_settings.RATE_LIMIT_WINDOW_SEC,
+    redis_url=agent_settings.RATE_LIMIT_REDIS_URL,
+    prefetch=agent_settings.RATE_LIMIT_PREFETCH,
+    lease_seconds=agent_settings.RATE_LIMIT_LEASE_SEC,
 )
 
 # Add session middleware for OAuth state management (must be before CSRF)
@@ -130,19 +136,15 @@ async def _maybe_create_tables():
 init_tracing(app)
 
 
-@app.on_event("startup")
-def _startup():
-    # Log key environment variables for troubleshooting
-    logger.info(
-        f"🔧 Runtime config: APPLYLENS_DEV={os.getenv('APPLYLENS_DEV')}, "
-        f"DATABASE_URL={settings.sql_database_url[:30]}..., "
-        f"ES_ENABLED={os.getenv('ES_ENABLED', 'true')}, "
-        f"DEVDIAG_BASE={os.getenv('DEVDIAG_BASE')}, "
-        f"DEVDIAG_ENABLED={os.getenv('DEVDIAG_ENABLED')}"
-    )
+def _warm_up():
+    """Slow startup work; runs in a thread so /healthz answers meanwhile."""
+    from .es import ensure_index
 
     # Make sure ES index exists (no‑op if disabled)
-    ensure_index()
+    try:
+        ensure_index()
+    except Exception as e:
+        logger.error(f"Could not ensure ES index: {e}", exc_info=True)
 
     # Initialize health metrics (DB_UP, ES_UP) on startup
     try:
@@ -161,8 +163,36 @@ def _startup():
         print(f"Warning: Could not start scheduler: {e}")
 
 
+async def _warm_up_and_preload():
+    await asyncio.to_thread(_warm_up)
+    await lazy_routers.preload()
+    health.mark_warmed_up()
+    logger.info("Warm-up finished; all routers loaded")
+
+
+_warm_up_task = None
+
+
+@app.on_event("startup")
+async def _startup():
+    global _warm_up_task
+    # Log key environment variables for troubleshooting
+    logger.info(
+        f"🔧 Runtime config: APPLYLENS_DEV={os.getenv('APPLYLENS_DEV')}, "
+        f"DATABASE_URL={settings.sql_database_url[:30]}..., "
+        f"ES_ENABLED={os.getenv('ES_ENABLED', 'true')}, "
+        f"DEVDIAG_BASE={os.getenv('DEVDIAG_BASE')}, "
+        f"DEVDIAG_ENABLED={os.getenv('DEVDIAG_ENABLED')}"
+    )
+    # ES index, health metrics, the scheduler and the remaining router
+    # imports run in the background; /readyz returns 503 until they finish.
+    _warm_up_task = asyncio.create_task(_warm_up_and_preload())
+
+
 @app.on_event("shutdown")
 def _shutdown():
+    if _warm_up_task is not None:
+        _warm_up_task.cancel()
     # Gracefully shutdown scheduler
     try:
         from .scheduler import shutdown_scheduler
@@ -212,383 +242,240 @@ def debug_500():
     raise HTTPException(status_code=500, detail="Debug error for alert testing")
 
 
+# Everything below is registered lazily, in the order it used to be included:
+# a router module is imported the first time a request hits one of its
+# prefixes (or when the background warm-up preloads it), so `import app.main`
+# stays fast. Prefixes are the URL prefixes as served; when adding a router,
+# list every prefix its paths start with.
+lazy_routers = RouterRegistry(app)
+lazy = lazy_routers.register
+
 # Dev shim router - must come early enough that /api/auth/* and
 # /api/actions/tray are handled before any more specific 404s.
 if os.getenv("APPLYLENS_DEV") == "1":
-    app.include_router(dev_shims.router)
+    lazy("app.routers.dev_shims:router", ("/api",))
 
 
 # Dev routers FIRST - Must be before production routers to win path matches
 # Dev seed router - Test data seeding (dev only)
-from .routers import dev_seed  # noqa: E402
-
-app.include_router(dev_seed.router)
+lazy("app.routers.dev_seed:router", ("/api/dev",))
 
 # Dev risk router - Email risk assessment stubs (dev only)
 # MUST BE BEFORE emails.router to win /emails/{id}/risk-advice
-from .routers import dev_risk  # noqa: E402
-
-app.include_router(dev_risk.router)
-app.include_router(dev_risk.emails_risk_router)  # /emails/* paths (no prefix)
+lazy("app.routers.dev_risk:router", ("/security",))
+lazy("app.routers.dev_risk:emails_risk_router", ("/emails",))  # no prefix
 
 # Dev backfill router - Gmail backfill stubs (dev only)
-from .routers import dev_backfill  # noqa: E402
-
-app.include_router(dev_backfill.router)
+lazy("app.routers.dev_backfill:router", ("/api/gmail/backfill", "/gmail/backfill"))
 
 # Include production routers
-app.include_router(emails.router)
-app.include_router(search.router)
-app.include_router(search_debug.router)  # Debug diagnostics for search
-app.include_router(suggest.router)
-app.include_router(applications.router)
+lazy("app.routers.emails:router", ("/emails",))
+lazy("app.routers.search:router", ("/api/search",))
+lazy("app.routers.search_debug:router", ("/search",))  # Search diagnostics
+lazy("app.routers.suggest:router", ("/suggest",))
+lazy("app.routers.applications:router", ("/applications",))
 
 # Resume router - Upload-only resume management
-app.include_router(resume.router)
+lazy("app.routers.resume:router", ("/api/resume",))
 
 # Opportunities router - Job opportunities listing
-app.include_router(opportunities.router)
+lazy("app.routers.opportunities:router", ("/api/opportunities",))
 
 # Classifier diagnostics router - Email classifier health checks
-from .routers import diagnostics_classifier  # noqa: E402
-
-app.include_router(diagnostics_classifier.router)
+lazy("app.routers.diagnostics_classifier:router", ("/diagnostics/classifier",))
 
 # Agent router - Mailbox Agent v2 (AI assistant)
 # Mount with /api prefix to match frontend expectations (/api/v2/agent/run)
-app.include_router(agent_router.router, prefix="/api")
+lazy("app.routers.agent:router", ("/api/v2/agent",), prefix="/api")
 
 # Agent feedback - Learning loop for Agent V2
-from . import routes_agent_feedback  # noqa: E402
-
-app.include_router(routes_agent_feedback.router, prefix="/api")
+lazy("app.routes_agent_feedback:router", ("/api/v2/agent",), prefix="/api")
 
 # Auth router - Google OAuth and demo mode
-from .routers import auth as auth_router  # noqa: E402
-
-app.include_router(auth_router.router)
+lazy("app.routers.auth:router", ("/auth",))
 
 # Admin router - System maintenance
-from .routers import admin as admin_router  # noqa: E402
+lazy("app.routers.admin:router", ("/admin",))
 
-app.include_router(admin_router.router)
-
-app.include_router(auth_google.router)
-app.include_router(routes_gmail.router)
-app.include_router(oauth_google.router)
-app.include_router(routes_extract.router)
+lazy("app.auth_google:router", ("/auth2/google",))
+lazy("app.routes_gmail:router", ("/gmail",))
+lazy("app.oauth_google:router", ("/oauth/google",))
+lazy("app.routes_extract:router", ("/applications",))
 
 # Thread detail API
-from . import routes_threads  # noqa: E402
-
-app.include_router(routes_threads.router)
+lazy("app.routes_threads:router", ("/api/threads",))
 
 # E2E test authentication (only enabled when E2E_PROD=1)
 if os.getenv("E2E_PROD") == "1":
-    from . import routes_e2e_auth
-
-    app.include_router(routes_e2e_auth.router)
+    lazy("app.routes_e2e_auth:router", ("/auth/e2e",))
     logging.getLogger("uvicorn").info(
         "🧪 E2E auth endpoint enabled at /api/auth/e2e/login"
     )
 
 # Debug LLM router - Hackathon monitoring
-from .routers import debug_llm  # noqa: E402
-
-app.include_router(debug_llm.router)
+lazy("app.routers.debug_llm:router", ("/debug",))
 
 # Hackathon demo router - Gemini test endpoints
-from .routers import hackathon_demo  # noqa: E402
-
-app.include_router(hackathon_demo.router)
+lazy("app.routers.hackathon_demo:router", ("/hackathon",))
 
 # Companion learning loop
-from .routers import extension_learning  # noqa: E402
-
-app.include_router(extension_learning.router)
+lazy("app.routers.extension_learning:router", ("/api/extension/learning",))
 
 # Async Gmail backfill with job tracking (v0.4.17)
-from .routers import gmail_backfill  # noqa: E402
-
-app.include_router(gmail_backfill.router)  # /gmail/backfill/* (no /api prefix needed)
+lazy("app.routers.gmail_backfill:router", ("/gmail/backfill",))  # no /api prefix
 
 # Phase 2 - Category labeling and profile analytics
-from .routers import labeling, labels, profile  # noqa: E402
-
-app.include_router(labels.router)
-app.include_router(profile.router)
-app.include_router(labeling.router)
+lazy("app.routers.labels:router", ("/labels",))
+lazy("app.routers.profile:router", ("/profile",))
+lazy("app.routers.labeling:router", ("/ml",))
 
 # UX metrics (lightweight client telemetry)
-from .routers import ux_metrics  # noqa: E402
-
-app.include_router(ux_metrics.router)
+lazy("app.routers.ux_metrics:router", ("/ux",))
 
 # Security analysis
-from .routers import policy, security  # noqa: E402
-
-app.include_router(security.router, prefix="/api")  # /api/security/*
-app.include_router(policy.router)
+lazy("app.routers.security:router", ("/api/security",), prefix="/api")
+lazy("app.routers.policy:router", ("/policy",))
 
 # Phase 4 - Agentic Actions & Approval Loop
-from .routers import actions  # noqa: E402
-from .routers import inbox_actions  # noqa: E402
-from .routers import senders  # noqa: E402
-from .routers import tracker  # noqa: E402
-
-app.include_router(actions.router)
-app.include_router(inbox_actions.router)
-app.include_router(senders.router)  # /settings/senders
-app.include_router(tracker.router)  # /tracker
+lazy("app.routers.actions:router", ("/actions",))
+lazy("app.routers.inbox_actions:router", ("/actions",))
+lazy("app.routers.senders:router", ("/settings/senders",))
+lazy("app.routers.tracker:router", ("/tracker",))
 
 # Browser Extension API (dev-only)
-from .routers import extension  # noqa: E402
-
-app.include_router(extension.router)  # /api/extension/* + /api/profile/*
+lazy("app.routers.extension:router", ("/api/extension", "/api/profile"))
 
 # DevDiag Proxy (ops diagnostics)
-from .routers import devdiag_proxy  # noqa: E402
-
-app.include_router(devdiag_proxy.router, prefix="/api")  # /api/ops/diag/*
+lazy("app.routers.devdiag_proxy:router", ("/api/ops/diag",), prefix="/api")
 
 # Phase 5 - Chat Assistant
-from .routers import chat  # noqa: E402
-from .routers import assistant  # noqa: E402
-
-app.include_router(chat.router)
-app.include_router(assistant.router)  # /assistant/query
+lazy("app.routers.chat:router", ("/chat",))
+lazy("app.routers.assistant:router", ("/assistant",))  # /assistant/query
 
 # Email Statistics (with Redis caching)
-from .routers import emails_stats  # noqa: E402
-
-app.include_router(emails_stats.router)
+lazy("app.routers.emails_stats:router", ("/emails",))
 
 # Feature Flags Management (Email Risk v3.1 rollout)
-from .routers import flags  # noqa: E402
-
-app.include_router(flags.router)
+lazy("app.routers.flags:router", ("/flags",))
 
 # Phase 6 - Money Mode (Receipt tracking)
-from .routers import money  # noqa: E402
-
-app.include_router(money.router)
+lazy("app.routers.money:router", ("/money",))
 
 # Fivetran & BigQuery Warehouse Metrics
-from .routers import metrics_profile  # noqa: E402
-
-app.include_router(metrics_profile.router)
-
-# BigQuery Warehouse Profile Metrics (feature-flagged)
-try:
-    from .routers.warehouse import router as warehouse_router
+lazy("app.routers.metrics_profile:router", ("/metrics/profile",))
 
-    app.include_router(warehouse_router)
-except ImportError:
-    pass  # Warehouse module not available (requires google-cloud-bigquery)
+# BigQuery Warehouse Profile Metrics (feature-flagged; needs google-cloud-bigquery)
+lazy("app.routers.warehouse:router", ("/warehouse/profile",), optional=True)
 
 # Phase 5 - Agent Telemetry & Online Evaluation
-from .routers import agents_telemetry  # noqa: E402
-
-app.include_router(agents_telemetry.router)
+lazy("app.routers.agents_telemetry:router", ("/agents",))
 
 # Phase 5 - Budget Gates & Quality Thresholds
-from .routers import budgets  # noqa: E402
-
-app.include_router(budgets.router)
+lazy("app.routers.budgets:router", ("/budgets",))
 
 # Phase 5 - Intelligence Reports & Weekly Quality Analysis
-from .routers import intelligence  # noqa: E402
-
-app.include_router(intelligence.router)
+lazy("app.routers.intelligence:router", ("/intelligence",))
 
 # Phase 5 - Evaluation Metrics & Dashboard Integration
-from .routers import metrics_eval  # noqa: E402
-
-app.include_router(metrics_eval.router)
+lazy("app.routers.metrics_eval:router", ("/metrics",))
 
 # Phase 5.3 - Active Learning & Judge Reliability
-try:
-    from .api.routes.active import router as active_router
-
-    app.include_router(active_router)
-except ImportError:
-    pass  # Active learning module not available yet
+lazy("app.api.routes.active:router", ("/api/active",), optional=True)
 
 # Email automation system
-try:
-    from .routers.mail_tools import router as mail_tools_router
-
-    app.include_router(mail_tools_router)
-except ImportError:
-    pass  # Mail tools module not available yet
+lazy("app.routers.mail_tools:router", ("/mail",), optional=True)
 
 # Unsubscribe automation
-try:
-    from .routers.unsubscribe import router as unsubscribe_router
-
-    app.include_router(unsubscribe_router)
-except ImportError:
-    pass  # Unsubscribe module not available yet
+lazy("app.routers.unsubscribe:router", ("/unsubscribe",), optional=True)
 
 # Natural language agent
-try:
-    from .routers.nl_agent import router as nl_router
-
-    app.include_router(nl_router)
-except ImportError:
-    pass  # NL agent module not available yet
+lazy("app.routers.nl_agent:router", ("/nl",), optional=True)
 
 # Policy execution (approvals tray)
-try:
-    from .routers.policy_exec import router as policy_exec_router
-
-    app.include_router(policy_exec_router)
-except ImportError:
-    pass  # Policy exec module not available yet
+lazy("app.routers.policy_exec:router", ("/policies",), optional=True)
 
 # Approvals Tray API (Postgres + ES write-through)
-try:
-    from .routers.approvals import router as approvals_router
-
-    app.include_router(approvals_router)
-except ImportError:
-    pass  # Approvals module not available yet
+lazy("app.routers.approvals:router", ("/approvals",), optional=True)
 
 # Agent Approvals API (Phase 4)
-try:
-    from .routers.approvals_agent import router as agent_approvals_router
-
-    app.include_router(agent_approvals_router)
-except ImportError:
-    pass  # Agent approvals module not available yet
+lazy("app.routers.approvals_agent:router", ("/approvals",), optional=True)
 
 # Grouped unsubscribe
-try:
-    from .routers.unsubscribe_group import router as unsubscribe_group_router
-
-    app.include_router(unsubscribe_group_router)
-except ImportError:
-    pass  # Grouped unsubscribe module not available yet
+lazy("app.routers.unsubscribe_group:router", ("/unsubscribe",), optional=True)
 
 # Productivity tools (reminders, calendar)
-try:
-    from .routers.productivity import router as productivity_router
-
-    app.include_router(productivity_router)
-except ImportError:
-    pass  # Productivity module not available yet
+lazy("app.routers.productivity:router", ("/productivity",), optional=True)
 
 # Phase 51.2 — Analytics endpoints (optional, gated)
-try:
-    from .routers.analytics import router as analytics_router
-
-    app.include_router(analytics_router)
-except ImportError:
-    pass  # Analytics module not available
+lazy("app.routers.analytics:router", ("/analytics",), optional=True)
 
 # Backfill health metrics (Prometheus)
-try:
-    from .routers.metrics import router as backfill_metrics_router
-
-    app.include_router(backfill_metrics_router)
-except ImportError:
-    pass  # Backfill metrics module not available
+lazy("app.routers.metrics:router", ("/metrics",), optional=True)
 
 # Automation (risk scoring, etc.)
-try:
-    from .routers.automation import router as automation_router
+lazy("app.routers.automation:router", ("/automation",), optional=True)
 
-    app.include_router(automation_router)
-except ImportError:
-    pass  # Automation module not available
 
 # Phase 1 Agentic System - Agents core infrastructure
-try:
-    from .routers.agents import router as agents_router, get_registry
-    from .routers.agents_events import router as agents_events_router
-    from .agents.warehouse import register as register_warehouse
-    from .agents.inbox_triage import register as register_inbox_triage
-    from .agents.knowledge_update import register as register_knowledge_update
-    from .agents.insights_writer import register as register_insights_writer
-
-    app.include_router(agents_router)
-    app.include_router(agents_events_router)
-
-    # Register agents
-    registry = get_registry()
-    register_warehouse(registry)
-    register_inbox_triage(registry)
-    register_knowledge_update(registry)
-    register_insights_writer(registry)
-except ImportError:
-    pass  # Agents module not available
+def _register_agents(modules):
+    registry = modules["app.routers.agents"].get_registry()
+    for name in (
+        "warehouse",
+        "inbox_triage",
+        "knowledge_update",
+        "insights_writer",
+    ):
+        modules[f"app.agents.{name}"].register(registry)
+
+
+lazy(
+    ("app.routers.agents:router", "app.routers.agents_events:router"),
+    ("/agents",),
+    optional=True,
+    requires=(
+        "app.agents.warehouse",
+        "app.agents.inbox_triage",
+        "app.agents.knowledge_update",
+        "app.agents.insights_writer",
+    ),
+    setup=_register_agents,
+)
 
 # Phase 5.4 Interventions - Incident tracking and remediation
-try:
-    from .routers.incidents import router as incidents_router
-    from .routers.playbooks import router as playbooks_router
-    from .routers.sse import router as sse_router
-
-    app.include_router(incidents_router)
-    app.include_router(playbooks_router)
-    app.include_router(sse_router)
-except ImportError:
-    pass  # Interventions module not available yet
+lazy(
+    (
+        "app.routers.incidents:router",
+        "app.routers.playbooks:router",
+        "app.routers.sse:router",
+    ),
+    ("/incidents", "/playbooks", "/sse"),
+    optional=True,
+)
 
 # Phase 5.5 Policy UI Editor - Policy bundles with versioning
-try:
-    from .routers.policy_bundles import router as policy_bundles_router
-    from .routers.policy_lint import router as policy_lint_router
-    from .routers.policy_sim import router as policy_sim_router
-    from .routers.policy_bundle_io import router as policy_bundle_io_router
-    from .routers.policy_activate import router as policy_activate_router
-
-    app.include_router(policy_bundles_router)
-    app.include_router(policy_lint_router)
-    app.include_router(policy_sim_router)
-    app.include_router(policy_bundle_io_router)
-    app.include_router(policy_activate_router)
-except ImportError:
-    pass  # Policy bundles module not available yet
+lazy(
+    (
+        "app.routers.policy_bundles:router",
+        "app.routers.policy_lint:router",
+        "app.routers.policy_sim:router",
+        "app.routers.policy_bundle_io:router",
+        "app.routers.policy_activate:router",
+    ),
+    ("/policy",),
+    optional=True,
+)
 
 # Phase 4 AI Features - Email Summarizer, Risk Badge, RAG Search
-logger = logging.getLogger(__name__)
-
-try:
-    logger.info("Attempting to load AI and RAG routers...")
-    from .routers import ai, rag
-
-    logger.info(f"AI router loaded: {ai.router}")
-    logger.info(f"RAG router loaded: {rag.router}")
-
-    app.include_router(ai.router)
-    logger.info("[OK] AI router registered")
-
-    # RAG router: Register twice for backwards compatibility
-    app.include_router(rag.router)  # /rag/...
-    app.include_router(rag.router, prefix="/api")  # /api/rag/... (backwards compat)
-    logger.info("[OK] RAG router registered at /rag/* and /api/rag/*")
-
-    print("[OK] Phase 4 AI routers registered successfully")
-except ImportError as e:
-    logger.error(f"[WARN] AI features module import failed: {e}")
-    print(f"[WARN] AI features module not available: {e}")
-except Exception as e:
-    logger.error(f"[ERROR] Error loading AI features: {e}", exc_info=True)
-    print(f"[ERROR] Error loading AI features: {e}")
-    import traceback
-
-    traceback.print_exc()
+lazy(
+    ("app.routers.ai:router", "app.routers.rag:router"), ("/ai", "/rag"), optional=True
+)
+# RAG router: Register twice for backwards compatibility (/api/rag/...)
+lazy("app.routers.rag:router", ("/api/rag",), prefix="/api", optional=True)
 
 # Dev-only routes for E2E testing (seed data, etc.)
 # Only available when ALLOW_DEV_ROUTES=1 environment variable is set
 if os.getenv("ALLOW_DEV_ROUTES") == "1":
-    try:
-        from .routers import dev_seed
+    lazy("app.routers.dev_seed:router", ("/api/dev",))
 
-        app.include_router(dev_seed.router)
-        logger.info("[OK] Dev seed router registered at /api/dev/*")
-    except ImportError as e:
-        logger.error(f"[WARN] Dev seed module import failed: {e}")
-    except Exception as e:
-        logger.error(f"[ERROR] Error loading dev seed router: {e}", exc_info=True)
+# Outermost middleware: loads the routers a request needs before routing it
+app.add_middleware(LazyRouterMiddleware, registry=lazy_routers)
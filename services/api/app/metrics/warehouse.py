@@ -14,16 +14,19 @@ Usage:
 """
 
 import os
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from google.cloud import bigquery
+# google-cloud-bigquery is imported inside the query functions: it is slow
+# to import and only needed when USE_WAREHOUSE is on.
+if TYPE_CHECKING:
+    from google.cloud import bigquery
 
 # BigQuery configuration from environment
 PROJECT = os.getenv("GCP_PROJECT", os.getenv("BQ_PROJECT", "applylens-app"))
 LOCATION = os.getenv("GCP_BQ_LOCATION", "US")
 
 
-def _client() -> bigquery.Client:
+def _client() -> "bigquery.Client":
     """Get BigQuery client instance.
     
     Uses Application Default Credentials (ADC) or service account key
@@ -32,6 +35,8 @@ def _client() -> bigquery.Client:
     Returns:
         Configured BigQuery client
     """
+    from google.cloud import bigquery
+
     credentials_path = os.getenv("GCP_CREDENTIALS_PATH")
     if credentials_path:
         return bigquery.Client.from_service_account_json(
@@ -75,6 +80,8 @@ async def mq_top_senders_30d(limit: int = 10) -> list[dict[str, Any]]:
     LIMIT @limit
     """
     
+    from google.cloud import bigquery
+
     client = _client()
     job_config = bigquery.QueryJobConfig(
         query_parameters=[
@@ -121,6 +128,8 @@ async def mq_activity_daily(days: int = 14) -> list[dict[str, Any]]:
     ORDER BY day ASC
     """
     
+    from google.cloud import bigquery
+
     client = _client()
     job_config = bigquery.QueryJobConfig(
         query_parameters=[
@@ -164,6 +173,8 @@ async def mq_categories_30d(limit: int = 10) -> list[dict[str, Any]]:
     LIMIT @limit
     """
     
+    from google.cloud import bigquery
+
     client = _client()
     job_config = bigquery.QueryJobConfig(
         query_parameters=[
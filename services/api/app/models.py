@@ -15,13 +15,17 @@ from sqlalchemy import (
     LargeBinary,
     String,
     Text,
+    UniqueConstraint,
+    event,
     text,
 )
+from sqlalchemy import inspect as sa_inspect
 from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from .db import Base
+from .services.opportunity_state import email_opportunity_state
 from .settings import settings
 
 # Use JSON for SQLite, JSONB for PostgreSQL
@@ -129,6 +133,9 @@ class Email(Base):
     is_real_opportunity = Column(Boolean, nullable=True, index=True)
     category_confidence = Column(Float, nullable=True)
     classifier_version = Column(String(64), nullable=True)
+    # Email-level opportunity verdict (classifier | heuristic | excluded),
+    # kept current by the flush listeners below
+    opportunity_state = Column(String(16), nullable=True)
 
     # Reply metrics
     first_user_reply_at = Column(DateTime(timezone=True), nullable=True)
@@ -178,6 +185,40 @@ class Email(Base):
 
 
 Index("idx_emails_search", Email.subject, Email.sender, Email.recipient)
+Index(
+    "ix_emails_owner_opportunity_received",
+    Email.owner_email,
+    Email.opportunity_state,
+    Email.received_at,
+)
+# Per-user date ranges; on Postgres one per monthly partition
+Index("ix_emails_owner_received", Email.owner_email, Email.received_at)
+
+
+# Email columns email_opportunity_state reads
+_OPPORTUNITY_INPUTS = (
+    "is_real_opportunity",
+    "subject",
+    "sender",
+    "body_text",
+    "labels",
+    "category",
+)
+
+
+@event.listens_for(Email, "before_insert")
+def _set_opportunity_state(mapper, connection, target):
+    target.opportunity_state = email_opportunity_state(target)
+
+
+@event.listens_for(Email, "before_update")
+def _refresh_opportunity_state(mapper, connection, target):
+    """Re-derive opportunity_state when an ORM update touches its inputs."""
+    attrs = sa_inspect(target).attrs
+    if target.opportunity_state is None or any(
+        attrs[name].history.has_changes() for name in _OPPORTUNITY_INPUTS
+    ):
+        target.opportunity_state = email_opportunity_state(target)
 
 
 class AppStatus(str, enum.Enum):
@@ -552,7 +593,11 @@ class UserWeight(Base):
     weight = Column(Float, default=0.0)  # learned weight
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    __table_args__ = ({"schema": None},)  # Use default schema
+    __table_args__ = (
+        # Matches migration 0017; the learner upserts on it
+        UniqueConstraint("user_id", "feature", name="uq_user_feature"),
+        {"schema": None},  # Use default schema
+    )
 
     def __repr__(self):
         return f"<UserWeight(user={self.user_id}, feature={self.feature}, weight={self.weight:.3f})>"
@@ -631,6 +676,8 @@ class AgentAuditLog(Base):
     __table_args__ = (
         Index("ix_agent_audit_log_agent_status", "agent", "status"),
         Index("ix_agent_audit_log_started_at_desc", started_at.desc()),
+        # Latest runs by status (regression detector windows)
+        Index("ix_agent_audit_log_status_started_at", "status", "started_at"),
     )
 
     def __repr__(self):
@@ -759,6 +806,9 @@ class AgentMetricsDaily(Base):
     median_latency_ms = Column(Float, nullable=True)
     p95_latency_ms = Column(Float, nullable=True)
     p99_latency_ms = Column(Float, nullable=True)
+    # Mergeable latency sketch (app.observability.sketch); percentiles over
+    # a date range come from merging these, never from averaging p95s
+    latency_sketch = Column(JSONB, nullable=True)
 
     # Cost tracking
     total_cost_weight = Column(Float, default=0.0)  # Relative cost units
@@ -1169,3 +1219,26 @@ class EmailTrainingLabel(Base):
 
     def __repr__(self):
         return f"<EmailTrainingLabel(id={self.id}, category={self.label_category}, source={self.label_source}, conf={self.confidence})>"
+
+
+# ===== Scheduler =====
+
+
+class JobLease(Base):
+    """Cross-worker lease and last run of a scheduled job (app.core.job_locks)."""
+
+    __tablename__ = "job_leases"
+
+    job_id = Column(String(128), primary_key=True)
+    holder = Column(String(255), nullable=True)  # Worker running the job
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+    # Un-jittered trigger time of the latest claimed run; older slots skip
+    last_fire_time = Column(DateTime(timezone=True), nullable=True)
+    last_started_at = Column(DateTime(timezone=True), nullable=True)
+    last_finished_at = Column(DateTime(timezone=True), nullable=True)
+    last_duration_seconds = Column(Float, nullable=True)
+    last_status = Column(String(16), nullable=True)  # ok | failed
+    last_success_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<JobLease(job={self.job_id}, holder={self.holder}, until={self.locked_until})>"
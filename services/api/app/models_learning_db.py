@@ -61,6 +61,12 @@ class FormProfile(Base):
     avg_edit_chars = Column(Float, nullable=True)
     avg_duration_ms = Column(Integer, nullable=True)
 
+    # Running state for incremental aggregation at sync time:
+    # number of events folded into the averages above, and
+    # {selector: {semantic: votes}} behind the canonical `fields` map
+    event_count = Column(Integer, nullable=False, server_default="0")
+    field_votes = Column(JSONB, nullable=False, server_default="{}")
+
     # Tracking
     last_seen_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(
@@ -0,0 +1,176 @@
+"""
+Mergeable latency sketch (DDSketch-style log histogram).
+
+Values are counted in logarithmic buckets ``gamma**(i-1) < v <= gamma**i``,
+with ``gamma = (1 + a) / (1 - a)``, so any quantile read back is within
+relative error ``a`` (RELATIVE_ACCURACY) of a true sample value. Two sketches
+merge by adding bucket counts, which makes them safe to combine across days,
+processes or SQL ``GROUP BY`` results. Percentiles of percentiles (averaging
+daily p95s) are not.
+
+Size is bounded by the value range, not the sample count: ~1,400 buckets
+cover 1 ms to 1,000 s at 0.5% accuracy.
+"""
+
+import math
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+RELATIVE_ACCURACY = 0.005
+# Values at or below this (including 0) share one bucket, read back as 0
+MIN_VALUE = 1e-3
+
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+
+
+def bucket_index(value: float) -> int:
+    return math.ceil(math.log(value) / LOG_GAMMA)
+
+
+def bucket_value(index: int) -> float:
+    # Point of the bucket with equal relative distance to both bounds
+    return 2 * GAMMA**index / (GAMMA + 1)
+
+
+class LatencySketch:
+    """Quantile sketch of non-negative values (latencies in ms)."""
+
+    __slots__ = ("bins", "zero_count", "count", "sum", "min", "max")
+
+    def __init__(self):
+        self.bins: Counter = Counter()
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, value: float, count: int = 1) -> None:
+        if value is None or count <= 0:
+            return
+        if value > MIN_VALUE:
+            self.bins[bucket_index(value)] += count
+        else:
+            value = max(value, 0.0)
+            self.zero_count += count
+        self.count += count
+        self.sum += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def add_many(self, values: Iterable[float]) -> None:
+        values = [max(v, 0.0) for v in values if v is not None]
+        if not values:
+            return
+        log, ceil = math.log, math.ceil
+        positive = [v for v in values if v > MIN_VALUE]
+        self.bins.update(ceil(log(v) / LOG_GAMMA) for v in positive)
+        self.zero_count += len(values) - len(positive)
+        self.count += len(values)
+        self.sum += math.fsum(values)
+        self.min = min(self.min, min(values))
+        self.max = max(self.max, max(values))
+
+    def add_bucket(
+        self,
+        index: Optional[int],
+        count: int,
+        total: float = 0.0,
+        lo: Optional[float] = None,
+        hi: Optional[float] = None,
+    ) -> None:
+        """
+        Add ``count`` values already bucketed elsewhere (e.g. by SQL).
+
+        ``index`` None means the zero bucket; ``total``, ``lo`` and ``hi`` are
+        the sum, min and max of the bucket's values when known.
+        """
+        if count <= 0:
+            return
+        if index is None:
+            self.zero_count += count
+        else:
+            self.bins[int(index)] += count
+        self.count += count
+        self.sum += total
+        if lo is not None:
+            self.min = min(self.min, lo)
+        if hi is not None:
+            self.max = max(self.max, hi)
+
+    def merge(self, other: "LatencySketch") -> "LatencySketch":
+        self.bins.update(other.bins)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Nearest-rank value at quantile ``q`` (0-1): the smallest sample with
+        at least ``q`` of all samples at or below it. None if empty.
+        """
+        if not self.count:
+            return None
+        rank = max(math.ceil(q * self.count), 1)
+        seen = self.zero_count
+        if seen >= rank:
+            return 0.0
+        value = self.max
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen >= rank:
+                value = bucket_value(index)
+                break
+        return min(max(value, self.min), self.max)
+
+    def percentiles(self, *qs: float) -> Tuple[Optional[float], ...]:
+        return tuple(self.quantile(q) for q in qs)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-safe form; bucket keys are strings."""
+        return {
+            "alpha": RELATIVE_ACCURACY,
+            "bins": {str(i): n for i, n in self.bins.items()},
+            "zero": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "LatencySketch":
+        sketch = cls()
+        if not data:
+            return sketch
+        if data.get("alpha", RELATIVE_ACCURACY) != RELATIVE_ACCURACY:
+            raise ValueError(
+                f"sketch accuracy {data['alpha']} != {RELATIVE_ACCURACY}; "
+                "sketches with different bucket widths can't be merged"
+            )
+        sketch.bins.update({int(i): n for i, n in data.get("bins", {}).items()})
+        sketch.zero_count = data.get("zero", 0)
+        sketch.count = data.get("count", 0)
+        sketch.sum = data.get("sum", 0.0)
+        if sketch.count:
+            sketch.min = data["min"]
+            sketch.max = data["max"]
+        return sketch
+
+    @classmethod
+    def merged(cls, sketches: Iterable["LatencySketch"]) -> "LatencySketch":
+        out = cls()
+        for sketch in sketches:
+            out.merge(sketch)
+        return out
@@ -10,6 +10,8 @@ from enum import Enum
 from typing import Dict, List, Optional, Any
 from pydantic import BaseModel, Field
 
+from .sketch import LatencySketch
+
 
 class SLOMetric(str, Enum):
     """SLO metric types."""
@@ -203,6 +205,7 @@ class SLOEvaluator:
         self,
         agent_name: str,
         metrics: Dict[str, float],
+        latency: Optional[LatencySketch] = None,
     ) -> SLOStatus:
         """
         Evaluate SLO compliance for an agent.
@@ -210,10 +213,17 @@ class SLOEvaluator:
         Args:
             agent_name: Agent identifier
             metrics: Current metric measurements
+            latency: Merged latency sketch for the window (e.g. the agent's
+                daily sketches); its p95/p99 take precedence over any
+                latency percentiles in ``metrics``
 
         Returns:
             SLOStatus with compliance information
         """
+        if latency is not None and latency.count:
+            p95, p99 = latency.percentiles(0.95, 0.99)
+            metrics = {**metrics, "latency_p95_ms": p95, "latency_p99_ms": p99}
+
         spec = self.slo_specs.get(agent_name)
         if not spec:
             # No SLO defined for this agent
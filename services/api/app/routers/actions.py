@@ -24,7 +24,11 @@ from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
 from ..core.executors import execute_action
-from ..core.learner import score_ctx_with_user, update_user_weights
+from ..core.learner import (
+    score_batch_with_user,
+    score_ctx_with_user,
+    update_user_weights,
+)
 from ..core.yardstick import evaluate_policy, validate_condition
 from ..db import get_db
 from ..models import ActionType, AuditAction, Email, Policy, PolicyStats, ProposedAction
@@ -122,6 +126,20 @@ def extract_domain(email_address: str) -> Optional[str]:
     return email_address.split("@")[-1].lower()
 
 
+def user_context_feats(email: Email) -> List[str]:
+    """Features of an email that the user's learned weights are scored on."""
+    f = []
+    if getattr(email, "category", None):
+        f.append(f"category:{email.category}")
+    if getattr(email, "sender_domain", None):
+        f.append(f"sender_domain:{email.sender_domain}")
+    subj = (getattr(email, "subject", "") or "").lower()
+    for tok in ("invoice", "receipt", "meetup", "interview", "newsletter", "offer"):
+        if tok in subj:
+            f.append(f"contains:{tok}")
+    return f
+
+
 def estimate_confidence(
     policy: Policy,
     feats: Dict[str, Any],
@@ -130,6 +148,7 @@ def estimate_confidence(
     db: Optional[Session] = None,
     user: Optional[Any] = None,
     email: Optional[Email] = None,
+    user_score: Optional[float] = None,
 ) -> float:
     """
     Estimate confidence score for a policy match with personalized learning bump.
@@ -142,6 +161,8 @@ def estimate_confidence(
         db: Database session (for user weight lookup)
         user: User object with email attribute
         email: Email object being evaluated
+        user_score: Precomputed learned-weight score for the email (skips the
+            per-email lookup; see score_batch_with_user)
 
     Returns:
         Confidence score (0.01 - 0.99)
@@ -156,19 +177,10 @@ def estimate_confidence(
         base = 0.95
 
     # User-personalized bump: +/- up to ~0.15
-    if db and user and email:
-        f = []
-        if getattr(email, "category", None):
-            f.append(f"category:{email.category}")
-        if getattr(email, "sender_domain", None):
-            f.append(f"sender_domain:{email.sender_domain}")
-        subj = (getattr(email, "subject", "") or "").lower()
-        for tok in ("invoice", "receipt", "meetup", "interview", "newsletter", "offer"):
-            if tok in subj:
-                f.append(f"contains:{tok}")
-
-        bump = max(-0.15, min(0.15, 0.05 * score_ctx_with_user(db, user.email, f)))
-        base += bump
+    if user_score is None and db and user and email:
+        user_score = score_ctx_with_user(db, user.email, user_context_feats(email))
+    if user_score is not None:
+        base += max(-0.15, min(0.15, 0.05 * user_score))
 
     return max(0.01, min(0.99, base))
 
@@ -178,6 +190,7 @@ def build_rationale(
     policy: Policy,
     db: Optional[Session] = None,
     user: Optional[Any] = None,
+    user_score: Optional[float] = None,
 ) -> tuple[float, Dict[str, Any]]:
     """
     Build confidence score and rationale for an action proposal.
@@ -214,7 +227,14 @@ def build_rationale(
     aggs = {}  # TODO: Add ES aggregations in Phase 4.1
     neighbors = []  # TODO: Add KNN neighbors in Phase 4.1
     confidence = estimate_confidence(
-        policy, features, aggs, neighbors, db=db, user=user, email=email
+        policy,
+        features,
+        aggs,
+        neighbors,
+        db=db,
+        user=user,
+        email=email,
+        user_score=user_score,
     )
 
     # Build narrative
@@ -413,13 +433,20 @@ def propose_actions(
 
     created = []
 
-    for email in emails:
+    # One load of the user's weights scores every email in the request
+    user_scores = score_batch_with_user(
+        db, user.email, [user_context_feats(email) for email in emails]
+    )
+
+    for email, user_score in zip(emails, user_scores):
         ctx = build_email_ctx(email)
 
         # Try each policy (stop at first match)
         for policy in policies:
             if evaluate_policy({"condition": policy.condition}, ctx):
-                confidence, rationale = build_rationale(email, policy, db=db, user=user)
+                confidence, rationale = build_rationale(
+                    email, policy, db=db, user=user, user_score=user_score
+                )
 
                 if confidence >= policy.confidence_threshold:
                     pa = ProposedAction(
@@ -28,6 +28,8 @@ from app.schemas_agent import (
     RoleMatchBatchResponse,
 )
 from app.agent.orchestrator import MailboxAgentOrchestrator
+from app.agent.today import TodayTriageEngine
+from app.services.opportunity_state import is_newsletter_or_digest
 from app.db import get_db
 from app.models import Session as SessionModel, JobOpportunity, OpportunityMatch, User
 from app.auth.deps import current_user
@@ -47,6 +49,7 @@ logger = logging.getLogger(__name__)
 
 # Initialize orchestrator (singleton)
 _orchestrator = None
+_today_engine = None
 
 
 def get_orchestrator() -> MailboxAgentOrchestrator:
@@ -57,6 +60,14 @@ def get_orchestrator() -> MailboxAgentOrchestrator:
     return _orchestrator
 
 
+def get_today_engine() -> TodayTriageEngine:
+    """Get or create the Today triage engine (shares the orchestrator)."""
+    global _today_engine
+    if _today_engine is None:
+        _today_engine = TodayTriageEngine(get_orchestrator())
+    return _today_engine
+
+
 # ============================================================================
 # Endpoints
 # ============================================================================
@@ -278,7 +289,8 @@ async def today_triage(
     """
     Execute "Today" inbox triage across multiple scan intents.
 
-    Runs preview_only scans for a fixed set of intents:
+    Runs preview_only scans (one shared ES scan, no LLM synthesis) for a
+    fixed set of intents:
     - followups
     - bills
     - interviews
@@ -337,111 +349,44 @@ async def today_triage(
         # 2. Extract time_window_days (default to 90)
         time_window_days = payload.get("time_window_days", 90)
 
-        # 3. Fixed list of scan intents for Today view
-        scan_intents = [
-            "followups",
-            "bills",
-            "interviews",
-            "unsubscribe",
-            "clean_promos",
-            "suspicious",
-        ]
-
-        # 4. Run preview_only scan for each intent
-        orchestrator = get_orchestrator()
-        results = []
-
-        for intent in scan_intents:
-            try:
-                # Build request for this intent
-                request = AgentRunRequest(
-                    user_id=user_id,
-                    query=f"Show {intent}",  # Simple query to trigger intent
-                    mode="preview_only",
-                    intent=intent,  # Explicit intent override
-                    context={"time_window_days": time_window_days},
-                )
-
-                # Execute scan
-                response = await orchestrator.run(request, db=db)
-
-                # Extract summary + threads from cards
-                summary = {"count": 0, "time_window_days": time_window_days}
-                threads = []
-
-                for card in response.cards:
-                    # Extract count from meta
-                    if card.meta and "count" in card.meta:
-                        summary["count"] = card.meta["count"]
-                        summary["time_window_days"] = card.meta.get(
-                            "time_window_days", time_window_days
-                        )
-
-                    # Extract threads from thread_list cards
-                    if card.kind == "thread_list" and hasattr(card, "threads"):
-                        threads = card.threads[:5]  # Limit to 5 threads per intent
-
-                results.append(
-                    {
-                        "intent": intent,
-                        "summary": summary,
-                        "threads": threads,
-                    }
-                )
-
-            except Exception as e:
-                # Log error but continue with other intents
-                logger.error(
-                    f"Today: intent '{intent}' failed: {e}",
-                    exc_info=True,
-                    extra={"user_id": user_id, "intent": intent},
-                )
-                # Omit failed intent from results (graceful degradation)
-                continue
-
-        logger.info(
-            f"Today: completed for user={user_id}, {len(results)}/{len(scan_intents)} intents succeeded"
-        )
+        # 3. Preview scans for all Today intents from one shared ES scan
+        #    (cached per user briefly; invalidated when new mail is indexed)
+        today = await get_today_engine().run(user_id, time_window_days)
+        results = today["intents"]
 
-        # 5. Fetch follow-up queue summary for Today panel
+        # 4. Follow-up queue summary for Today panel
         followups_summary = None
         try:
             from app.models import FollowupQueueState
 
-            # Call get_followup_queue to get the meta
-            queue_result = await orchestrator.get_followup_queue(
-                user_id=user_id,
-                time_window_days=time_window_days,
-            )
+            queue_result = today["followup_queue"]
+            threads = queue_result.get("threads", [])
+            total = len(threads)
 
-            if queue_result:
-                threads = queue_result.get("threads", [])
-                total = len(threads)
-
-                # Fetch state to calculate done_count
-                state_rows = (
-                    db.query(FollowupQueueState)
-                    .filter(FollowupQueueState.user_id == user_id)
-                    .all()
-                )
-                state_by_thread = {row.thread_id: row for row in state_rows}
+            # Fetch state to calculate done_count
+            state_rows = (
+                db.query(FollowupQueueState)
+                .filter(FollowupQueueState.user_id == user_id)
+                .all()
+            )
+            state_by_thread = {row.thread_id: row for row in state_rows}
 
-                done_count = sum(
-                    1
-                    for thread in threads
-                    if state_by_thread.get(thread.get("thread_id", ""), None)
-                    and state_by_thread[thread["thread_id"]].is_done
-                )
-                remaining_count = total - done_count
-
-                followups_summary = {
-                    "total": total,
-                    "done_count": done_count,
-                    "remaining_count": remaining_count,
-                    "time_window_days": queue_result.get(
-                        "time_window_days", time_window_days
-                    ),
-                }
+            done_count = sum(
+                1
+                for thread in threads
+                if state_by_thread.get(thread.get("thread_id", ""), None)
+                and state_by_thread[thread["thread_id"]].is_done
+            )
+            remaining_count = total - done_count
+
+            followups_summary = {
+                "total": total,
+                "done_count": done_count,
+                "remaining_count": remaining_count,
+                "time_window_days": queue_result.get(
+                    "time_window_days", time_window_days
+                ),
+            }
         except Exception as e:
             logger.warning(
                 f"Today: failed to fetch followups summary: {e}",
@@ -449,7 +394,7 @@ async def today_triage(
             )
             # Continue without followups summary (graceful degradation)
 
-        # 6. Fetch opportunities summary for Today panel
+        # 5. Fetch opportunities summary for Today panel
         opportunities_summary = None
         try:
             opportunities_summary = _build_opportunities_summary(db, user_id)
@@ -606,73 +551,6 @@ async def draft_followup(
         )
 
 
-# Newsletter domains to filter out
-NEWSLETTER_DOMAINS = {
-    "substack.com",
-    "newsletter.substack.com",
-    "medium.com",
-    "mailchimp.com",
-    "sendgrid.net",
-    "hubspotemail.net",
-    "info.linkedin.com",
-    "notifications.linkedin.com",
-}
-
-# Newsletter/digest subject keywords
-NEWSLETTER_SUBJECT_KEYWORDS = [
-    "newsletter",
-    "digest",
-    "roundup",
-    "weekly update",
-    "blog update",
-    "new post",
-    "substack",
-    "jobs you might like",
-    "new jobs for you",
-    "job alerts",
-    "jobs based on your profile",
-    "applied to",
-    "daily roundup",
-    "weekly roundup",
-    "job digest",
-    "recommended for you",
-    "similar jobs",
-]
-
-
-def is_newsletter_or_digest(
-    thread: dict, labels: list = None, category: str = None
-) -> bool:
-    """
-    Filter out newsletters, digests, and marketing emails.
-
-    Returns True if the thread should be excluded from follow-up queue.
-    """
-    subj = (thread.get("subject") or "").lower()
-    from_email = (thread.get("from_email") or "").lower()
-    labels = labels or []
-    category = (category or "").lower()
-
-    # Check sender domain
-    domain = from_email.split("@")[-1] if "@" in from_email else ""
-    if domain in NEWSLETTER_DOMAINS:
-        return True
-
-    # Exclude known newsletter categories
-    if category in {"newsletter_ads", "newsletter", "promo", "promotions"}:
-        return True
-
-    # Exclude Gmail promotional/update categories
-    if "CATEGORY_PROMOTIONS" in labels or "CATEGORY_UPDATES" in labels:
-        return True
-
-    # Exclude newsletter/digest subjects
-    if any(keyword in subj for keyword in NEWSLETTER_SUBJECT_KEYWORDS):
-        return True
-
-    return False
-
-
 def looks_like_real_interview(thread: dict) -> bool:
     """
     Sanity check to avoid treating obvious newsletters as interviews.
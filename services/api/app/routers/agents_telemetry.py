@@ -361,7 +361,7 @@ async def run_redteam_evaluation(
     )
 
     runner = EvalRunner(use_mock_executor=True)
-    run = runner.run_suite(suite)
+    run = await runner.run_suite_async(suite)
 
     # Count pass/fail
     passed = sum(1 for r in run.results if r.success and r.quality_score >= 70.0)
@@ -19,11 +19,12 @@ import os
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel
 
 from ..deps.user import get_current_user_email
 from ..es import ES_ENABLED, INDEX, es
+from ..logic.paging import NEXT_CURSOR_HEADER, InvalidCursor, Pager
 
 router = APIRouter(prefix="/applications", tags=["applications"])
 logger = logging.getLogger(__name__)
@@ -415,25 +416,39 @@ class TrackerRow(BaseModel):
 
 
 @router.get("/tracker", response_model=List[TrackerRow])
-def get_tracker_applications(user_email: str = Depends(get_current_user_email)):
+def get_tracker_applications(
+    response: Response,
+    cursor: Optional[str] = Query(
+        None, description="X-Next-Cursor header value from the previous page"
+    ),
+    user_email: str = Depends(get_current_user_email),
+):
     """
     Get application rows for the Tracker page derived from Gmail emails.
 
     This is a read-only endpoint that groups job-related emails by company
     and returns them as application rows for the Tracker UI.
 
+    Rows are grouped per page of 100 emails (newest first); when older emails
+    remain, the ``X-Next-Cursor`` header carries the cursor for the next page.
+    A company may reappear on later pages with older activity.
+
     Safe for production - no mutations, graceful fallback to empty list.
     """
+    # If Elasticsearch is disabled or not available, return empty list
+    if not ES_ENABLED or es is None:
+        logger.info("Tracker: ES disabled, returning empty list")
+        return []
+    try:
+        pager = Pager(es, INDEX, user=user_email, scope="tracker", cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
-        # If Elasticsearch is disabled or not available, return empty list
-        if not ES_ENABLED or es is None:
-            logger.info("Tracker: ES disabled, returning empty list")
-            return []
 
         # Query ES for job-related emails for this user
         # Look for emails with label_heuristics: offer, interview, rejection, application_receipt
         body = {
-            "size": 100,  # Get up to 100 recent job emails
             "query": {
                 "bool": {
                     "must": [
@@ -459,8 +474,10 @@ def get_tracker_applications(user_email: str = Depends(get_current_user_email)):
             ],
         }
 
-        result = es.search(index=INDEX, body=body)
-        hits = result.get("hits", {}).get("hits", [])
+        page = pager.fetch(body, size=100)  # 100 job emails per page
+        hits = page.hits
+        if page.next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
 
         # Group emails by company and build application rows
         # Use a dict to deduplicate by company
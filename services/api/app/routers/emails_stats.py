@@ -4,6 +4,8 @@ Email statistics and counters endpoints.
 Provides aggregated statistics about user's emails with Redis caching.
 """
 
+from datetime import datetime, timedelta, timezone
+
 from fastapi import APIRouter, Depends
 from sqlalchemy import text
 from sqlalchemy.orm import Session
@@ -14,6 +16,62 @@ from ..utils.cache import cache_get, cache_set
 
 router = APIRouter(prefix="/emails", tags=["emails"])
 
+RECENT_DAYS = 30
+TOP_WINDOW_DAYS = 365
+
+# received_at bounds are bound parameters rather than NOW() - INTERVAL so
+# Postgres prunes emails partitions at plan time.
+TOTALS_SQL = text("""
+    SELECT
+        COUNT(*) AS total,
+        COUNT(*) FILTER (WHERE received_at >= :since) AS last_30d
+    FROM emails
+    WHERE owner_email = :e
+""")
+
+BY_DAY_SQL = text("""
+    SELECT
+        DATE_TRUNC('day', received_at)::date AS day,
+        COUNT(*) AS c
+    FROM emails
+    WHERE owner_email = :e
+        AND received_at >= :since
+    GROUP BY 1
+    ORDER BY 1
+""")
+
+TOP_SENDERS_SQL = text("""
+    SELECT
+        sender,
+        COUNT(*) AS c
+    FROM emails
+    WHERE owner_email = :e
+        AND received_at >= :top_since
+    GROUP BY sender
+    ORDER BY c DESC
+    LIMIT 10
+""")
+
+TOP_CATEGORIES_SQL = text("""
+    SELECT
+        COALESCE(category, '(uncategorized)') AS category,
+        COUNT(*) AS c
+    FROM emails
+    WHERE owner_email = :e
+        AND received_at >= :top_since
+    GROUP BY 1
+    ORDER BY c DESC
+    LIMIT 10
+""")
+
+
+def stats_params(user_email: str, now: datetime) -> dict:
+    return {
+        "e": user_email,
+        "since": now - timedelta(days=RECENT_DAYS),
+        "top_since": now - timedelta(days=TOP_WINDOW_DAYS),
+    }
+
 
 @router.get("/count")
 def emails_count(
@@ -49,82 +107,19 @@ def emails_stats(
     - total: Total email count
     - last_30d: Emails received in last 30 days
     - by_day: Daily counts for last 30 days
-    - top_senders: Top 10 senders by email count
-    - top_categories: Top 10 categories by email count
+    - top_senders: Top 10 senders by email count over the last year
+    - top_categories: Top 10 categories by email count over the last year
     """
     cache_key = f"emails:stats:{user_email}"
     cached = cache_get(cache_key)
     if cached:
         return cached
 
-    # Total counts
-    totals = db.execute(
-        text("""
-            SELECT
-                COUNT(*) AS total,
-                COUNT(*) FILTER (WHERE received_at >= NOW() - INTERVAL '30 days') AS last_30d
-            FROM emails
-            WHERE owner_email = :e
-        """),
-        {"e": user_email},
-    ).first()
-
-    # Daily breakdown (last 30 days)
-    by_day = (
-        db.execute(
-            text("""
-            SELECT
-                DATE_TRUNC('day', received_at)::date AS day,
-                COUNT(*) AS c
-            FROM emails
-            WHERE owner_email = :e
-                AND received_at >= NOW() - INTERVAL '30 days'
-            GROUP BY 1
-            ORDER BY 1
-        """),
-            {"e": user_email},
-        )
-        .mappings()
-        .all()
-    )
-
-    # Top senders
-    top_senders = (
-        db.execute(
-            text("""
-            SELECT
-                sender,
-                COUNT(*) AS c
-            FROM emails
-            WHERE owner_email = :e
-            GROUP BY sender
-            ORDER BY c DESC
-            LIMIT 10
-        """),
-            {"e": user_email},
-        )
-        .mappings()
-        .all()
-    )
-
-    # Top categories
-    top_categories = (
-        db.execute(
-            text("""
-            SELECT
-                COALESCE(category, '(uncategorized)') AS category,
-                COUNT(*) AS c
-            FROM emails
-            WHERE owner_email = :e
-            GROUP BY 1
-            ORDER BY c DESC
-            LIMIT 10
-        """),
-            {"e": user_email},
-        )
-        .mappings()
-        .all()
-    )
+    params = stats_params(user_email, datetime.now(timezone.utc))
+    totals = db.execute(TOTALS_SQL, params).first()
+    by_day = db.execute(BY_DAY_SQL, params).mappings().all()
+    top_senders = db.execute(TOP_SENDERS_SQL, params).mappings().all()
+    top_categories = db.execute(TOP_CATEGORIES_SQL, params).mappings().all()
 
     out = {
         "owner_email": user_email,
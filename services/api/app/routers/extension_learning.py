@@ -3,10 +3,10 @@
 import logging
 import os
 import uuid
-from datetime import datetime
+from collections import Counter
 from typing import List
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, insert
 from fastapi import APIRouter, Depends, HTTPException, status
 
 from app.models_learning import (
@@ -26,6 +26,8 @@ from app.autofill_aggregator import (
     get_host_family,  # Phase 5.3
     build_style_explanation,  # Phase 5.3
     autofill_policy_total,  # Phase 5.4
+    apply_event_deltas,
+    invalidate_style_stats_cache,
 )
 
 logger = logging.getLogger(__name__)
@@ -51,6 +53,8 @@ async def learning_sync(
     """Ingest anonymized learning events from the Companion extension.
 
     Phase 2.0: Persist events to autofill_events table and update form_profiles.
+    The batch is written with a single multi-row INSERT and folded into the
+    affected profiles as deltas (see apply_event_deltas).
 
     Args:
         payload: Batch of learning events from the extension
@@ -73,8 +77,9 @@ async def learning_sync(
         # Phase 3.0 will use actual authenticated user_id
         temp_user_id = uuid.uuid4()
 
-        # Persist each event to database
-        events_created = 0
+        # Build all rows first, then persist the batch in one multi-row INSERT
+        rows = []
+        policy_counts: Counter = Counter()
         for event in payload.events:
             # Phase 5.2: Derive segment_key from job information
             segment_key = derive_segment_key(event.job)
@@ -86,64 +91,57 @@ async def learning_sync(
             if not agent_settings.COMPANION_BANDIT_ENABLED:
                 policy = "fallback"
 
+            rows.append(
+                {
+                    "user_id": temp_user_id,
+                    "host": event.host,
+                    "schema_hash": event.schema_hash,
+                    "suggested_map": event.suggested_map,
+                    "final_map": event.final_map,
+                    "gen_style_id": event.gen_style_id,
+                    "segment_key": segment_key,  # Phase 5.2
+                    "policy": policy,  # Phase 5.4
+                    "edit_stats": event.edit_stats.dict(),
+                    "duration_ms": event.duration_ms,
+                    "validation_errors": event.validation_errors,
+                    "status": event.status,
+                    "application_id": (
+                        uuid.UUID(event.application_id)
+                        if event.application_id
+                        else None
+                    ),
+                }
+            )
+
             # Phase 5.4: Get host_family for metrics
             host_family = get_host_family(event.host)
+            policy_counts[(policy, host_family, segment_key)] += 1
 
-            db_event = AutofillEvent(
-                user_id=temp_user_id,
-                host=event.host,
-                schema_hash=event.schema_hash,
-                suggested_map=event.suggested_map,
-                final_map=event.final_map,
-                gen_style_id=event.gen_style_id,
-                segment_key=segment_key,  # Phase 5.2
-                policy=policy,  # Phase 5.4
-                edit_stats=event.edit_stats.dict(),
-                duration_ms=event.duration_ms,
-                validation_errors=event.validation_errors,
-                status=event.status,
-                application_id=uuid.UUID(event.application_id)
-                if event.application_id
-                else None,
-            )
-            db.add(db_event)
-            events_created += 1
+        if rows:
+            db.execute(insert(AutofillEvent), rows)
+
+        # Fold the batch into each affected form profile as a delta
+        by_form = {}
+        for row in rows:
+            by_form.setdefault((row["host"], row["schema_hash"]), []).append(row)
+        by_form.setdefault((payload.host, payload.schema_hash), [])
+        # Sorted so concurrent syncs lock profiles in the same order
+        for (host, schema_hash), form_rows in sorted(by_form.items()):
+            apply_event_deltas(db, host, schema_hash, form_rows)
 
-            # Phase 5.4: Increment policy metric
+        db.commit()
+        invalidate_style_stats_cache()
+        learning_sync_counter.labels(status="persisted").inc()
+
+        # Phase 5.4: Increment policy metric, once per label set
+        for (policy, host_family, segment_key), count in policy_counts.items():
             autofill_policy_total.labels(
                 policy=policy,
                 host_family=host_family,
                 segment_key=segment_key,
-            ).inc()
-
-        # Update or create form profile
-        profile = (
-            db.query(FormProfile)
-            .filter(
-                FormProfile.host == payload.host,
-                FormProfile.schema_hash == payload.schema_hash,
-            )
-            .first()
-        )
-
-        if profile:
-            # Update existing profile
-            profile.last_seen_at = datetime.utcnow()
-            # TODO: Recalculate aggregate stats from all events
-        else:
-            # Create new profile
-            profile = FormProfile(
-                host=payload.host,
-                schema_hash=payload.schema_hash,
-                fields={},  # Will be populated by aggregation job
-                last_seen_at=datetime.utcnow(),
-            )
-            db.add(profile)
-
-        db.commit()
-        learning_sync_counter.labels(status="persisted").inc()
+            ).inc(count)
 
-        return {"status": "accepted", "persisted": True, "events_saved": events_created}
+        return {"status": "accepted", "persisted": True, "events_saved": len(rows)}
 
     except Exception as e:
         db.rollback()
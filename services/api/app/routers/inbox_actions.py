@@ -11,18 +11,29 @@ Endpoints for the /inbox-actions page:
 - POST /api/actions/summary-feedback - Record summary feedback
 """
 
+import asyncio
 import logging
 import os
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
+from ..core.gmail_batch import (
+    ARCHIVE,
+    MARK_SAFE,
+    QUARANTINE,
+    LabelChange,
+    ModifyRequest,
+    get_batcher,
+)
 from ..db import get_db
 from ..deps.user import get_current_user_email
 from ..es import ES_ENABLED, INDEX, es
+from ..logic.paging import NEXT_CURSOR_HEADER, InvalidCursor, Pager
+from ..models import Email
 from .senders import get_overrides_for_user, upsert_sender_override_safe
 
 router = APIRouter(prefix="/actions", tags=["inbox_actions"])
@@ -241,9 +252,32 @@ def generate_explanation_for_message(
 # ===== Endpoints =====
 
 
+def _needs_review(src: Dict[str, Any]) -> bool:
+    """Review-mode check for docs that still carry legacy lifecycle flags."""
+    handled = (
+        src.get("user_archived")
+        or src.get("archived")
+        or src.get("user_unsubscribed")
+        or src.get("muted")
+        or src.get("user_overrode_safe")
+        or src.get("marked_safe")
+        or src.get("quarantined")
+    )
+    if handled:
+        return False
+    # Must be unread OR risky (>= 40); unread defaults to True when unknown
+    unread = "UNREAD" in (src.get("labels") or []) or src.get("unread", True)
+    return bool(unread) or (src.get("risk_score") or 0) >= 40
+
+
 @router.get("/inbox")
 async def get_inbox_actions(
+    response: Response,
     mode: str = "review",
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(
+        None, description="X-Next-Cursor header value from the previous page"
+    ),
     user_email: str = Depends(get_current_user_email),
 ) -> List[ActionRow]:
     """
@@ -251,6 +285,8 @@ async def get_inbox_actions(
 
     Args:
         mode: Filter mode - "review" (default), "quarantined", or "archived"
+        limit: Page size
+        cursor: Cursor for the next page (``X-Next-Cursor`` response header)
         user_email: Current user's email
 
     Returns:
@@ -258,10 +294,15 @@ async def get_inbox_actions(
         - quarantined: Emails marked suspicious or high-risk
         - archived: Emails user has handled (archived/safe/muted)
     """
+    if not ES_ENABLED or es is None:
+        logger.info("Inbox actions: ES disabled, returning empty list")
+        return []
+    try:
+        pager = Pager(es, INDEX, user=user_email, scope=f"inbox:{mode}", cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
-        if not ES_ENABLED or es is None:
-            logger.info("Inbox actions: ES disabled, returning empty list")
-            return []
 
         # Build query based on mode
         must_clauses = [{"term": {"owner_email.keyword": user_email}}]
@@ -280,15 +321,18 @@ async def get_inbox_actions(
             ]
         else:  # mode == "review" (default)
             # Show emails that need review: not handled yet, and either unread OR risky
-            # Exclude items that have been explicitly handled
+            # Exclude items that have been explicitly handled (incl. legacy flags)
             must_not_clauses = [
                 {"term": {"user_archived": True}},
                 {"term": {"user_overrode_safe": True}},
                 {"term": {"user_unsubscribed": True}},
                 {"term": {"quarantined": True}},
+                {"term": {"archived": True}},
+                {"term": {"muted": True}},
+                {"term": {"marked_safe": True}},
             ]
             # Much looser criteria: unread OR risk >= 40
-            # This will be further filtered in Python after fetching
+            # _needs_review re-checks the rest in Python while paging
             should_clauses = [
                 {"term": {"labels": "UNREAD"}},
                 {"range": {"risk_score": {"gte": 40}}},
@@ -305,7 +349,6 @@ async def get_inbox_actions(
 
         # Query ES for actionable emails
         body = {
-            "size": 50,
             "query": {"bool": query_body},
             "sort": [{"received_at": {"order": "desc"}}],
             "_source": [
@@ -321,11 +364,20 @@ async def get_inbox_actions(
                 "user_archived",
                 "user_overrode_safe",
                 "user_unsubscribed",
+                "archived",
+                "muted",
+                "marked_safe",
             ],
         }
 
-        result = es.search(index=INDEX, body=body)
-        hits = result.get("hits", {}).get("hits", [])
+        def keep(hit):
+            return mode != "review" or _needs_review(hit.get("_source", {}))
+
+        # May take several round trips to fill the page; keep the loop free
+        page = await asyncio.to_thread(pager.fetch, body, limit, keep)
+        hits = page.hits
+        if page.next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
 
         rows = []
         for hit in hits:
@@ -360,18 +412,6 @@ async def get_inbox_actions(
                 "marked_safe", False
             )
 
-            # For review mode, apply Python-side filtering
-            if mode == "review":
-                # Skip if user already handled this
-                already_handled = archived or muted or user_overrode_safe or quarantined
-                if already_handled:
-                    continue
-
-                # Must be unread OR risky (>= 40)
-                is_actionable = unread or risk_score >= 40
-                if not is_actionable:
-                    continue
-
             # Build reason
             category = categorize_email(labels, risk_score, quarantined)
             signals = build_signals(category, labels, risk_score, sender)
@@ -987,14 +1027,58 @@ async def post_summary_feedback(
         )
 
 
-# TODO(thread-viewer v1.4.5):
-# These handlers should:
-# - auth the user (using get_current_user_email)
-# - check that message_ids belong to this user
-# - persist the state change (archived, quarantined, safe)
-# - emit events / index updates if needed
-#
-# For now we sketch them with ES updates.
+def _owned_message_ids(
+    db: Session, user_email: str, message_ids: List[str]
+) -> List[str]:
+    """The subset of ``message_ids`` that are ``user_email``'s, in order."""
+    owned = {
+        gmail_id
+        for (gmail_id,) in db.query(Email.gmail_id).filter(
+            Email.owner_email == user_email, Email.gmail_id.in_(message_ids)
+        )
+    }
+    return [msg_id for msg_id in dict.fromkeys(message_ids) if msg_id in owned]
+
+
+async def _bulk_modify(
+    db: Session,
+    user_email: str,
+    message_ids: List[str],
+    change: LabelChange,
+    verb: str,
+) -> BulkActionResponse:
+    """Apply ``change`` to every message through the Gmail batcher.
+
+    One Gmail batchModify, one DB UPDATE and one ES bulk request per 1,000
+    messages; per-message failures come back in ``failed``. Ids that aren't
+    the caller's are failed without being sent anywhere.
+    """
+    owned = _owned_message_ids(db, user_email, message_ids) if message_ids else []
+    not_owned = sorted(set(message_ids) - set(owned))
+    if not_owned:
+        logger.warning(
+            f"Refusing to {verb} {len(not_owned)} messages not owned by {user_email}"
+        )
+    futures = get_batcher().submit_many(
+        [ModifyRequest(user_email, msg_id, change) for msg_id in owned]
+    )
+    outcomes = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+
+    updated = [o.gmail_id for o in outcomes if o.ok]
+    failed = [o.gmail_id for o in outcomes if not o.ok] + not_owned
+    for outcome in outcomes:
+        if not outcome.ok:
+            logger.warning(
+                f"Failed to {verb} message {outcome.gmail_id}: {outcome.error}"
+            )
+        elif outcome.mirror_error:
+            logger.warning(
+                f"{verb} of {outcome.gmail_id} not mirrored locally: {outcome.mirror_error}"
+            )
+    logger.info(
+        f"Bulk {verb} {len(updated)}/{len(message_ids)} messages for {user_email}"
+    )
+    return BulkActionResponse(updated=updated, failed=failed)
 
 
 @router.post("/bulk/archive", response_model=BulkActionResponse)
@@ -1005,7 +1089,7 @@ async def bulk_archive(
 ):
     """
     Bulk archive multiple emails.
-    Marks user_archived=true in the search index.
+    Removes INBOX in Gmail and marks user_archived=true in the search index.
     """
     if not ALLOW_ACTION_MUTATIONS:
         raise HTTPException(
@@ -1015,32 +1099,7 @@ async def bulk_archive(
     if not ES_ENABLED:
         raise HTTPException(status_code=503, detail="Search not enabled")
 
-    updated = []
-    failed = []
-
-    # Update each message in ES, tracking successes and failures
-    for msg_id in req.message_ids:
-        try:
-            # Verify ownership and update
-            doc = {
-                "user_archived": True,
-                "archived_at": datetime.utcnow().isoformat(),
-            }
-            es.update(
-                index=INDEX,
-                id=msg_id,
-                body={"doc": doc},
-                refresh=True,
-            )
-            updated.append(msg_id)
-        except Exception as e:
-            logger.warning(f"Failed to archive message {msg_id}: {e}")
-            failed.append(msg_id)
-
-    logger.info(
-        f"Bulk archived {len(updated)}/{len(req.message_ids)} messages for {user_email}"
-    )
-    return BulkActionResponse(updated=updated, failed=failed)
+    return await _bulk_modify(db, user_email, req.message_ids, ARCHIVE, "archive")
 
 
 @router.post("/bulk/mark-safe", response_model=BulkActionResponse)
@@ -1061,32 +1120,7 @@ async def bulk_mark_safe(
     if not ES_ENABLED:
         raise HTTPException(status_code=503, detail="Search not enabled")
 
-    updated = []
-    failed = []
-
-    # Update each message in ES, tracking successes and failures
-    for msg_id in req.message_ids:
-        try:
-            doc = {
-                "quarantined": False,
-                "user_overrode_safe": True,
-                "marked_safe_at": datetime.utcnow().isoformat(),
-            }
-            es.update(
-                index=INDEX,
-                id=msg_id,
-                body={"doc": doc},
-                refresh=True,
-            )
-            updated.append(msg_id)
-        except Exception as e:
-            logger.warning(f"Failed to mark safe message {msg_id}: {e}")
-            failed.append(msg_id)
-
-    logger.info(
-        f"Bulk marked safe {len(updated)}/{len(req.message_ids)} messages for {user_email}"
-    )
-    return BulkActionResponse(updated=updated, failed=failed)
+    return await _bulk_modify(db, user_email, req.message_ids, MARK_SAFE, "mark safe")
 
 
 @router.post("/bulk/quarantine", response_model=BulkActionResponse)
@@ -1097,7 +1131,7 @@ async def bulk_quarantine(
 ):
     """
     Bulk quarantine multiple emails.
-    Sets quarantined=true in the search index.
+    Pulls them out of the Gmail inbox and sets quarantined=true.
     """
     if not ALLOW_ACTION_MUTATIONS:
         raise HTTPException(
@@ -1107,28 +1141,4 @@ async def bulk_quarantine(
     if not ES_ENABLED:
         raise HTTPException(status_code=503, detail="Search not enabled")
 
-    updated = []
-    failed = []
-
-    # Update each message in ES, tracking successes and failures
-    for msg_id in req.message_ids:
-        try:
-            doc = {
-                "quarantined": True,
-                "quarantined_at": datetime.utcnow().isoformat(),
-            }
-            es.update(
-                index=INDEX,
-                id=msg_id,
-                body={"doc": doc},
-                refresh=True,
-            )
-            updated.append(msg_id)
-        except Exception as e:
-            logger.warning(f"Failed to quarantine message {msg_id}: {e}")
-            failed.append(msg_id)
-
-    logger.info(
-        f"Bulk quarantined {len(updated)}/{len(req.message_ids)} messages for {user_email}"
-    )
-    return BulkActionResponse(updated=updated, failed=failed)
+    return await _bulk_modify(db, user_email, req.message_ids, QUARANTINE, "quarantine")
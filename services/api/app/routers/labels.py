@@ -20,6 +20,7 @@ import joblib
 from fastapi import APIRouter, Body, HTTPException
 
 from ..labeling.rules import rule_labels
+from ..utils.cache import cache
 
 router = APIRouter(prefix="/labels", tags=["labels"])
 
@@ -35,6 +36,10 @@ MODEL_PATH = os.getenv(
 # Cache for ML model
 _model_cache = None
 
+# Category facets (label stats, profile summary) depend on applied labels
+CATEGORY_CACHE_TAG = "email_categories"
+LABEL_STATS_CACHE_TTL = 60
+
 
 def get_model():
     """Load ML model from disk (cached).
@@ -267,6 +272,9 @@ async def apply_labels(
                 print(f"⚠️  Failed to update {doc_id}: {e}")
                 continue
 
+    if updated:
+        await cache.invalidate_tags(CATEGORY_CACHE_TAG)
+
     return {
         "updated": updated,
         "by_category": category_counts,
@@ -365,6 +373,9 @@ async def apply_labels_batch(
                 print(f"⚠️  Failed to process {doc_id}: {e}")
                 continue
 
+    if updated:
+        await cache.invalidate_tags(CATEGORY_CACHE_TAG)
+
     return {
         "updated": updated,
         "by_category": category_counts,
@@ -384,6 +395,16 @@ async def label_stats() -> dict:
             - avg_confidence: Average confidence score
             - low_confidence: Count with confidence < 0.5
     """
+    return await cache.get_or_set(
+        "labels:stats",
+        LABEL_STATS_CACHE_TTL,
+        _fetch_label_stats,
+        tags=(CATEGORY_CACHE_TAG,),
+    )
+
+
+async def _fetch_label_stats() -> dict:
+    """Run the category/confidence facet aggregation behind /labels/stats."""
     body = {
         "size": 0,
         "aggs": {
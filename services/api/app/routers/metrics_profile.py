@@ -9,13 +9,20 @@ Environment Variables:
 - BQ_MARTS_DATASET: BigQuery dataset for mart tables (default: gmail_marts)
 - USE_WAREHOUSE_METRICS: Enable/disable warehouse endpoints (default: 0)
 - GOOGLE_APPLICATION_CREDENTIALS: Path to service account JSON
+- WAREHOUSE_REFRESH_UTC: Time of day the nightly dbt run has landed (default: 05:00)
+
+Results are cached per normalized query (app.services.bq_result_cache): mart
+queries stay fresh until the next nightly refresh and are re-run right after
+it; stale results are served immediately while they revalidate. Responses
+carry ``as_of`` (when the data was queried) and ``stale``.
 """
 
 from fastapi import APIRouter, HTTPException, Query
 from google.cloud import bigquery
-from app.utils.cache import cache_get, cache_set
+from app.services.bq_result_cache import BQResult, BQResultCache
+import asyncio
 import os
-from typing import List, Dict, Any
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 import logging
 
@@ -28,8 +35,8 @@ BQ_PROJECT = os.getenv("GCP_PROJECT")
 DS_MARTS = os.getenv("BQ_MARTS_DATASET", "gmail_marts")
 DS_STAGING = os.getenv("BQ_STAGING_DATASET", "gmail_raw_stg_gmail_raw_stg")
 USE_WAREHOUSE = os.getenv("USE_WAREHOUSE_METRICS", "0") == "1"
-CACHE_TTL_SECONDS = 300  # 5 minutes
-SUMMARY_CACHE_TTL = 60  # 1 minute for summary endpoint
+FRESHNESS_MAX_AGE = 60  # staging sync status: 1 minute
+STAGING_MAX_AGE = 300  # other staging-table queries: 5 minutes
 
 # Active account email (TODO: Get from auth context)
 DEFAULT_ACCOUNT = "leoklemet.pa@gmail.com"
@@ -50,11 +57,24 @@ def get_bq_client():
     return _bq_client
 
 
-def query_bq(sql: str) -> List[Dict[str, Any]]:
+def _query_parameters(params: Dict[str, Any]) -> List[bigquery.ScalarQueryParameter]:
+    types = {bool: "BOOL", int: "INT64", float: "FLOAT64"}
+    return [
+        bigquery.ScalarQueryParameter(name, types.get(type(value), "STRING"), value)
+        for name, value in params.items()
+    ]
+
+
+def query_bq(sql: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
     """Execute BigQuery SQL and return results as list of dicts."""
     try:
         client = get_bq_client()
-        query_job = client.query(sql)
+        job_config = None
+        if params:
+            job_config = bigquery.QueryJobConfig(
+                query_parameters=_query_parameters(params)
+            )
+        query_job = client.query(sql, job_config=job_config)
         result = query_job.result()
 
         # Convert to list of dicts
@@ -76,8 +96,38 @@ def query_bq(sql: str) -> List[Dict[str, Any]]:
         raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
 
 
+def _run_query(sql: str, params: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return query_bq(sql, params)
+
+
+results = BQResultCache(_run_query)
+_refresh_task: Optional[asyncio.Task] = None
+
+
+@router.on_event("startup")
+async def _start_result_refresh():
+    """Re-run cached mart queries after each nightly warehouse refresh."""
+    global _refresh_task
+    if USE_WAREHOUSE and _refresh_task is None:
+        _refresh_task = asyncio.create_task(results.run_refresh_schedule())
+
+
+@router.on_event("shutdown")
+async def _stop_result_refresh():
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        _refresh_task = None
+
+
+def _freshness(*parts: BQResult) -> Dict[str, Any]:
+    """``as_of`` of the oldest part and whether any part is stale."""
+    oldest = min(parts, key=lambda part: part.as_of)
+    return {"as_of": oldest.as_of_iso, "stale": any(part.stale for part in parts)}
+
+
 @router.get("/activity_daily")
-def get_activity_daily(days: int = Query(default=90, ge=1, le=365)):
+async def get_activity_daily(days: int = Query(default=90, ge=1, le=365)):
     """
     Get daily email activity metrics.
 
@@ -88,7 +138,7 @@ def get_activity_daily(days: int = Query(default=90, ge=1, le=365)):
     - avg_size_kb: Average message size in KB
     - total_size_mb: Total size in MB
 
-    Cache: 5 minutes
+    Cache: until the next nightly warehouse refresh
     Source: mart_email_activity_daily (dbt model)
     """
     if not USE_WAREHOUSE:
@@ -97,11 +147,6 @@ def get_activity_daily(days: int = Query(default=90, ge=1, le=365)):
             detail="Warehouse metrics disabled. Set USE_WAREHOUSE_METRICS=1",
         )
 
-    cache_key = f"metrics:activity_daily:{days}"
-    cached = cache_get(cache_key)
-    if cached:
-        return cached  # Already deserialized by cache_get
-
     sql = f"""
         SELECT
             day,
@@ -111,23 +156,21 @@ def get_activity_daily(days: int = Query(default=90, ge=1, le=365)):
             total_size_mb
         FROM `{BQ_PROJECT}.{DS_MARTS}.mart_email_activity_daily`
         ORDER BY day DESC
-        LIMIT {days}
+        LIMIT @days
     """
 
-    rows = query_bq(sql)
-    payload = {
-        "rows": rows,
-        "count": len(rows),
+    res = await results.fetch(sql, {"days": days})
+    return {
+        "rows": res.rows,
+        "count": len(res.rows),
         "source": "bigquery",
         "dataset": f"{BQ_PROJECT}.{DS_MARTS}.mart_email_activity_daily",
+        **_freshness(res),
     }
 
-    cache_set(cache_key, payload, CACHE_TTL_SECONDS)
-    return payload
-
 
 @router.get("/top_senders_30d")
-def get_top_senders_30d(limit: int = Query(default=20, ge=1, le=100)):
+async def get_top_senders_30d(limit: int = Query(default=20, ge=1, le=100)):
     """
     Get top email senders in the last 30 days.
 
@@ -139,7 +182,7 @@ def get_top_senders_30d(limit: int = Query(default=20, ge=1, le=100)):
     - last_message_at: Last message timestamp
     - active_days: Days between first and last message
 
-    Cache: 5 minutes
+    Cache: until the next nightly warehouse refresh
     Source: mart_top_senders_30d (dbt model)
     """
     if not USE_WAREHOUSE:
@@ -148,11 +191,6 @@ def get_top_senders_30d(limit: int = Query(default=20, ge=1, le=100)):
             detail="Warehouse metrics disabled. Set USE_WAREHOUSE_METRICS=1",
         )
 
-    cache_key = f"metrics:top_senders_30d:{limit}"
-    cached = cache_get(cache_key)
-    if cached:
-        return cached  # Already deserialized by cache_get
-
     sql = f"""
         SELECT
             from_email,
@@ -163,23 +201,21 @@ def get_top_senders_30d(limit: int = Query(default=20, ge=1, le=100)):
             active_days
         FROM `{BQ_PROJECT}.{DS_MARTS}.mart_top_senders_30d`
         ORDER BY messages_30d DESC
-        LIMIT {limit}
+        LIMIT @limit
     """
 
-    rows = query_bq(sql)
-    payload = {
-        "rows": rows,
-        "count": len(rows),
+    res = await results.fetch(sql, {"limit": limit})
+    return {
+        "rows": res.rows,
+        "count": len(res.rows),
         "source": "bigquery",
         "dataset": f"{BQ_PROJECT}.{DS_MARTS}.mart_top_senders_30d",
+        **_freshness(res),
     }
 
-    cache_set(cache_key, payload, CACHE_TTL_SECONDS)
-    return payload
-
 
 @router.get("/categories_30d")
-def get_categories_30d():
+async def get_categories_30d():
     """
     Get email category distribution in the last 30 days.
 
@@ -189,7 +225,7 @@ def get_categories_30d():
     - pct_of_total: Percentage of total
     - total_size_mb: Total size
 
-    Cache: 5 minutes
+    Cache: until the next nightly warehouse refresh
     Source: mart_categories_30d (dbt model)
     """
     if not USE_WAREHOUSE:
@@ -198,11 +234,6 @@ def get_categories_30d():
             detail="Warehouse metrics disabled. Set USE_WAREHOUSE_METRICS=1",
         )
 
-    cache_key = "metrics:categories_30d"
-    cached = cache_get(cache_key)
-    if cached:
-        return cached  # Already deserialized by cache_get
-
     sql = f"""
         SELECT
             category,
@@ -213,20 +244,18 @@ def get_categories_30d():
         ORDER BY messages_30d DESC
     """
 
-    rows = query_bq(sql)
-    payload = {
-        "rows": rows,
-        "count": len(rows),
+    res = await results.fetch(sql)
+    return {
+        "rows": res.rows,
+        "count": len(res.rows),
         "source": "bigquery",
         "dataset": f"{BQ_PROJECT}.{DS_MARTS}.mart_categories_30d",
+        **_freshness(res),
     }
 
-    cache_set(cache_key, payload, CACHE_TTL_SECONDS)
-    return payload
-
 
 @router.get("/freshness")
-def get_data_freshness():
+async def get_data_freshness():
     """
     Get data freshness metrics from Fivetran sync.
 
@@ -243,36 +272,30 @@ def get_data_freshness():
             detail="Warehouse metrics disabled. Set USE_WAREHOUSE_METRICS=1",
         )
 
-    cache_key = "metrics:freshness"
-    cached = cache_get(cache_key)
-    if cached:
-        return cached  # Already deserialized by cache_get
-
     sql = f"""
         SELECT
             MAX(synced_at) as last_sync_at,
-            TIMESTAMP_DIFF(CURRENT_TIMESTAMP(), MAX(synced_at), MINUTE) as minutes_since_sync
+            TIMESTAMP_DIFF(CURRENT_TIMESTAMP(), MAX(synced_at), MINUTE)
+                as minutes_since_sync
         FROM `{BQ_PROJECT}.{DS_STAGING}.stg_gmail__messages`
     """
 
-    rows = query_bq(sql)
-    if not rows:
+    res = await results.fetch(sql, max_age=FRESHNESS_MAX_AGE)
+    if not res.rows:
         raise HTTPException(status_code=404, detail="No sync data found")
 
-    row = rows[0]
-    payload = {
+    row = res.rows[0]
+    return {
         "last_sync_at": row["last_sync_at"],
         "minutes_since_sync": row["minutes_since_sync"],
         "is_fresh": row["minutes_since_sync"] <= 30,  # SLO: 30 minutes
         "source": "bigquery",
+        **_freshness(res),
     }
 
-    cache_set(cache_key, payload, 60)  # Cache for 1 minute
-    return payload
-
 
 @router.get("/summary")
-def get_profile_summary():
+async def get_profile_summary():
     """
     Unified profile summary aggregating warehouse mart data.
 
@@ -284,26 +307,11 @@ def get_profile_summary():
     - top_senders_30d: Top 3 senders (sender, email, count)
     - top_categories_30d: Top 3 categories (category, count)
     - top_interests: Top 3 interests/keywords (keyword, count)
+    - as_of / stale: Oldest cached section backing the response
 
-    Cache: 60 seconds
+    Cache: per section (marts until the nightly refresh, staging 1-5 minutes)
     Error handling: Returns 200 with empty arrays on failure (graceful degradation)
     """
-    if not USE_WAREHOUSE:
-        return {
-            "account": "leoklemet.pa@gmail.com",
-            "last_sync_at": None,
-            "dataset": f"{BQ_PROJECT}.{DS_MARTS}",
-            "totals": {"all_time_emails": 0, "last_30d_emails": 0},
-            "top_senders_30d": [],
-            "top_categories_30d": [],
-            "top_interests": [],
-        }
-
-    cache_key = "metrics:profile_summary"
-    cached = cache_get(cache_key)
-    if cached:
-        return cached
-
     result = {
         "account": "leoklemet.pa@gmail.com",  # TODO: Get from auth context
         "last_sync_at": None,
@@ -313,114 +321,111 @@ def get_profile_summary():
         "top_categories_30d": [],
         "top_interests": [],
     }
+    if not USE_WAREHOUSE:
+        return result
 
-    # Fetch last_sync_at from warehouse (most recent data timestamp)
-    try:
-        sync_sql = f"""
-        SELECT MAX(synced_at) as last_sync_at
-        FROM `{BQ_PROJECT}.{DS_STAGING}.stg_gmail__messages`
-        """
-        sync_rows = query_bq(sync_sql)
-        if sync_rows and sync_rows[0] and sync_rows[0].get("last_sync_at"):
-            result["last_sync_at"] = sync_rows[0]["last_sync_at"]
-    except Exception as e:
-        logger.warning(f"Error fetching last_sync_at: {e}")
-
-    # Fetch totals from mart_email_activity_daily
-    try:
-        totals_sql = f"""
-        SELECT
-            SUM(message_count) as all_time_emails,
-            SUM(CASE WHEN activity_date >= DATE_SUB(CURRENT_DATE(), INTERVAL 30 DAY)
-                THEN message_count ELSE 0 END) as last_30d_emails
-        FROM `{BQ_PROJECT}.{DS_MARTS}.mart_email_activity_daily`
-        """
-        totals_rows = query_bq(totals_sql)
-        if totals_rows and totals_rows[0]:
-            result["totals"]["all_time_emails"] = int(
-                totals_rows[0].get("all_time_emails") or 0
-            )
-            result["totals"]["last_30d_emails"] = int(
-                totals_rows[0].get("last_30d_emails") or 0
+    # TODO: Create mart_interests_30d in dbt for better performance
+    sections = await asyncio.gather(
+        results.fetch(
+            f"""
+            SELECT MAX(synced_at) as last_sync_at
+            FROM `{BQ_PROJECT}.{DS_STAGING}.stg_gmail__messages`
+            """,
+            max_age=FRESHNESS_MAX_AGE,
+        ),
+        results.fetch(f"""
+            SELECT
+                SUM(message_count) as all_time_emails,
+                SUM(CASE WHEN activity_date >= DATE_SUB(CURRENT_DATE(), INTERVAL 30 DAY)
+                    THEN message_count ELSE 0 END) as last_30d_emails
+            FROM `{BQ_PROJECT}.{DS_MARTS}.mart_email_activity_daily`
+            """),
+        results.fetch(f"""
+            SELECT
+                from_name as sender,
+                from_email as email,
+                messages_30d as count
+            FROM `{BQ_PROJECT}.{DS_MARTS}.mart_top_senders_30d`
+            ORDER BY messages_30d DESC
+            LIMIT 3
+            """),
+        results.fetch(f"""
+            SELECT
+                category,
+                messages_30d as count
+            FROM `{BQ_PROJECT}.{DS_MARTS}.mart_categories_30d`
+            WHERE category IS NOT NULL
+            ORDER BY messages_30d DESC
+            LIMIT 3
+            """),
+        results.fetch(
+            f"""
+            SELECT
+                keyword,
+                COUNT(*) as count
+            FROM (
+                SELECT
+                    LOWER(SPLIT(subject, ' ')[SAFE_OFFSET(0)]) as keyword
+                FROM `{BQ_PROJECT}.{DS_STAGING}.stg_gmail__messages`
+                WHERE received_at >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 30 DAY)
+                    AND subject IS NOT NULL
+                    AND LENGTH(subject) > 3
             )
-    except Exception as e:
-        logger.warning(f"Error fetching totals: {e}")
-
-    # Fetch top 3 senders from mart_top_senders_30d
-    try:
-        senders_sql = f"""
-        SELECT
-            from_name as sender,
-            from_email as email,
-            messages_30d as count
-        FROM `{BQ_PROJECT}.{DS_MARTS}.mart_top_senders_30d`
-        ORDER BY messages_30d DESC
-        LIMIT 3
-        """
-        senders_rows = query_bq(senders_sql)
+            WHERE keyword IS NOT NULL
+                AND LENGTH(keyword) > 3
+                AND keyword NOT IN (
+                    're:', 'fwd:', 'the', 'your', 'new', 'update', 'from'
+                )
+            GROUP BY keyword
+            ORDER BY count DESC
+            LIMIT 3
+            """,
+            max_age=STAGING_MAX_AGE,
+        ),
+        return_exceptions=True,
+    )
+    names = ["last_sync_at", "totals", "top senders", "top categories", "top interests"]
+    for name, section in zip(names, sections):
+        if isinstance(section, Exception):
+            logger.warning(f"Error fetching {name}: {section}")
+    sync, totals, senders, categories, interests = [
+        section if isinstance(section, BQResult) else None for section in sections
+    ]
+
+    if sync and sync.rows and sync.rows[0].get("last_sync_at"):
+        result["last_sync_at"] = sync.rows[0]["last_sync_at"]
+
+    if totals and totals.rows:
+        row = totals.rows[0]
+        result["totals"]["all_time_emails"] = int(row.get("all_time_emails") or 0)
+        result["totals"]["last_30d_emails"] = int(row.get("last_30d_emails") or 0)
+
+    if senders:
         result["top_senders_30d"] = [
             {
                 "sender": row.get("sender") or row.get("email", "Unknown"),
                 "email": row.get("email", ""),
                 "count": int(row.get("count") or 0),
             }
-            for row in senders_rows
+            for row in senders.rows
         ]
-    except Exception as e:
-        logger.warning(f"Error fetching top senders: {e}")
 
-    # Fetch top 3 categories from mart_categories_30d
-    try:
-        categories_sql = f"""
-        SELECT
-            category,
-            messages_30d as count
-        FROM `{BQ_PROJECT}.{DS_MARTS}.mart_categories_30d`
-        WHERE category IS NOT NULL
-        ORDER BY messages_30d DESC
-        LIMIT 3
-        """
-        categories_rows = query_bq(categories_sql)
+    if categories:
         result["top_categories_30d"] = [
             {
                 "category": row.get("category", "Unknown"),
                 "count": int(row.get("count") or 0),
             }
-            for row in categories_rows
+            for row in categories.rows
         ]
-    except Exception as e:
-        logger.warning(f"Error fetching top categories: {e}")
 
-    # Fetch top 3 interests/keywords
-    # TODO: Create mart_interests_30d in dbt for better performance
-    try:
-        interests_sql = f"""
-        SELECT
-            keyword,
-            COUNT(*) as count
-        FROM (
-            SELECT
-                LOWER(SPLIT(subject, ' ')[SAFE_OFFSET(0)]) as keyword
-            FROM `{BQ_PROJECT}.{DS_STAGING}.stg_gmail__messages`
-            WHERE received_at >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 30 DAY)
-                AND subject IS NOT NULL
-                AND LENGTH(subject) > 3
-        )
-        WHERE keyword IS NOT NULL
-            AND LENGTH(keyword) > 3
-            AND keyword NOT IN ('re:', 'fwd:', 'the', 'your', 'new', 'update', 'from')
-        GROUP BY keyword
-        ORDER BY count DESC
-        LIMIT 3
-        """
-        interests_rows = query_bq(interests_sql)
+    if interests:
         result["top_interests"] = [
             {"keyword": row.get("keyword", ""), "count": int(row.get("count") or 0)}
-            for row in interests_rows
+            for row in interests.rows
         ]
-    except Exception as e:
-        logger.warning(f"Error fetching top interests: {e}")
 
-    # Cache for 60 seconds
-    cache_set(cache_key, result, SUMMARY_CACHE_TTL)
+    served = [section for section in sections if isinstance(section, BQResult)]
+    if served:
+        result.update(_freshness(*served))
     return result
@@ -2,10 +2,14 @@
 REST API endpoints for SLO monitoring and alerting.
 """
 
+from datetime import datetime, timedelta
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
+from sqlalchemy.orm import Session
 
+from app.db import get_db
+from app.eval.telemetry import MetricsAggregator
 from app.observability.slo import (
     SLOStatus,
     SLOSpec,
@@ -44,12 +48,17 @@ async def list_agents():
 
 
 @router.get("/slo/{agent_name}", response_model=SLOStatus)
-async def get_agent_slo_status(agent_name: str):
+def get_agent_slo_status(
+    agent_name: str,
+    days: int = Query(1, ge=1, le=90, description="Latency window in days"),
+    db: Session = Depends(get_db),
+):
     """
     Get current SLO status for an agent.
 
     This endpoint returns the latest SLO evaluation for the specified agent,
-    including compliance status, violations, and burn rates.
+    including compliance status, violations, and burn rates. Latency
+    percentiles come from the agent's daily sketches merged over ``days``.
     """
     evaluator = get_slo_evaluator()
 
@@ -64,7 +73,12 @@ async def get_agent_slo_status(agent_name: str):
     # Mock metrics - in production, fetch from telemetry
     metrics = {}
 
-    status = evaluator.evaluate(agent_name, metrics)
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    latency = MetricsAggregator(db).get_latency_sketch(
+        agent_name, today - timedelta(days=days - 1), today
+    )
+
+    status = evaluator.evaluate(agent_name, metrics, latency=latency)
     return status
 
 
@@ -9,20 +9,38 @@ API DESIGN RULE (Dec 2024):
     See test_routes_resume_opportunities.py for regression tests.
 """
 
+import base64
+import json
 import logging
-import re
-from datetime import datetime, timezone
-from typing import Literal, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from dateutil.relativedelta import relativedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel
-from sqlalchemy import func, text
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, func, or_, tuple_
+from sqlalchemy.orm import Session, load_only
 
 from ..deps.user import get_current_user_email
 from ..db import get_db
-from ..models import Application, Email, JobOpportunity, OpportunityMatch
-from .agent import is_newsletter_or_digest
+from ..models import (
+    Application,
+    AppStatus,
+    Email,
+    JobOpportunity,
+    OpportunityMatch,
+)
+from ..services.opportunity_state import (  # noqa: F401 - re-exported
+    CLOSED_STATUSES,
+    ELIGIBLE_OPPORTUNITY_STATES,
+    JOB_ALERT_SUBJECT_PATTERNS,
+    JOB_BOARD_DOMAINS,
+    NEEDS_ATTENTION_STATUSES,
+    OPPORTUNITY_HEURISTIC,
+    application_allows_opportunity,
+    email_opportunity_state,
+    is_job_alert_or_blast,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -34,29 +52,6 @@ OpportunityPriority = Literal["low", "medium", "high"]
 # ===== Filter Helpers =====
 
 
-JOB_BOARD_DOMAINS = {
-    "indeed.com",
-    "ziprecruiter.com",
-    "glassdoor.com",
-    "monster.com",
-    "simplyhired.com",
-    "jobcase.com",
-    "careerbuilder.com",
-    "noreply.linkedin.com",
-    "linkedin.com",
-}
-
-JOB_ALERT_SUBJECT_PATTERNS = [
-    r"new jobs for you",
-    r"jobs you might like",
-    r"job alerts?",
-    r"top jobs",
-    r"daily (job )?digest",
-    r"recommended jobs",
-    r"because you searched",
-    r"job recommendations",
-]
-
 # Priority scoring constants
 STAGE_WEIGHTS = {
     "offer": 4,
@@ -163,41 +158,78 @@ def compute_opportunity_priority(
     return "low"
 
 
-def is_job_alert_or_blast(email: Email) -> bool:
+# Listing order: high > medium > low
+PRIORITY_RANK = {"high": 2, "medium": 1, "low": 0}
+RANK_PRIORITY = {rank: priority for priority, rank in PRIORITY_RANK.items()}
+
+
+def opportunity_priority_rank_sql(now: datetime):
     """
-    Detect job board alerts and mass mailings.
+    SQL twin of ``compute_opportunity_priority`` as a rank (see PRIORITY_RANK).
 
-    Returns True if the email is a generic job alert/blast that should be excluded
-    from the opportunities list (not a real recruiter outreach).
+    Evaluated per query rather than stored: the recency bonus moves with
+    ``now`` and the stage weight with the linked application's status.
     """
-    subject = (email.subject or "").lower()
-    from_addr = (email.sender or "").lower()
-
-    # Check sender domain against known job boards
-    if any(domain in from_addr for domain in JOB_BOARD_DOMAINS):
-        return True
-
-    # Check subject for job alert patterns
-    for pattern in JOB_ALERT_SUBJECT_PATTERNS:
-        if re.search(pattern, subject, re.IGNORECASE):
-            return True
-
-    # Check body for bulk email markers
-    # Use body_text field from Email model
-    body = (email.body_text or "").lower()
-    # Require both markers to avoid false positives
-    has_unsubscribe = "unsubscribe" in body
-    has_browser_view = (
-        "view this email in your browser" in body or "view in browser" in body
+    category = func.lower(Email.category)
+    category_stage = case(
+        *[(category == cat, weight) for cat, weight in CATEGORY_STAGE_HINTS.items()],
+        else_=0,
+    )
+    stage_weight = case(
+        *[
+            (Application.status == status, STAGE_WEIGHTS[status.value])
+            for status in AppStatus
+            if status.value in STAGE_WEIGHTS
+        ],
+        else_=category_stage,
+    )
+    age = case(
+        (Email.received_at >= now - timedelta(days=3), 2),
+        (Email.received_at >= now - timedelta(days=7), 1),
+        (Email.received_at >= now - timedelta(days=21), 0),
+        (Email.received_at.isnot(None), -1),
+        else_=0,
     )
-    if has_unsubscribe and has_browser_view:
-        return True
+    category_bonus = case((category.in_(GOOD_CATEGORIES), 1), else_=0)
+    confidence_boost = case((Email.category_confidence >= 0.9, 1), else_=0)
 
-    return False
+    score = stage_weight + age + category_bonus + confidence_boost
+    return case(
+        (score >= 4, PRIORITY_RANK["high"]),
+        (score >= 2, PRIORITY_RANK["medium"]),
+        else_=PRIORITY_RANK["low"],
+    )
+
+
+def opportunity_eligible_sql():
+    """SQL twin of ``is_real_opportunity`` over Email outer-joined Application."""
+    closed = [s for s in AppStatus if s.value in CLOSED_STATUSES]
+    live = [s for s in AppStatus if s.value in NEEDS_ATTENTION_STATUSES]
+    is_heuristic = Email.opportunity_state == OPPORTUNITY_HEURISTIC
+    return and_(
+        Email.opportunity_state.in_(ELIGIBLE_OPPORTUNITY_STATES),
+        or_(
+            Application.id.is_(None),
+            and_(is_heuristic, Application.status.in_(live)),
+            and_(
+                ~is_heuristic,
+                or_(Application.status.is_(None), Application.status.notin_(closed)),
+            ),
+        ),
+    )
 
 
-NEEDS_ATTENTION_STATUSES = {"applied", "hr_screen", "interview", "onsite", "offer"}
-CLOSED_STATUSES = {"rejected", "withdrawn", "ghosted", "closed"}
+def _encode_cursor(payload: Dict[str, Any]) -> str:
+    """Encode cursor data to opaque base64 token"""
+    return base64.urlsafe_b64encode(json.dumps(payload, default=str).encode()).decode()
+
+
+def _decode_cursor(token: str) -> Dict[str, Any]:
+    """Decode cursor token; raises HTTPException 400 if invalid"""
+    try:
+        return json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
 def is_real_opportunity(email: Email, application: Optional[Application]) -> bool:
@@ -215,66 +247,14 @@ def is_real_opportunity(email: Email, application: Optional[Application]) -> boo
 
     **NEW (Dec 2025)**: Prioritizes email.is_real_opportunity field if populated
     by the email classifier. Falls back to heuristics if field is None.
-    """
-    # PRIORITY 1: Use email.is_real_opportunity field if classifier has set it
-    if email.is_real_opportunity is not None:
-        # If classifier says it's not an opportunity, respect that
-        if not email.is_real_opportunity:
-            return False
-        # If classifier says it IS an opportunity, still check application status
-        # (classifier doesn't know about closed/withdrawn apps)
-        if application:
-            status = (application.status.value if application.status else "").lower()
-            if status in CLOSED_STATUSES:
-                return False
-        return True
-
-    # FALLBACK: Use legacy heuristics if is_real_opportunity field is None
-    # (e.g., old emails before classifier was deployed)
-
-    # 1) Filter out newsletters/digests using existing helper
-    # Convert Email model to dict format expected by is_newsletter_or_digest
-    thread_dict = {
-        "subject": email.subject,
-        "from_email": email.sender,
-    }
-    labels = email.labels or []
-    category = email.category
-
-    if is_newsletter_or_digest(thread_dict, labels=labels, category=category):
-        return False
 
-    # 2) Filter out job board alerts and blasts
-    if is_job_alert_or_blast(email):
-        return False
-
-    # 3) If we have an application, require a "live" status
+    Listing reads the email half of this from ``Email.opportunity_state``;
+    this helper evaluates the same rules on in-memory objects.
+    """
+    status = None
     if application:
-        status = (application.status.value if application.status else "").lower()
-        if status in CLOSED_STATUSES:
-            return False
-        if status not in NEEDS_ATTENTION_STATUSES:
-            # Don't treat purely informational states as "opportunities"
-            return False
-
-    # 4) Optionally use email category if available
-    category_str = (category or "").lower()
-    if category_str:
-        # Only allow categories that look like real recruiting leads
-        allowed_categories = {
-            "recruiter_outreach",
-            "interview_invite",
-            "phone_screen",
-            "onsite",
-            "offer",
-            "application_update",
-            "applications",  # general application category
-        }
-        # If there's a category but it's not in allowed list, exclude it
-        if category_str not in allowed_categories:
-            return False
-
-    return True
+        status = application.status.value if application.status else ""
+    return application_allows_opportunity(email_opportunity_state(email), status)
 
 
 # ===== Schemas =====
@@ -313,6 +293,7 @@ class OpportunityResponse(BaseModel):
 
 @router.get("", response_model=list[OpportunityResponse])
 def list_opportunities(
+    response: Response,
     source: Optional[str] = Query(
         None, description="Filter by source (indeed, linkedin, etc.)"
     ),
@@ -324,6 +305,9 @@ def list_opportunities(
     ),
     limit: int = Query(100, ge=1, le=500, description="Maximum number of results"),
     offset: int = Query(0, ge=0, description="Number of results to skip"),
+    cursor: Optional[str] = Query(
+        None, description="Opaque keyset cursor from the X-Next-Cursor header"
+    ),
     db: Session = Depends(get_db),
     user_email: str = Depends(get_current_user_email),
 ):
@@ -343,21 +327,65 @@ def list_opportunities(
     - **match_bucket**: Optional filter by match quality (perfect, strong, possible, skip)
     - **limit**: Maximum number of results (default: 100, max: 500)
     - **offset**: Number of results to skip for pagination (default: 0)
+    - **cursor**: Keyset cursor for the next page (takes precedence over offset)
+
+    Returns opportunities sorted by priority, then recency (most recent email
+    first). When a full page is returned, the ``X-Next-Cursor`` response
+    header carries the cursor for the following page. The cursor pins the
+    first page's "now", so age-based priorities cannot shift between pages.
 
-    Returns opportunities sorted by recency (most recent email first).
+    Eligibility comes from the precomputed ``Email.opportunity_state`` and
+    priority is ranked in SQL, so each page is a single indexed query.
     """
 
+    # Keyset pagination on (priority rank, received_at, id), all descending
+    after = None
+    now = datetime.now(timezone.utc)
+    if cursor:
+        data = _decode_cursor(cursor)
+        try:
+            after = (
+                int(data["r"]),
+                datetime.fromisoformat(data["t"]),
+                int(data["i"]),
+            )
+            if "n" in data:
+                now = datetime.fromisoformat(data["n"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
     try:
         logger.info(f"list_opportunities called for user_email={user_email}")
 
-        # Query emails with potential applications
-        # Start with emails that have application category or are linked to applications
+        rank = opportunity_priority_rank_sql(now)
         email_query = (
-            db.query(Email, Application)
+            db.query(Email, Application, rank.label("priority_rank"))
             .outerjoin(Application, Email.application_id == Application.id)
+            # Only the columns the response needs
+            .options(
+                load_only(
+                    Email.id,
+                    Email.owner_email,
+                    Email.source,
+                    Email.subject,
+                    Email.company,
+                    Email.role,
+                    Email.received_at,
+                ),
+                load_only(
+                    Application.id,
+                    Application.company,
+                    Application.role,
+                    Application.source,
+                    Application.status,
+                ),
+            )
             .filter(Email.owner_email == user_email)
-            # Focus on recent emails (last 6 months) to avoid processing entire history
-            .filter(Email.received_at >= func.now() - text("INTERVAL '6 months'"))
+            # Focus on recent emails (last 6 months) to avoid processing entire
+            # history; a bound value (not now()) lets Postgres prune emails
+            # partitions when planning
+            .filter(Email.received_at >= now - relativedelta(months=6))
+            .filter(opportunity_eligible_sql())
         )
 
         logger.info("Email query constructed successfully")
@@ -378,47 +406,6 @@ def list_opportunities(
             (Email.source == source) | (Application.source == source)
         )
 
-    # Order by recency
-    email_query = email_query.order_by(Email.received_at.desc())
-
-    # Execute query (we'll filter in Python due to complex logic)
-    email_app_pairs = email_query.all()
-
-    # Filter using our opportunity detection logic
-    filtered_items = []
-    for email, application in email_app_pairs:
-        if not is_real_opportunity(email, application):
-            continue
-
-        last_message_at = email.received_at
-
-        # Compute priority score
-        priority = compute_opportunity_priority(
-            application_status=application.status.value
-            if application and application.status
-            else None,
-            email_category=email.category,
-            email_category_confidence=email.category_confidence,
-            last_message_at=last_message_at,
-        )
-
-        # Build response item
-        filtered_items.append(
-            {
-                "email": email,
-                "application": application,
-                "company": application.company if application else email.company,
-                "role": application.role if application else email.role,
-                "status": application.status.value
-                if application and application.status
-                else None,
-                "last_message_at": last_message_at,
-                "email_id": email.id,
-                "thread_id": email.thread_id,
-                "priority": priority,
-            }
-        )
-
     # Apply match_bucket filter if specified (for JobOpportunity integration)
     # Note: This filter applies to the old JobOpportunity model, not Email/Application
     # We keep it for backward compatibility but it won't filter Email-based opportunities
@@ -427,26 +414,33 @@ def list_opportunities(
             f"match_bucket filter ({match_bucket}) not applicable to Email-based opportunities"
         )
 
-    # Sort by priority (high > medium > low), then by recency
-    priority_rank = {"high": 2, "medium": 1, "low": 0}
-    filtered_items.sort(
-        key=lambda it: (
-            priority_rank[it["priority"]],
-            it["last_message_at"] or datetime.min.replace(tzinfo=timezone.utc),
-        ),
-        reverse=True,
+    if after:
+        email_query = email_query.filter(
+            tuple_(rank, Email.received_at, Email.id) < tuple_(*after)
+        )
+    elif offset:
+        email_query = email_query.offset(offset)
+
+    rows = (
+        email_query.order_by(rank.desc(), Email.received_at.desc(), Email.id.desc())
+        .limit(limit)
+        .all()
     )
 
-    # Apply pagination
-    total_count = len(filtered_items)
-    paginated_items = filtered_items[offset : offset + limit]
+    if len(rows) == limit:
+        last_email, _, last_rank = rows[-1]
+        response.headers["X-Next-Cursor"] = _encode_cursor(
+            {
+                "r": last_rank,
+                "t": last_email.received_at.isoformat(),
+                "i": last_email.id,
+                "n": now.isoformat(),
+            }
+        )
 
     # Convert to response format
     results = []
-    for item in paginated_items:
-        email = item["email"]
-        application = item["application"]
-
+    for email, application, priority_rank in rows:
         # For backward compatibility, map to OpportunityResponse schema
         # Note: Some fields like tech_stack, apply_url won't be populated from Email
         try:
@@ -456,8 +450,11 @@ def list_opportunities(
                     owner_email=email.owner_email or user_email,
                     source=email.source
                     or (application.source if application else "email"),
-                    title=item["role"] or email.subject or "",
-                    company=item["company"] or "Unknown",
+                    title=(application.role if application else email.role)
+                    or email.subject
+                    or "",
+                    company=(application.company if application else email.company)
+                    or "Unknown",
                     location=None,  # Not available in Email model
                     remote_flag=None,  # Not available in Email model
                     salary_text=None,  # Not available in Email model
@@ -465,12 +462,12 @@ def list_opportunities(
                     tech_stack=None,  # Not available in Email model
                     apply_url=None,  # Not available in Email model
                     posted_at=None,
-                    created_at=email.received_at.isoformat()
-                    if email.received_at
-                    else "",
+                    created_at=(
+                        email.received_at.isoformat() if email.received_at else ""
+                    ),
                     match_bucket=None,  # Not applicable for Email-based opportunities
                     match_score=None,  # Not applicable for Email-based opportunities
-                    priority=item["priority"],
+                    priority=RANK_PRIORITY[priority_rank],
                 )
             )
         except Exception as e:
@@ -479,8 +476,8 @@ def list_opportunities(
             )
 
     logger.info(
-        f"Listed {len(results)}/{total_count} opportunities for user {user_email} "
-        f"(source={source}, company={company}, after filtering noise)"
+        f"Listed {len(results)} opportunities for user {user_email} "
+        f"(source={source}, company={company}, cursor={bool(cursor)})"
     )
 
     return results
@@ -533,9 +530,9 @@ def get_opportunity_detail(
         "level": opportunity.level,
         "tech_stack": opportunity.tech_stack,
         "apply_url": opportunity.apply_url,
-        "posted_at": opportunity.posted_at.isoformat()
-        if opportunity.posted_at
-        else None,
+        "posted_at": (
+            opportunity.posted_at.isoformat() if opportunity.posted_at else None
+        ),
         "created_at": opportunity.created_at.isoformat(),
         "updated_at": opportunity.updated_at.isoformat(),
         "match": None,
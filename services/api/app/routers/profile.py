@@ -20,6 +20,8 @@ from sqlalchemy.orm import Session
 from ..db import get_db
 from ..deps.user import get_current_user_email
 from ..models import Email
+from ..utils.cache import cache
+from .labels import CATEGORY_CACHE_TAG
 
 router = APIRouter(prefix="/profile", tags=["profile"])
 
@@ -27,6 +29,9 @@ router = APIRouter(prefix="/profile", tags=["profile"])
 ES_URL = os.getenv("ES_URL", "http://elasticsearch:9200")
 INDEX = os.getenv("ES_EMAIL_INDEX", "emails_v1-000001")
 
+# Category facets are invalidated when labels are applied (routers/labels.py)
+PROFILE_SUMMARY_CACHE_TTL = 60
+
 
 @router.get("/summary")
 async def profile_summary(days: int = Query(60, ge=1, le=365)) -> dict:
@@ -57,6 +62,23 @@ async def profile_summary(days: int = Query(60, ge=1, le=365)) -> dict:
             ]
         }
     """
+    try:
+        return await cache.get_or_set(
+            f"profile:summary:{days}",
+            PROFILE_SUMMARY_CACHE_TTL,
+            lambda: _fetch_profile_summary(days),
+            tags=(CATEGORY_CACHE_TAG,),
+        )
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(status_code=e.response.status_code, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to fetch profile: {str(e)}"
+        )
+
+
+async def _fetch_profile_summary(days: int) -> dict:
+    """Run the category/sender facet aggregation behind /profile/summary."""
     # Build aggregation query
     query = {
         "size": 0,
@@ -69,50 +91,42 @@ async def profile_summary(days: int = Query(60, ge=1, le=365)) -> dict:
         },
     }
 
-    try:
-        async with httpx.AsyncClient(timeout=20) as client:
-            response = await client.post(f"{ES_URL}/{INDEX}/_search", json=query)
-            response.raise_for_status()
-
-            data = response.json()
-            total = data["hits"]["total"]["value"]
-            aggs = data["aggregations"]
-
-            # Calculate category breakdown with percentages
-            categories = []
-            for bucket in aggs["by_category"]["buckets"]:
-                categories.append(
-                    {
-                        "category": bucket["key"],
-                        "count": bucket["doc_count"],
-                        "percent": (
-                            round((bucket["doc_count"] / total * 100), 1)
-                            if total > 0
-                            else 0
-                        ),
-                    }
-                )
+    async with httpx.AsyncClient(timeout=20) as client:
+        response = await client.post(f"{ES_URL}/{INDEX}/_search", json=query)
+        response.raise_for_status()
 
-            # Top senders
-            senders = [
-                {"sender_domain": bucket["key"], "count": bucket["doc_count"]}
-                for bucket in aggs["top_senders"]["buckets"]
-            ]
+        data = response.json()
+        total = data["hits"]["total"]["value"]
+        aggs = data["aggregations"]
 
-            return {
-                "total": total,
-                "days": days,
-                "avg_per_day": round(total / days, 1) if days > 0 else 0,
-                "by_category": categories,
-                "top_senders": senders,
-            }
+        # Calculate category breakdown with percentages
+        categories = []
+        for bucket in aggs["by_category"]["buckets"]:
+            categories.append(
+                {
+                    "category": bucket["key"],
+                    "count": bucket["doc_count"],
+                    "percent": (
+                        round((bucket["doc_count"] / total * 100), 1)
+                        if total > 0
+                        else 0
+                    ),
+                }
+            )
 
-    except httpx.HTTPStatusError as e:
-        raise HTTPException(status_code=e.response.status_code, detail=str(e))
-    except Exception as e:
-        raise HTTPException(
-            status_code=500, detail=f"Failed to fetch profile: {str(e)}"
-        )
+        # Top senders
+        senders = [
+            {"sender_domain": bucket["key"], "count": bucket["doc_count"]}
+            for bucket in aggs["top_senders"]["buckets"]
+        ]
+
+        return {
+            "total": total,
+            "days": days,
+            "avg_per_day": round(total / days, 1) if days > 0 else 0,
+            "by_category": categories,
+            "top_senders": senders,
+        }
 
 
 @router.get("/senders")
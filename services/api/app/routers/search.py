@@ -9,6 +9,7 @@ from pydantic import BaseModel
 
 from ..deps.user import get_current_user_email
 from ..es import ES_ENABLED, INDEX, es
+from ..logic.paging import InvalidCursor, Pager
 
 logger = logging.getLogger(__name__)
 
@@ -71,6 +72,7 @@ class SearchResponse(BaseModel):
     total: int
     hits: List[SearchHit]
     info: Optional[str] = None
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page
 
 
 @router.get("/", response_model=SearchResponse)
@@ -119,6 +121,9 @@ def search(
     quarantined: Optional[bool] = Query(
         None, description="Filter by quarantine status: true|false"
     ),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor from the previous page"
+    ),
     user_email: str = Depends(get_current_user_email),
 ):
     """
@@ -129,10 +134,16 @@ def search(
     - 7-day recency decay (Gaussian)
     - Field boosting (subject^3, sender^1.5)
     - Phrase + prefix matching
+    - Deep paging: ``next_cursor`` / ``cursor`` (PIT + search_after)
     """
     if not ES_ENABLED or es is None:
         return SearchResponse(total=0, hits=[], info="Elasticsearch disabled")
 
+    try:
+        pager = Pager(es, INDEX_ALIAS, user=user_email, scope="search", cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     # Log search parameters for debugging
     logger.debug(
         "SEARCH params: q=%s scale=%s hide_expired=%s quarantined=%s risk_min=%s labels=%s owner=%s",
@@ -151,7 +162,8 @@ def search(
     # Validate / normalize scale (defensive)
     allowed = {"3d", "7d", "14d"}
     scale = scale if scale in allowed else "7d"
-    recency = {**RECENCY, "scale": scale}
+    # Pin "now" for the whole paging session so scores don't drift between pages
+    recency = {**RECENCY, "scale": scale, "origin": pager.started_at}
 
     # Build base query with phrase + prefix matching
     if q == "*":
@@ -253,32 +265,14 @@ def search(
             {"received_at": {"order": "desc" if sort == "received_desc" else "asc"}}
         ]
     elif sort in ("ttr_asc", "ttr_desc"):
-        # Script computes hours between received_at and first_user_reply_at.
-        # If missing reply, return a very large number for asc (push to bottom),
-        # and a very small number for desc (bring to top) to make intent explicit.
-        order = "asc" if sort == "ttr_asc" else "desc"
-        script_source = """
-          def r = doc.containsKey('received_at') && !doc['received_at'].empty ? doc['received_at'].value.toInstant().toEpochMilli() : null;
-          def f = doc.containsKey('first_user_reply_at') && !doc['first_user_reply_at'].empty ? doc['first_user_reply_at'].value.toInstant().toEpochMilli() : null;
-          if (r == null) return params.missing;
-          if (f == null) return params.no_reply;
-          if (f < r) return params.missing;
-          return (f - r) / 3600000.0;
-        """
+        # time_to_response_hours is computed at ingest; docs without a reply
+        # (or whose reply predates them) have no value and sort last.
         es_sort = [
             {
-                "_script": {
-                    "type": "number",
-                    "order": order,
-                    "script": {
-                        "source": script_source,
-                        "params": {
-                            "missing": 9.22e18,
-                            "no_reply": (
-                                (0 - 9.22e18) if sort == "ttr_desc" else 9.22e18
-                            ),
-                        },
-                    },
+                "time_to_response_hours": {
+                    "order": "asc" if sort == "ttr_asc" else "desc",
+                    "missing": "_last",
+                    "unmapped_type": "float",
                 }
             }
         ]
@@ -386,10 +380,13 @@ def search(
         json.dumps(body, default=str),
     )
 
-    res = es.search(index=INDEX_ALIAS, body=body)
+    try:
+        page = pager.fetch(body, size)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     hits = []
-    for h in res["hits"]["hits"]:
+    for h in page.hits:
         source = h["_source"]
         highlight = h.get("highlight", {})
 
@@ -400,26 +397,6 @@ def search(
         elif source.get("body_text"):
             snippet = source["body_text"][:300] + "..."
 
-        # Compute time_to_response_hours server-side
-        time_to_response_hours = None
-        if source.get("first_user_reply_at") and source.get("received_at"):
-            try:
-                first_reply_str = source["first_user_reply_at"].replace("Z", "+00:00")
-                received_str = source["received_at"]
-                # Add timezone if missing
-                if "+" not in received_str and not received_str.endswith("Z"):
-                    received_str += "+00:00"
-                else:
-                    received_str = received_str.replace("Z", "+00:00")
-
-                first_reply = datetime.fromisoformat(first_reply_str)
-                received = datetime.fromisoformat(received_str)
-                time_to_response_hours = (
-                    first_reply - received
-                ).total_seconds() / 3600.0
-            except Exception:
-                pass
-
         hits.append(
             SearchHit(
                 id=source.get("id"),
@@ -452,7 +429,7 @@ def search(
                 first_user_reply_at=source.get("first_user_reply_at"),
                 user_reply_count=source.get("user_reply_count", 0),
                 replied=source.get("replied", False),
-                time_to_response_hours=time_to_response_hours,
+                time_to_response_hours=source.get("time_to_response_hours"),
                 # ML fields (Phase 37)
                 category=source.get("category"),
                 expires_at=source.get("expires_at"),
@@ -463,7 +440,7 @@ def search(
             )
         )
 
-    return SearchResponse(total=res["hits"]["total"]["value"], hits=hits)
+    return SearchResponse(total=page.total, hits=hits, next_cursor=page.next_cursor)
 
 
 # ----- Explain endpoint -----
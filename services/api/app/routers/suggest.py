@@ -3,8 +3,10 @@ from typing import Dict, List
 
 from fastapi import APIRouter, Depends, Query
 
+from ..core.metrics import suggest_requests_total
 from ..deps.user import get_current_user_email
 from ..es import ES_ENABLED, INDEX, es
+from ..logic.suggest_index import looks_like_body_search, suggest_indexes
 
 router = APIRouter(prefix="/suggest", tags=["suggest"])
 logger = logging.getLogger(__name__)
@@ -17,7 +19,12 @@ def suggest(
     user_email: str = Depends(get_current_user_email),
 ) -> Dict[str, List[str]]:
     """
-    Unified suggest: completion over subject + phrase spell-correct + body prefix.
+    Unified suggest: subject/sender/company prefixes plus body prefix matches.
+
+    Short queries are answered from the user's in-process index
+    (app.logic.suggest_index); ES is queried only when that yields fewer
+    than ``limit`` suggestions or the query looks like body text. Every ES
+    query is filtered to the owner, so suggestions never cross users.
 
     CRITICAL: NEVER throws 500 - always returns empty suggestions on error
     to prevent blocking search results UI.
@@ -29,53 +36,47 @@ def suggest(
     if len(q.strip()) < 2:
         return {"suggestions": [], "did_you_mean": [], "body_prefix": []}
 
+    local: List[str] = []
+    if not looks_like_body_search(q):
+        try:
+            local = suggest_indexes.lookup(es, INDEX, user_email, q, limit) or []
+        except Exception as e:
+            logger.warning(f"[suggest] local index unavailable for q='{q}': {e}")
+        if len(local) >= limit:
+            suggest_requests_total.labels(source="local").inc()
+            return {"suggestions": local, "did_you_mean": [], "body_prefix": []}
+
+    suggest_requests_total.labels(source="es").inc()
     try:
-        # Add owner filter to all suggestions
+        # Owner-scoped queries only: the completion and phrase suggesters
+        # can't be filtered by owner, so they would leak other users' subjects
         owner_filter = {"term": {"owner_email.keyword": user_email}}
 
         body = {
-            "suggest": {
-                "subject_completion": {
-                    "prefix": q,
-                    "completion": {
-                        "field": "subject_suggest",
-                        "skip_duplicates": True,
-                        "size": limit,
-                        "fuzzy": {"fuzziness": 1},
-                    },
-                },
-                "subject_phrase": {
-                    "text": q,
-                    "phrase": {
-                        "field": "subject_shingles",
-                        "size": limit,
-                        "real_word_error_likelihood": 0.9,
-                        "max_errors": 1,
-                        "gram_size": 2,
-                        "direct_generator": [
-                            {
-                                "field": "subject_shingles",
-                                "suggest_mode": "popular",
-                                "min_word_length": 2,
-                            }
-                        ],
-                    },
-                },
-            },
-            "size": 5,
+            "size": limit + 5,
+            "_source": ["subject"],
             "query": {
                 "bool": {
-                    "must": {
-                        "multi_match": {
-                            "query": q,
-                            "type": "bool_prefix",
-                            "fields": [
-                                "body_sayt",
-                                "body_sayt._2gram",
-                                "body_sayt._3gram",
-                            ],
-                        }
-                    },
+                    "should": [
+                        {
+                            "match_phrase_prefix": {
+                                "subject": {"query": q, "_name": "subject"}
+                            }
+                        },
+                        {
+                            "multi_match": {
+                                "query": q,
+                                "type": "bool_prefix",
+                                "fields": [
+                                    "body_sayt",
+                                    "body_sayt._2gram",
+                                    "body_sayt._3gram",
+                                ],
+                                "_name": "body",
+                            }
+                        },
+                    ],
+                    "minimum_should_match": 1,
                     "filter": [owner_filter],
                 }
             },
@@ -83,32 +84,27 @@ def suggest(
 
         res = es.search(index=INDEX, body=body)
 
-        # completion
-        completion_opts = (
-            res.get("suggest", {}).get("subject_completion", [{}])[0].get("options", [])
-        )
-        suggestions = [o.get("text") for o in completion_opts]
-
-        # phrase did-you-mean
-        phrase_opts = (
-            res.get("suggest", {}).get("subject_phrase", [{}])[0].get("options", [])
-        )
-        did_you_mean = [o.get("text") for o in phrase_opts]
-
-        # body prefix top texts (use subject as a readable suggestion)
+        # subject prefix, after the local matches
+        suggestions = list(local)
         body_prefix = []
-        for h in res.get("hits", {}).get("hits", [])[:limit]:
-            src = h.get("_source", {})
-            if src.get("subject"):
-                body_prefix.append(src["subject"])
+        for h in res.get("hits", {}).get("hits", []):
+            subject = h.get("_source", {}).get("subject")
+            if not subject:
+                continue
+            matched = h.get("matched_queries", [])
+            if "subject" in matched and subject not in suggestions:
+                suggestions.append(subject)
+            # body prefix top texts (use subject as a readable suggestion)
+            if "body" in matched and len(body_prefix) < 5:
+                body_prefix.append(subject)
 
         return {
-            "suggestions": suggestions,
-            "did_you_mean": did_you_mean,
-            "body_prefix": body_prefix,
+            "suggestions": suggestions[:limit],
+            "did_you_mean": [],
+            "body_prefix": body_prefix[:limit],
         }
 
     except Exception as e:
         # NEVER 500 — return empty suggestions so UI can still show results
         logger.warning(f"[suggest] error for q='{q}': {e}")
-        return {"suggestions": [], "did_you_mean": [], "body_prefix": []}
+        return {"suggestions": local, "did_you_mean": [], "body_prefix": []}
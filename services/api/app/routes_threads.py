@@ -2,13 +2,22 @@
 Thread Detail API Routes
 
 GET /api/threads/{thread_id} - Returns detailed thread information with messages
+GET /api/threads/{thread_id}/messages/{message_id}/body - Full body of one message
+
+Thread detail only selects the message columns it returns and cuts bodies at
+BODY_PREVIEW_CHARS in SQL; clients fetch the rest per message on demand.
+Responses carry an ETag derived from the thread's message count and latest
+received_at, so re-opening an unchanged thread is answered with 304 from one
+aggregate query.
 """
 
+import hashlib
 import logging
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Depends
+from datetime import datetime
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from pydantic import BaseModel
-from sqlalchemy import desc
+from sqlalchemy import desc, func
 from sqlalchemy.orm import Session
 
 from .db import get_db
@@ -18,6 +27,9 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/threads", tags=["threads"])
 
+# Message bodies longer than this are truncated in thread detail
+BODY_PREVIEW_CHARS = 4000
+
 
 class MailMessage(BaseModel):
     id: str
@@ -27,6 +39,7 @@ class MailMessage(BaseModel):
     subject: str
     bodyHtml: Optional[str] = None
     bodyText: Optional[str] = None
+    bodyTruncated: bool = False  # Full text via .../messages/{id}/body
     isImportant: Optional[bool] = False
 
     class Config:
@@ -34,6 +47,11 @@ class MailMessage(BaseModel):
         fields = {"from_": "from"}
 
 
+class MailMessageBody(BaseModel):
+    id: str
+    bodyText: str = ""
+
+
 class MailThreadDetail(BaseModel):
     threadId: str
     subject: str
@@ -51,22 +69,69 @@ class MailThreadDetail(BaseModel):
         fields = {"from_": "from"}
 
 
+def _thread_version(db: Session, thread_id: str) -> Tuple[int, Optional[datetime]]:
+    """Message count and latest received_at of a thread."""
+    count, latest = (
+        db.query(func.count(Email.id), func.max(Email.received_at))
+        .filter(Email.thread_id == thread_id)
+        .one()
+    )
+    return int(count or 0), latest
+
+
+def _thread_etag(thread_id: str, count: int, latest: Optional[datetime]) -> str:
+    stamp = latest.isoformat() if latest else ""
+    key = f"{thread_id}:{count}:{stamp}:{BODY_PREVIEW_CHARS}"
+    return f'W/"{hashlib.sha1(key.encode()).hexdigest()[:20]}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip() for tag in if_none_match.split(","))
+
+
 @router.get("/{thread_id}", response_model=MailThreadDetail)
 async def get_thread_detail(
-    thread_id: str, db: Session = Depends(get_db)
+    thread_id: str,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
 ) -> MailThreadDetail:
     """
     Get detailed thread information including all messages.
 
     Returns:
         - MailThreadDetail with messages sorted by sentAt desc (most recent first)
+        - 304 without a body when If-None-Match carries the current ETag
 
     Raises:
         - 404 if thread not found
     """
-    # Query all emails in this thread, ordered by received_at desc
+    count, latest = _thread_version(db, thread_id)
+    if not count:
+        raise HTTPException(status_code=404, detail=f"Thread {thread_id} not found")
+
+    etag = _thread_etag(thread_id, count, latest)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    # Only the columns the response uses; bodies are cut server-side
     emails = (
-        db.query(Email)
+        db.query(
+            Email.id,
+            Email.sender,
+            Email.recipient,
+            Email.subject,
+            Email.received_at,
+            Email.risk_score,
+            Email.labels,
+            func.substr(Email.body_text, 1, BODY_PREVIEW_CHARS).label("body_text"),
+            func.length(Email.body_text).label("body_length"),
+        )
         .filter(Email.thread_id == thread_id)
         .order_by(desc(Email.received_at))
         .all()
@@ -88,48 +153,63 @@ async def get_thread_detail(
                 from_=email.sender or "Unknown",
                 to=email.recipient or "Unknown",
                 subject=email.subject or "No Subject",
-                bodyHtml=email.body_html if hasattr(email, "body_html") else None,
-                bodyText=email.body_text or email.body_preview or "",
-                isImportant=email.risk_score and email.risk_score > 0.7
-                if hasattr(email, "risk_score")
-                else False,
+                bodyText=email.body_text or "",
+                bodyTruncated=(email.body_length or 0) > BODY_PREVIEW_CHARS,
+                isImportant=bool(email.risk_score and email.risk_score > 0.7),
             )
         )
 
     # Construct Gmail URL
     gmail_url = f"https://mail.google.com/mail/u/0/#inbox/{thread_id}"
-    if hasattr(first_email, "gmail_thread_id") and first_email.gmail_thread_id:
-        gmail_url = (
-            f"https://mail.google.com/mail/u/0/#inbox/{first_email.gmail_thread_id}"
-        )
 
     # Parse labels if available
     labels = []
-    if hasattr(first_email, "labels") and first_email.labels:
+    if first_email.labels:
         if isinstance(first_email.labels, str):
             labels = first_email.labels.split(",")
         elif isinstance(first_email.labels, list):
             labels = first_email.labels
 
     # Build snippet
-    snippet = first_email.body_preview or first_email.subject or ""
+    snippet = first_email.body_text or first_email.subject or ""
     if len(snippet) > 200:
         snippet = snippet[:200] + "..."
 
+    response.headers.update(headers)
     return MailThreadDetail(
         threadId=thread_id,
         subject=first_email.subject or "No Subject",
         from_=first_email.sender or "Unknown",
         to=first_email.recipient,
-        lastMessageAt=first_email.received_at.isoformat()
-        if first_email.received_at
-        else "",
-        unreadCount=sum(1 for e in emails if hasattr(e, "is_read") and not e.is_read),
-        riskScore=first_email.risk_score
-        if hasattr(first_email, "risk_score")
-        else None,
+        lastMessageAt=(
+            first_email.received_at.isoformat() if first_email.received_at else ""
+        ),
+        riskScore=first_email.risk_score,
         labels=labels,
         snippet=snippet,
         gmailUrl=gmail_url,
         messages=messages,
     )
+
+
+@router.get("/{thread_id}/messages/{message_id}/body", response_model=MailMessageBody)
+async def get_message_body(
+    thread_id: str, message_id: int, db: Session = Depends(get_db)
+) -> MailMessageBody:
+    """
+    Get the full body of one message, for messages marked bodyTruncated.
+
+    Raises:
+        - 404 if the message is not part of the thread
+    """
+    row = (
+        db.query(Email.id, Email.body_text)
+        .filter(Email.id == message_id, Email.thread_id == thread_id)
+        .one_or_none()
+    )
+    if row is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Message {message_id} not found in thread {thread_id}",
+        )
+    return MailMessageBody(id=str(row.id), bodyText=row.body_text or "")
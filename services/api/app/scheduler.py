@@ -1,21 +1,40 @@
 """Scheduled jobs for ApplyLens.
 
 Uses APScheduler for background tasks like feed loading, weight updates, etc.
+
+Every API worker runs this scheduler; each run goes through the job's lease
+(app.core.job_locks), so a trigger runs on one worker only and never
+overlaps a previous run still in progress. Jobs run in a bounded thread
+pool, separate from the request threadpool, and re-raise failures so they
+are counted per job.
 """
 
 import logging
 from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 
+from apscheduler.executors.pool import ThreadPoolExecutor
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from sqlalchemy.orm import Session
 
+from app.config import agent_settings
+from app.core import job_locks
+from app.core.query_stats import track_queries
 from app.db import SessionLocal
 
 logger = logging.getLogger(__name__)
 
-# Initialize scheduler
-scheduler = BackgroundScheduler()
+# Initialize scheduler: one instance per job at a time, missed runs
+# collapse into one, late runs start within the grace period
+scheduler = BackgroundScheduler(
+    executors={"default": ThreadPoolExecutor(agent_settings.SCHEDULER_MAX_WORKERS)},
+    job_defaults={
+        "coalesce": True,
+        "max_instances": 1,
+        "misfire_grace_time": agent_settings.SCHEDULER_MISFIRE_GRACE_SEC,
+    },
+)
 
 
 @contextmanager
@@ -25,9 +44,8 @@ def session_scope():
     try:
         yield session
         session.commit()
-    except Exception as e:
+    except Exception:
         session.rollback()
-        logger.error(f"Session error: {e}")
         raise
     finally:
         session.close()
@@ -54,118 +72,141 @@ def is_active_learning_paused(session: Session) -> bool:
 # ============================================================================
 
 
+@track_queries("job_load_labeled_data")
 def job_load_labeled_data():
     """Daily job: Load labeled data from all sources."""
     logger.info("Starting scheduled job: load_labeled_data")
 
-    try:
-        with session_scope() as session:
-            # Check if paused
-            if is_active_learning_paused(session):
-                logger.info("Active learning is paused, skipping labeled data loading")
-                return
+    with session_scope() as session:
+        # Check if paused
+        if is_active_learning_paused(session):
+            logger.info("Active learning is paused, skipping labeled data loading")
+            return
 
-            from app.active.feeds import load_all_feeds
+        from app.active.feeds import load_all_feeds
 
-            counts = load_all_feeds(session)
-            total = sum(counts.values())
+        counts = load_all_feeds(session)
+        total = sum(counts.values())
 
-            logger.info(f"Loaded {total} labeled examples: {counts}")
-    except Exception as e:
-        logger.error(f"Failed to load labeled data: {e}", exc_info=True)
+        logger.info(f"Loaded {total} labeled examples: {counts}")
 
 
+@track_queries("job_update_judge_weights")
 def job_update_judge_weights():
     """Daily job: Update judge reliability weights."""
     logger.info("Starting scheduled job: update_judge_weights")
 
-    try:
-        with session_scope() as session:
-            # Check if paused
-            if is_active_learning_paused(session):
-                logger.info("Active learning is paused, skipping judge weight update")
-                return
+    with session_scope() as session:
+        # Check if paused
+        if is_active_learning_paused(session):
+            logger.info("Active learning is paused, skipping judge weight update")
+            return
 
-            from app.active.weights import nightly_update_weights
+        from app.active.weights import nightly_update_weights
 
-            results = nightly_update_weights(session)
+        results = nightly_update_weights(session)
 
-            logger.info(f"Updated judge weights for {len(results)} agents")
-            for agent, weights in results.items():
-                logger.info(f"  {agent}: {weights}")
-    except Exception as e:
-        logger.error(f"Failed to update judge weights: {e}", exc_info=True)
+        logger.info(f"Updated judge weights for {len(results)} agents")
+        for agent, weights in results.items():
+            logger.info(f"  {agent}: {weights}")
 
 
+@track_queries("job_sample_review_queue")
 def job_sample_review_queue():
     """Daily job: Sample uncertain predictions for review."""
     logger.info("Starting scheduled job: sample_review_queue")
 
-    try:
-        with session_scope() as session:
-            # Check if paused
-            if is_active_learning_paused(session):
-                logger.info("Active learning is paused, skipping review queue sampling")
-                return
+    with session_scope() as session:
+        # Check if paused
+        if is_active_learning_paused(session):
+            logger.info("Active learning is paused, skipping review queue sampling")
+            return
 
-            from app.active.sampler import daily_sample_review_queue
+        from app.active.sampler import daily_sample_review_queue
 
-            candidates = daily_sample_review_queue(session, top_n_per_agent=20)
-            total = sum(len(c) for c in candidates.values())
+        candidates = daily_sample_review_queue(session, top_n_per_agent=20)
+        total = sum(len(c) for c in candidates.values())
 
-            logger.info(
-                f"Sampled {total} review queue candidates across {len(candidates)} agents"
-            )
-            for agent, agent_candidates in candidates.items():
-                logger.info(f"  {agent}: {len(agent_candidates)} candidates")
-    except Exception as e:
-        logger.error(f"Failed to sample review queue: {e}", exc_info=True)
+        logger.info(
+            f"Sampled {total} review queue candidates across {len(candidates)} agents"
+        )
+        for agent, agent_candidates in candidates.items():
+            logger.info(f"  {agent}: {len(agent_candidates)} candidates")
 
 
+@track_queries("job_watch_incidents")
 def job_watch_incidents():
     """Every 15 min: Watch for invariant failures and raise incidents."""
     logger.info("Starting scheduled job: watch_incidents")
 
     try:
         from app.intervene.watcher import run_watcher_cycle
-
-        run_watcher_cycle()
     except ImportError as e:
         logger.info(f"Watcher module not available yet: {e}")
-    except Exception as e:
-        logger.error(f"Failed to run watcher cycle: {e}", exc_info=True)
+        return
+
+    run_watcher_cycle()
 
 
+@track_queries("job_check_canary_deployments")
 def job_check_canary_deployments():
     """Daily job: Check canary deployments and auto-promote/rollback."""
     logger.info("Starting scheduled job: check_canary_deployments")
 
-    try:
-        with session_scope() as session:
-            # Check if paused
-            if is_active_learning_paused(session):
-                logger.info("Active learning is paused, skipping canary checks")
-                return
-
-            from app.active.guards import OnlineLearningGuard
-
-            guard = OnlineLearningGuard(session)
-            results = guard.nightly_guard_check()
-
-            logger.info(f"Checked {len(results)} active canaries")
-            for agent, result in results.items():
-                logger.info(f"  {agent}: {result.get('status', 'unknown')}")
-
-                if result.get("status") == "rolled_back":
-                    logger.warning(
-                        f"Auto-rolled back canary for {agent}: {result.get('reason')}"
-                    )
-                elif result.get("status") == "promoted":
-                    logger.info(
-                        f"Promoted {agent} from {result.get('from_percent')}% to {result.get('to_percent')}%"
-                    )
-    except Exception as e:
-        logger.error(f"Failed to check canary deployments: {e}", exc_info=True)
+    with session_scope() as session:
+        # Check if paused
+        if is_active_learning_paused(session):
+            logger.info("Active learning is paused, skipping canary checks")
+            return
+
+        from app.active.guards import OnlineLearningGuard
+
+        guard = OnlineLearningGuard(session)
+        results = guard.nightly_guard_check()
+
+        logger.info(f"Checked {len(results)} active canaries")
+        for agent, result in results.items():
+            logger.info(f"  {agent}: {result.get('status', 'unknown')}")
+
+            if result.get("status") == "rolled_back":
+                logger.warning(
+                    f"Auto-rolled back canary for {agent}: {result.get('reason')}"
+                )
+            elif result.get("status") == "promoted":
+                logger.info(
+                    f"Promoted {agent} from {result.get('from_percent')}% to {result.get('to_percent')}%"
+                )
+
+
+@track_queries("job_sweep_search_pits")
+def job_sweep_search_pits():
+    """Every minute: close ES point-in-time contexts left by abandoned cursors."""
+    from app.logic.paging import sweep_idle_pits
+
+    closed = sweep_idle_pits()
+    if closed:
+        logger.info(f"Closed {closed} idle search PITs")
+
+
+@track_queries("job_manage_email_partitions")
+def job_manage_email_partitions():
+    """Daily job: pre-create upcoming emails partitions, detach expired ones."""
+    from app.config import agent_settings
+    from app.core import email_partitions
+    from app.db import engine
+
+    with engine.begin() as conn:
+        if not email_partitions.is_postgres(conn):
+            return
+        email_partitions.ensure_partitions(
+            conn, agent_settings.EMAIL_PARTITION_MONTHS_AHEAD
+        )
+        if agent_settings.EMAIL_PARTITION_RETENTION_MONTHS:
+            email_partitions.detach_expired(
+                conn,
+                agent_settings.EMAIL_PARTITION_RETENTION_MONTHS,
+                drop=agent_settings.EMAIL_PARTITION_DROP_EXPIRED,
+            )
 
 
 # ============================================================================
@@ -173,6 +214,46 @@ def job_check_canary_deployments():
 # ============================================================================
 
 
+def run_coordinated(job_id: str, func, trigger, manual: bool = False) -> str:
+    """Run a job through its lease; what APScheduler calls on each trigger.
+
+    Scheduled runs claim the trigger's un-jittered fire time, so every
+    worker competes for the same slot. Manual runs claim the current time:
+    they still wait for no one, but never overlap a run in progress.
+
+    Returns:
+        ``ok``/``failed``, or why the run was skipped (``locked``, ``claimed``)
+    """
+    now = datetime.now(timezone.utc)
+    slot = None
+    if not manual:
+        lookback = timedelta(
+            seconds=agent_settings.SCHEDULER_MISFIRE_GRACE_SEC
+            + (trigger.jitter or 0)
+        )
+        slot = job_locks.trigger_slot(trigger, now, lookback)
+    return job_locks.get_coordinator().run(job_id, func, slot or now)
+
+
+def _add_job(func, trigger, job_id: str, name: str):
+    """Schedule a cluster-wide job: one worker runs each trigger."""
+    scheduler.add_job(
+        run_coordinated,
+        trigger=trigger,
+        args=(job_id, func, trigger),
+        id=job_id,
+        name=name,
+        replace_existing=True,
+    )
+
+
+def _add_local_job(func, trigger, job_id: str, name: str):
+    """Schedule per-process maintenance: every worker runs it, no lease."""
+    scheduler.add_job(
+        func, trigger=trigger, id=job_id, name=name, replace_existing=True
+    )
+
+
 def setup_scheduled_jobs():
     """Configure and start all scheduled jobs."""
     import os
@@ -184,60 +265,78 @@ def setup_scheduled_jobs():
 
     logger.info("Setting up scheduled jobs...")
 
+    # Spread cron starts; the per-minute sweep gets a shorter spread
+    jitter = agent_settings.SCHEDULER_JITTER_SEC or None
+    short_jitter = min(jitter, 10) if jitter else None
+
     # Active Learning Jobs (Phase 5.3)
 
     # Daily at 2 AM: Load labeled data
-    scheduler.add_job(
+    _add_job(
         job_load_labeled_data,
-        trigger=CronTrigger(hour=2, minute=0),
-        id="load_labeled_data",
-        name="Load Labeled Data",
-        replace_existing=True,
+        CronTrigger(hour=2, minute=0, jitter=jitter),
+        "load_labeled_data",
+        "Load Labeled Data",
     )
     logger.info("Scheduled: Load labeled data (daily at 2 AM)")
 
     # Daily at 3 AM: Update judge weights
-    scheduler.add_job(
+    _add_job(
         job_update_judge_weights,
-        trigger=CronTrigger(hour=3, minute=0),
-        id="update_judge_weights",
-        name="Update Judge Weights",
-        replace_existing=True,
+        CronTrigger(hour=3, minute=0, jitter=jitter),
+        "update_judge_weights",
+        "Update Judge Weights",
     )
     logger.info("Scheduled: Update judge weights (daily at 3 AM)")
 
     # Daily at 4 AM: Sample review queue
-    scheduler.add_job(
+    _add_job(
         job_sample_review_queue,
-        trigger=CronTrigger(hour=4, minute=0),
-        id="sample_review_queue",
-        name="Sample Review Queue",
-        replace_existing=True,
+        CronTrigger(hour=4, minute=0, jitter=jitter),
+        "sample_review_queue",
+        "Sample Review Queue",
     )
     logger.info("Scheduled: Sample review queue (daily at 4 AM)")
 
     # Daily at 5 AM: Check canary deployments
-    scheduler.add_job(
+    _add_job(
         job_check_canary_deployments,
-        trigger=CronTrigger(hour=5, minute=0),
-        id="check_canary_deployments",
-        name="Check Canary Deployments",
-        replace_existing=True,
+        CronTrigger(hour=5, minute=0, jitter=jitter),
+        "check_canary_deployments",
+        "Check Canary Deployments",
     )
     logger.info("Scheduled: Check canary deployments (daily at 5 AM)")
 
     # Interventions Jobs (Phase 5.4)
 
     # Every 15 minutes: Watch for invariant/gate failures
-    scheduler.add_job(
+    _add_job(
         job_watch_incidents,
-        trigger=CronTrigger(minute="*/15"),
-        id="watch_incidents",
-        name="Watch for Incidents",
-        replace_existing=True,
+        CronTrigger(minute="*/15", jitter=jitter),
+        "watch_incidents",
+        "Watch for Incidents",
     )
     logger.info("Scheduled: Watch for incidents (every 15 minutes)")
 
+    # Every minute: close idle search PITs (deep pagination cursors). The
+    # PIT registry is per process, so each worker sweeps its own
+    _add_local_job(
+        job_sweep_search_pits,
+        CronTrigger(minute="*", jitter=short_jitter),
+        "sweep_search_pits",
+        "Sweep Search PITs",
+    )
+    logger.info("Scheduled: Sweep search PITs (every minute)")
+
+    # Daily at 1 AM: emails partitions for the coming months
+    _add_job(
+        job_manage_email_partitions,
+        CronTrigger(hour=1, minute=0, jitter=jitter),
+        "manage_email_partitions",
+        "Manage Email Partitions",
+    )
+    logger.info("Scheduled: Manage email partitions (daily at 1 AM)")
+
     # Start scheduler
     if not scheduler.running:
         scheduler.start()
@@ -258,11 +357,16 @@ def shutdown_scheduler():
 # ============================================================================
 
 
-def run_job_now(job_id: str):
-    """Manually trigger a scheduled job.
+def run_job_now(job_id: str) -> str:
+    """Manually trigger a scheduled job, through the same lease as its runs.
 
     Args:
         job_id: Job identifier (e.g., 'load_labeled_data')
+
+    Per-process jobs run in this worker only, without a lease.
+
+    Returns:
+        ``ok``/``failed``, or ``locked`` if a run is already in progress
     """
     job = scheduler.get_job(job_id)
 
@@ -270,21 +374,40 @@ def run_job_now(job_id: str):
         raise ValueError(f"Job {job_id} not found")
 
     logger.info(f"Manually triggering job: {job_id}")
-    job.func()
+    if job.func is run_coordinated:
+        return job.func(*job.args, manual=True)
+    try:
+        job.func(*job.args)
+    except Exception as e:
+        logger.error(f"Job {job_id} failed: {e}", exc_info=True)
+        return job_locks.FAILED
+    return job_locks.OK
 
 
 def list_scheduled_jobs():
-    """List all scheduled jobs with their next run times."""
+    """List all scheduled jobs with their next run, last run and lock holder."""
     jobs = scheduler.get_jobs()
-
-    return [
-        {
-            "id": job.id,
-            "name": job.name,
-            "next_run_time": job.next_run_time.isoformat()
-            if job.next_run_time
-            else None,
-            "trigger": str(job.trigger),
-        }
-        for job in jobs
-    ]
+    coordinator = job_locks.get_coordinator()
+
+    def iso(value):
+        return value.isoformat() if value else None
+
+    listed = []
+    for job in jobs:
+        coordinated = job.func is run_coordinated
+        status = coordinator.status(job.id) if coordinated else {}
+        listed.append(
+            {
+                "id": job.id,
+                "name": job.name,
+                "next_run_time": iso(getattr(job, "next_run_time", None)),
+                "trigger": str(job.trigger),
+                "coordinated": coordinated,
+                "lock_holder": status.get("lock_holder"),
+                "last_status": status.get("last_status"),
+                "last_duration_seconds": status.get("last_duration_seconds"),
+                "last_started_at": iso(status.get("last_started_at")),
+                "last_success_at": iso(status.get("last_success_at")),
+            }
+        )
+    return listed
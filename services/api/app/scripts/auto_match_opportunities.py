@@ -6,14 +6,19 @@ opportunities for users with active resume profiles.
 
 Usage:
     python -m app.scripts.auto_match_opportunities
+
+Progress is checkpointed to AUTO_MATCH_CHECKPOINT (default
+.backfill/auto_match.json); rerunning after a crash resumes the same run.
 """
 
 import asyncio
 import logging
+import os
 import sys
 
 from app.db import SessionLocal
 from app.services.opportunity_auto_match import auto_match_all_opportunities
+from app.utils.backfill import Checkpoint
 
 logging.basicConfig(
     level=logging.INFO,
@@ -28,7 +33,10 @@ async def main():
 
     db = SessionLocal()
     try:
-        total = await auto_match_all_opportunities(db)
+        checkpoint = Checkpoint.load(
+            os.getenv("AUTO_MATCH_CHECKPOINT", ".backfill/auto_match.json")
+        )
+        total = await auto_match_all_opportunities(db, checkpoint=checkpoint)
         logger.info(f"✅ Auto-matched {total} opportunities")
         print(f"✅ Auto-matched {total} opportunities")
         return 0
@@ -0,0 +1,213 @@
+"""
+Materialized result cache for BigQuery-backed endpoints.
+
+Warehouse marts only change when the nightly dbt run lands, so re-running the
+same query on every dashboard load buys nothing. Results are stored in the
+shared AsyncCache (``app.utils.cache``) under a key derived from the
+whitespace-normalized SQL and its parameters, together with ``as_of`` (when
+the query ran) and ``fresh_until``:
+
+- Mart queries stay fresh until the next warehouse refresh boundary
+  (WAREHOUSE_REFRESH_UTC, after the 04:17 UTC dbt run); ``refresh_all``
+  re-runs them right after the boundary.
+- Queries over near-real-time staging tables pass ``max_age`` instead.
+
+Stale results are served immediately (``stale=True``) while a single
+background query per key revalidates them; only a cold key waits for
+BigQuery. Results are retained for RETENTION_SECONDS so an outage degrades
+to stale data rather than errors.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.utils.cache import AsyncCache, cache
+
+logger = logging.getLogger(__name__)
+
+# UTC time of day by which the nightly dbt run has refreshed the marts
+WAREHOUSE_REFRESH_UTC = os.getenv("WAREHOUSE_REFRESH_UTC", "05:00")
+# How long results are kept for stale-while-revalidate
+RETENTION_SECONDS = 2 * 24 * 3600
+# Spread scheduled refreshes of different workers over this many seconds
+REFRESH_JITTER_SECONDS = 60.0
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and drop trailing semicolons."""
+    return _WHITESPACE.sub(" ", sql).strip().rstrip(";").strip()
+
+
+def result_key(sql: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Cache key for a query: hash of normalized SQL plus sorted parameters."""
+    material = (
+        normalize_sql(sql)
+        + "\0"
+        + json.dumps(params or {}, sort_keys=True, default=str)
+    )
+    return "bq:" + hashlib.sha1(material.encode()).hexdigest()
+
+
+def _refresh_time() -> Tuple[int, int]:
+    hour, minute = WAREHOUSE_REFRESH_UTC.split(":")
+    return int(hour), int(minute)
+
+
+def last_refresh_before(ts: float) -> float:
+    """Most recent warehouse refresh boundary at or before ``ts``."""
+    hour, minute = _refresh_time()
+    moment = datetime.fromtimestamp(ts, timezone.utc)
+    boundary = moment.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if boundary > moment:
+        boundary -= timedelta(days=1)
+    return boundary.timestamp()
+
+
+def next_refresh_after(ts: float) -> float:
+    """First warehouse refresh boundary after ``ts``."""
+    return last_refresh_before(ts) + 24 * 3600
+
+
+@dataclass
+class QuerySpec:
+    sql: str
+    params: Optional[Dict[str, Any]]
+    max_age: Optional[float]  # None: fresh until the next refresh boundary
+
+
+@dataclass
+class BQResult:
+    rows: List[Dict[str, Any]]
+    as_of: float  # epoch seconds the query ran
+    stale: bool = False
+
+    @property
+    def as_of_iso(self) -> str:
+        return datetime.fromtimestamp(self.as_of, timezone.utc).isoformat()
+
+
+class BQResultCache:
+    """Stale-while-revalidate cache over a blocking ``run_query(sql, params)``."""
+
+    def __init__(
+        self,
+        run_query: Callable[[str, Optional[Dict[str, Any]]], List[Dict[str, Any]]],
+        store: AsyncCache = cache,
+    ):
+        self.run_query = run_query
+        self.store = store
+        self._queries: Dict[str, QuerySpec] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def fresh_until(self, as_of: float, max_age: Optional[float]) -> float:
+        if max_age is not None:
+            return as_of + max_age
+        return next_refresh_after(as_of)
+
+    async def fetch(
+        self,
+        sql: str,
+        params: Optional[Dict[str, Any]] = None,
+        max_age: Optional[float] = None,
+    ) -> BQResult:
+        """
+        Rows for a query, from cache when possible.
+
+        Args:
+            sql: BigQuery SQL (may reference ``@name`` parameters)
+            params: Query parameters
+            max_age: Seconds a result stays fresh; None aligns freshness
+                with the nightly warehouse refresh
+
+        Returns:
+            BQResult with ``as_of`` and whether the rows are stale
+        """
+        key = result_key(sql, params)
+        spec = QuerySpec(sql, params, max_age)
+        self._queries[key] = spec
+
+        entry = await self.store.get(key)
+        if entry is None:
+            task = self._revalidate(key, spec)
+            return await asyncio.shield(task)
+
+        envelope = entry.value
+        result = BQResult(envelope["rows"], envelope["as_of"])
+        if time.time() < envelope["fresh_until"]:
+            return result
+
+        result.stale = True
+        self._revalidate(key, spec, background=True)
+        return result
+
+    def _revalidate(
+        self, key: str, spec: QuerySpec, background: bool = False
+    ) -> asyncio.Future:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run(key, spec))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t, background))
+        return task
+
+    def _finish(self, key: str, task: asyncio.Future, background: bool) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc is not None and background:
+            logger.warning(f"Background BigQuery refresh failed for {key}: {exc}")
+
+    async def _run(self, key: str, spec: QuerySpec) -> BQResult:
+        as_of = time.time()
+        rows = await asyncio.to_thread(self.run_query, spec.sql, spec.params)
+        envelope = {
+            "rows": rows,
+            "as_of": as_of,
+            "fresh_until": self.fresh_until(as_of, spec.max_age),
+        }
+        await self.store.set(key, envelope, RETENTION_SECONDS, tags=("warehouse",))
+        return BQResult(rows, as_of)
+
+    async def refresh_all(self) -> int:
+        """
+        Re-run every boundary-aligned query this process has served.
+
+        Queries another worker already refreshed since the last boundary are
+        skipped. Returns the number of queries that ran.
+        """
+        boundary = last_refresh_before(time.time())
+        refreshed = 0
+        for key, spec in list(self._queries.items()):
+            if spec.max_age is not None:
+                continue
+            entry = await self.store.get(key)
+            if entry is not None and entry.value["as_of"] >= boundary:
+                continue
+            try:
+                await self._revalidate(key, spec)
+                refreshed += 1
+            except Exception as exc:
+                logger.warning(f"Scheduled BigQuery refresh failed for {key}: {exc}")
+        return refreshed
+
+    async def run_refresh_schedule(self) -> None:
+        """Refresh served queries shortly after every warehouse refresh boundary."""
+        while True:
+            wake_at = next_refresh_after(time.time())
+            delay = wake_at - time.time() + random.uniform(0, REFRESH_JITTER_SECONDS)
+            await asyncio.sleep(max(0.0, delay))
+            refreshed = await self.refresh_all()
+            logger.info(f"Refreshed {refreshed} cached BigQuery results")
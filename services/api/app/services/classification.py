@@ -12,6 +12,9 @@ Usage in Gmail ingest:
     db.commit()
 """
 
+from typing import Any, Sequence
+
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
 from app.classification.email_classifier import (
@@ -20,6 +23,7 @@ from app.classification.email_classifier import (
     HybridEmailClassifier,
 )
 from app.models import Email, EmailClassificationEvent
+from app.services.opportunity_state import classified_opportunity_state
 
 # Global classifier instance (lazy-loaded)
 _classifier: HybridEmailClassifier | None = None
@@ -91,6 +95,58 @@ def classify_and_persist_email(db: Session, email: Email) -> ClassificationResul
     return result
 
 
+def classify_and_persist_batch(
+    db: Session, emails: Sequence[Any]
+) -> list[ClassificationResult]:
+    """
+    Batch version of classify_and_persist_email for backfills.
+
+    ``emails`` may be projected rows (``id``, ``thread_id``, ``subject``,
+    ``body_text``, ``sender``) rather than full Email objects, so callers
+    don't have to load ``raw`` or other wide columns. Classification runs as
+    one vectorized call; updates are issued as a single bulk UPDATE by
+    primary key and events are added together.
+
+    Caller is responsible for commit.
+    """
+    if not emails:
+        return []
+
+    results = get_global_classifier().classify_batch(emails)
+
+    db.execute(
+        update(Email),
+        [
+            {
+                "id": email.id,
+                "category": result.category,
+                "is_real_opportunity": result.is_real_opportunity,
+                "category_confidence": result.confidence,
+                "classifier_version": result.model_version,
+                # Bulk UPDATE skips the ORM listeners that maintain this
+                "opportunity_state": classified_opportunity_state(
+                    result.is_real_opportunity
+                ),
+            }
+            for email, result in zip(emails, results)
+        ],
+    )
+    db.add_all(
+        EmailClassificationEvent(
+            email_id=email.id,
+            thread_id=email.thread_id,
+            model_version=result.model_version,
+            predicted_category=result.category,
+            predicted_is_real_opportunity=result.is_real_opportunity,
+            confidence=result.confidence,
+            source=result.source,
+        )
+        for email, result in zip(emails, results)
+    )
+
+    return results
+
+
 def reload_classifier() -> None:
     """
     Force reload of the global classifier (e.g., after model update).
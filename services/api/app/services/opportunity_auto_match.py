@@ -2,65 +2,206 @@
 Auto-match service for nightly job opportunity matching.
 
 Runs batch role matching for all users with active resume profiles.
+
+Users are matched concurrently by a pool of workers, each with its own
+database session. The pool size is the global budget of in-flight LLM calls
+(role matching is sequential within a worker). Workers take one slice of at
+most AUTO_MATCH_USER_QUOTA opportunities per turn and then send the user to
+the back of the queue, so a user with hundreds of opportunities cannot hold
+up everyone else. A user is done once a slice leaves their count of
+unmatched opportunities unchanged: role matching reports fallback results
+(LLM failures) as processed without saving them, so its own count cannot
+tell progress apart from retrying the same opportunities. At most
+AUTO_MATCH_MAX_SLICES turns are taken per user and run.
+
+Progress is written to a Checkpoint (app.utils.backfill) after every slice.
+A crashed run resumes without the users it already finished. Users that
+were only partly matched pick up where they stopped, because matched
+opportunities are never selected again.
 """
 
+import asyncio
 import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
 from sqlalchemy.orm import Session
 
-from app.models import ResumeProfile
+from app.models import JobOpportunity, OpportunityMatch, ResumeProfile
 from app.agent.orchestrator import MailboxAgentOrchestrator
 from app.config import RequestContext
+from app.core.metrics import (
+    auto_match_opportunities_total,
+    auto_match_queue_depth,
+    auto_match_slice_seconds,
+    auto_match_slices_total,
+)
+from app.db import SessionLocal
 from app.schemas_agent import RoleMatchBatchRequest
+from app.utils.backfill import Checkpoint
 
 logger = logging.getLogger(__name__)
 
+# Concurrent workers, i.e. the global budget of in-flight LLM calls
+AUTO_MATCH_CONCURRENCY = int(os.getenv("AUTO_MATCH_CONCURRENCY", "4"))
+# Opportunities matched for one user before yielding to the next user
+AUTO_MATCH_USER_QUOTA = int(os.getenv("AUTO_MATCH_USER_QUOTA", "20"))
+# Turns one user may take per run, whatever their remaining backlog
+AUTO_MATCH_MAX_SLICES = int(os.getenv("AUTO_MATCH_MAX_SLICES", "25"))
+
+
+def _users_with_active_resumes(db: Session) -> List[str]:
+    rows = (
+        db.query(ResumeProfile.owner_email)
+        .filter(ResumeProfile.is_active == True)  # noqa: E712
+        .distinct()
+        .all()
+    )
+    return sorted(owner_email for (owner_email,) in rows)
+
+
+def _unmatched_count(db: Session, owner_email: str) -> int:
+    """Opportunities without a saved match, as role_match_batch selects them."""
+    matched = (
+        db.query(OpportunityMatch.id)
+        .filter(
+            OpportunityMatch.owner_email == owner_email,
+            OpportunityMatch.opportunity_id == JobOpportunity.id,
+        )
+        .exists()
+    )
+    return (
+        db.query(JobOpportunity.id)
+        .filter(JobOpportunity.owner_email == owner_email, ~matched)
+        .count()
+    )
+
 
-async def auto_match_all_opportunities(db: Session) -> int:
+async def _match_slice(db: Session, owner_email: str, limit: int) -> int:
+    """Match up to ``limit`` unmatched opportunities for one user."""
+    ctx = RequestContext(user_id=owner_email, db_session=db)
+    orchestrator = MailboxAgentOrchestrator(ctx=ctx)
+    resp = await orchestrator.role_match_batch(RoleMatchBatchRequest(limit=limit))
+    return resp.processed
+
+
+async def auto_match_all_opportunities(
+    db: Session,
+    session_factory: Callable[[], Session] = SessionLocal,
+    concurrency: Optional[int] = None,
+    user_quota: Optional[int] = None,
+    checkpoint: Optional[Checkpoint] = None,
+    max_slices: Optional[int] = None,
+) -> int:
     """
     For all users with an active resume profile, match all unmatched opportunities.
 
     Args:
-        db: Synchronous database session
+        db: Synchronous database session (used to list users)
+        session_factory: Creates one session per worker
+        concurrency: Number of workers (default AUTO_MATCH_CONCURRENCY)
+        user_quota: Opportunities per user per turn (default AUTO_MATCH_USER_QUOTA)
+        checkpoint: Progress of this run; an unfinished one is resumed
+        max_slices: Turns per user (default AUTO_MATCH_MAX_SLICES)
 
     Returns:
-        Total number of opportunities processed across all users.
+        Total number of opportunities matched (saved) across all users.
     """
-    total_processed = 0
-
-    # Find all users with active resumes (synchronous query)
-    users_with_resumes = (
-        db.query(ResumeProfile.owner_email)
-        .filter(ResumeProfile.is_active == True)  # noqa: E712
-        .distinct()
-        .all()
-    )
+    concurrency = concurrency or AUTO_MATCH_CONCURRENCY
+    quota = user_quota or AUTO_MATCH_USER_QUOTA
+    max_slices = max_slices or AUTO_MATCH_MAX_SLICES
+    checkpoint = checkpoint or Checkpoint()
+    if checkpoint.done:
+        # Last run finished; this is a new one
+        checkpoint = Checkpoint(path=checkpoint.path)
 
+    finished = set(checkpoint.completed)
+    users = [u for u in _users_with_active_resumes(db) if u not in finished]
     logger.info(
-        f"Auto-match: found {len(users_with_resumes)} users with active resumes"
+        f"Auto-match: found {len(users) + len(finished)} users with active resumes"
+        + (f" ({len(finished)} already done, resuming)" if finished else "")
     )
 
-    for (owner_email,) in users_with_resumes:
+    queue: asyncio.Queue = asyncio.Queue()
+    for owner_email in users:
+        queue.put_nowait(owner_email)
+    auto_match_queue_depth.set(queue.qsize())
+    checkpoint.counters.setdefault("processed", 0)
+    # Per user: unmatched count after their last slice, and slices taken
+    unmatched: Dict[str, int] = {}
+    slices: Dict[str, int] = {}
+
+    def record(owner_email: str, processed: int, done: bool) -> None:
+        checkpoint.counters["processed"] += processed
+        if done:
+            checkpoint.completed.append(owner_email)
+        checkpoint.save()
+
+    async def worker() -> None:
+        session = session_factory()
         try:
-            # Create context for this user
-            ctx = RequestContext(user_id=owner_email, db_session=db)
-            orchestrator = MailboxAgentOrchestrator(ctx=ctx)
-
-            # Run batch match with no limit (process all unmatched)
-            batch_req = RoleMatchBatchRequest(limit=None)
-            resp = await orchestrator.role_match_batch(batch_req)
-
-            total_processed += resp.processed
-            logger.info(
-                f"Auto-match: processed {resp.processed} opportunities for {owner_email}"
-            )
-
-        except Exception as e:
-            logger.error(
-                f"Auto-match failed for user {owner_email}: {e}",
-                exc_info=True,
-            )
-            # Continue with other users
-            continue
+            while True:
+                try:
+                    owner_email = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                auto_match_queue_depth.set(queue.qsize())
+
+                started = time.perf_counter()
+                try:
+                    before = unmatched.get(owner_email)
+                    if before is None:
+                        before = _unmatched_count(session, owner_email)
+                    processed = await _match_slice(session, owner_email, quota)
+                    remaining = _unmatched_count(session, owner_email)
+                except Exception as e:
+                    session.rollback()
+                    auto_match_slices_total.labels(outcome="error").inc()
+                    logger.error(
+                        f"Auto-match failed for user {owner_email}: {e}",
+                        exc_info=True,
+                    )
+                    # Continue with other users
+                    record(owner_email, 0, done=True)
+                    continue
+                finally:
+                    auto_match_slice_seconds.observe(time.perf_counter() - started)
+
+                matched = max(before - remaining, 0)
+                unmatched[owner_email] = remaining
+                slices[owner_email] = slices.get(owner_email, 0) + 1
+                auto_match_slices_total.labels(outcome="ok").inc()
+                auto_match_opportunities_total.inc(matched)
+                logger.info(
+                    f"Auto-match: matched {matched} of {processed} processed "
+                    f"opportunities for {owner_email}, {remaining} left"
+                )
+
+                # Another turn only while slices save matches; unsaved
+                # (fallback) results would select the same opportunities again
+                done = (
+                    remaining == 0 or matched == 0 or slices[owner_email] >= max_slices
+                )
+                if not done:
+                    queue.put_nowait(owner_email)
+                    auto_match_queue_depth.set(queue.qsize())
+                elif remaining and matched:
+                    logger.warning(
+                        f"Auto-match: {owner_email} reached {max_slices} slices "
+                        f"with {remaining} opportunities left"
+                    )
+                record(owner_email, matched, done=done)
+        finally:
+            session.close()
+
+    workers = min(concurrency, len(users))
+    await asyncio.gather(*[worker() for _ in range(workers)])
+
+    auto_match_queue_depth.set(0)
+    checkpoint.done = True
+    checkpoint.save()
 
+    total_processed = checkpoint.counters["processed"]
     logger.info(f"Auto-match: total processed {total_processed} opportunities")
     return total_processed
@@ -0,0 +1,236 @@
+"""
+Opportunity eligibility persisted on ``emails.opportunity_state``.
+
+The opportunities list used to decide per request, in Python, whether each
+Email+Application pair is a real opportunity. The email half of that
+decision only changes when the email itself changes, so it is stored on the
+row when the email is written (see the Email listeners in ``app.models``
+and ``classify_and_persist_batch``):
+
+    classifier  the classifier flagged it as a real opportunity
+    heuristic   unclassified, but it passes the newsletter/job-alert/category
+                heuristics
+    excluded    anything else
+    NULL        not evaluated yet (run scripts/backfill_opportunity_state.py)
+
+The application half (closed / needs-attention statuses) changes
+independently, so listing checks it against the joined application at
+query time via ``application_allows_opportunity`` or its SQL twin in
+``app.routers.opportunities``.
+"""
+
+import re
+from typing import Any, Optional
+
+OPPORTUNITY_CLASSIFIER = "classifier"
+OPPORTUNITY_HEURISTIC = "heuristic"
+OPPORTUNITY_EXCLUDED = "excluded"
+ELIGIBLE_OPPORTUNITY_STATES = (OPPORTUNITY_CLASSIFIER, OPPORTUNITY_HEURISTIC)
+
+
+# ===== Newsletter / digest detection =====
+
+# Newsletter/digest sender domains
+NEWSLETTER_DOMAINS = {
+    "substack.com",
+    "newsletter.substack.com",
+    "medium.com",
+    "mailchimp.com",
+    "sendgrid.net",
+    "hubspotemail.net",
+    "info.linkedin.com",
+    "notifications.linkedin.com",
+}
+
+# Newsletter/digest subject keywords
+NEWSLETTER_SUBJECT_KEYWORDS = [
+    "newsletter",
+    "digest",
+    "roundup",
+    "weekly update",
+    "blog update",
+    "new post",
+    "substack",
+    "jobs you might like",
+    "new jobs for you",
+    "job alerts",
+    "jobs based on your profile",
+    "applied to",
+    "daily roundup",
+    "weekly roundup",
+    "job digest",
+    "recommended for you",
+    "similar jobs",
+]
+
+
+def is_newsletter_or_digest(
+    thread: dict, labels: list = None, category: str = None
+) -> bool:
+    """
+    Filter out newsletters, digests, and marketing emails.
+
+    Returns True if the thread should be excluded from follow-up queue.
+    """
+    subj = (thread.get("subject") or "").lower()
+    from_email = (thread.get("from_email") or "").lower()
+    labels = labels or []
+    category = (category or "").lower()
+
+    # Check sender domain
+    domain = from_email.split("@")[-1] if "@" in from_email else ""
+    if domain in NEWSLETTER_DOMAINS:
+        return True
+
+    # Exclude known newsletter categories
+    if category in {"newsletter_ads", "newsletter", "promo", "promotions"}:
+        return True
+
+    # Exclude Gmail promotional/update categories
+    if "CATEGORY_PROMOTIONS" in labels or "CATEGORY_UPDATES" in labels:
+        return True
+
+    # Exclude newsletter/digest subjects
+    if any(keyword in subj for keyword in NEWSLETTER_SUBJECT_KEYWORDS):
+        return True
+
+    return False
+
+
+# ===== Job board alert detection =====
+
+JOB_BOARD_DOMAINS = {
+    "indeed.com",
+    "ziprecruiter.com",
+    "glassdoor.com",
+    "monster.com",
+    "simplyhired.com",
+    "jobcase.com",
+    "careerbuilder.com",
+    "noreply.linkedin.com",
+    "linkedin.com",
+}
+
+JOB_ALERT_SUBJECT_PATTERNS = [
+    r"new jobs for you",
+    r"jobs you might like",
+    r"job alerts?",
+    r"top jobs",
+    r"daily (job )?digest",
+    r"recommended jobs",
+    r"because you searched",
+    r"job recommendations",
+]
+
+
+def is_job_alert_or_blast(email: Any) -> bool:
+    """
+    Detect job board alerts and mass mailings.
+
+    Returns True if the email is a generic job alert/blast that should be excluded
+    from the opportunities list (not a real recruiter outreach).
+    """
+    subject = (email.subject or "").lower()
+    from_addr = (email.sender or "").lower()
+
+    # Check sender domain against known job boards
+    if any(domain in from_addr for domain in JOB_BOARD_DOMAINS):
+        return True
+
+    # Check subject for job alert patterns
+    for pattern in JOB_ALERT_SUBJECT_PATTERNS:
+        if re.search(pattern, subject, re.IGNORECASE):
+            return True
+
+    # Check body for bulk email markers
+    # Use body_text field from Email model
+    body = (email.body_text or "").lower()
+    # Require both markers to avoid false positives
+    has_unsubscribe = "unsubscribe" in body
+    has_browser_view = (
+        "view this email in your browser" in body or "view in browser" in body
+    )
+    if has_unsubscribe and has_browser_view:
+        return True
+
+    return False
+
+
+# ===== Eligibility =====
+
+NEEDS_ATTENTION_STATUSES = {"applied", "hr_screen", "interview", "onsite", "offer"}
+CLOSED_STATUSES = {"rejected", "withdrawn", "ghosted", "closed"}
+
+# Categories that look like real recruiting leads
+ALLOWED_OPPORTUNITY_CATEGORIES = {
+    "recruiter_outreach",
+    "interview_invite",
+    "phone_screen",
+    "onsite",
+    "offer",
+    "application_update",
+    "applications",  # general application category
+}
+
+
+def classified_opportunity_state(is_real_opportunity: bool) -> str:
+    """State for an email the classifier has just labelled."""
+    return OPPORTUNITY_CLASSIFIER if is_real_opportunity else OPPORTUNITY_EXCLUDED
+
+
+def email_opportunity_state(email: Any) -> str:
+    """
+    Email-level opportunity verdict, independent of any application.
+
+    Prioritizes ``email.is_real_opportunity`` when the classifier has set it
+    and falls back to the legacy heuristics (newsletters, job board alerts,
+    recruiting categories) for unclassified emails.
+    """
+    if email.is_real_opportunity is not None:
+        return classified_opportunity_state(email.is_real_opportunity)
+
+    # Convert Email model to dict format expected by is_newsletter_or_digest
+    thread_dict = {
+        "subject": email.subject,
+        "from_email": email.sender,
+    }
+    if is_newsletter_or_digest(
+        thread_dict, labels=email.labels or [], category=email.category
+    ):
+        return OPPORTUNITY_EXCLUDED
+
+    if is_job_alert_or_blast(email):
+        return OPPORTUNITY_EXCLUDED
+
+    # If there's a category but it's not in allowed list, exclude it
+    category = (email.category or "").lower()
+    if category and category not in ALLOWED_OPPORTUNITY_CATEGORIES:
+        return OPPORTUNITY_EXCLUDED
+
+    return OPPORTUNITY_HEURISTIC
+
+
+def application_allows_opportunity(
+    state: Optional[str], application_status: Optional[str]
+) -> bool:
+    """
+    Combine an email's opportunity state with its linked application.
+
+    ``application_status`` is the status value of the linked application,
+    ``""`` for an application without status, or None when no application
+    is linked. Classifier verdicts only drop closed applications (the
+    classifier doesn't know about them); heuristic matches additionally
+    require a "live" status.
+    """
+    if state not in ELIGIBLE_OPPORTUNITY_STATES:
+        return False
+    if application_status is None:
+        return True
+
+    status = application_status.lower()
+    if status in CLOSED_STATUSES:
+        return False
+    if state == OPPORTUNITY_HEURISTIC and status not in NEEDS_ATTENTION_STATUSES:
+        # Don't treat purely informational states as "opportunities"
+        return False
+    return True
@@ -0,0 +1,708 @@
+"""
+Bucketed (Merkle-style) parity engine between PostgreSQL and Elasticsearch.
+
+Instead of sampling random ids, the engine compares compact per-bucket
+digests computed natively on both sides:
+
+    level 0: (owner_email, day)          -> SQL GROUP BY / ES composite agg
+    level 1+: id sub-ranges of a bucket  -> SQL GROUP BY / ES histogram agg
+    leaf:     individual documents       -> SELECT / ES search
+
+Only buckets whose digests differ are recursed into, so a full-corpus check
+costs O(buckets + drift) instead of O(documents).
+
+A bucket digest is ``(count, sum(id), min(id), max(id), checksum per field)``.
+Each field checksum is ``sum(weight(id) * encode(value))`` using integer
+encodings that Postgres, painless and Python can all compute identically:
+
+    numeric -> floor(value * 1000 + 0.5)
+    date    -> floor(epoch_seconds / 86400)          (day-level, like check_parity)
+    text    -> (len * 131 + sum(code(c_i) * i) for the first 16 chars) % 65521
+
+``weight(id) = id % 9973 + 1`` keeps per-bucket sums below 2**53 so ES
+double-precision ``sum`` aggregations stay exact.
+
+Usage:
+    from app.services.parity import ParityChecker, SqlParitySource, EsParitySource
+
+    checker = ParityChecker(SqlParitySource(db), EsParitySource(es, "gmail_emails"))
+    result = checker.run(owner="me@example.com")
+    result.repair_actions()  # -> bulk indexer work list
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+WEIGHT_MODULUS = 9973
+TEXT_PREFIX_CHARS = 16
+TEXT_MODULUS = 65521
+
+FIELD_NUMERIC = "numeric"
+FIELD_DATE = "date"
+FIELD_TEXT = "text"
+
+# (owner_email or "", "YYYY-MM-DD")
+BucketKey = Tuple[str, str]
+
+
+@dataclass(frozen=True)
+class ParityField:
+    """A field compared between DB and ES.
+
+    ``es_field`` is the doc-values field used in aggregations (e.g. the
+    ``.keyword`` subfield of a dynamically mapped string); ``name`` is both the
+    DB column and the ``_source`` key.
+    """
+
+    name: str
+    kind: str
+    es_field: Optional[str] = None
+
+    @property
+    def agg_field(self) -> str:
+        return self.es_field or self.name
+
+
+DEFAULT_FIELDS: List[ParityField] = [
+    ParityField("risk_score", FIELD_NUMERIC),
+    ParityField("expires_at", FIELD_DATE),
+    ParityField("category", FIELD_TEXT, es_field="category.keyword"),
+]
+
+
+@dataclass(frozen=True)
+class BucketDigest:
+    """Aggregate fingerprint of one bucket on one side."""
+
+    count: int
+    id_sum: int
+    id_min: Optional[int]
+    id_max: Optional[int]
+    checksums: Tuple[int, ...]
+
+    def same_as(self, other: Optional["BucketDigest"]) -> bool:
+        if other is None:
+            return False
+        return (
+            self.count == other.count
+            and self.id_sum == other.id_sum
+            and self.checksums == other.checksums
+        )
+
+
+# ---------------------------------------------------------------------------
+# Reference encodings (mirrored by the SQL and painless expressions below)
+# ---------------------------------------------------------------------------
+
+
+def id_weight(email_id: int) -> int:
+    return email_id % WEIGHT_MODULUS + 1
+
+
+def _to_datetime(value: Any) -> Optional[datetime]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    elif isinstance(value, date):
+        dt = datetime(value.year, value.month, value.day)
+    else:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def encode_value(kind: str, value: Any) -> int:
+    """Integer encoding of a field value used in bucket checksums."""
+    if value is None:
+        return 0
+    if kind == FIELD_NUMERIC:
+        return math.floor(float(value) * 1000 + 0.5)
+    if kind == FIELD_DATE:
+        return math.floor(_to_datetime(value).timestamp() / 86400)
+    s = str(value)
+    h = len(s) * 131
+    for i, ch in enumerate(s[:TEXT_PREFIX_CHARS]):
+        h += ord(ch) * (i + 1)
+    return h % TEXT_MODULUS
+
+
+def normalize_value(kind: str, value: Any) -> Any:
+    """Value used for exact leaf comparison (same tolerance as the digests)."""
+    if value is None:
+        return None
+    if kind == FIELD_TEXT:
+        return str(value).strip()
+    return encode_value(kind, value)
+
+
+def digest_docs(
+    docs: Iterable[Dict[str, Any]], fields: List[ParityField]
+) -> BucketDigest:
+    """Compute a digest in Python (reference implementation, used by tests)."""
+    count = id_sum = 0
+    id_min: Optional[int] = None
+    id_max: Optional[int] = None
+    sums = [0] * len(fields)
+    for doc in docs:
+        doc_id = int(doc["id"])
+        count += 1
+        id_sum += doc_id
+        id_min = doc_id if id_min is None else min(id_min, doc_id)
+        id_max = doc_id if id_max is None else max(id_max, doc_id)
+        w = id_weight(doc_id)
+        for i, f in enumerate(fields):
+            sums[i] += w * encode_value(f.kind, doc.get(f.name))
+    return BucketDigest(count, id_sum, id_min, id_max, tuple(sums))
+
+
+def day_bounds(day: str) -> Tuple[datetime, datetime]:
+    start = datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+# ---------------------------------------------------------------------------
+# Sources
+# ---------------------------------------------------------------------------
+
+
+class ParitySource(Protocol):
+    """One side of the comparison (database or search index)."""
+
+    def day_buckets(
+        self,
+        fields: List[ParityField],
+        owner: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Dict[BucketKey, BucketDigest]: ...
+
+    def id_buckets(
+        self,
+        key: BucketKey,
+        fields: List[ParityField],
+        id_lo: int,
+        id_hi: int,
+        interval: int,
+    ) -> Dict[int, BucketDigest]: ...
+
+    def leaf_docs(
+        self, key: BucketKey, fields: List[ParityField], id_lo: int, id_hi: int
+    ) -> Dict[int, Dict[str, Any]]: ...
+
+
+def _sql_encode(f: ParityField) -> str:
+    col = f.name
+    if f.kind == FIELD_NUMERIC:
+        return f"COALESCE(FLOOR({col} * 1000 + 0.5)::bigint, 0)"
+    if f.kind == FIELD_DATE:
+        return f"COALESCE(FLOOR(EXTRACT(EPOCH FROM {col}) / 86400)::bigint, 0)"
+    chars = " + ".join(
+        f"ASCII(SUBSTR({col}, {i + 1}, 1)) * {i + 1}" for i in range(TEXT_PREFIX_CHARS)
+    )
+    return f"COALESCE(MOD(LENGTH({col}) * 131 + {chars}, {TEXT_MODULUS}), 0)"
+
+
+def _sql_digest_columns(fields: List[ParityField]) -> str:
+    weight = f"(MOD(id, {WEIGHT_MODULUS}) + 1)"
+    cols = [
+        "COUNT(*) AS n",
+        "SUM(id) AS id_sum",
+        "MIN(id) AS id_min",
+        "MAX(id) AS id_max",
+    ]
+    for i, f in enumerate(fields):
+        cols.append(f"SUM({weight} * {_sql_encode(f)}) AS c{i}")
+    return ", ".join(cols)
+
+
+def _row_digest(row: Any, n_fields: int) -> BucketDigest:
+    m = row._mapping
+    return BucketDigest(
+        count=int(m["n"]),
+        id_sum=int(m["id_sum"] or 0),
+        id_min=m["id_min"],
+        id_max=m["id_max"],
+        checksums=tuple(int(m[f"c{i}"] or 0) for i in range(n_fields)),
+    )
+
+
+class SqlParitySource:
+    """PostgreSQL side: digests are computed with GROUP BY aggregation."""
+
+    def __init__(self, db: Session, table: str = "emails"):
+        self.db = db
+        self.table = table
+
+    def day_buckets(self, fields, owner=None, since=None, until=None):
+        where = ["received_at IS NOT NULL"]
+        params: Dict[str, Any] = {}
+        if owner:
+            where.append("owner_email = :owner")
+            params["owner"] = owner
+        if since:
+            where.append("received_at >= :since")
+            params["since"] = since
+        if until:
+            where.append("received_at < :until")
+            params["until"] = until
+
+        sql = f"""
+            SELECT COALESCE(owner_email, '') AS owner,
+                   TO_CHAR(DATE_TRUNC('day', received_at AT TIME ZONE 'UTC'),
+                           'YYYY-MM-DD') AS day,
+                   {_sql_digest_columns(fields)}
+            FROM {self.table}
+            WHERE {" AND ".join(where)}
+            GROUP BY 1, 2
+        """
+        return {
+            (row.owner, row.day): _row_digest(row, len(fields))
+            for row in self.db.execute(text(sql), params)
+        }
+
+    def _bucket_filter(self, key: BucketKey) -> Tuple[str, Dict[str, Any]]:
+        owner, day = key
+        start, end = day_bounds(day)
+        return (
+            "COALESCE(owner_email, '') = :owner "
+            "AND received_at >= :start AND received_at < :end "
+            "AND id BETWEEN :id_lo AND :id_hi",
+            {"owner": owner, "start": start, "end": end},
+        )
+
+    def id_buckets(self, key, fields, id_lo, id_hi, interval):
+        where, params = self._bucket_filter(key)
+        params.update(id_lo=id_lo, id_hi=id_hi, interval=interval)
+        sql = f"""
+            SELECT (id - :id_lo) / :interval AS sub, {_sql_digest_columns(fields)}
+            FROM {self.table}
+            WHERE {where}
+            GROUP BY 1
+        """
+        return {
+            int(row.sub): _row_digest(row, len(fields))
+            for row in self.db.execute(text(sql), params)
+        }
+
+    def leaf_docs(self, key, fields, id_lo, id_hi):
+        where, params = self._bucket_filter(key)
+        params.update(id_lo=id_lo, id_hi=id_hi)
+        cols = ", ".join(f.name for f in fields)
+        sql = f"SELECT id, gmail_id, {cols} FROM {self.table} WHERE {where}"
+        docs = {}
+        for row in self.db.execute(text(sql), params):
+            m = row._mapping
+            doc = {"doc_id": m["gmail_id"]}
+            for f in fields:
+                doc[f.name] = normalize_value(f.kind, m[f.name])
+            docs[int(m["id"])] = doc
+        return docs
+
+
+_PAINLESS_WEIGHT = (
+    f"if (doc['id'].size() == 0) {{ return 0; }} "
+    f"long w = doc['id'].value % {WEIGHT_MODULUS} + 1; "
+    "if (doc[params.f].size() == 0) { return 0; } "
+)
+
+_PAINLESS_ENCODE = {
+    FIELD_NUMERIC: "return w * (long) Math.floor(doc[params.f].value * 1000 + 0.5);",
+    FIELD_DATE: (
+        "return w * Math.floorDiv("
+        "doc[params.f].value.toInstant().getEpochSecond(), 86400L);"
+    ),
+    FIELD_TEXT: (
+        "String s = doc[params.f].value; long h = s.length() * 131L; "
+        f"for (int i = 0; i < s.length() && i < {TEXT_PREFIX_CHARS}; i++) "
+        "{ h += (long) s.charAt(i) * (i + 1); } "
+        f"return w * (h % {TEXT_MODULUS});"
+    ),
+}
+
+
+class EsParitySource:
+    """Elasticsearch side: digests are computed with composite/histogram aggs."""
+
+    def __init__(self, es: Any, index: str, page_size: int = 1000):
+        self.es = es
+        self.index = index
+        self.page_size = page_size
+
+    @staticmethod
+    def _digest_aggs(fields: List[ParityField]) -> Dict[str, Any]:
+        aggs: Dict[str, Any] = {
+            "id_sum": {"sum": {"field": "id"}},
+            "id_min": {"min": {"field": "id"}},
+            "id_max": {"max": {"field": "id"}},
+        }
+        for i, f in enumerate(fields):
+            aggs[f"c{i}"] = {
+                "sum": {
+                    "script": {
+                        "source": _PAINLESS_WEIGHT + _PAINLESS_ENCODE[f.kind],
+                        "params": {"f": f.agg_field},
+                    }
+                }
+            }
+        return aggs
+
+    @staticmethod
+    def _bucket_digest(bucket: Dict[str, Any], n_fields: int) -> BucketDigest:
+        def _int(name: str) -> Optional[int]:
+            value = bucket[name]["value"]
+            return None if value is None else int(round(value))
+
+        return BucketDigest(
+            count=int(bucket["doc_count"]),
+            id_sum=_int("id_sum") or 0,
+            id_min=_int("id_min"),
+            id_max=_int("id_max"),
+            checksums=tuple(_int(f"c{i}") or 0 for i in range(n_fields)),
+        )
+
+    def day_buckets(self, fields, owner=None, since=None, until=None):
+        filters: List[Dict[str, Any]] = [{"exists": {"field": "received_at"}}]
+        if owner:
+            filters.append({"term": {"owner_email.keyword": owner}})
+        if since or until:
+            rng: Dict[str, Any] = {}
+            if since:
+                rng["gte"] = since.isoformat()
+            if until:
+                rng["lt"] = until.isoformat()
+            filters.append({"range": {"received_at": rng}})
+
+        composite: Dict[str, Any] = {
+            "size": self.page_size,
+            "sources": [
+                {
+                    "owner": {
+                        "terms": {
+                            "field": "owner_email.keyword",
+                            "missing_bucket": True,
+                        }
+                    }
+                },
+                {
+                    "day": {
+                        "date_histogram": {
+                            "field": "received_at",
+                            "calendar_interval": "day",
+                            "time_zone": "UTC",
+                            "format": "yyyy-MM-dd",
+                        }
+                    }
+                },
+            ],
+        }
+        digests: Dict[BucketKey, BucketDigest] = {}
+        while True:
+            resp = self.es.search(
+                index=self.index,
+                size=0,
+                query={"bool": {"filter": filters}},
+                aggs={
+                    "buckets": {
+                        "composite": composite,
+                        "aggs": self._digest_aggs(fields),
+                    }
+                },
+            )
+            agg = resp["aggregations"]["buckets"]
+            for b in agg["buckets"]:
+                key = (b["key"]["owner"] or "", b["key"]["day"])
+                digests[key] = self._bucket_digest(b, len(fields))
+            after = agg.get("after_key")
+            if not after or len(agg["buckets"]) < self.page_size:
+                return digests
+            composite["after"] = after
+
+    @staticmethod
+    def _bucket_query(key: BucketKey, id_lo: int, id_hi: int) -> Dict[str, Any]:
+        owner, day = key
+        start, end = day_bounds(day)
+        owner_clause: Dict[str, Any] = (
+            {"term": {"owner_email.keyword": owner}}
+            if owner
+            else {"bool": {"must_not": {"exists": {"field": "owner_email"}}}}
+        )
+        return {
+            "bool": {
+                "filter": [
+                    owner_clause,
+                    {
+                        "range": {
+                            "received_at": {
+                                "gte": start.isoformat(),
+                                "lt": end.isoformat(),
+                            }
+                        }
+                    },
+                    {"range": {"id": {"gte": id_lo, "lte": id_hi}}},
+                ]
+            }
+        }
+
+    def id_buckets(self, key, fields, id_lo, id_hi, interval):
+        resp = self.es.search(
+            index=self.index,
+            size=0,
+            query=self._bucket_query(key, id_lo, id_hi),
+            aggs={
+                "sub": {
+                    "histogram": {
+                        "field": "id",
+                        "interval": interval,
+                        "offset": id_lo % interval,
+                        "min_doc_count": 1,
+                    },
+                    "aggs": self._digest_aggs(fields),
+                }
+            },
+        )
+        out = {}
+        for b in resp["aggregations"]["sub"]["buckets"]:
+            sub = (int(b["key"]) - id_lo) // interval
+            out[sub] = self._bucket_digest(b, len(fields))
+        return out
+
+    def leaf_docs(self, key, fields, id_lo, id_hi):
+        resp = self.es.search(
+            index=self.index,
+            size=min(id_hi - id_lo + 1, 10000),
+            query=self._bucket_query(key, id_lo, id_hi),
+            source=["id"] + [f.name for f in fields],
+        )
+        docs = {}
+        for hit in resp["hits"]["hits"]:
+            src = hit.get("_source") or {}
+            if src.get("id") is None:
+                continue
+            doc = {"doc_id": hit["_id"]}
+            for f in fields:
+                doc[f.name] = normalize_value(f.kind, src.get(f.name))
+            docs[int(src["id"])] = doc
+        return docs
+
+
+# ---------------------------------------------------------------------------
+# Engine
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class ParityResult:
+    """Outcome of a bucketed parity run."""
+
+    buckets_total: int = 0
+    buckets_mismatched: int = 0
+    subbuckets_compared: int = 0
+    leaf_docs_compared: int = 0
+    missing_in_es: List[Dict[str, Any]] = field(default_factory=list)
+    missing_in_db: List[Dict[str, Any]] = field(default_factory=list)
+    field_mismatches: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def drift_count(self) -> int:
+        return (
+            len(self.missing_in_es)
+            + len(self.missing_in_db)
+            + len(self.field_mismatches)
+        )
+
+    def repair_actions(self) -> List[Dict[str, Any]]:
+        """Exact work list for the bulk indexer.
+
+        ``index`` entries are re-read from the DB and re-indexed; ``delete``
+        entries are orphan ES documents with no DB row.
+        """
+        actions = [
+            {"op": "index", "id": m["id"], "doc_id": m["doc_id"]}
+            for m in self.missing_in_es + self.field_mismatches
+        ]
+        actions.extend(
+            {"op": "delete", "id": m["id"], "doc_id": m["doc_id"]}
+            for m in self.missing_in_db
+        )
+        return actions
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "buckets_total": self.buckets_total,
+            "buckets_mismatched": self.buckets_mismatched,
+            "subbuckets_compared": self.subbuckets_compared,
+            "leaf_docs_compared": self.leaf_docs_compared,
+            "missing_in_es": len(self.missing_in_es),
+            "missing_in_db": len(self.missing_in_db),
+            "field_mismatch": len(self.field_mismatches),
+            "total_mismatches": self.drift_count,
+        }
+
+
+class ParityChecker:
+    """Compare two parity sources, recursing only into mismatching buckets."""
+
+    def __init__(
+        self,
+        db_source: ParitySource,
+        es_source: ParitySource,
+        fields: Optional[List[ParityField]] = None,
+        fanout: int = 16,
+        leaf_size: int = 256,
+    ):
+        if fanout < 2:
+            raise ValueError("fanout must be >= 2")
+        self.db_source = db_source
+        self.es_source = es_source
+        self.fields = list(fields or DEFAULT_FIELDS)
+        self.fanout = fanout
+        self.leaf_size = leaf_size
+
+    def run(
+        self,
+        owner: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> ParityResult:
+        result = ParityResult()
+        db_buckets = self.db_source.day_buckets(self.fields, owner, since, until)
+        es_buckets = self.es_source.day_buckets(self.fields, owner, since, until)
+
+        keys = sorted(set(db_buckets) | set(es_buckets))
+        result.buckets_total = len(keys)
+        for key in keys:
+            db_digest, es_digest = db_buckets.get(key), es_buckets.get(key)
+            if db_digest is not None and db_digest.same_as(es_digest):
+                continue
+            result.buckets_mismatched += 1
+            lo, hi = self._id_range(db_digest, es_digest)
+            if lo is None:
+                continue
+            self._descend(key, lo, hi, db_digest, es_digest, result)
+        self._reconcile_moved(result)
+        return result
+
+    @staticmethod
+    def _reconcile_moved(result: ParityResult) -> None:
+        """A doc whose received_at drifted shows up as missing on both sides
+        (in different day buckets); report it once as a field mismatch."""
+        in_db = {m["id"]: m for m in result.missing_in_es}
+        moved = [m for m in result.missing_in_db if m["id"] in in_db]
+        if not moved:
+            return
+        moved_ids = {m["id"] for m in moved}
+        result.missing_in_es = [
+            m for m in result.missing_in_es if m["id"] not in moved_ids
+        ]
+        result.missing_in_db = [
+            m for m in result.missing_in_db if m["id"] not in moved_ids
+        ]
+        for m in moved:
+            db_side = in_db[m["id"]]
+            result.field_mismatches.append(
+                {
+                    "id": m["id"],
+                    "doc_id": db_side["doc_id"],
+                    "bucket": db_side["bucket"],
+                    "fields": {
+                        "received_at": {"db": db_side["bucket"], "es": m["bucket"]}
+                    },
+                }
+            )
+
+    @staticmethod
+    def _id_range(
+        *digests: Optional[BucketDigest],
+    ) -> Tuple[Optional[int], Optional[int]]:
+        lows = [d.id_min for d in digests if d and d.id_min is not None]
+        highs = [d.id_max for d in digests if d and d.id_max is not None]
+        if not lows:
+            return None, None
+        return min(lows), max(highs)
+
+    def _descend(
+        self,
+        key: BucketKey,
+        id_lo: int,
+        id_hi: int,
+        db_digest: Optional[BucketDigest],
+        es_digest: Optional[BucketDigest],
+        result: ParityResult,
+    ) -> None:
+        size = max(d.count for d in (db_digest, es_digest) if d is not None)
+        if size <= self.leaf_size or id_lo == id_hi:
+            self._compare_leaf(key, id_lo, id_hi, result)
+            return
+
+        interval = max(1, math.ceil((id_hi - id_lo + 1) / self.fanout))
+        db_subs = self.db_source.id_buckets(key, self.fields, id_lo, id_hi, interval)
+        es_subs = self.es_source.id_buckets(key, self.fields, id_lo, id_hi, interval)
+        for sub in sorted(set(db_subs) | set(es_subs)):
+            result.subbuckets_compared += 1
+            db_sub, es_sub = db_subs.get(sub), es_subs.get(sub)
+            if db_sub is not None and db_sub.same_as(es_sub):
+                continue
+            lo, hi = self._id_range(db_sub, es_sub)
+            self._descend(key, lo, hi, db_sub, es_sub, result)
+
+    def _compare_leaf(
+        self, key: BucketKey, id_lo: int, id_hi: int, result: ParityResult
+    ) -> None:
+        db_docs = self.db_source.leaf_docs(key, self.fields, id_lo, id_hi)
+        es_docs = self.es_source.leaf_docs(key, self.fields, id_lo, id_hi)
+        for doc_id in sorted(set(db_docs) | set(es_docs)):
+            result.leaf_docs_compared += 1
+            db_doc, es_doc = db_docs.get(doc_id), es_docs.get(doc_id)
+            if es_doc is None:
+                result.missing_in_es.append(
+                    {"id": doc_id, "doc_id": db_doc["doc_id"], "bucket": list(key)}
+                )
+            elif db_doc is None:
+                result.missing_in_db.append(
+                    {"id": doc_id, "doc_id": es_doc["doc_id"], "bucket": list(key)}
+                )
+            else:
+                diff = {
+                    f.name: {"db": db_doc[f.name], "es": es_doc[f.name]}
+                    for f in self.fields
+                    if db_doc[f.name] != es_doc[f.name]
+                }
+                if diff:
+                    result.field_mismatches.append(
+                        {
+                            "id": doc_id,
+                            "doc_id": db_doc["doc_id"],
+                            "bucket": list(key),
+                            "fields": diff,
+                        }
+                    )
+
+
+def parse_fields(spec: str) -> List[ParityField]:
+    """Parse ``name[:kind[:es_field]]`` entries.
+
+    Example: ``risk_score,category:text:category.keyword``
+    """
+    known = {f.name: f for f in DEFAULT_FIELDS}
+    fields = []
+    for raw in spec.split(","):
+        parts = [p.strip() for p in raw.split(":") if p.strip()]
+        if not parts:
+            continue
+        if len(parts) == 1 and parts[0] in known:
+            fields.append(known[parts[0]])
+            continue
+        kind = parts[1] if len(parts) > 1 else FIELD_TEXT
+        if kind not in (FIELD_NUMERIC, FIELD_DATE, FIELD_TEXT):
+            raise ValueError(f"Unknown parity field kind: {kind}")
+        fields.append(ParityField(parts[0], kind, parts[2] if len(parts) > 2 else None))
+    return fields
@@ -0,0 +1,338 @@
+"""
+Reusable chunked backfill runner.
+
+Backfills stream rows in keyset order, process them one chunk at a time and
+commit per chunk, persisting a checkpoint after every commit so a crashed or
+interrupted run resumes where it stopped instead of starting over.
+
+Usage:
+    from app.utils.backfill import Checkpoint, SqlKeysetJob, run_backfill_job
+
+    class MyJob(SqlKeysetJob):
+        name = "my_backfill"
+        columns = (Email.id, Email.received_at, Email.subject)
+
+        def filters(self):
+            return [Email.category.is_(None)]
+
+        def process_chunk(self, db, rows):
+            ...
+            return {"updated": len(rows)}
+
+    counters = run_backfill_job(
+        MyJob(), db, checkpoint=Checkpoint.load(".backfill/my_backfill.json")
+    )
+
+    # Fan out across processes by id range (one checkpoint per partition)
+    counters = run_backfill_parallel(MyJob(), workers=4, checkpoint_dir=".backfill")
+
+Jobs that aren't backed by a SQL table (e.g. Elasticsearch ``search_after``
+scans) subclass BackfillJob directly and implement ``fetch_chunk``/``key_of``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, func, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.query_stats import track_queries
+
+logger = logging.getLogger(__name__)
+
+IdRange = Tuple[int, int]
+
+
+@dataclass
+class Checkpoint:
+    """Resume position and running counters, persisted as a small JSON file.
+
+    A checkpoint without a path is kept in memory only (no resume).
+    """
+
+    path: Optional[str] = None
+    last_key: Optional[List[Any]] = None
+    counters: Dict[str, int] = field(default_factory=dict)
+    done: bool = False
+    # Unordered work units already finished (e.g. per-user jobs)
+    completed: List[str] = field(default_factory=list)
+
+    @classmethod
+    def load(cls, path: Optional[str]) -> "Checkpoint":
+        if not path or not os.path.exists(path):
+            return cls(path=path)
+        with open(path) as f:
+            data = json.load(f)
+        return cls(
+            path=path,
+            last_key=data.get("last_key"),
+            counters=data.get("counters", {}),
+            done=data.get("done", False),
+            completed=data.get("completed", []),
+        )
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(
+                {
+                    "last_key": self.last_key,
+                    "counters": self.counters,
+                    "done": self.done,
+                    "completed": self.completed,
+                    "updated_at": datetime.utcnow().isoformat(),
+                },
+                f,
+            )
+        # Atomic on POSIX: a crash never leaves a half-written checkpoint
+        os.replace(tmp, self.path)
+
+
+class BackfillJob(ABC):
+    """A backfill expressed as fetch/process steps over an ordered key."""
+
+    name = "backfill"
+    chunk_size = 500
+
+    @abstractmethod
+    def fetch_chunk(
+        self,
+        db: Session,
+        after: Optional[List[Any]],
+        limit: int,
+        id_range: Optional[IdRange] = None,
+    ) -> Sequence[Any]:
+        """Return up to ``limit`` rows strictly after ``after`` in key order."""
+
+    @abstractmethod
+    def key_of(self, row: Any) -> List[Any]:
+        """JSON-serializable resume key for a row."""
+
+    @abstractmethod
+    def process_chunk(self, db: Session, rows: Sequence[Any]) -> Dict[str, int]:
+        """Process one chunk and return counters to accumulate."""
+
+    def id_bounds(self, db: Session) -> Optional[IdRange]:
+        """Min/max id of the rows to process (needed for parallel runs)."""
+        return None
+
+
+class SqlKeysetJob(BackfillJob):
+    """
+    Keyset-paginated SQL job ordered by ``(received_at, id)``.
+
+    Only ``columns`` are selected, so wide columns like ``raw`` are never
+    loaded unless a job asks for them. Rows with NULL ``received_at`` are
+    visited after the dated rows, ordered by id.
+    """
+
+    columns: Tuple[Any, ...] = ()
+    order_column: Any = None
+    id_column: Any = None
+
+    def filters(self) -> List[Any]:
+        return []
+
+    def _order_column(self) -> Any:
+        return (
+            self.order_column
+            if self.order_column is not None
+            else self.columns[0].class_.received_at
+        )
+
+    def _id_column(self) -> Any:
+        return (
+            self.id_column if self.id_column is not None else self.columns[0].class_.id
+        )
+
+    def fetch_chunk(self, db, after, limit, id_range=None):
+        order_col, id_col = self._order_column(), self._id_column()
+        conditions = list(self.filters())
+        if id_range is not None:
+            conditions.append(id_col.between(*id_range))
+
+        # Phase 0: dated rows by (received_at, id); phase 1: undated rows by id
+        phase = after[0] if after else 0
+        if phase == 0:
+            dated = conditions + [order_col.isnot(None)]
+            if after:
+                last_at = datetime.fromisoformat(after[1])
+                dated.append(tuple_(order_col, id_col) > tuple_(last_at, after[2]))
+            stmt = (
+                select(*self.columns)
+                .where(and_(*dated))
+                .order_by(order_col, id_col)
+                .limit(limit)
+            )
+            rows = db.execute(stmt).all()
+            if rows:
+                return rows
+            after = None
+
+        undated = conditions + [order_col.is_(None)]
+        if after:
+            undated.append(id_col > after[2])
+        stmt = select(*self.columns).where(and_(*undated)).order_by(id_col).limit(limit)
+        return db.execute(stmt).all()
+
+    def key_of(self, row):
+        received_at = row._mapping[self._order_column().key]
+        row_id = row._mapping[self._id_column().key]
+        if received_at is None:
+            return [1, None, row_id]
+        return [0, received_at.isoformat(), row_id]
+
+    def id_bounds(self, db):
+        id_col = self._id_column()
+        stmt = select(func.min(id_col), func.max(id_col))
+        if self.filters():
+            stmt = stmt.where(and_(*self.filters()))
+        lo, hi = db.execute(stmt).one()
+        if lo is None:
+            return None
+        return int(lo), int(hi)
+
+
+def run_backfill_job(
+    job: BackfillJob,
+    db: Session,
+    *,
+    limit: Optional[int] = None,
+    dry_run: bool = False,
+    checkpoint: Optional[Checkpoint] = None,
+    id_range: Optional[IdRange] = None,
+) -> Dict[str, int]:
+    """
+    Stream ``job`` chunk by chunk, committing (or rolling back in dry-run)
+    after each chunk and saving the checkpoint after each commit.
+
+    Returns accumulated counters; ``total`` is the number of rows fetched.
+    """
+    checkpoint = checkpoint or Checkpoint()
+    if checkpoint.done:
+        logger.info(f"[{job.name}] checkpoint marked done, nothing to do")
+        return dict(checkpoint.counters)
+
+    counters: Counter = Counter(checkpoint.counters)
+    processed = 0
+
+    while limit is None or processed < limit:
+        size = (
+            job.chunk_size if limit is None else min(job.chunk_size, limit - processed)
+        )
+        # One accounting context per chunk: per-row queries are flagged as N+1
+        with track_queries(f"backfill:{job.name}"):
+            rows = job.fetch_chunk(db, checkpoint.last_key, size, id_range)
+            if not rows:
+                checkpoint.done = True
+                break
+            counters.update(job.process_chunk(db, rows))
+        counters["total"] += len(rows)
+        processed += len(rows)
+
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+
+        checkpoint.last_key = job.key_of(rows[-1])
+        checkpoint.counters = dict(counters)
+        if not dry_run:
+            checkpoint.save()
+
+        logger.info(f"[{job.name}] processed {counters['total']} rows")
+
+    checkpoint.counters = dict(counters)
+    if not dry_run:
+        checkpoint.save()
+    return dict(counters)
+
+
+def split_id_range(bounds: IdRange, parts: int) -> List[IdRange]:
+    """Split an inclusive id range into ``parts`` contiguous ranges."""
+    lo, hi = bounds
+    parts = max(1, min(parts, hi - lo + 1))
+    step = (hi - lo + 1 + parts - 1) // parts
+    return [(start, min(start + step - 1, hi)) for start in range(lo, hi + 1, step)]
+
+
+def _partition_checkpoint(checkpoint_dir: Optional[str], name: str, idx: int):
+    if not checkpoint_dir:
+        return None
+    return os.path.join(checkpoint_dir, f"{name}.part{idx}.json")
+
+
+def _run_partition(
+    job: BackfillJob,
+    id_range: IdRange,
+    checkpoint_path: Optional[str],
+    dry_run: bool,
+) -> Dict[str, int]:
+    """Process-pool entry point: each worker opens its own session."""
+    from app.db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return run_backfill_job(
+            job,
+            db,
+            dry_run=dry_run,
+            checkpoint=Checkpoint.load(checkpoint_path),
+            id_range=id_range,
+        )
+    finally:
+        db.close()
+
+
+def run_backfill_parallel(
+    job: BackfillJob,
+    workers: int,
+    *,
+    dry_run: bool = False,
+    checkpoint_dir: Optional[str] = None,
+) -> Dict[str, int]:
+    """
+    Fan ``job`` out across a process pool by contiguous id ranges.
+
+    Each partition keeps its own checkpoint file, so a resumed run only redoes
+    the unfinished tail of each range. ``job`` must be picklable (defined at
+    module level).
+    """
+    from app.db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        bounds = job.id_bounds(db)
+    finally:
+        db.close()
+    if bounds is None:
+        return {"total": 0}
+
+    ranges = split_id_range(bounds, workers)
+    totals: Counter = Counter()
+    with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+        futures = [
+            pool.submit(
+                _run_partition,
+                job,
+                id_range,
+                _partition_checkpoint(checkpoint_dir, job.name, idx),
+                dry_run,
+            )
+            for idx, id_range in enumerate(ranges)
+        ]
+        for future in futures:
+            totals.update(future.result())
+    return dict(totals)
@@ -1,13 +1,37 @@
 """
-Lightweight Redis cache utility for API responses.
+Redis cache utilities for API responses.
 
-Provides simple key-value caching with TTL support. Falls back gracefully
-if Redis is not available (returns None for gets, no-ops for sets).
+Two layers share the REDIS_URL configuration:
+
+- cache_get / cache_set / cache_delete: small synchronous helpers for sync
+  endpoints. Fall back gracefully if Redis is not available (returns None
+  for gets, no-ops for sets).
+- AsyncCache (module instance ``cache``): for async code. An in-process
+  LRU/TTL tier sits in front of async Redis; concurrent misses for a key
+  share one computation (single-flight); values are refreshed in the
+  background shortly before they expire, with probability rising as expiry
+  nears (XFetch), so hot keys never stampede; entries can be invalidated by
+  tag; hits, misses and latency are exported as Prometheus metrics.
 """
 
+import asyncio
+import inspect
 import json
+import logging
+import math
 import os
-from typing import Optional
+import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple, Union
+
+from app.core.metrics import (
+    cache_early_refresh_total,
+    cache_latency_seconds,
+    cache_requests_total,
+)
 
 try:
     import redis
@@ -17,6 +41,13 @@ except ImportError:
     REDIS_AVAILABLE = False
     redis = None  # type: ignore
 
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
 _redis: Optional["redis.Redis"] = None  # type: ignore
 
 
@@ -104,38 +135,306 @@ def cache_delete(key: str) -> None:
         pass
 
 
-async def cache_json(key: str, ttl: int, fn):
+# ===== Async two-tier cache =====
+
+# Max entries kept in the in-process tier (least recently used are evicted)
+LOCAL_MAX_ENTRIES = int(os.getenv("CACHE_LOCAL_MAX_ENTRIES", "2048"))
+# With Redis configured, in-process copies are kept at most this long so
+# invalidations from other workers show up quickly
+LOCAL_MAX_TTL_SECONDS = float(os.getenv("CACHE_LOCAL_MAX_TTL_SECONDS", "10"))
+# XFetch beta: >1 refreshes earlier, <1 later, 0 disables early refresh
+EARLY_REFRESH_BETA = float(os.getenv("CACHE_EARLY_REFRESH_BETA", "1.0"))
+# Tag sets outlive the entries they point to; stale members are harmless
+TAG_TTL_SECONDS = 24 * 3600
+
+_UNSET = object()
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    expires_at: float  # epoch seconds
+    delta: float = 0.0  # seconds the value took to compute
+    tags: Tuple[str, ...] = ()
+
+
+def _namespace(key: str) -> str:
+    return key.split(":", 1)[0]
+
+
+def _tag_key(tag: str) -> str:
+    return f"cache:tag:{tag}"
+
+
+class AsyncCache:
+    """Two-tier async cache-aside with single-flight and early refresh.
+
+    Values are shared between callers and must be treated as read-only.
+    Redis errors are logged and counted, then treated as misses.
+    """
+
+    def __init__(
+        self,
+        redis_client: Any = _UNSET,
+        max_entries: int = LOCAL_MAX_ENTRIES,
+        local_max_ttl: float = LOCAL_MAX_TTL_SECONDS,
+        beta: float = EARLY_REFRESH_BETA,
+    ):
+        """
+        Args:
+            redis_client: redis.asyncio client, or None for in-process only
+                (default: built lazily from REDIS_URL)
+            max_entries: Size of the in-process LRU tier
+            local_max_ttl: Cap on in-process TTL when Redis is configured
+            beta: XFetch early-refresh aggressiveness
+        """
+        self._redis = redis_client
+        self.max_entries = max_entries
+        self.local_max_ttl = local_max_ttl
+        self.beta = beta
+        self._local: "OrderedDict[str, Tuple[CacheEntry, float]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _client(self):
+        if self._redis is _UNSET:
+            url = os.getenv("REDIS_URL")
+            self._redis = None
+            if url and aioredis is not None:
+                try:
+                    self._redis = aioredis.from_url(url, decode_responses=True)
+                except Exception as exc:
+                    logger.warning(f"Async cache running without Redis: {exc}")
+        return self._redis
+
+    # --- in-process tier ---
+
+    def _local_get(self, key: str, now: float) -> Optional[CacheEntry]:
+        item = self._local.get(key)
+        if item is None:
+            return None
+        entry, local_expires_at = item
+        if local_expires_at <= now:
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return entry
+
+    def _local_put(self, key: str, entry: CacheEntry, now: float) -> None:
+        expires_at = entry.expires_at
+        if self._client() is not None:
+            expires_at = min(expires_at, now + self.local_max_ttl)
+        self._local[key] = (entry, expires_at)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    def clear_local(self) -> None:
+        """Drop every in-process entry (Redis is untouched)."""
+        self._local.clear()
+
+    # --- redis tier ---
+
+    async def _redis_get(self, key: str) -> Optional[CacheEntry]:
+        client = self._client()
+        if client is None:
+            return None
+
+        ns = _namespace(key)
+        try:
+            with cache_latency_seconds.labels(namespace=ns, op="get").time():
+                raw = await client.get(key)
+        except Exception as exc:
+            cache_requests_total.labels(
+                namespace=ns, tier="redis", result="error"
+            ).inc()
+            logger.warning(f"Cache GET failed for {key}: {exc}")
+            return None
+
+        try:
+            data = json.loads(raw) if raw is not None else None
+            entry = CacheEntry(
+                data["v"], float(data["exp"]), data.get("d", 0.0), tuple(data["tags"])
+            )
+        except (TypeError, ValueError, KeyError):
+            entry = None
+
+        result = "hit" if entry is not None else "miss"
+        cache_requests_total.labels(namespace=ns, tier="redis", result=result).inc()
+        return entry
+
+    async def _redis_set(self, key: str, entry: CacheEntry, ttl: float) -> None:
+        client = self._client()
+        if client is None:
+            return
+
+        ns = _namespace(key)
+        try:
+            payload = json.dumps(
+                {
+                    "v": entry.value,
+                    "exp": entry.expires_at,
+                    "d": entry.delta,
+                    "tags": list(entry.tags),
+                }
+            )
+            with cache_latency_seconds.labels(namespace=ns, op="set").time():
+                async with client.pipeline(transaction=False) as pipe:
+                    pipe.set(key, payload, ex=max(1, math.ceil(ttl)))
+                    for tag in entry.tags:
+                        pipe.sadd(_tag_key(tag), key)
+                        pipe.expire(_tag_key(tag), TAG_TTL_SECONDS)
+                    await pipe.execute()
+        except Exception as exc:
+            cache_requests_total.labels(
+                namespace=ns, tier="redis", result="error"
+            ).inc()
+            logger.warning(f"Cache SET failed for {key}: {exc}")
+
+    # --- public API ---
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        """Look a key up in the in-process tier, then Redis."""
+        now = time.time()
+        ns = _namespace(key)
+        entry = self._local_get(key, now)
+        if entry is not None:
+            cache_requests_total.labels(namespace=ns, tier="local", result="hit").inc()
+            return entry
+        cache_requests_total.labels(namespace=ns, tier="local", result="miss").inc()
+
+        entry = await self._redis_get(key)
+        if entry is None or entry.expires_at <= now:
+            return None
+        self._local_put(key, entry, now)
+        return entry
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: float,
+        tags: Iterable[str] = (),
+        delta: float = 0.0,
+    ) -> CacheEntry:
+        """Store a value in both tiers for ``ttl`` seconds."""
+        now = time.time()
+        entry = CacheEntry(value, now + ttl, delta, tuple(tags))
+        self._local_put(key, entry, now)
+        await self._redis_set(key, entry, ttl)
+        return entry
+
+    async def delete(self, key: str) -> None:
+        """Remove one key from both tiers."""
+        self._local.pop(key, None)
+        client = self._client()
+        if client is None:
+            return
+        try:
+            await client.delete(key)
+        except Exception as exc:
+            logger.warning(f"Cache DELETE failed for {key}: {exc}")
+
+    async def invalidate_tags(self, *tags: str) -> None:
+        """Remove every entry stored with any of ``tags`` from both tiers."""
+        wanted = set(tags)
+        for key in [k for k, (e, _) in self._local.items() if wanted & set(e.tags)]:
+            del self._local[key]
+
+        client = self._client()
+        if client is None:
+            return
+        for tag in tags:
+            try:
+                keys = await client.smembers(_tag_key(tag))
+                await client.delete(_tag_key(tag), *keys)
+            except Exception as exc:
+                logger.warning(f"Cache tag invalidation failed for {tag}: {exc}")
+
+    async def get_or_set(
+        self,
+        key: str,
+        ttl: float,
+        fn: Callable[[], Union[Any, Awaitable[Any]]],
+        tags: Iterable[str] = (),
+    ) -> Any:
+        """
+        Cache-aside: return the cached value for ``key`` or compute it.
+
+        ``fn`` may be sync or async; blocking work should be wrapped with
+        ``asyncio.to_thread`` by the caller. Exceptions from ``fn`` propagate
+        and nothing is cached.
+        """
+        entry = await self.get(key)
+        if entry is None:
+            task = self._single_flight(key, ttl, fn, tags, background=False)
+            # Shield so one cancelled caller doesn't cancel the shared computation
+            return await asyncio.shield(task)
+
+        if self._should_refresh_early(entry) and key not in self._inflight:
+            cache_early_refresh_total.labels(namespace=_namespace(key)).inc()
+            self._single_flight(key, ttl, fn, tags, background=True)
+        return entry.value
+
+    def _should_refresh_early(self, entry: CacheEntry) -> bool:
+        # XFetch: now - delta * beta * ln(rand) >= expiry, rand in (0, 1]
+        jitter = -entry.delta * self.beta * math.log(1.0 - random.random())
+        return time.time() + jitter >= entry.expires_at
+
+    def _single_flight(self, key, ttl, fn, tags, background: bool) -> asyncio.Future:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._compute(key, ttl, fn, tags))
+            self._inflight[key] = task
+            task.add_done_callback(partial(self._finish, key, background))
+        return task
+
+    def _finish(self, key: str, background: bool, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc is not None and background:
+            logger.warning(f"Background cache refresh failed for {key}: {exc}")
+
+    async def _compute(self, key, ttl, fn, tags) -> Any:
+        ns = _namespace(key)
+        start = time.perf_counter()
+        with cache_latency_seconds.labels(namespace=ns, op="compute").time():
+            value = fn()
+            if inspect.isawaitable(value):
+                value = await value
+        await self.set(key, value, ttl, tags, delta=time.perf_counter() - start)
+        return value
+
+
+# Shared instance for application code
+cache = AsyncCache()
+
+
+async def cache_json(key: str, ttl: int, fn, tags: Iterable[str] = ()):
     """
     Cache-aside pattern for async functions returning JSON-serializable data.
-    
-    Checks cache first, calls fn() if miss, stores result with TTL.
-    Falls back to calling fn() directly if Redis unavailable.
-    
+
+    Thin wrapper over ``cache.get_or_set`` kept for existing callers.
+
     Args:
         key: Cache key
         ttl: Time-to-live in seconds
-        fn: Async callable that returns JSON-serializable data
-        
+        fn: Callable (sync or async) returning JSON-serializable data
+        tags: Invalidation tags for the entry
+
     Returns:
         Result from cache or fn()
-        
+
     Example:
         ```python
         async def expensive_query():
             return await db.query(...)
-            
+
         result = await cache_json("mykey", 60, expensive_query)
         ```
     """
-    # Try cache first
-    cached = cache_get(key)
-    if cached is not None:
-        return cached
-    
-    # Cache miss - call function
-    result = await fn() if callable(fn) else fn
-    
-    # Store in cache
-    cache_set(key, result if isinstance(result, dict) else {"data": result}, ttl)
-    
-    return result
+    if not callable(fn):
+        return fn
+    return await cache.get_or_set(key, ttl, fn, tags=tags)
@@ -23,6 +23,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.db import SessionLocal
 from app.autofill_aggregator import aggregate_autofill_profiles
+from app.core.query_stats import track_queries
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -56,7 +57,9 @@ def main():
     db = SessionLocal()
 
     try:
-        profiles_updated = aggregate_autofill_profiles(db, days=args.days)
+        with track_queries("aggregate_autofill_events") as stats:
+            profiles_updated = aggregate_autofill_profiles(db, days=args.days)
+        logger.info(stats.summary())
 
         if args.dry_run:
             db.rollback()
@@ -12,10 +12,15 @@ Usage (from services/api/):
     # Backfill for specific user
     python -m scripts.backfill_email_classification --user-id leo@applylens.app --limit 500
 
+    # Resumable run, 4 worker processes split by id range
+    python -m scripts.backfill_email_classification --workers 4 --checkpoint .backfill/
+
 This script:
     - Finds emails with is_real_opportunity IS NULL (unclassified)
-    - Processes oldest first (by received_at) for gradual historical coverage
-    - Uses the production classifier (classify_and_persist_email)
+    - Streams oldest first by keyset pagination on (received_at, id),
+      selecting only the columns the classifier needs
+    - Classifies each chunk in one vectorized call (classify_and_persist_batch)
+      and commits per chunk, saving a checkpoint for resume
     - Tracks counters: total processed, updated, skipped, errors
     - Supports dry-run mode (no database commit)
 """
@@ -24,110 +29,120 @@ from __future__ import annotations
 
 import argparse
 import logging
-from typing import Optional
+from typing import Any, Dict, Optional, Sequence
 
-from sqlalchemy import asc
 from sqlalchemy.orm import Session
 
 from app.db import SessionLocal
 from app.models import Email
-from app.services.classification import classify_and_persist_email
+from app.services.classification import classify_and_persist_batch
+from app.utils.backfill import (
+    Checkpoint,
+    SqlKeysetJob,
+    run_backfill_job,
+    run_backfill_parallel,
+)
 
 logger = logging.getLogger(__name__)
 
+COUNTER_KEYS = ("total", "classified_ok", "skipped", "errors")
+
+
+class ClassificationBackfill(SqlKeysetJob):
+    """Classify unclassified emails, oldest first, in vectorized chunks."""
+
+    name = "email_classification"
+    # Only the columns the classifier reads; never loads raw/body html/etc.
+    columns = (
+        Email.id,
+        Email.thread_id,
+        Email.subject,
+        Email.body_text,
+        Email.sender,
+        Email.received_at,
+    )
+
+    def __init__(self, user_id: Optional[str] = None, chunk_size: int = 500):
+        self.user_id = user_id
+        self.chunk_size = chunk_size
+
+    def filters(self):
+        conditions = [Email.is_real_opportunity.is_(None)]
+        if self.user_id:
+            conditions.append(Email.owner_email == self.user_id)
+        return conditions
+
+    def process_chunk(self, db: Session, rows: Sequence[Any]) -> Dict[str, int]:
+        try:
+            results = classify_and_persist_batch(db, rows)
+            self._log_first(rows, results)
+            return {"classified_ok": len(rows)}
+        except Exception as e:
+            logger.warning(f"Batch of {len(rows)} failed ({e}); retrying per email")
+            db.rollback()
+
+        # Isolate failures so one bad email doesn't lose the whole chunk
+        counters = {"classified_ok": 0, "errors": 0}
+        for row in rows:
+            try:
+                with db.begin_nested():
+                    classify_and_persist_batch(db, [row])
+                counters["classified_ok"] += 1
+            except Exception as e:
+                logger.error(f"Error classifying email {row.id}: {e}", exc_info=True)
+                counters["errors"] += 1
+        return counters
+
+    def _log_first(self, rows: Sequence[Any], results: Sequence[Any]) -> None:
+        # Log details for the first few emails of each chunk
+        for row, result in list(zip(rows, results))[:3]:
+            logger.info(
+                f"Email {row.id}: {result.category}, "
+                f"is_opp={result.is_real_opportunity}, "
+                f"conf={result.confidence:.3f}, "
+                f"source={result.source}"
+            )
+
 
 def run_backfill(
     db: Session,
     limit: int,
     dry_run: bool,
     user_id: Optional[str] = None,
+    chunk_size: int = 500,
+    checkpoint_path: Optional[str] = None,
 ) -> dict[str, int]:
     """
     Run classification backfill for unclassified emails.
 
+    Rows are streamed by keyset pagination on (received_at, id) and committed
+    per chunk; with ``checkpoint_path`` a rerun resumes after the last
+    committed chunk.
+
     Args:
         db: Database session
         limit: Maximum number of emails to process
-        dry_run: If True, don't commit changes
+        dry_run: If True, roll back every chunk instead of committing
         user_id: Optional user email to filter by (only backfill that user's emails)
+        chunk_size: Emails classified and committed per chunk
+        checkpoint_path: Optional JSON checkpoint file for resume
 
     Returns:
         Dict with counters: total, classified_ok, skipped, errors
     """
-    counters = {
-        "total": 0,
-        "classified_ok": 0,
-        "skipped": 0,
-        "errors": 0,
-    }
-
-    # Build query for unclassified emails
-    q = db.query(Email).filter(Email.is_real_opportunity.is_(None))
-
-    # Optional user filter
-    if user_id:
-        q = q.filter(Email.owner_email == user_id)
-
-    # Process oldest first for gradual historical coverage
-    q = q.order_by(asc(Email.received_at)).limit(limit)
-
-    emails = q.all()
-
-    if not emails:
-        logger.info("No unclassified emails found to backfill")
-        return counters
-
-    logger.info(
-        f"Found {len(emails)} unclassified emails to process "
-        f"(limit={limit}, user_id={user_id or 'all'})"
+    job = ClassificationBackfill(user_id=user_id, chunk_size=chunk_size)
+    counters = run_backfill_job(
+        job,
+        db,
+        limit=limit,
+        dry_run=dry_run,
+        checkpoint=Checkpoint.load(checkpoint_path),
     )
 
-    for email in emails:
-        counters["total"] += 1
-
-        try:
-            # Skip if email has no id (should never happen in practice)
-            if email.id is None:
-                logger.warning(f"Email has no ID, skipping: {email}")
-                counters["skipped"] += 1
-                continue
-
-            # Classify and persist
-            result = classify_and_persist_email(db, email)
-
-            counters["classified_ok"] += 1
-
-            # Log every 100 emails
-            if counters["classified_ok"] % 100 == 0:
-                logger.info(
-                    f"Progress: {counters['classified_ok']}/{len(emails)} emails classified"
-                )
-
-            # Log details for first few emails
-            if counters["total"] <= 5:
-                logger.info(
-                    f"Email {email.id}: {result.category}, "
-                    f"is_opp={result.is_real_opportunity}, "
-                    f"conf={result.confidence:.3f}, "
-                    f"source={result.source}"
-                )
-
-        except Exception as e:
-            logger.error(
-                f"Error classifying email {email.id}: {e}",
-                exc_info=True,
-            )
-            counters["errors"] += 1
-
-    # Commit or rollback based on dry_run flag
-    if dry_run:
-        logger.info("DRY RUN: Rolling back changes (no database commit)")
-        db.rollback()
-    else:
-        logger.info("Committing classification updates to database")
-        db.commit()
+    if not counters.get("total"):
+        logger.info("No unclassified emails found to backfill")
 
-    return counters
+    return {key: counters.get(key, 0) for key in COUNTER_KEYS}
 
 
 def main() -> None:
@@ -152,6 +167,24 @@ def main() -> None:
         default=None,
         help="Only backfill emails for specific user (email address)",
     )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=500,
+        help="Emails classified and committed per chunk (default: 500)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        default=None,
+        help="Checkpoint file (or directory with --workers) to resume from",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Process-pool workers, each owning an id range (ignores --limit)",
+    )
     args = parser.parse_args()
 
     # Configure logging
@@ -166,16 +199,28 @@ def main() -> None:
     logger.info(f"Limit: {args.limit}")
     logger.info(f"Dry run: {args.dry_run}")
     logger.info(f"User filter: {args.user_id or 'none (all users)'}")
+    logger.info(f"Chunk size: {args.chunk_size}, workers: {args.workers}")
     logger.info("=" * 60)
 
     db = SessionLocal()
     try:
-        counters = run_backfill(
-            db=db,
-            limit=args.limit,
-            dry_run=args.dry_run,
-            user_id=args.user_id,
-        )
+        if args.workers > 1:
+            counters = run_backfill_parallel(
+                ClassificationBackfill(args.user_id, args.chunk_size),
+                workers=args.workers,
+                dry_run=args.dry_run,
+                checkpoint_dir=args.checkpoint,
+            )
+            counters = {key: counters.get(key, 0) for key in COUNTER_KEYS}
+        else:
+            counters = run_backfill(
+                db=db,
+                limit=args.limit,
+                dry_run=args.dry_run,
+                user_id=args.user_id,
+                chunk_size=args.chunk_size,
+                checkpoint_path=args.checkpoint,
+            )
 
         # Print summary
         logger.info("=" * 60)
@@ -0,0 +1,133 @@
+"""
+Backfill emails.opportunity_state for emails written before it existed.
+
+Usage (from services/api/):
+
+    # Dry run - count what would be updated
+    python -m scripts.backfill_opportunity_state --dry-run
+
+    # Resumable run
+    python -m scripts.backfill_opportunity_state --checkpoint .backfill/opp.json
+
+This script:
+    - Finds emails with opportunity_state IS NULL (the migration already
+      seeded every classified email)
+    - Streams them by keyset pagination on (received_at, id), selecting only
+      the columns the eligibility heuristics read
+    - Writes each chunk with one bulk UPDATE and commits per chunk
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+from collections import Counter
+from typing import Any, Dict, Optional, Sequence
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+from app.models import Email
+from app.services.opportunity_state import email_opportunity_state
+from app.utils.backfill import Checkpoint, SqlKeysetJob, run_backfill_job
+
+logger = logging.getLogger(__name__)
+
+
+class OpportunityStateBackfill(SqlKeysetJob):
+    """Derive opportunity_state for emails that don't have one yet."""
+
+    name = "opportunity_state"
+    columns = (
+        Email.id,
+        Email.received_at,
+        Email.subject,
+        Email.sender,
+        Email.body_text,
+        Email.labels,
+        Email.category,
+        Email.is_real_opportunity,
+    )
+
+    def __init__(self, user_id: Optional[str] = None, chunk_size: int = 1000):
+        self.user_id = user_id
+        self.chunk_size = chunk_size
+
+    def filters(self):
+        conditions = [Email.opportunity_state.is_(None)]
+        if self.user_id:
+            conditions.append(Email.owner_email == self.user_id)
+        return conditions
+
+    def process_chunk(self, db: Session, rows: Sequence[Any]) -> Dict[str, int]:
+        states = [email_opportunity_state(row) for row in rows]
+        db.execute(
+            update(Email),
+            [
+                {"id": row.id, "opportunity_state": state}
+                for row, state in zip(rows, states)
+            ],
+        )
+        return dict(Counter(states))
+
+
+def main() -> None:
+    """CLI entry point for backfill script."""
+    parser = argparse.ArgumentParser(
+        description="Backfill emails.opportunity_state for historical emails."
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=None,
+        help="Maximum number of emails to process (default: all)",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Preview mode - don't commit changes to database",
+    )
+    parser.add_argument(
+        "--user-id",
+        type=str,
+        default=None,
+        help="Only backfill emails for specific user (email address)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=1000,
+        help="Emails updated and committed per chunk (default: 1000)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        default=None,
+        help="Checkpoint file to resume from",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    db = SessionLocal()
+    try:
+        counters = run_backfill_job(
+            OpportunityStateBackfill(args.user_id, args.chunk_size),
+            db,
+            limit=args.limit,
+            dry_run=args.dry_run,
+            checkpoint=Checkpoint.load(args.checkpoint),
+        )
+        logger.info(f"Opportunity state backfill: {counters}")
+        if args.dry_run:
+            logger.info("DRY RUN: No changes committed")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
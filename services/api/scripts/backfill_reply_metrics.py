@@ -8,17 +8,24 @@ Requires:
 
 Usage:
   python -m services.api.scripts.backfill_reply_metrics
+  python -m services.api.scripts.backfill_reply_metrics --checkpoint reply.json
 """
 
+import argparse
 import os
 import sys
 from collections import defaultdict
-from sqlalchemy import create_engine, text
+from sqlalchemy import bindparam, create_engine, text
+from sqlalchemy.orm import sessionmaker
 from elasticsearch import Elasticsearch
 
 # Import the metrics computation module
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from app.ingest.gmail_metrics import compute_thread_reply_metrics
+from app.ingest.gmail_metrics import (
+    compute_thread_reply_metrics,
+    time_to_response_script,
+)
+from app.utils.backfill import BackfillJob, Checkpoint, run_backfill_job
 
 DB_URL = os.getenv("DATABASE_URL")
 ES_URL = os.getenv("ES_URL", "http://localhost:9200")
@@ -27,8 +34,122 @@ USER_EMAIL = (
     os.getenv("GMAIL_PRIMARY_ADDRESS") or os.getenv("DEFAULT_USER_EMAIL") or ""
 ).lower()
 
+ES_SCRIPT = time_to_response_script(
+    """
+  ctx._source.first_user_reply_at = params.first;
+  ctx._source.last_user_reply_at  = params.last;
+  ctx._source.user_reply_count    = params.cnt;
+  ctx._source.replied             = (params.cnt != null && params.cnt > 0);
+"""
+)
+
+
+class ReplyMetricsBackfill(BackfillJob):
+    """Threads in thread_id order; each chunk loads raw only for its threads."""
+
+    name = "reply_metrics"
+
+    def __init__(self, es, user_email: str, chunk_size: int = 200):
+        self.es = es
+        self.user_email = user_email
+        self.chunk_size = chunk_size
+
+    def fetch_chunk(self, db, after, limit, id_range=None):
+        after_clause = "AND thread_id > :after" if after else ""
+        return db.execute(
+            text(f"""
+                SELECT DISTINCT thread_id FROM emails
+                WHERE raw IS NOT NULL AND thread_id IS NOT NULL {after_clause}
+                ORDER BY thread_id
+                LIMIT :limit
+                """),
+            {"after": after[0] if after else None, "limit": limit},
+        ).all()
+
+    def key_of(self, row):
+        return [row.thread_id]
+
+    def process_chunk(self, db, rows):
+        thread_ids = [r.thread_id for r in rows]
+        by_thread = defaultdict(list)
+        ids_by_thread = defaultdict(list)
+        res = db.execute(
+            text(
+                "SELECT id, thread_id, raw FROM emails "
+                "WHERE raw IS NOT NULL AND thread_id IN :tids"
+            ).bindparams(bindparam("tids", expanding=True)),
+            {"tids": thread_ids},
+        )
+        for r in res:
+            by_thread[r.thread_id].append(r.raw)
+            ids_by_thread[r.thread_id].append(r.id)
+
+        updates = []
+        thread_metrics = {}
+        for thread_id, msgs in by_thread.items():
+            metrics = compute_thread_reply_metrics(msgs, self.user_email)
+            thread_metrics[thread_id] = metrics
+            # Update all rows within thread (denormalized)
+            for email_id in ids_by_thread[thread_id]:
+                updates.append(
+                    {
+                        "id": email_id,
+                        "first": metrics["first_user_reply_at"],
+                        "last": metrics["last_user_reply_at"],
+                        "cnt": metrics["user_reply_count"],
+                    }
+                )
+
+        if updates:
+            # executemany: one round trip per chunk instead of per row
+            db.execute(
+                text("""
+                    UPDATE emails
+                    SET first_user_reply_at = :first,
+                        last_user_reply_at  = :last,
+                        user_reply_count    = :cnt
+                    WHERE id=:id
+                    """),
+                updates,
+            )
+
+        es_updated = 0
+        for thread_id, metrics in thread_metrics.items():
+            try:
+                result = self.es.update_by_query(
+                    index=ES_ALIAS,
+                    body={
+                        "script": {
+                            "source": ES_SCRIPT,
+                            "params": {
+                                "first": metrics["first_user_reply_at"],
+                                "last": metrics["last_user_reply_at"],
+                                "cnt": metrics["user_reply_count"],
+                            },
+                        },
+                        "query": {"term": {"thread_id": thread_id}},
+                    },
+                    refresh=False,
+                )
+                es_updated += result.get("updated", 0)
+            except Exception as e:
+                print(f"   Warning: Failed to update thread {thread_id}: {e}")
+
+        return {
+            "threads": len(thread_metrics),
+            "db_updated": len(updates),
+            "es_updated": es_updated,
+        }
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Backfill reply metrics")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Threads per chunk")
+    parser.add_argument(
+        "--checkpoint", type=str, default=None, help="Checkpoint file for resume"
+    )
+    args = parser.parse_args()
+
     if not DB_URL:
         raise SystemExit("DATABASE_URL not set")
     if not USER_EMAIL:
@@ -41,123 +162,27 @@ def main():
     eng = create_engine(DB_URL)
     es = Elasticsearch(ES_URL)
 
-    # Pull minimal fields needed: id, thread_id, gmail_id, raw
-    print("\n1. Loading emails from database...")
-    rows = []
-    with eng.connect() as c:
-        res = c.execute(
-            text(
-                "SELECT id, thread_id, gmail_id, raw FROM emails WHERE raw IS NOT NULL"
-            )
+    # Threads are processed chunk by chunk; only raw for the current chunk
+    # is held in memory and each chunk is committed with a checkpoint
+    print("\nProcessing threads in chunks...")
+    db = sessionmaker(bind=eng)()
+    try:
+        counters = run_backfill_job(
+            ReplyMetricsBackfill(es, USER_EMAIL, chunk_size=args.chunk_size),
+            db,
+            checkpoint=Checkpoint.load(args.checkpoint),
         )
-        for r in res:
-            rows.append(
-                {
-                    "id": r.id,
-                    "thread_id": r.thread_id,
-                    "gmail_id": r.gmail_id,
-                    "raw": r.raw,
-                }
-            )
-
-    print(f"   Loaded {len(rows)} emails")
-
-    # Group by thread
-    print("\n2. Grouping by thread...")
-    by_thread = defaultdict(list)
-    row_by_thread = defaultdict(list)
-    for r in rows:
-        by_thread[r["thread_id"]].append(r["raw"])
-        row_by_thread[r["thread_id"]].append(r)
-
-    print(f"   Found {len(by_thread)} unique threads")
-
-    # Compute metrics per thread
-    print("\n3. Computing reply metrics per thread...")
-    updates = []
-    thread_metrics = {}
-    for thread_id, msgs in by_thread.items():
-        metrics = compute_thread_reply_metrics(msgs, USER_EMAIL)
-        thread_metrics[thread_id] = metrics
-
-        # Update all rows within thread (denormalized)
-        for r in row_by_thread[thread_id]:
-            updates.append(
-                {
-                    "id": r["id"],
-                    "first": metrics["first_user_reply_at"],
-                    "last": metrics["last_user_reply_at"],
-                    "cnt": metrics["user_reply_count"],
-                }
-            )
-
-    print(f"   Computed metrics for {len(thread_metrics)} threads")
-    print(f"   Will update {len(updates)} email records")
-
-    # DB apply
-    print("\n4. Updating database...")
-    with eng.begin() as c:
-        for i, u in enumerate(updates):
-            c.execute(
-                text(
-                    """
-                    UPDATE emails
-                    SET first_user_reply_at = :first,
-                        last_user_reply_at  = :last,
-                        user_reply_count    = :cnt
-                    WHERE id=:id
-                    """
-                ),
-                u,
-            )
-            if (i + 1) % 100 == 0:
-                print(f"   Updated {i + 1}/{len(updates)} records...")
-
-    print("   ✓ Database updated")
-
-    # ES apply (update by query per thread)
-    print("\n5. Updating Elasticsearch...")
-    es_updated = 0
-    for i, (thread_id, metrics) in enumerate(thread_metrics.items()):
-        try:
-            result = es.update_by_query(
-                index=ES_ALIAS,
-                body={
-                    "script": {
-                        "source": """
-                          ctx._source.first_user_reply_at = params.first;
-                          ctx._source.last_user_reply_at  = params.last;
-                          ctx._source.user_reply_count    = params.cnt;
-                          ctx._source.replied             = (params.cnt != null && params.cnt > 0);
-                        """,
-                        "params": {
-                            "first": metrics["first_user_reply_at"],
-                            "last": metrics["last_user_reply_at"],
-                            "cnt": metrics["user_reply_count"],
-                        },
-                    },
-                    "query": {"term": {"thread_id": thread_id}},
-                },
-                refresh=False,
-            )
-            es_updated += result.get("updated", 0)
-
-            if (i + 1) % 100 == 0:
-                print(f"   Processed {i + 1}/{len(thread_metrics)} threads...")
-        except Exception as e:
-            print(f"   Warning: Failed to update thread {thread_id}: {e}")
-            continue
+    finally:
+        db.close()
 
     # Final refresh
     es.indices.refresh(index=ES_ALIAS)
-    print(f"   ✓ Elasticsearch updated ({es_updated} documents)")
 
     print("\n✅ Backfill complete!")
     print("\nSummary:")
-    print(f"  - {len(rows)} emails processed")
-    print(f"  - {len(thread_metrics)} threads analyzed")
-    print(f"  - {len(updates)} database records updated")
-    print(f"  - {es_updated} Elasticsearch documents updated")
+    print(f"  - {counters.get('threads', 0)} threads analyzed")
+    print(f"  - {counters.get('db_updated', 0)} database records updated")
+    print(f"  - {counters.get('es_updated', 0)} Elasticsearch documents updated")
 
 
 if __name__ == "__main__":
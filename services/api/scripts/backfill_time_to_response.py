@@ -0,0 +1,150 @@
+"""
+Backfill ``time_to_response_hours`` on existing email docs.
+
+The ttr_asc / ttr_desc search sorts read this field; new mail gets it at
+ingest. This one-shot pass adds the mapping and fills the field for replied
+docs with ``update_by_query``, one ``received_at`` window at a time
+(sliced across shards). The checkpoint is saved after every window, so an
+interrupted run resumes at the next one.
+
+Requires:
+  - ES_URL (defaults http://localhost:9200)
+  - ES_ALIAS (defaults gmail_emails)
+
+Usage:
+  python -m services.api.scripts.backfill_time_to_response
+  python -m services.api.scripts.backfill_time_to_response \\
+      --checkpoint .backfill/ttr.json --window-days 14
+"""
+
+import argparse
+import os
+import sys
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from elasticsearch import Elasticsearch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.ingest.gmail_metrics import time_to_response_script
+from app.utils.backfill import Checkpoint
+
+ES_URL = os.getenv("ES_URL", "http://localhost:9200")
+ES_ALIAS = os.getenv("ES_ALIAS", "gmail_emails")
+
+ES_SCRIPT = time_to_response_script()
+
+
+def _from_millis(ms: float) -> datetime:
+    return datetime.fromtimestamp(ms / 1000.0, tz=timezone.utc)
+
+
+def _bounds(es, index):
+    res = es.search(
+        index=index,
+        size=0,
+        aggs={
+            "first": {"min": {"field": "received_at"}},
+            "last": {"max": {"field": "received_at"}},
+        },
+    )
+    lo = res["aggregations"]["first"]["value"]
+    hi = res["aggregations"]["last"]["value"]
+    if lo is None:
+        return None
+    return _from_millis(lo), _from_millis(hi)
+
+
+def backfill_time_to_response(
+    es, index: str, checkpoint: Checkpoint, window_days: int = 30
+) -> dict:
+    if checkpoint.done:
+        print("Checkpoint marked done, nothing to do")
+        return dict(checkpoint.counters)
+
+    # Adding a new field to an existing mapping is allowed in place
+    es.indices.put_mapping(
+        index=index, properties={"time_to_response_hours": {"type": "float"}}
+    )
+
+    bounds = _bounds(es, index)
+    counters = Counter(checkpoint.counters)
+    if bounds is None:
+        checkpoint.done = True
+        checkpoint.save()
+        return dict(counters)
+
+    start = (
+        datetime.fromisoformat(checkpoint.last_key[0])
+        if checkpoint.last_key
+        else bounds[0]
+    )
+    step = timedelta(days=window_days)
+    while start <= bounds[1]:
+        end = start + step
+        result = es.update_by_query(
+            index=index,
+            query={
+                "bool": {
+                    "filter": [
+                        {
+                            "range": {
+                                "received_at": {
+                                    "gte": start.isoformat(),
+                                    "lt": end.isoformat(),
+                                }
+                            }
+                        },
+                        {"exists": {"field": "first_user_reply_at"}},
+                    ]
+                }
+            },
+            script={"lang": "painless", "source": ES_SCRIPT},
+            slices="auto",
+            conflicts="proceed",
+            refresh=False,
+            wait_for_completion=True,
+        )
+        counters["updated"] += result.get("updated", 0)
+        counters["version_conflicts"] += result.get("version_conflicts", 0)
+        counters["windows"] += 1
+
+        checkpoint.last_key = [end.isoformat()]
+        checkpoint.counters = dict(counters)
+        checkpoint.save()
+        print(f"  {start.date()} .. {end.date()}: {result.get('updated', 0)} updated")
+        start = end
+
+    checkpoint.done = True
+    checkpoint.save()
+    es.indices.refresh(index=index)
+    return dict(counters)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill time_to_response_hours")
+    parser.add_argument(
+        "--window-days", type=int, default=30, help="received_at days per pass"
+    )
+    parser.add_argument(
+        "--checkpoint", type=str, default=None, help="Checkpoint file for resume"
+    )
+    args = parser.parse_args()
+
+    print(f"Elasticsearch: {ES_URL}/{ES_ALIAS}")
+    counters = backfill_time_to_response(
+        Elasticsearch(ES_URL),
+        ES_ALIAS,
+        Checkpoint.load(args.checkpoint),
+        window_days=args.window_days,
+    )
+
+    print("\n✅ Backfill complete!")
+    print(f"  - {counters.get('windows', 0)} windows processed")
+    print(f"  - {counters.get('updated', 0)} Elasticsearch documents updated")
+    if counters.get("version_conflicts"):
+        print(f"  - {counters['version_conflicts']} skipped on version conflicts")
+
+
+if __name__ == "__main__":
+    main()
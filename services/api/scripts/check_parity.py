@@ -15,6 +15,10 @@ Usage:
     # Allow up to 5 mismatches before failing
     python scripts/check_parity.py --fields risk_score --sample 1000 --allow 5
 
+    # Full-corpus bucketed parity (per owner/day digests, recursing only into
+    # drifted buckets) with a repair list for the bulk indexer
+    python scripts/check_parity.py --mode buckets --repair-out repair.jsonl
+
 Environment Variables:
     DATABASE_URL        - PostgreSQL connection string
     ELASTICSEARCH_URL   - Elasticsearch URL
@@ -23,6 +27,7 @@ Environment Variables:
     FIELDS              - Comma-separated fields to check
     OUTPUT              - Output file path (JSON format)
     ALLOW               - Maximum allowed mismatches before exit code 1
+    PARITY_MODE         - "sample" (default) or "buckets"
 """
 
 import os
@@ -100,6 +105,23 @@ def parse_args():
     parser.add_argument(
         "--stratify", action="store_true", help="Stratify sample by category/date"
     )
+    parser.add_argument(
+        "--mode",
+        choices=["sample", "buckets"],
+        default=os.getenv("PARITY_MODE", "sample"),
+        help="sample: random id sample; buckets: full-corpus bucketed digests",
+    )
+    parser.add_argument("--owner", type=str, help="Limit bucket mode to one owner")
+    parser.add_argument(
+        "--days",
+        type=int,
+        help="Limit bucket mode to emails received in the last N days",
+    )
+    parser.add_argument(
+        "--repair-out",
+        type=str,
+        help="Bucket mode: write repair actions (JSON lines) for the bulk indexer",
+    )
 
     return parser.parse_args()
 
@@ -363,6 +385,78 @@ def save_csv(report: Dict[str, Any], csv_path: str, fields: List[str]):
     print("✓ CSV saved")
 
 
+def run_sample_parity(db, es_client, es_index: str, fields: List[str], args):
+    """Random-sample parity: compare sampled emails field-by-field."""
+    email_ids = sample_email_ids(db, args.sample, args.stratify)
+
+    # Fetch data from both sources
+    db_data = fetch_db_sample(db, email_ids, fields)
+    es_data = fetch_es_sample(es_client, email_ids, fields, es_index)
+
+    return generate_report(db_data, es_data, fields)
+
+
+def run_bucket_parity(db, es_client, es_index: str, fields: List[str], args):
+    """Full-corpus parity via per-(owner, day) digests.
+
+    Only buckets whose digests differ are descended into, so the cost is
+    proportional to the number of buckets plus the amount of drift.
+    """
+    from datetime import timedelta
+
+    from app.services.parity import (
+        EsParitySource,
+        ParityChecker,
+        SqlParitySource,
+        parse_fields,
+    )
+
+    since = (
+        datetime.now(timezone.utc) - timedelta(days=args.days) if args.days else None
+    )
+    checker = ParityChecker(
+        SqlParitySource(db),
+        EsParitySource(es_client, es_index),
+        fields=parse_fields(",".join(fields)),
+    )
+    print("Comparing per-bucket digests...")
+    result = checker.run(owner=args.owner, since=since)
+    summary = result.summary()
+
+    mismatches = [{"issue": "missing_in_es", **m} for m in result.missing_in_es] + [
+        {"issue": "missing_in_db", **m} for m in result.missing_in_db
+    ]
+    mismatches += [{"issue": "field_mismatch", **m} for m in result.field_mismatches]
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {"mode": "buckets", "fields": fields, "owner": args.owner},
+        "summary": {**summary, "total_checked": summary["leaf_docs_compared"]},
+        "mismatches": mismatches[:100],
+    }
+
+    print(f"\n{'='*60}")
+    print("BUCKET PARITY RESULTS")
+    print(f"{'='*60}")
+    print(f"Buckets compared: {summary['buckets_total']}")
+    print(f"Buckets drifted: {summary['buckets_mismatched']}")
+    print(f"Sub-buckets compared: {summary['subbuckets_compared']}")
+    print(f"Leaf docs compared: {summary['leaf_docs_compared']}")
+    print(f"Missing in ES: {summary['missing_in_es']}")
+    print(f"Missing in DB: {summary['missing_in_db']}")
+    print(f"Field mismatches: {summary['field_mismatch']}")
+    print(f"{'='*60}\n")
+
+    if args.repair_out:
+        actions = result.repair_actions()
+        with open(args.repair_out, "w") as f:
+            for action in actions:
+                f.write(json.dumps(action) + "\n")
+        print(f"✓ Wrote {len(actions)} repair actions to {args.repair_out}")
+
+    return report
+
+
 def main():
     """Main entry point."""
     args = parse_args()
@@ -384,15 +478,10 @@ def main():
     es_index = os.getenv("ES_INDEX", "gmail_emails_v2")
 
     try:
-        # Sample email IDs
-        email_ids = sample_email_ids(db, args.sample, args.stratify)
-
-        # Fetch data from both sources
-        db_data = fetch_db_sample(db, email_ids, fields)
-        es_data = fetch_es_sample(es_client, email_ids, fields, es_index)
-
-        # Generate report
-        report = generate_report(db_data, es_data, fields)
+        if args.mode == "buckets":
+            report = run_bucket_parity(db, es_client, es_index, fields, args)
+        else:
+            report = run_sample_parity(db, es_client, es_index, fields, args)
 
         # Update metrics
         if METRICS_AVAILABLE:
@@ -414,7 +503,7 @@ def main():
         if args.output:
             save_report(report, args.output)
 
-        if args.csv:
+        if args.csv and args.mode == "sample":
             save_csv(report, args.csv, fields)
 
         # Determine exit code
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Import-time budget check for the API.
+
+Runs ``python -X importtime -c "import app.main"`` in a fresh interpreter,
+reports the slowest modules and exits non-zero if the total import time is
+over budget or a module that must stay lazy (sklearn, BigQuery, ...) was
+imported. Meant for CI, so a new top-level import of a heavy library is
+caught before it slows down every deploy and cold start.
+
+Usage:
+    python scripts/import_profile.py                 # default 1.5s budget
+    python scripts/import_profile.py --budget 1.0 --top 30
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+API_ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_BUDGET_S = 1.5
+# Must not be imported by `import app.main`; routers that need them are lazy
+FORBIDDEN = ("sklearn", "pandas", "google.cloud.bigquery", "pdfminer", "bs4")
+
+# "import time: <self us> | <cumulative us> | <indent><module>"
+LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile(module: str = "app.main"):
+    """Return ``[(module, self_us, cumulative_us, depth)]`` for one import."""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    env.setdefault("DATABASE_URL", "sqlite://")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=API_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr)
+        raise SystemExit(f"import {module} failed")
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_S)
+    parser.add_argument("--top", type=int, default=20, help="slowest modules to list")
+    args = parser.parse_args()
+
+    rows = profile(args.module)
+    total_s = sum(self_us for _, self_us, _, _ in rows) / 1e6
+    imported = {name for name, _, _, _ in rows}
+
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for name, self_us, cumulative_us, depth in sorted(
+        rows, key=lambda row: row[2], reverse=True
+    )[: args.top]:
+        print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:8.1f}  {name}")
+    print(f"\n{len(rows)} modules, {total_s:.2f}s total (budget {args.budget:.2f}s)")
+
+    failures = []
+    if total_s > args.budget:
+        failures.append(f"import time {total_s:.2f}s is over {args.budget:.2f}s")
+    heavy = [m for m in FORBIDDEN if m in imported]
+    if heavy:
+        failures.append(f"heavy modules imported eagerly: {', '.join(heavy)}")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Convert the emails table to monthly partitions, step by step.
+
+Usage (from services/api/):
+
+    # Where the conversion stands
+    python -m scripts.partition_emails status
+
+    # Create the partitioned table and start mirroring writes
+    python -m scripts.partition_emails prepare
+
+    # Copy rows in batches (resumable; safe to Ctrl-C and rerun)
+    python -m scripts.partition_emails copy --batch-size 5000 --pause 0.05
+
+    # Swap tables under a short lock, then validate the re-pointed foreign
+    # keys (``alembic upgrade`` does the same once the copy has caught up)
+    python -m scripts.partition_emails swap
+
+    # After checking the app: drop the old heap
+    python -m scripts.partition_emails drop-retired
+
+    # Pre-create upcoming partitions / detach expired ones (the daily job)
+    python -m scripts.partition_emails maintain --retention-months 36
+
+The a3b4c5d6e7f8 migration never runs the bulk copy: on a database with
+more than a few batches of mail, run prepare and copy before deploying.
+See app/core/email_partitions.py for the details.
+"""
+
+import argparse
+import logging
+import time
+
+from app.config import agent_settings
+from app.core import email_partitions
+from app.db import engine
+
+logger = logging.getLogger(__name__)
+
+
+def copy(batch_size: int, pause: float) -> int:
+    """Copy until caught up, committing every batch."""
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            n = email_partitions.copy_batch(conn, batch_size)
+        if not n:
+            return total
+        total += n
+        if total % (batch_size * 20) < batch_size:
+            with engine.connect() as conn:
+                left = email_partitions.remaining(conn)
+            logger.info(f"Copied {total} emails, {left} to go")
+        if pause:
+            time.sleep(pause)
+
+
+def main() -> None:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Convert emails to a monthly-partitioned table."
+    )
+    parser.add_argument(
+        "step",
+        choices=["status", "prepare", "copy", "swap", "drop-retired", "maintain"],
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=email_partitions.BATCH_SIZE,
+        help=f"Rows copied per transaction (default: {email_partitions.BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--pause",
+        type=float,
+        default=0.0,
+        help="Seconds to sleep between batches to limit load (default: 0)",
+    )
+    parser.add_argument(
+        "--months-ahead",
+        type=int,
+        default=agent_settings.EMAIL_PARTITION_MONTHS_AHEAD,
+        help="Monthly partitions to create in advance",
+    )
+    parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=agent_settings.EMAIL_PARTITION_RETENTION_MONTHS,
+        help="maintain: detach partitions older than this (default: keep all)",
+    )
+    parser.add_argument(
+        "--drop",
+        action="store_true",
+        help="maintain: drop expired partitions instead of archiving them",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    with engine.connect() as conn:
+        if not email_partitions.is_postgres(conn):
+            logger.info("Not a PostgreSQL database; emails stays a plain table")
+            return
+        state = email_partitions.status(conn)
+    if args.step in ("copy", "swap") and state != "copying":
+        logger.info(
+            f"emails is {state}; run prepare first"
+            if state == "plain"
+            else f"emails is already {state}"
+        )
+        return
+
+    if args.step == "status":
+        logger.info(f"emails: {state}")
+        if state == "copying":
+            with engine.connect() as conn:
+                logger.info(f"{email_partitions.remaining(conn)} rows left to copy")
+    elif args.step == "prepare":
+        with engine.begin() as conn:
+            email_partitions.prepare(conn, args.months_ahead)
+    elif args.step == "copy":
+        logger.info(f"Copied {copy(args.batch_size, args.pause)} emails")
+    elif args.step == "swap":
+        # Most of the catch-up happens before taking the lock
+        copy(args.batch_size, 0.0)
+        with engine.begin() as conn:
+            email_partitions.swap(conn)
+        with engine.begin() as conn:
+            email_partitions.validate_foreign_keys(conn)
+    elif args.step == "drop-retired":
+        with engine.begin() as conn:
+            if email_partitions.drop_retired(conn):
+                logger.info(f"Dropped {email_partitions.RETIRED}")
+    elif args.step == "maintain":
+        with engine.begin() as conn:
+            email_partitions.ensure_partitions(conn, args.months_ahead)
+            if args.retention_months:
+                email_partitions.detach_expired(
+                    conn, args.retention_months, drop=args.drop
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""
+Hot-path micro-benchmarks.
+
+Run from services/api:
+
+    python -m tests.benchmarks                      # report
+    python -m tests.benchmarks --save               # record a new baseline
+    python -m tests.benchmarks --compare            # exit 1 on regressions
+
+See ``make bench`` / ``make bench-compare``.
+"""
@@ -0,0 +1,69 @@
+"""CLI for the hot-path benchmarks (``python -m tests.benchmarks --help``)."""
+
+import argparse
+import os
+import sys
+
+os.environ.setdefault("ES_ENABLED", "false")
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+
+from .cases import all_cases  # noqa: E402
+from .harness import (  # noqa: E402
+    compare,
+    format_table,
+    load_baseline,
+    run_cases,
+    save_baseline,
+)
+from .mailbox import generate_mailbox  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("--case", action="append", help="Only run these cases")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="Write the baseline")
+    parser.add_argument(
+        "--compare", action="store_true", help="Fail on regressions vs baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=float(os.getenv("BENCH_REGRESSION_THRESHOLD", "0.25")),
+        help="Allowed slowdown before failing (0.25 = 25%%)",
+    )
+    args = parser.parse_args(argv)
+
+    messages = generate_mailbox(args.messages, seed=args.seed)
+    results = run_cases(all_cases(), messages, repeats=args.repeats, only=args.case)
+
+    baseline = None
+    if args.compare or (not args.save and os.path.exists(args.baseline)):
+        baseline = load_baseline(args.baseline)
+    print(format_table(results, baseline))
+
+    if args.save:
+        save_baseline(
+            args.baseline, results, {"messages": args.messages, "seed": args.seed}
+        )
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if args.compare:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%}:")
+            for r in regressions:
+                print(f"  {r.name}: {r.ratio:.2f}x baseline")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
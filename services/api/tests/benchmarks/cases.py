@@ -0,0 +1,186 @@
+"""
+Benchmark cases for the ingest, classification, security and search hot paths.
+
+Every case costs one call per synthetic message, so ``us_per_msg`` reads as
+the per-message cost of that stage of the pipeline.
+"""
+
+import random
+from datetime import timedelta
+from functools import lru_cache
+from typing import List
+from unittest import mock
+
+from app.classification.email_classifier import HybridEmailClassifier
+from app.core.yardstick import evaluate_policy
+from app.gmail_service import _parts_to_text, derive_labels
+from app.ingest.due_dates import extract_due_dates
+from app.logic.suggest_index import UserSuggestIndex
+from app.models import Email
+from app.routers import search as search_router
+from app.security.analyzer import EmailRiskAnalyzer
+from app.security.pii_scan import PIIScanner
+from app.seeds.policies import DEFAULT_POLICIES
+
+from .harness import Case
+from .mailbox import COMPANIES, FILLER, FIRST_NAMES, NOW, ROLES
+
+SEARCH_PAGE_SIZE = 25
+SUGGEST_INDEX_ENTRIES = 100_000
+SUGGEST_LIMIT = 8
+
+
+def _classify_inputs(messages):
+    return [
+        Email(
+            gmail_id=m.gmail_id,
+            sender=m.sender,
+            subject=m.subject,
+            body_text=m.body_text,
+            labels=m.labels,
+        )
+        for m in messages
+    ]
+
+
+def _analyze_inputs(messages):
+    return [
+        dict(
+            headers=m.headers,
+            from_name=m.from_name,
+            from_email=m.from_email,
+            subject=m.subject,
+            body_text=m.body_text,
+            body_html=m.body_html,
+            urls_visible_text_pairs=m.links or None,
+        )
+        for m in messages
+    ]
+
+
+def _search_inputs(messages):
+    """One search call per page of hits; the cost is reported per hit."""
+    pages = []
+    for start in range(0, len(messages), SEARCH_PAGE_SIZE):
+        hits = [m.es_hit() for m in messages[start : start + SEARCH_PAGE_SIZE]]
+        pages.append({"hits": {"total": {"value": len(messages)}, "hits": hits}})
+    return pages
+
+
+class _FakeES:
+    def __init__(self):
+        self.response = None
+
+    def search(self, index=None, body=None, **kwargs):
+        return self.response
+
+
+def _search_case() -> Case:
+    fake_es = _FakeES()
+
+    def run(page):
+        fake_es.response = page
+        with mock.patch.multiple(search_router, es=fake_es, ES_ENABLED=True):
+            return search_router.search(
+                request=None,
+                q="interview offer",
+                size=SEARCH_PAGE_SIZE,
+                scale="7d",
+                labels=None,
+                date_from=None,
+                date_to=None,
+                replied=None,
+                sort="relevance",
+                label_filter=None,
+                company=None,
+                source=None,
+                categories=None,
+                hide_expired=True,
+                risk_min=None,
+                risk_max=None,
+                quarantined=False,
+                cursor=None,
+                user_email="me@example.com",
+            )
+
+    return Case(
+        "search.response_page",
+        _search_inputs,
+        run,
+        size=lambda page: len(page["hits"]["hits"]),
+    )
+
+
+@lru_cache(maxsize=1)
+def suggest_index(entries: int = SUGGEST_INDEX_ENTRIES) -> UserSuggestIndex:
+    """One user's autocomplete index holding ``entries`` mailbox-like phrases."""
+    rng = random.Random(1234)
+    words = FILLER.replace(",", "").replace(".", "").split()
+    words += COMPANIES + FIRST_NAMES + " ".join(ROLES).split()
+    idx = UserSuggestIndex(max_entries=entries)
+    with idx.bulk():
+        while len(idx) < entries:
+            phrase = " ".join(rng.choice(words) for _ in range(rng.randint(2, 6)))
+            idx.add(phrase, seen=NOW - timedelta(days=rng.random() * 365))
+    return idx
+
+
+def _suggest_case() -> Case:
+    """Local autocomplete: one lookup per keystroke prefix of each subject."""
+
+    def prefixes(messages):
+        suggest_index()  # built outside the timed passes
+        return [m.subject[: 2 + m.id % 5] for m in messages]
+
+    return Case(
+        "suggest.local_lookup",
+        prefixes,
+        lambda prefix: suggest_index().lookup(prefix, SUGGEST_LIMIT),
+    )
+
+
+def all_cases() -> List[Case]:
+    analyzer = EmailRiskAnalyzer()
+    classifier = HybridEmailClassifier()
+    scanner = PIIScanner()
+    policies = [{"condition": p["condition"]} for p in DEFAULT_POLICIES]
+
+    return [
+        Case(
+            "ingest.parts_to_text",
+            lambda msgs: [m.payload for m in msgs],
+            _parts_to_text,
+        ),
+        Case(
+            "ingest.derive_labels",
+            lambda msgs: [(m.sender, m.subject, m.body_text) for m in msgs],
+            lambda args: derive_labels(*args),
+        ),
+        Case(
+            "ingest.extract_due_dates",
+            lambda msgs: [(m.body_text, m.received_at) for m in msgs],
+            lambda args: extract_due_dates(*args),
+        ),
+        Case(
+            "security.risk_analyze",
+            _analyze_inputs,
+            lambda kwargs: analyzer.analyze(**kwargs),
+        ),
+        Case(
+            "security.pii_scan",
+            lambda msgs: [m.body_text for m in msgs],
+            scanner.scan,
+        ),
+        Case(
+            "classify.hybrid",
+            _classify_inputs,
+            classifier.classify,
+        ),
+        Case(
+            "policy.evaluate_defaults",
+            lambda msgs: [m.policy_context() for m in msgs],
+            lambda ctx: [evaluate_policy(p, ctx) for p in policies],
+        ),
+        _search_case(),
+        _suggest_case(),
+    ]
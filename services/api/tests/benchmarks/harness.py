@@ -0,0 +1,161 @@
+"""
+Minimal benchmark harness (no pytest-benchmark dependency).
+
+A case runs a function once per message of a synthetic mailbox, in
+``repeats`` timed passes after a warm-up pass.
+
+Baselines store cost in two units:
+- ``us_per_msg``: microseconds per message (best pass) on the machine that
+  recorded it
+- ``norm_per_msg``: cost per message relative to a fixed pure-Python
+  calibration loop timed alongside every pass (median over passes).
+  Comparisons use it, so a baseline recorded on a laptop is still
+  meaningful on a CI runner.
+"""
+
+import json
+import platform
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+@dataclass
+class Case:
+    name: str
+    setup: Callable[[Sequence[Any]], Sequence[Any]]  # messages -> per-call inputs
+    run: Callable[[Any], Any]
+    # Messages covered by one input (e.g. a page of search hits); default 1
+    size: Optional[Callable[[Any], int]] = None
+
+
+@dataclass
+class Measurement:
+    name: str
+    messages: int
+    us_per_msg: float
+    msgs_per_sec: float
+    norm_per_msg: float
+
+
+@dataclass
+class Regression:
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline
+
+
+def _calibration_work() -> int:
+    total = 0
+    for i in range(100000):
+        total += len(str(i * 7)) ^ (i & 3)
+    return total
+
+
+def _timed(fn: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def measure(case: Case, messages: Sequence[Any], repeats: int = 5) -> Measurement:
+    """Time ``case.run`` over every input prepared from ``messages``.
+
+    Each timed pass is paired with a calibration loop run right before it,
+    so drifts in CPU speed during the run cancel out of ``norm_per_msg``.
+    """
+    inputs = list(case.setup(messages))
+    run = case.run
+
+    def one_pass():
+        for item in inputs:
+            run(item)
+
+    one_pass()  # warm-up: caches, lazy imports, compiled regexes
+    _calibration_work()
+
+    passes, ratios = [], []
+    for _ in range(repeats):
+        reference = _timed(_calibration_work)
+        elapsed = _timed(one_pass)
+        passes.append(elapsed)
+        ratios.append(elapsed / reference)
+
+    count = sum(map(case.size, inputs)) if case.size else len(inputs)
+    per_msg = min(passes) / count
+    return Measurement(
+        name=case.name,
+        messages=count,
+        us_per_msg=round(per_msg * 1e6, 3),
+        msgs_per_sec=round(1 / per_msg, 1) if per_msg else float("inf"),
+        norm_per_msg=round(statistics.median(ratios) / count, 6),
+    )
+
+
+def run_cases(
+    cases: Sequence[Case],
+    messages: Sequence[Any],
+    repeats: int = 5,
+    only: Optional[Sequence[str]] = None,
+) -> List[Measurement]:
+    return [
+        measure(case, messages, repeats)
+        for case in cases
+        if not only or case.name in only
+    ]
+
+
+def save_baseline(path: str, results: Sequence[Measurement], meta: Dict) -> None:
+    data = {
+        "meta": {**meta, "python": platform.python_version()},
+        "results": {r.name: asdict(r) for r in results},
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_baseline(path: str) -> Dict[str, Dict[str, Any]]:
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def compare(
+    results: Sequence[Measurement],
+    baseline: Dict[str, Dict[str, Any]],
+    threshold: float,
+) -> List[Regression]:
+    """Cases whose normalized cost grew by more than ``threshold`` (0.25 = 25%)."""
+    regressions = []
+    for r in results:
+        base = baseline.get(r.name)
+        if not base or not base.get("norm_per_msg"):
+            continue
+        if r.norm_per_msg > base["norm_per_msg"] * (1 + threshold):
+            regressions.append(Regression(r.name, base["norm_per_msg"], r.norm_per_msg))
+    return regressions
+
+
+def format_table(
+    results: Sequence[Measurement],
+    baseline: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> str:
+    header = f"{'case':<28} {'msgs':>6} {'us/msg':>10} {'msgs/s':>11} {'norm':>10}"
+    if baseline is not None:
+        header += f" {'vs base':>8}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        line = (
+            f"{r.name:<28} {r.messages:>6} {r.us_per_msg:>10.1f} "
+            f"{r.msgs_per_sec:>11.1f} {r.norm_per_msg:>10.6f}"
+        )
+        if baseline is not None:
+            base = baseline.get(r.name, {}).get("norm_per_msg")
+            line += f" {r.norm_per_msg / base - 1:>+8.1%}" if base else f" {'new':>8}"
+        lines.append(line)
+    return "\n".join(lines)
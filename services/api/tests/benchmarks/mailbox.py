@@ -0,0 +1,289 @@
+"""
+Deterministic synthetic mailbox for benchmarks.
+
+Messages mix the shapes the hot paths see in production: ATS mail
+(interview, offer, rejection, receipts), newsletters, bills with due dates,
+security codes, personal mail and the phishing samples from
+``scripts/generate_test_emails.py``. Each message carries a Gmail API
+payload (multipart, HTML-only or single-part), parsed fields, headers and
+an Elasticsearch hit, so one generator feeds ingest, classification and
+search benchmarks.
+
+Generation only uses ``random.Random(seed)``; the same seed always yields
+the same mailbox, which is what makes baselines comparable.
+"""
+
+import base64
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Tuple
+
+NOW = datetime(2025, 10, 15, 12, 0, tzinfo=timezone.utc)
+
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Vandelay", "Stark"]
+ROLES = ["Software Engineer", "Data Scientist", "Product Manager", "SRE", "Analyst"]
+ATS_DOMAINS = ["greenhouse.io", "lever.co", "myworkdayjobs.com", "ashbyhq.com"]
+FIRST_NAMES = ["Dana", "Sam", "Alex", "Jordan", "Priya", "Chen", "Maria", "Terell"]
+FILLER = (
+    "We appreciate the time you spent with the team and wanted to share a few "
+    "details about next steps, logistics and what to expect over the coming "
+    "weeks. Please reach out if anything is unclear."
+)
+
+# (kind, weight) - roughly the category mix of a job seeker's inbox
+KINDS = [
+    ("interview", 8),
+    ("offer", 2),
+    ("rejection", 6),
+    ("receipt", 10),
+    ("newsletter", 30),
+    ("bill", 8),
+    ("security", 6),
+    ("phishing", 5),
+    ("personal", 25),
+]
+
+# Message kind -> category as used by the seeded policies (app.seeds.policies)
+POLICY_CATEGORIES = {
+    "interview": "applications",
+    "offer": "applications",
+    "rejection": "applications",
+    "receipt": "applications",
+    "newsletter": "promotions",
+}
+
+
+@dataclass
+class SyntheticMessage:
+    id: int
+    gmail_id: str
+    thread_id: str
+    from_name: str
+    from_email: str
+    subject: str
+    body_text: str
+    body_html: str
+    received_at: datetime
+    kind: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    links: List[Tuple[str, str]] = field(default_factory=list)
+    labels: List[str] = field(default_factory=list)
+    payload: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def sender(self) -> str:
+        return f"{self.from_name} <{self.from_email}>"
+
+    def policy_context(self) -> Dict[str, Any]:
+        """Flat context as passed to yardstick.evaluate_policy."""
+        return {
+            "category": POLICY_CATEGORIES.get(self.kind, self.kind),
+            "subject": self.subject,
+            "risk_score": 85 if self.kind == "phishing" else 10,
+            "sender_domain": self.from_email.split("@", 1)[1],
+            "labels": self.labels,
+            "age_days": (NOW - self.received_at).days,
+            "expires_at": (self.received_at + timedelta(days=7)).isoformat(),
+        }
+
+    def es_hit(self) -> Dict[str, Any]:
+        """Search hit as returned by ES for this message."""
+        received = self.received_at.isoformat().replace("+00:00", "Z")
+        source = {
+            "id": self.id,
+            "gmail_id": self.gmail_id,
+            "thread_id": self.thread_id,
+            "subject": self.subject,
+            "sender": self.sender,
+            "recipient": "me@example.com",
+            "labels": self.labels,
+            "label_heuristics": [self.kind],
+            "received_at": received,
+            "body_text": self.body_text,
+            "category": self.kind,
+            "owner_email": "me@example.com",
+        }
+        if self.id % 3 == 0:
+            reply = self.received_at + timedelta(hours=5 + self.id % 40)
+            source["first_user_reply_at"] = reply.isoformat().replace("+00:00", "Z")
+            source["replied"] = True
+        highlight = {"subject": [f"<mark>{self.subject}</mark>"]}
+        if self.id % 2 == 0:
+            highlight["body_text"] = [self.body_text[:150], self.body_text[150:300]]
+        return {
+            "_id": self.gmail_id,
+            "_score": 1.0,
+            "_source": source,
+            "highlight": highlight,
+        }
+
+
+def _b64(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode()).decode()
+
+
+def _gmail_payload(rng: random.Random, text: str, html: str) -> Dict[str, Any]:
+    shape = rng.random()
+    if shape < 0.6:
+        # multipart/alternative nested in multipart/mixed
+        return {
+            "mimeType": "multipart/mixed",
+            "parts": [
+                {
+                    "mimeType": "multipart/alternative",
+                    "parts": [
+                        {"mimeType": "text/plain", "body": {"data": _b64(text)}},
+                        {"mimeType": "text/html", "body": {"data": _b64(html)}},
+                    ],
+                },
+                {"mimeType": "application/pdf", "filename": "a.pdf", "body": {}},
+            ],
+        }
+    if shape < 0.85:
+        # HTML-only marketing mail: goes through the HTML stripper
+        return {
+            "mimeType": "multipart/alternative",
+            "parts": [{"mimeType": "text/html", "body": {"data": _b64(html)}}],
+        }
+    return {"mimeType": "text/plain", "body": {"data": _b64(text)}}
+
+
+def _content(rng: random.Random, kind: str, company: str, role: str, when: datetime):
+    """(from_email, subject, body, links) for one message kind."""
+    domain = f"{company.lower()}.com"
+    name = rng.choice(FIRST_NAMES)
+    due = (when + timedelta(days=rng.randint(3, 20))).strftime("%B %d, %Y")
+    phone = f"({rng.randint(200, 999)}) 555-{rng.randint(1000, 9999)}"
+    if kind == "interview":
+        return (
+            f"no-reply@{rng.choice(ATS_DOMAINS)}",
+            f"Interview invitation: {role} at {company}",
+            f"Hi, we'd like to schedule an interview for the {role} role. "
+            f"Please pick a time that works, or call {name} at {phone}. {FILLER}",
+            [
+                (
+                    "Schedule",
+                    f"https://{rng.choice(ATS_DOMAINS)}/s/{rng.randint(1, 9999)}",
+                )
+            ],
+        )
+    if kind == "offer":
+        return (
+            f"{name.lower()}@{domain}",
+            f"Offer letter - {role}",
+            f"We are pleased to extend an offer for the {role} position at "
+            f"{company}. Please sign by {due}. {FILLER}",
+            [],
+        )
+    if kind == "rejection":
+        return (
+            f"careers@{domain}",
+            f"Your application to {company}",
+            "Unfortunately we will not be moving forward with your application "
+            f"for {role}. We decided to pursue other candidates. {FILLER}",
+            [],
+        )
+    if kind == "receipt":
+        return (
+            f"no-reply@{rng.choice(ATS_DOMAINS)}",
+            f"Thank you for applying to {company}",
+            f"We received your application for {role}. Application ID "
+            f"{rng.randint(100000, 999999)}. {FILLER}",
+            [],
+        )
+    if kind == "newsletter":
+        return (
+            f"news@{domain}",
+            f"{rng.randint(10, 70)}% off this week only - {company} deals",
+            f"Shop the sale before it ends. Unsubscribe at any time. {FILLER * 2}",
+            [("Shop now", f"https://click.{domain}/t/{rng.randint(1, 99999)}")],
+        )
+    if kind == "bill":
+        return (
+            f"billing@{domain}",
+            f"Your {company} bill is ready",
+            f"Your statement is available. Amount due ${rng.randint(20, 400)}.00, "
+            f"payment due by {due}. Card ending 4111 1111 1111 1111. {FILLER}",
+            [("Pay bill", f"https://{domain}/pay")],
+        )
+    if kind == "security":
+        return (
+            f"security@{domain}",
+            "Your verification code",
+            f"Your one-time passcode is {rng.randint(100000, 999999)}. If this "
+            "wasn't you, reset your password. Sign-in from "
+            f"203.0.113.{rng.randint(1, 254)}.",
+            [],
+        )
+    if kind == "phishing":
+        return (
+            f"remotetech@careers-{company.lower()}learning.top",
+            "You're Invited: Software Developer Interview",
+            "A mini home office will be arranged for you. Please reply with your "
+            f"name, phone, location and SSN 123-45-{rng.randint(1000, 9999)}. "
+            "Work from anywhere. Flexible hours. Wire the equipment deposit today.",
+            [
+                (
+                    "https://www.paypal.com",
+                    f"http://paypa1-secure.{company.lower()}.top/login",
+                ),
+                ("Verify account", f"http://bit.ly/{rng.randint(1000, 9999)}"),
+            ],
+        )
+    return (
+        f"{name.lower()}@gmail.com",
+        rng.choice(["Lunch?", "Weekend plans", "Photos from the trip", "Re: hi"]),
+        f"Hey! Are you free on {due}? Call me at {phone} or email "
+        f"{name.lower()}@example.org. {FILLER}",
+        [],
+    )
+
+
+def generate_mailbox(n: int, seed: int = 1234) -> List[SyntheticMessage]:
+    """Generate ``n`` messages; identical for identical ``(n, seed)``."""
+    rng = random.Random(seed)
+    kinds = [k for k, _ in KINDS]
+    weights = [w for _, w in KINDS]
+    messages = []
+    for i in range(n):
+        kind = rng.choices(kinds, weights)[0]
+        company = rng.choice(COMPANIES)
+        role = rng.choice(ROLES)
+        when = NOW - timedelta(minutes=rng.randint(0, 60 * 24 * 60))
+        from_email, subject, body, links = _content(rng, kind, company, role, when)
+        anchors = "".join(f'<a href="{href}">{text}</a> ' for text, href in links)
+        html = (
+            f"<html><body><table><tr><td><h1>{subject}</h1>"
+            f"<p>{body}</p>{anchors}</td></tr></table></body></html>"
+        )
+        auth = "pass" if kind != "phishing" else "neutral"
+        headers = {
+            "Authentication-Results": (
+                f"mx.google.com; spf={auth}; dkim=pass "
+                f"header.d={from_email.split('@', 1)[1]}; dmarc={auth}"
+            ),
+            "Received-SPF": f"{auth} (google.com: domain of {from_email})",
+        }
+        if kind == "newsletter":
+            headers["List-Unsubscribe"] = f"<mailto:unsub@{from_email.split('@')[1]}>"
+        labels = ["INBOX"] + (["CATEGORY_PROMOTIONS"] if kind == "newsletter" else [])
+        messages.append(
+            SyntheticMessage(
+                id=i + 1,
+                gmail_id=f"g{seed}-{i:06d}",
+                thread_id=f"t{seed}-{i // 3:06d}",
+                from_name=company if kind != "personal" else from_email.split("@")[0],
+                from_email=from_email,
+                subject=subject,
+                body_text=body,
+                body_html=html,
+                received_at=when,
+                kind=kind,
+                headers=headers,
+                links=links,
+                labels=labels,
+                payload=_gmail_payload(rng, body, html),
+            )
+        )
+    return messages
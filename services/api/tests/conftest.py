@@ -6,10 +6,12 @@ This module provides:
 - AsyncClient fixture with ASGITransport for httpx>=0.28 compatibility
 - Test data factories
 - Mock configurations for external services
+- Query budgets (assert_max_queries)
 """
 
 import asyncio
 import os
+from contextlib import contextmanager
 from typing import AsyncIterator, Generator
 
 import httpx
@@ -18,6 +20,8 @@ from httpx import ASGITransport
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import Session, sessionmaker
 
+from app.core.query_stats import install as install_query_stats
+from app.core.query_stats import track_queries
 from app.main import app  # FastAPI instance
 from app.models import Base
 
@@ -58,6 +62,7 @@ def engine():
         echo=False,  # Set to True for SQL debugging
         future=True,
     )
+    install_query_stats(test_engine)
 
     # Create all tables with deferrable constraint handling for circular FKs
     # Use checkfirst to avoid errors if tables exist
@@ -141,6 +146,32 @@ async def async_client() -> AsyncIterator[httpx.AsyncClient]:
         yield client
 
 
+@pytest.fixture
+def assert_max_queries():
+    """
+    Pin a query budget for a block of test code.
+
+    Counts the SQL statements run inside the block (requests made with
+    TestClient or async_client included) and fails when there are more than
+    ``n``. Statements repeated past N_PLUS_ONE_THRESHOLD raise NPlusOneError
+    unless ``n_plus_one=False``.
+
+    Usage:
+        def test_list(client, assert_max_queries):
+            with assert_max_queries(3):
+                client.get("/applications")
+    """
+
+    @contextmanager
+    def _assert_max_queries(n: int, n_plus_one: bool = True):
+        budget = track_queries("assert_max_queries", raise_on_n_plus_one=n_plus_one)
+        with budget as stats:
+            yield stats
+        assert stats.count <= n, f"Query budget of {n} exceeded: {stats.summary()}"
+
+    return _assert_max_queries
+
+
 @pytest.fixture
 def sample_user_email():
     """Provide a consistent test user email."""
@@ -0,0 +1,15 @@
+"""
+End-to-end load harness.
+
+Boots the FastAPI app in-process against local fakes for Elasticsearch,
+Gmail and the LLM providers (see ``fakes``), drives a weighted mix of
+endpoints at a target request rate and reports per-endpoint latency
+percentiles, event-loop lag and DB pool saturation.
+
+Run from services/api (DB-backed endpoints need a reachable DATABASE_URL):
+
+    python -m tests.load --rps 50 --duration 30
+    python -m tests.load --mix search=1 --es-latency 40:400 --json out.json
+
+See ``make load``.
+"""
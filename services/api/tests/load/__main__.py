@@ -0,0 +1,84 @@
+"""CLI for the end-to-end load harness (``python -m tests.load --help``)."""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from dataclasses import asdict
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./load.db")
+os.environ.setdefault("ES_ENABLED", "false")
+
+from .driver import authenticated_as, format_report, run_load  # noqa: E402
+from .fakes import LatencyDist, ScriptedLLM, install_fakes  # noqa: E402
+from .workloads import default_mix, parse_mix  # noqa: E402
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rps", type=float, default=20.0)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds")
+    parser.add_argument("--mix", help="e.g. search=5,inbox_actions=2,agent_run=1")
+    parser.add_argument("--max-in-flight", type=int, default=512)
+    parser.add_argument("--mailbox", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument(
+        "--es-latency", help="ES search latency in ms, 'p50' or 'p50:p99'"
+    )
+    parser.add_argument("--gmail-latency", help="Gmail API latency, 'p50:p99' ms")
+    parser.add_argument("--llm-ttft", default="150:600", help="'p50:p99' ms")
+    parser.add_argument("--llm-token-ms", type=float, default=20.0)
+    parser.add_argument("--llm-tokens", type=int, default=60)
+    parser.add_argument("--json", help="Also write the report as JSON here")
+    args = parser.parse_args(argv)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    from app.db import engine
+    from app.main import app
+
+    llm = ScriptedLLM(
+        ttft=LatencyDist.parse(args.llm_ttft),
+        token_ms=args.llm_token_ms,
+        tokens=args.llm_tokens,
+        seed=args.seed,
+    )
+    es_latency = {}
+    if args.es_latency:
+        es_latency["search"] = LatencyDist.parse(args.es_latency)
+    gmail_latency = (
+        LatencyDist.parse(args.gmail_latency) if args.gmail_latency else None
+    )
+    mix = parse_mix(args.mix) if args.mix else default_mix()
+
+    with install_fakes(
+        mailbox_size=args.mailbox,
+        es_latency=es_latency,
+        llm=llm,
+        gmail_latency=gmail_latency,
+        seed=args.seed,
+    ) as fakes, authenticated_as(app):
+        report = asyncio.run(
+            run_load(
+                app,
+                mix,
+                rps=args.rps,
+                duration=args.duration,
+                engine=engine,
+                max_in_flight=args.max_in_flight,
+                seed=args.seed,
+            )
+        )
+        report.outbound_refused = dict(fakes.transport.refused)
+
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(asdict(report), f, indent=2, default=str)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+"""
+Open-loop load driver for the in-process FastAPI app.
+
+Requests arrive as a Poisson process at the target rate, regardless of how
+fast earlier ones complete. Latency is measured from the *scheduled*
+arrival time, so a saturated app shows up as queueing delay instead of being
+hidden by a slower send rate (no coordinated omission). The driver talks to
+the app through ``httpx.ASGITransport``; app and driver share one event
+loop, like a single uvicorn worker.
+
+Alongside the requests it samples:
+- event-loop lag: how late a periodic timer fires
+- DB pool occupancy: checked-out connections at every checkout, attributed
+  to the endpoint that made it (via a context variable that follows the
+  request into FastAPI's threadpool)
+"""
+
+import asyncio
+import contextvars
+import random
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+from sqlalchemy import event
+
+from .workloads import LOAD_USER_EMAIL, Endpoint
+
+current_endpoint: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "load_endpoint", default="-"
+)
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile (0 for no values)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+@dataclass
+class EndpointStats:
+    latencies: List[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    errors: int = 0
+    pool_occupancy: List[float] = field(default_factory=list)
+
+    def summary(self, duration: float) -> Dict[str, Any]:
+        ms = [v * 1000 for v in self.latencies]
+        return {
+            "requests": len(self.latencies),
+            "rps": round(len(self.latencies) / duration, 2) if duration else 0.0,
+            "errors": self.errors,
+            "statuses": dict(sorted(self.statuses.items())),
+            "p50_ms": round(percentile(ms, 50), 1),
+            "p90_ms": round(percentile(ms, 90), 1),
+            "p99_ms": round(percentile(ms, 99), 1),
+            "max_ms": round(max(ms, default=0.0), 1),
+            "pool_max": round(max(self.pool_occupancy, default=0.0), 2),
+            "pool_p90": round(percentile(self.pool_occupancy, 90), 2),
+        }
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.lags: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, time.perf_counter() - start - self.interval))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    def summary(self) -> Dict[str, float]:
+        ms = [v * 1000 for v in self.lags]
+        return {
+            "p50_ms": round(percentile(ms, 50), 2),
+            "p99_ms": round(percentile(ms, 99), 2),
+            "max_ms": round(max(ms, default=0.0), 2),
+        }
+
+
+class PoolMonitor:
+    """Tracks checked-out connections of a SQLAlchemy engine's pool."""
+
+    def __init__(self, engine, stats: Dict[str, EndpointStats]):
+        self.engine = engine
+        self.stats = stats
+        self.checked_out = 0
+        self.peak = 0
+        pool = engine.pool
+        size = getattr(pool, "size", None)
+        overflow = getattr(pool, "_max_overflow", 0)
+        self.capacity = size() + max(0, overflow) if callable(size) else None
+
+    def _checkout(self, *args):
+        self.checked_out += 1
+        self.peak = max(self.peak, self.checked_out)
+        if self.capacity:
+            occupancy = self.checked_out / self.capacity
+            self.stats[current_endpoint.get()].pool_occupancy.append(occupancy)
+
+    def _checkin(self, *args):
+        self.checked_out = max(0, self.checked_out - 1)
+
+    def start(self):
+        event.listen(self.engine, "checkout", self._checkout)
+        event.listen(self.engine, "checkin", self._checkin)
+
+    def stop(self):
+        event.remove(self.engine, "checkout", self._checkout)
+        event.remove(self.engine, "checkin", self._checkin)
+
+    def summary(self) -> Dict[str, Any]:
+        return {"capacity": self.capacity, "peak_checked_out": self.peak}
+
+
+@contextmanager
+def authenticated_as(app, email: str = LOAD_USER_EMAIL):
+    """Resolve every auth dependency to ``email`` without a session lookup."""
+    from app.auth.deps import current_user, optional_current_user
+    from app.deps.user import get_current_user_email
+    from app.models import User
+
+    user = User(id=email, email=email)
+    overrides = {
+        current_user: lambda: user,
+        optional_current_user: lambda: user,
+        get_current_user_email: lambda: email,
+    }
+    saved = dict(app.dependency_overrides)
+    app.dependency_overrides.update(overrides)
+    try:
+        yield user
+    finally:
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(saved)
+
+
+@dataclass
+class LoadReport:
+    target_rps: float
+    duration: float
+    endpoints: Dict[str, Dict[str, Any]]
+    loop_lag: Dict[str, float]
+    pool: Dict[str, Any]
+    shed: int
+    outbound_refused: Dict[str, int] = field(default_factory=dict)
+
+
+async def run_load(
+    app,
+    mix: Sequence[Endpoint],
+    rps: float,
+    duration: float,
+    engine=None,
+    max_in_flight: int = 512,
+    seed: int = 1234,
+) -> LoadReport:
+    """Drive ``app`` with ``mix`` at ``rps`` requests/second for ``duration``."""
+    rng = random.Random(seed)
+    names = [e.name for e in mix]
+    weights = [e.weight for e in mix]
+    by_name = {e.name: e for e in mix}
+    stats: Dict[str, EndpointStats] = defaultdict(EndpointStats)
+    lag = LoopLagMonitor()
+    pool = PoolMonitor(engine, stats) if engine is not None else None
+    in_flight: set = set()
+    shed = 0
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://loadtest", timeout=60.0
+    ) as client:
+
+        async def fire(name: str, scheduled: float):
+            current_endpoint.set(name)
+            method, path, kwargs = by_name[name].build(rng)
+            try:
+                resp = await client.request(method, path, **kwargs)
+                stats[name].statuses[resp.status_code] += 1
+                if resp.status_code >= 500:
+                    stats[name].errors += 1
+            except Exception as exc:
+                stats[name].statuses[type(exc).__name__] += 1
+                stats[name].errors += 1
+            stats[name].latencies.append(time.perf_counter() - scheduled)
+
+        lag.start()
+        if pool:
+            pool.start()
+        start = time.perf_counter()
+        next_at = start
+        try:
+            while True:
+                next_at += rng.expovariate(rps)
+                if next_at - start >= duration:
+                    break
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if len(in_flight) >= max_in_flight:
+                    shed += 1
+                    continue
+                name = rng.choices(names, weights)[0]
+                task = asyncio.create_task(
+                    fire(name, next_at), context=contextvars.copy_context()
+                )
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            if in_flight:
+                await asyncio.gather(*in_flight)
+        finally:
+            await lag.stop()
+            if pool:
+                pool.stop()
+
+    elapsed = time.perf_counter() - start
+    return LoadReport(
+        target_rps=rps,
+        duration=round(elapsed, 2),
+        endpoints={
+            name: stats[name].summary(elapsed) for name in names if name in stats
+        },
+        loop_lag=lag.summary(),
+        pool=pool.summary() if pool else {},
+        shed=shed,
+    )
+
+
+def format_report(report: LoadReport) -> str:
+    lines = [
+        f"target {report.target_rps} rps for {report.duration}s"
+        f" (shed {report.shed} arrivals at the in-flight cap)",
+        "",
+        f"{'endpoint':<15} {'reqs':>6} {'rps':>7} {'err':>5} {'p50':>8} "
+        f"{'p90':>8} {'p99':>8} {'max':>8} {'pool max':>9} {'pool p90':>9}",
+    ]
+    for name, s in report.endpoints.items():
+        lines.append(
+            f"{name:<15} {s['requests']:>6} {s['rps']:>7.1f} {s['errors']:>5} "
+            f"{s['p50_ms']:>8.1f} {s['p90_ms']:>8.1f} {s['p99_ms']:>8.1f} "
+            f"{s['max_ms']:>8.1f} {s['pool_max']:>9.0%} {s['pool_p90']:>9.0%}"
+        )
+    for name, s in report.endpoints.items():
+        lines.append(f"  {name} statuses: {s['statuses']}")
+    lag = report.loop_lag
+    lines += [
+        "",
+        f"event-loop lag: p50 {lag['p50_ms']}ms  p99 {lag['p99_ms']}ms"
+        f"  max {lag['max_ms']}ms",
+    ]
+    if report.pool:
+        lines.append(
+            f"db pool: peak {report.pool['peak_checked_out']} checked out"
+            f" of {report.pool['capacity'] or 'n/a'}"
+        )
+    if report.outbound_refused:
+        lines.append(f"refused outbound hosts: {report.outbound_refused}")
+    return "\n".join(lines)
@@ -0,0 +1,402 @@
+"""
+In-process stand-ins for Elasticsearch, Gmail and the LLM providers.
+
+``install_fakes`` patches the running app so that, for its duration:
+
+- Every ``es`` client, ``ES_ENABLED`` flag and ``Elasticsearch`` /
+  ``AsyncElasticsearch`` constructor bound in an ``app.*`` module resolves
+  to FakeES / FakeAsyncES. These answer from the synthetic mailbox after a
+  latency drawn from a per-operation distribution. The sync client sleeps
+  the calling thread, exactly like the real one, so blocking calls made
+  from async endpoints show up as event-loop lag.
+- ``httpx.AsyncClient`` instances created without an explicit transport
+  talk to ScriptedLLM, which speaks the Ollama (/api/generate, /api/chat)
+  and OpenAI (/v1/chat/completions) wire formats. It answers after a
+  time-to-first-token plus a per-token delay, and streams when asked to.
+  Any other outbound host gets a 503, so nothing leaves the process.
+- googleapiclient's ``build`` returns FakeGmailAPI, a Gmail resource
+  served from the same mailbox, wherever an ``app`` module imported it.
+"""
+
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import httpx
+
+from tests.benchmarks.mailbox import SyntheticMessage, generate_mailbox
+
+Z_99 = 2.326  # standard normal quantile for p99
+
+
+@dataclass
+class LatencyDist:
+    """Log-normal latency described by its median and p99 (milliseconds)."""
+
+    p50_ms: float
+    p99_ms: float
+
+    def sample(self, rng: random.Random) -> float:
+        if self.p50_ms <= 0:
+            return 0.0
+        sigma = max(0.0, math.log(self.p99_ms / self.p50_ms) / Z_99)
+        return rng.lognormvariate(math.log(self.p50_ms), sigma) / 1000.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDist":
+        """``"15"`` (constant) or ``"15:120"`` (p50:p99) in milliseconds."""
+        p50, _, p99 = spec.partition(":")
+        return cls(float(p50), float(p99 or p50))
+
+
+DEFAULT_ES_LATENCY = {
+    "search": LatencyDist(12, 90),
+    "count": LatencyDist(4, 30),
+    "default": LatencyDist(5, 40),
+}
+
+
+class FakeResponse(dict):
+    """Dict that also exposes ``.body`` like elasticsearch's ObjectApiResponse."""
+
+    @property
+    def body(self) -> Dict[str, Any]:
+        return dict(self)
+
+
+class _FakeIndices:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def __getattr__(self, name):
+        return self._owner._call(name, lambda **kw: FakeResponse(acknowledged=True))
+
+
+class _ESBackend:
+    """Shared state and canned answers for the sync and async fakes."""
+
+    def __init__(
+        self,
+        mailbox: Sequence[SyntheticMessage],
+        latency: Dict[str, LatencyDist],
+        seed: int,
+    ):
+        self.hits = [m.es_hit() for m in mailbox]
+        self.latency = {**DEFAULT_ES_LATENCY, **latency}
+        self.rng = random.Random(seed)
+        self.calls: Dict[str, int] = {}
+
+    def delay(self, op: str) -> float:
+        self.calls[op] = self.calls.get(op, 0) + 1
+        return self.latency.get(op, self.latency["default"]).sample(self.rng)
+
+    def answer(self, op: str, kwargs: Dict[str, Any]) -> FakeResponse:
+        if op == "search":
+            body = kwargs.get("body") or {}
+            size = kwargs.get("size", body.get("size", 10)) or 0
+            start = self.rng.randrange(max(1, len(self.hits) - size))
+            return FakeResponse(
+                took=1,
+                hits={
+                    "total": {"value": len(self.hits), "relation": "eq"},
+                    "hits": self.hits[start : start + size],
+                },
+                aggregations={},
+            )
+        if op == "count":
+            return FakeResponse(count=len(self.hits))
+        if op == "get":
+            hit = self.hits[self.rng.randrange(len(self.hits))]
+            return FakeResponse(found=True, **hit)
+        if op == "ping":
+            return True
+        return FakeResponse(result="updated", updated=1, acknowledged=True)
+
+
+class FakeES:
+    """Synchronous Elasticsearch stand-in; latency blocks the calling thread."""
+
+    def __init__(self, backend: _ESBackend):
+        self._backend = backend
+        self.indices = _FakeIndices(self)
+
+    def _call(self, op, answer=None):
+        def call(*args, **kwargs):
+            time.sleep(self._backend.delay(op))
+            return answer(**kwargs) if answer else self._backend.answer(op, kwargs)
+
+        return call
+
+    def __getattr__(self, op):
+        if op.startswith("_"):
+            raise AttributeError(op)
+        return self._call(op)
+
+    def close(self):
+        pass
+
+
+class FakeAsyncES(FakeES):
+    """Async Elasticsearch stand-in; latency is an ``asyncio.sleep``."""
+
+    def _call(self, op, answer=None):
+        async def call(*args, **kwargs):
+            await asyncio.sleep(self._backend.delay(op))
+            return answer(**kwargs) if answer else self._backend.answer(op, kwargs)
+
+        return call
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@dataclass
+class ScriptedLLM:
+    """LLM whose replies take ``ttft`` plus ``token_ms`` per generated token."""
+
+    ttft: LatencyDist = field(default_factory=lambda: LatencyDist(150, 600))
+    token_ms: float = 20.0
+    tokens: int = 60
+    seed: int = 0
+    calls: int = 0
+
+    def __post_init__(self):
+        self.rng = random.Random(self.seed)
+
+    def reply_tokens(self, wants_json: bool) -> List[str]:
+        words = ["Here", "is", "what", "I", "found", "in", "your", "mailbox."]
+        text = [words[i % len(words)] + " " for i in range(self.tokens)]
+        if not wants_json:
+            return text
+        answer = "".join(text).strip()
+        payload = json.dumps({"answer": answer, "cards": []})
+        step = max(1, len(payload) // self.tokens)
+        return [payload[i : i + step] for i in range(0, len(payload), step)]
+
+    async def respond(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        body = json.loads(request.content or b"{}")
+        path = request.url.path
+        wants_json = body.get("format") == "json" or (
+            body.get("response_format", {}).get("type") == "json_object"
+        )
+        tokens = self.reply_tokens(wants_json)
+        await asyncio.sleep(self.ttft.sample(self.rng))
+
+        if body.get("stream"):
+            stream = _TokenStream(tokens, self.token_ms / 1000.0, path)
+            return httpx.Response(200, stream=stream, request=request)
+
+        await asyncio.sleep(len(tokens) * self.token_ms / 1000.0)
+        text = "".join(tokens)
+        if path.endswith("/api/generate"):
+            data = {"response": text, "done": True}
+        elif path.endswith("/api/chat"):
+            data = {"message": {"role": "assistant", "content": text}, "done": True}
+        else:
+            data = {"choices": [{"message": {"role": "assistant", "content": text}}]}
+        return httpx.Response(200, json=data, request=request)
+
+
+class _TokenStream(httpx.AsyncByteStream):
+    def __init__(self, tokens: List[str], per_token: float, path: str):
+        self.tokens = tokens
+        self.per_token = per_token
+        self.openai = "/v1/" in path
+
+    async def __aiter__(self):
+        for token in self.tokens:
+            await asyncio.sleep(self.per_token)
+            if self.openai:
+                chunk = {"choices": [{"delta": {"content": token}}]}
+                yield f"data: {json.dumps(chunk)}\n\n".encode()
+            else:
+                yield (json.dumps({"response": token, "done": False}) + "\n").encode()
+        if self.openai:
+            yield b"data: [DONE]\n\n"
+        else:
+            yield (json.dumps({"response": "", "done": True}) + "\n").encode()
+
+
+class OutboundTransport(httpx.AsyncBaseTransport):
+    """Routes LLM traffic to ScriptedLLM and refuses everything else."""
+
+    LLM_PATHS = ("/api/generate", "/api/chat", "/v1/chat/completions")
+
+    def __init__(self, llm: ScriptedLLM):
+        self.llm = llm
+        self.refused: Dict[str, int] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith(self.LLM_PATHS):
+            return await self.llm.respond(request)
+        host = request.url.host
+        self.refused[host] = self.refused.get(host, 0) + 1
+        return httpx.Response(503, text="network disabled in load harness")
+
+
+class _GmailRequest:
+    def __init__(self, api: "FakeGmailAPI", result):
+        self._api = api
+        self._result = result
+
+    def execute(self, *args, **kwargs):
+        time.sleep(self._api.latency.sample(self._api.rng))
+        return self._result()
+
+
+class FakeGmailAPI:
+    """``googleapiclient`` Gmail resource answering from the synthetic mailbox.
+
+    Supports the ``users().threads()`` / ``users().messages()`` list, get and
+    modify calls; ``execute()`` blocks for a sampled latency like the real
+    HTTP round trip.
+    """
+
+    def __init__(self, mailbox: Sequence[SyntheticMessage], latency, seed: int):
+        self.mailbox = list(mailbox)
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    def users(self):
+        return self
+
+    def threads(self):
+        return _GmailCollection(self, "threads")
+
+    def messages(self):
+        return _GmailCollection(self, "messages")
+
+    def _message(self, m: SyntheticMessage) -> Dict[str, Any]:
+        return {
+            "id": m.gmail_id,
+            "threadId": m.thread_id,
+            "labelIds": list(m.labels),
+            "snippet": m.body_text[:120],
+            "payload": m.payload,
+        }
+
+
+class _GmailCollection:
+    def __init__(self, api: FakeGmailAPI, kind: str):
+        self.api = api
+        self.kind = kind
+
+    def list(self, userId="me", maxResults=100, pageToken=None, **kwargs):
+        def result():
+            offset = int(pageToken or 0)
+            page = self.api.mailbox[offset : offset + maxResults]
+            if self.kind == "threads":
+                items = [{"id": m.thread_id} for m in page]
+            else:
+                items = [{"id": m.gmail_id, "threadId": m.thread_id} for m in page]
+            out = {self.kind: items}
+            if offset + maxResults < len(self.api.mailbox):
+                out["nextPageToken"] = str(offset + maxResults)
+            return out
+
+        self.api.calls += 1
+        return _GmailRequest(self.api, result)
+
+    def get(self, userId="me", id=None, **kwargs):
+        def result():
+            if self.kind == "threads":
+                msgs = [m for m in self.api.mailbox if m.thread_id == id][:5]
+                return {"id": id, "messages": [self.api._message(m) for m in msgs]}
+            match = next((m for m in self.api.mailbox if m.gmail_id == id), None)
+            return self.api._message(match or self.api.mailbox[0])
+
+        self.api.calls += 1
+        return _GmailRequest(self.api, result)
+
+    def modify(self, userId="me", id=None, body=None, **kwargs):
+        self.api.calls += 1
+        return _GmailRequest(self.api, lambda: {"id": id})
+
+    def batchModify(self, userId="me", body=None, **kwargs):
+        self.api.calls += 1
+        return _GmailRequest(self.api, lambda: {})
+
+
+@dataclass
+class Fakes:
+    es: _ESBackend
+    llm: ScriptedLLM
+    transport: OutboundTransport
+    gmail: FakeGmailAPI
+
+
+def _app_modules():
+    return [
+        module
+        for name, module in list(sys.modules.items())
+        if module is not None and (name == "app" or name.startswith("app."))
+    ]
+
+
+@contextmanager
+def install_fakes(
+    mailbox_size: int = 2000,
+    es_latency: Optional[Dict[str, LatencyDist]] = None,
+    llm: Optional[ScriptedLLM] = None,
+    gmail_latency: Optional[LatencyDist] = None,
+    seed: int = 1234,
+) -> Iterator[Fakes]:
+    """Patch ES, Gmail and outbound LLM HTTP for every loaded ``app`` module."""
+    from elasticsearch import AsyncElasticsearch, Elasticsearch
+    from googleapiclient.discovery import build
+
+    mailbox = generate_mailbox(mailbox_size, seed=seed)
+    backend = _ESBackend(mailbox, es_latency or {}, seed)
+    llm = llm or ScriptedLLM(seed=seed)
+    transport = OutboundTransport(llm)
+    sync_es = FakeES(backend)
+    gmail = FakeGmailAPI(mailbox, gmail_latency or LatencyDist(40, 250), seed)
+
+    saved = []
+
+    def patch(obj, attr, value):
+        saved.append((obj, attr, getattr(obj, attr)))
+        setattr(obj, attr, value)
+
+    for module in _app_modules():
+        attrs = vars(module)
+        if "ES_ENABLED" in attrs:
+            patch(module, "ES_ENABLED", True)
+        if "es" in attrs and (
+            attrs["es"] is None or isinstance(attrs["es"], Elasticsearch)
+        ):
+            patch(module, "es", sync_es)
+        if attrs.get("Elasticsearch") is Elasticsearch:
+            patch(module, "Elasticsearch", lambda *a, **kw: sync_es)
+        if attrs.get("AsyncElasticsearch") is AsyncElasticsearch:
+            patch(module, "AsyncElasticsearch", lambda *a, **kw: FakeAsyncES(backend))
+        if attrs.get("build") is build:
+            patch(module, "build", lambda *a, **kw: gmail)
+
+    original_init = httpx.AsyncClient.__init__
+
+    def init(self, *args, **kwargs):
+        if kwargs.get("transport") is None and kwargs.get("app") is None:
+            kwargs["transport"] = transport
+        original_init(self, *args, **kwargs)
+
+    patch(httpx.AsyncClient, "__init__", init)
+    try:
+        yield Fakes(es=backend, llm=llm, transport=transport, gmail=gmail)
+    finally:
+        for obj, attr, value in reversed(saved):
+            setattr(obj, attr, value)
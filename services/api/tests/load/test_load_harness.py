@@ -0,0 +1,47 @@
+"""
+Smoke test for the load harness: a short, fast run against the in-process
+app reaches every endpoint in the mix and reports its percentiles.
+"""
+
+import pytest
+
+from tests.load.driver import authenticated_as, percentile, run_load
+from tests.load.fakes import LatencyDist, ScriptedLLM, install_fakes
+from tests.load.workloads import parse_mix
+
+pytestmark = pytest.mark.unit
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 99) == 0.0
+
+
+def test_latency_dist_parse():
+    assert LatencyDist.parse("15") == LatencyDist(15, 15)
+    assert LatencyDist.parse("15:120") == LatencyDist(15, 120)
+
+
+async def test_short_run_reports_every_endpoint():
+    from app.main import app
+
+    fast = LatencyDist(1, 2)
+    llm = ScriptedLLM(ttft=fast, token_ms=0.1, tokens=5)
+    with install_fakes(
+        mailbox_size=50, es_latency={"search": fast}, llm=llm
+    ) as fakes, authenticated_as(app):
+        report = await run_load(
+            app, parse_mix("search=3,inbox_actions=1"), rps=40, duration=1.0
+        )
+
+    assert set(report.endpoints) == {"search", "inbox_actions"}
+    for stats in report.endpoints.values():
+        assert stats["requests"] > 0
+        assert stats["statuses"] == {200: stats["requests"]}
+        assert 0 < stats["p50_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+    assert fakes.es.calls["search"] > 0
+    assert not fakes.transport.refused
+    assert "p99_ms" in report.loop_lag
@@ -0,0 +1,82 @@
+"""
+Request mixes for the load harness.
+
+Each endpoint builds one request from a seeded RNG, so a run is reproducible
+for a given seed and rate. Weights are relative shares of the mix.
+"""
+
+import random
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Tuple
+
+LOAD_USER_EMAIL = "load@example.com"
+
+SEARCH_TERMS = ["interview", "offer", "invoice", "greenhouse", "acme", "*", "sale"]
+CHAT_QUERIES = [
+    "summarize my recruiter emails this week",
+    "find interviews from acme",
+    "clean up promos unless best buy",
+    "flag suspicious emails",
+]
+AGENT_QUERIES = [
+    "Show suspicious emails from new domains this week",
+    "What bills are due soon?",
+    "Any interview invites I haven't answered?",
+]
+
+Request = Tuple[str, str, Dict[str, Any]]  # method, path, httpx kwargs
+
+
+@dataclass
+class Endpoint:
+    name: str
+    weight: float
+    build: Callable[[random.Random], Request]
+
+
+def _search(rng: random.Random) -> Request:
+    params = {"q": rng.choice(SEARCH_TERMS), "size": 25}
+    if rng.random() < 0.3:
+        params["sort"] = "received_desc"
+    return "GET", "/api/search/", {"params": params}
+
+
+def _inbox_actions(rng: random.Random) -> Request:
+    mode = rng.choices(["review", "quarantined", "archived"], [8, 1, 1])[0]
+    return "GET", "/actions/inbox", {"params": {"mode": mode}}
+
+
+def _chat_stream(rng: random.Random) -> Request:
+    return "GET", "/chat/stream", {"params": {"q": rng.choice(CHAT_QUERIES)}}
+
+
+def _agent_run(rng: random.Random) -> Request:
+    return (
+        "POST",
+        "/api/v2/agent/run",
+        {"json": {"query": rng.choice(AGENT_QUERIES), "user_id": LOAD_USER_EMAIL}},
+    )
+
+
+ENDPOINTS = {
+    "search": Endpoint("search", 50, _search),
+    "inbox_actions": Endpoint("inbox_actions", 20, _inbox_actions),
+    "chat_stream": Endpoint("chat_stream", 15, _chat_stream),
+    "agent_run": Endpoint("agent_run", 15, _agent_run),
+}
+
+
+def parse_mix(spec: str) -> List[Endpoint]:
+    """``"search=5,agent_run=1"`` -> endpoints with those weights."""
+    mix = []
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        endpoint = ENDPOINTS[name.strip()]
+        mix.append(
+            Endpoint(endpoint.name, float(weight or endpoint.weight), endpoint.build)
+        )
+    return mix
+
+
+def default_mix() -> List[Endpoint]:
+    return list(ENDPOINTS.values())
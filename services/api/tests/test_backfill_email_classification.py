@@ -63,6 +63,20 @@ def in_memory_db():
     session.close()
 
 
+def _batch(per_email):
+    """Adapt a per-email fake to the classify_and_persist_batch signature."""
+
+    def classify_batch(db_session, rows):
+        results = []
+        for row in rows:
+            email = db_session.get(Email, row.id)
+            results.append(per_email(db_session, email))
+        db_session.flush()
+        return results
+
+    return classify_batch
+
+
 def test_backfill_updates_emails(in_memory_db):
     """Test that backfill updates email classification fields."""
     db = in_memory_db
@@ -83,7 +97,7 @@ def test_backfill_updates_emails(in_memory_db):
         db.add(email)
     db.commit()
 
-    # Mock classify_and_persist_email to set fields
+    # Mock classify_and_persist_batch to set fields
     call_count = 0
 
     def mock_classify(db_session, email):
@@ -106,8 +120,8 @@ def test_backfill_updates_emails(in_memory_db):
         )
 
     with patch(
-        "scripts.backfill_email_classification.classify_and_persist_email",
-        side_effect=mock_classify,
+        "scripts.backfill_email_classification.classify_and_persist_batch",
+        side_effect=_batch(mock_classify),
     ):
         counters = run_backfill(db, limit=10, dry_run=False)
 
@@ -157,8 +171,8 @@ def test_backfill_dry_run_no_commit(in_memory_db):
         )
 
     with patch(
-        "scripts.backfill_email_classification.classify_and_persist_email",
-        side_effect=mock_classify,
+        "scripts.backfill_email_classification.classify_and_persist_batch",
+        side_effect=_batch(mock_classify),
     ):
         counters = run_backfill(db, limit=10, dry_run=True)
 
@@ -207,8 +221,8 @@ def test_backfill_respects_limit(in_memory_db):
         )
 
     with patch(
-        "scripts.backfill_email_classification.classify_and_persist_email",
-        side_effect=mock_classify,
+        "scripts.backfill_email_classification.classify_and_persist_batch",
+        side_effect=_batch(mock_classify),
     ):
         counters = run_backfill(db, limit=2, dry_run=False)
 
@@ -266,8 +280,8 @@ def test_backfill_user_filter(in_memory_db):
         )
 
     with patch(
-        "scripts.backfill_email_classification.classify_and_persist_email",
-        side_effect=mock_classify,
+        "scripts.backfill_email_classification.classify_and_persist_batch",
+        side_effect=_batch(mock_classify),
     ):
         # Backfill only Alice's emails
         counters = run_backfill(db, limit=10, dry_run=False, user_id="alice@test.com")
@@ -316,14 +330,9 @@ def test_backfill_handles_errors(in_memory_db):
         db.add(email)
     db.commit()
 
-    # Mock classifier to fail on second email
-    call_count = 0
-
+    # Mock classifier to fail on the second email (fails its batch too)
     def mock_classify(db_session, email):
-        nonlocal call_count
-        call_count += 1
-
-        if call_count == 2:
+        if email.gmail_id == "test-1":
             raise RuntimeError("Simulated classification error")
 
         email.is_real_opportunity = True
@@ -336,8 +345,8 @@ def test_backfill_handles_errors(in_memory_db):
         )
 
     with patch(
-        "scripts.backfill_email_classification.classify_and_persist_email",
-        side_effect=mock_classify,
+        "scripts.backfill_email_classification.classify_and_persist_batch",
+        side_effect=_batch(mock_classify),
     ):
         counters = run_backfill(db, limit=10, dry_run=False)
 
@@ -346,6 +355,63 @@ def test_backfill_handles_errors(in_memory_db):
     assert counters["classified_ok"] == 2
     assert counters["errors"] == 1
 
+    # The failing email stays unclassified; the rest of its chunk is kept
+    unclassified = db.query(Email).filter(Email.is_real_opportunity.is_(None)).all()
+    assert [e.gmail_id for e in unclassified] == ["test-1"]
+
+
+def test_backfill_resumes_from_checkpoint(in_memory_db, tmp_path):
+    """Test that a checkpointed run picks up after the last committed chunk."""
+    db = in_memory_db
+
+    for i in range(5):
+        db.add(
+            Email(
+                gmail_id=f"test-{i}",
+                thread_id=f"thread-{i}",
+                subject=f"Test Email {i}",
+                received_at=datetime(2025, 1, i + 1, tzinfo=timezone.utc),
+                is_real_opportunity=None,
+            )
+        )
+    db.commit()
+
+    seen = []
+
+    def mock_classify(db_session, email):
+        seen.append(email.gmail_id)
+        email.is_real_opportunity = False
+        return ClassificationResult(
+            category="newsletter_marketing",
+            is_real_opportunity=False,
+            confidence=0.5,
+            model_version="heuristic_v1",
+            source="heuristic",
+        )
+
+    checkpoint = str(tmp_path / "backfill.json")
+    with patch(
+        "scripts.backfill_email_classification.classify_and_persist_batch",
+        side_effect=_batch(mock_classify),
+    ):
+        first = run_backfill(
+            db, limit=2, dry_run=False, chunk_size=2, checkpoint_path=checkpoint
+        )
+        # Simulate a row that was classified elsewhere being reset: the
+        # checkpoint, not the filter, decides where the second run starts
+        db.query(Email).filter(Email.gmail_id == "test-0").update(
+            {"is_real_opportunity": None}
+        )
+        db.commit()
+        second = run_backfill(
+            db, limit=10, dry_run=False, chunk_size=2, checkpoint_path=checkpoint
+        )
+
+    assert first["total"] == 2
+    # Counters accumulate across runs
+    assert second["total"] == 5
+    assert seen == ["test-0", "test-1", "test-2", "test-3", "test-4"]
+
 
 def test_backfill_empty_result(in_memory_db):
     """Test that backfill handles empty results gracefully."""
@@ -357,3 +423,13 @@ def test_backfill_empty_result(in_memory_db):
     assert counters["total"] == 0
     assert counters["classified_ok"] == 0
     assert counters["errors"] == 0
+
+
+def test_incomplete_backfill_job_fails_at_construction():
+    from app.utils.backfill import SqlKeysetJob
+
+    class NoProcessing(SqlKeysetJob):
+        name = "incomplete"
+
+    with pytest.raises(TypeError, match="process_chunk"):
+        NoProcessing()
@@ -215,3 +215,36 @@ def test_hybrid_email_classifier_heuristic_mode_logs_event(monkeypatch):
     assert evt.confidence == email.category_confidence
 
     db.close()
+
+
+def test_classify_batch_matches_per_email_classify():
+    """classify_batch vectorizes the ML path but must agree with classify()."""
+    from types import SimpleNamespace
+
+    class FakeVectorizer:
+        def __init__(self):
+            self.calls = 0
+
+        def transform(self, texts):
+            self.calls += 1
+            return texts
+
+    class FakeModel:
+        def predict_proba(self, texts):
+            return [[0.2, 0.8] if "engineer" in t else [0.9, 0.1] for t in texts]
+
+    emails = [
+        SimpleNamespace(subject="Your verification code", body_text="", sender="x"),
+        SimpleNamespace(subject="Staff engineer role", body_text="hi", sender="r@a"),
+        SimpleNamespace(subject="Weekly digest", body_text="news", sender="n@b"),
+    ]
+
+    classifier = HybridEmailClassifier(ml_model=FakeModel(), vectorizer=None)
+    classifier.mode = "ml_live"
+    classifier.vectorizer = FakeVectorizer()
+
+    batch = classifier.classify_batch(emails)
+    # One transform for the whole batch; the rule hit never reaches the model
+    assert classifier.vectorizer.calls == 1
+    assert batch == [classifier.classify(e) for e in emails]
+    assert [r.source for r in batch] == ["rule", "ml_live", "ml_live"]
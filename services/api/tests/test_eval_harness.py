@@ -9,6 +9,10 @@ Tests cover:
 - JSONL export
 """
 
+import random
+import threading
+import time
+
 import pytest
 from app.eval.models import EvalTask, EvalSuite
 from app.eval.judges import (
@@ -26,7 +30,8 @@ from app.eval.tasks import (
     get_insights_tasks,
     get_warehouse_tasks,
 )
-from app.eval.runner import EvalRunner, MockAgentExecutor
+from app.eval.result_cache import EvalResultCache
+from app.eval.runner import EvalRunner, MockAgentExecutor, parse_shard
 
 
 class TestGoldenTasks:
@@ -549,3 +554,187 @@ class TestEvalRunner:
         # Both should have scores (actual ordering depends on mock logic)
         assert run.quality_by_difficulty["easy"] > 0
         assert run.quality_by_difficulty["hard"] > 0
+
+
+class SleepyAgent:
+    """Fake agent: sleeps ``context["sleep"]`` seconds, optionally fails."""
+
+    version = "sleepy-1"
+
+    def execute(self, agent, objective, context):
+        time.sleep(context.get("sleep", 0.2))
+        if context.get("fail"):
+            raise RuntimeError("agent crashed")
+        return {"risk_level": context.get("risk", "low"), "is_phishing": False}
+
+
+class CountingAgent(SleepyAgent):
+    """Fake agent recording calls and how many of them run at once."""
+
+    def __init__(self, barrier=None):
+        self.barrier = barrier
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def execute(self, agent, objective, context):
+        with self.lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            if self.barrier:
+                # Only passes once ``barrier.parties`` calls are in flight
+                self.barrier.wait(timeout=5)
+            return super().execute(agent, objective, context)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def _suite(n, **context):
+    return EvalSuite(
+        name="parallel_suite",
+        agent="inbox.triage",
+        tasks=[
+            EvalTask(
+                id=f"parallel.{i:03d}",
+                agent="inbox.triage",
+                category="test",
+                objective="Classify",
+                context={"risk": ["low", "high"][i % 2], **context},
+                expected_output={"risk_level": "low"},
+            )
+            for i in range(n)
+        ],
+    )
+
+
+def _report(run):
+    """Run results without timing fields."""
+    return [r.model_dump(exclude={"timestamp", "latency_ms"}) for r in run.results]
+
+
+class TestParallelEvalRunner:
+    """Concurrency, caching, isolation and sharding of the eval runner."""
+
+    def test_parallel_suite_then_cached_rerun(self, tmp_path):
+        cache = EvalResultCache(tmp_path / "cache.sqlite")
+        agent = CountingAgent(barrier=threading.Barrier(20))
+        runner = EvalRunner(
+            executor=agent, output_dir=tmp_path, concurrency=20, cache=cache
+        )
+        suite = _suite(100, sleep=0)
+
+        first = runner.run_suite(suite)
+        assert first.cache_hits == 0
+        assert all(r.success for r in first.results)
+        assert agent.calls == 100
+        assert agent.max_active == 20
+
+        second = runner.run_suite(suite)
+        assert agent.calls == 100  # Served from the cache, no agent calls
+        assert second.cache_hit_rate == 1.0
+        assert _report(second) == _report(first)
+
+    def test_cache_key_covers_agent_and_judge_versions(self, tmp_path):
+        cache = EvalResultCache(tmp_path / "cache.sqlite")
+        suite = _suite(3, sleep=0)
+        EvalRunner(executor=SleepyAgent(), output_dir=tmp_path, cache=cache).run_suite(
+            suite
+        )
+
+        bumped = EvalRunner(
+            executor=SleepyAgent(),
+            output_dir=tmp_path,
+            cache=cache,
+            agent_version="sleepy-2",
+        )
+        assert bumped.run_suite(suite).cache_hits == 0
+
+        judge = get_judge("inbox.triage")
+        original = judge.version
+        judge.version = "2"
+        try:
+            runner = EvalRunner(
+                executor=SleepyAgent(), output_dir=tmp_path, cache=cache
+            )
+            assert runner.run_suite(suite).cache_hits == 0
+        finally:
+            judge.version = original
+
+    def test_serial_and_parallel_reports_match(self, tmp_path):
+        class JitteryAgent(SleepyAgent):
+            def execute(self, agent, objective, context):
+                # Shuffle completion order
+                time.sleep(random.random() * 0.02)
+                return super().execute(agent, objective, {**context, "sleep": 0})
+
+        suite = _suite(30)
+        serial = EvalRunner(
+            executor=JitteryAgent(), output_dir=tmp_path, concurrency=1
+        ).run_suite(suite)
+        parallel = EvalRunner(
+            executor=JitteryAgent(), output_dir=tmp_path, concurrency=10
+        ).run_suite(suite)
+
+        assert [r.task_id for r in parallel.results] == [t.id for t in suite.tasks]
+        assert _report(parallel) == _report(serial)
+        assert parallel.avg_quality_score == serial.avg_quality_score
+
+    def test_failing_and_hanging_tasks_are_isolated(self, tmp_path):
+        release = threading.Event()
+        finished = []
+
+        class HangingAgent(SleepyAgent):
+            def execute(self, agent, objective, context):
+                if context.get("hang"):
+                    release.wait(10)
+                    finished.append(objective)
+                return super().execute(agent, objective, context)
+
+        suite = _suite(4, sleep=0)
+        suite.tasks[1].context["fail"] = True
+        suite.tasks[2].context["hang"] = True
+        runner = EvalRunner(
+            executor=HangingAgent(),
+            output_dir=tmp_path,
+            concurrency=4,
+            task_timeout_s=0.2,
+        )
+
+        try:
+            run = runner.run_suite(suite)
+            # The suite finished without waiting for the hung task
+            assert not finished
+        finally:
+            release.set()
+
+        ok, failed, hung, ok2 = run.results
+        assert ok.success and ok2.success
+        assert not failed.success and failed.error == "agent crashed"
+        assert not hung.success and "Timed out" in hung.error
+        assert hung.latency_ms >= 200
+
+    def test_shards_partition_the_suite(self, tmp_path):
+        suite = _suite(40, sleep=0)
+        runner = EvalRunner(executor=SleepyAgent(), output_dir=tmp_path)
+
+        shards = [runner.run_suite(suite, shard=(i, 3)) for i in (1, 2, 3)]
+
+        ids = [r.task_id for run in shards for r in run.results]
+        assert sorted(ids) == sorted(t.id for t in suite.tasks)
+        assert all(run.total_tasks > 0 for run in shards)
+        assert parse_shard("2/3") == (2, 3)
+        with pytest.raises(ValueError):
+            parse_shard("4/3")
+
+    def test_process_mode_matches_thread_mode(self, tmp_path):
+        suite = get_inbox_suite()
+        thread = EvalRunner(output_dir=tmp_path, concurrency=4).run_suite(suite)
+        process = EvalRunner(
+            output_dir=tmp_path, concurrency=4, mode="process"
+        ).run_suite(suite)
+
+        assert _report(process) == _report(thread)
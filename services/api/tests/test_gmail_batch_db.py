@@ -0,0 +1,93 @@
+"""
+Owner scoping of batched label changes (app.core.gmail_batch) and the bulk
+inbox endpoints, against the real emails table.
+"""
+
+import asyncio
+from unittest import mock
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.core.gmail_batch import QUARANTINE, GmailModifyBatcher, ModifyRequest
+from app.models import Email
+from app.routers import inbox_actions
+from app.settings import settings
+
+IS_POSTGRES = "postgresql" in settings.DATABASE_URL.lower()
+
+pytestmark = pytest.mark.skipif(not IS_POSTGRES, reason="Requires PostgreSQL")
+
+ALICE = "alice-batch@example.com"
+MALLORY = "mallory-batch@example.com"
+
+
+@pytest.fixture
+def mailboxes(db_session: Session):
+    for owner, gmail_id in [(ALICE, "batch-alice-1"), (MALLORY, "batch-mallory-1")]:
+        db_session.add(
+            Email(
+                gmail_id=gmail_id,
+                owner_email=owner,
+                subject="Weekly deals",
+                labels=["INBOX"],
+                quarantined=False,
+            )
+        )
+    db_session.commit()
+
+    # Batches write through their own sessions; savepoints keep them inside
+    # the test's transaction, which is rolled back afterwards
+    def session_factory():
+        return Session(
+            bind=db_session.connection(), join_transaction_mode="create_savepoint"
+        )
+
+    batcher = GmailModifyBatcher(
+        service_for=lambda user: None,
+        session_factory=session_factory,
+        es_client=None,
+        index="emails",
+    )
+    yield db_session, batcher
+    batcher.close()
+
+
+def _email(db: Session, gmail_id: str) -> Email:
+    db.expire_all()
+    return db.query(Email).filter_by(gmail_id=gmail_id).one()
+
+
+def test_batch_leaves_other_owners_rows_unchanged(mailboxes):
+    db, batcher = mailboxes
+
+    batcher.execute(
+        [
+            ModifyRequest(ALICE, "batch-alice-1", QUARANTINE),
+            ModifyRequest(ALICE, "batch-mallory-1", QUARANTINE),
+        ],
+        timeout=10,
+    )
+
+    assert _email(db, "batch-alice-1").quarantined is True
+    assert _email(db, "batch-alice-1").labels == []
+    mallory = _email(db, "batch-mallory-1")
+    assert mallory.quarantined is False
+    assert mallory.labels == ["INBOX"]
+
+
+def test_bulk_endpoint_refuses_other_owners_messages(mailboxes):
+    db, batcher = mailboxes
+    req = inbox_actions.BulkActionRequest(
+        message_ids=["batch-alice-1", "batch-mallory-1"]
+    )
+
+    with mock.patch.object(inbox_actions, "get_batcher", return_value=batcher):
+        with mock.patch.object(inbox_actions, "ES_ENABLED", True):
+            res = asyncio.run(
+                inbox_actions.bulk_quarantine(req, user_email=ALICE, db=db)
+            )
+
+    assert res.updated == ["batch-alice-1"]
+    assert res.failed == ["batch-mallory-1"]
+    assert _email(db, "batch-mallory-1").quarantined is False
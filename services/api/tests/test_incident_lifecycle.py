@@ -4,12 +4,18 @@ Tests for incident lifecycle - Phase 5.4 PR1
 Tests incident creation, state transitions, and watcher logic.
 """
 
+import json
+
 import pytest
 from datetime import datetime, timedelta
 from unittest.mock import Mock
+from sqlalchemy import text
 
 from app.models_incident import Incident, IncidentAction
 from app.intervene.watcher import InvariantWatcher
+from app.settings import settings
+
+IS_POSTGRES = "postgresql" in settings.DATABASE_URL.lower()
 
 
 def test_incident_creation(db_session):
@@ -262,5 +268,129 @@ def test_watcher_planner_regression(db_session):
     assert incident.details["rollback_available"] is True
 
 
+def test_watcher_blocked_keys_single_query(db_session):
+    """Open and rate-limited keys are resolved together for a batch of keys."""
+    watcher = InvariantWatcher(db_session)
+
+    db_session.add(
+        Incident(
+            kind="budget",
+            key="budget.open",
+            severity="sev2",
+            status="acknowledged",
+            summary="Open",
+            details={},
+        )
+    )
+    for i in range(3):
+        db_session.add(
+            Incident(
+                kind="budget",
+                key="budget.noisy",
+                severity="sev2",
+                status="closed",
+                summary=f"Noisy {i}",
+                details={},
+                created_at=datetime.utcnow() - timedelta(minutes=10),
+            )
+        )
+    db_session.commit()
+
+    blocked = watcher._blocked_keys(
+        "budget", ["budget.open", "budget.noisy", "budget.fresh"], hours=1
+    )
+
+    assert blocked == {"budget.open", "budget.noisy"}
+    assert watcher._blocked_keys("budget", [], hours=1) == set()
+
+
+def test_watcher_persists_incidents_in_bulk(db_session):
+    """Built incidents are inserted together and returned with ids."""
+    watcher = InvariantWatcher(db_session)
+
+    pending = [
+        watcher._build_budget_incident("budget.a.daily", {"spent": 150, "limit": 100}),
+        watcher._build_planner_incident("v3", {"status": "regressed"}),
+    ]
+    incidents = watcher._persist_incidents(pending)
+
+    assert [i.key for i in incidents] == ["budget.a.daily", "planner:v3"]
+    assert all(i.id is not None for i in incidents)
+    assert watcher._blocked_keys("budget", ["budget.a.daily"], hours=4) == {
+        "budget.a.daily"
+    }
+    assert watcher._persist_incidents([]) == []
+
+
+@pytest.mark.skipif(not IS_POSTGRES, reason="Requires PostgreSQL")
+def test_watcher_raises_one_incident_per_failing_invariant(db_session):
+    """A failing eval result becomes exactly one incident, then stays blocked."""
+    # eval_results has no ORM model; only the columns the watcher reads.
+    # Temporary, so it goes away with the test's transaction
+    db_session.execute(text("""
+        CREATE TEMP TABLE eval_results (
+            id SERIAL PRIMARY KEY,
+            agent TEXT,
+            task_id TEXT,
+            invariant_results JSONB,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """))
+
+    def add_result(task_id, invariants, minutes_ago):
+        return db_session.execute(
+            text(
+                "INSERT INTO eval_results (agent, task_id, invariant_results, "
+                "created_at) VALUES ('inbox.triage', :task_id, "
+                "CAST(:invariants AS jsonb), now() - :ago * INTERVAL '1 minute') "
+                "RETURNING id"
+            ),
+            {
+                "task_id": task_id,
+                "invariants": json.dumps(invariants),
+                "ago": minutes_ago,
+            },
+        ).scalar()
+
+    failing = {"invariant_id": "PHISH_LABEL", "passed": False, "priority": "high"}
+    add_result("t1", [failing], minutes_ago=20)
+    latest = add_result(
+        "t2",
+        [failing, {"invariant_id": "QUOTA", "passed": True}],
+        minutes_ago=5,
+    )
+    add_result("t3", [{"invariant_id": "ALREADY_OPEN", "passed": False}], 5)
+    add_result("t4", [{"invariant_id": "TOO_OLD", "passed": False}], 600)
+    db_session.add(
+        Incident(
+            kind="invariant",
+            key="INV_ALREADY_OPEN",
+            severity="sev3",
+            status="open",
+            summary="Open",
+            details={},
+        )
+    )
+    db_session.commit()
+
+    watcher = InvariantWatcher(db_session)
+    [incident] = watcher.check_invariants(lookback_minutes=60)
+
+    assert incident.key == "INV_PHISH_LABEL"
+    assert incident.severity == "sev2"
+    assert incident.details["eval_result_id"] == latest
+    assert incident.details["task_id"] == "t2"
+    assert watcher._blocked_keys(
+        "invariant", ["INV_PHISH_LABEL", "INV_ALREADY_OPEN", "INV_QUOTA"], hours=1
+    ) == {"INV_PHISH_LABEL", "INV_ALREADY_OPEN"}
+    assert (
+        db_session.query(Incident).filter(Incident.key == "INV_PHISH_LABEL").count()
+        == 1
+    )
+
+    # The open incident dedups the next run
+    assert watcher.check_invariants(lookback_minutes=60) == []
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
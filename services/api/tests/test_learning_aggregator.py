@@ -10,117 +10,86 @@ from sqlalchemy.orm import Session
 
 from app.autofill_aggregator import (
     aggregate_autofill_profiles,
-    _compute_canonical_map,
-    _compute_stats,
+    _canonical_from_votes,
 )
 from app.models_learning_db import AutofillEvent, FormProfile
 from app.settings import settings
 
-
 # Determine if we're on PostgreSQL or SQLite
 IS_POSTGRES = "postgresql" in settings.DATABASE_URL.lower()
 
 
-@pytest.mark.skipif(not IS_POSTGRES, reason="Requires PostgreSQL")
-def test_compute_canonical_map_picks_most_common_semantic(db_session: Session):
+def test_canonical_from_votes_picks_most_common_semantic():
     """
     Canonical map selects most common semantic for each selector.
 
-    Given: 3 events with votes for selectors
+    Given: Selector votes from 3 events
     When: Computing canonical map
-    Then: Most common semantic wins for each selector
+    Then: Most common semantic wins; ties go to the lowest semantic
     """
-    events = [
-        AutofillEvent(
-            user_id=uuid.uuid4(),
-            host="test.io",
-            schema_hash="test",
-            final_map={"input[name='q1']": "first_name"},
-            suggested_map={},
-            edit_stats={"total_chars_added": 0, "total_chars_deleted": 0},
-            duration_ms=100,
-            status="ok",
-        ),
-        AutofillEvent(
-            user_id=uuid.uuid4(),
-            host="test.io",
-            schema_hash="test",
-            final_map={"input[name='q1']": "first_name"},
-            suggested_map={},
-            edit_stats={"total_chars_added": 0, "total_chars_deleted": 0},
-            duration_ms=100,
-            status="ok",
-        ),
-        AutofillEvent(
-            user_id=uuid.uuid4(),
-            host="test.io",
-            schema_hash="test",
-            final_map={"input[name='q1']": "given_name"},  # Different semantic
-            suggested_map={},
-            edit_stats={"total_chars_added": 0, "total_chars_deleted": 0},
-            duration_ms=100,
-            status="ok",
-        ),
-    ]
-
-    canonical = _compute_canonical_map(events)
+    canonical = _canonical_from_votes(
+        {
+            "input[name='q1']": {"first_name": 2, "given_name": 1},
+            "input[name='q2']": {"surname": 1, "last_name": 1},
+            "input[name='q3']": {},
+        }
+    )
 
     # "first_name" has 2 votes, "given_name" has 1 vote
-    assert canonical["input[name='q1']"] == "first_name"
+    assert canonical == {
+        "input[name='q1']": "first_name",
+        "input[name='q2']": "last_name",
+    }
 
 
 @pytest.mark.skipif(not IS_POSTGRES, reason="Requires PostgreSQL")
-def test_compute_stats_calculates_averages(db_session: Session):
+def test_aggregator_calculates_averages(db_session: Session):
     """
-    Stats function computes success rate, edit distance, and duration.
+    Aggregation computes success rate, edit distance, and duration.
 
     Given: Events with different outcomes and edit stats
-    When: Computing aggregate stats
-    Then: Returns correct averages
+    When: Running aggregation
+    Then: Profile holds the correct averages
     """
-    events = [
-        AutofillEvent(
-            user_id=uuid.uuid4(),
-            host="test.io",
-            schema_hash="test",
-            final_map={},
-            suggested_map={},
-            edit_stats={"total_chars_added": 10, "total_chars_deleted": 5},  # 15 total
-            duration_ms=1000,
-            status="ok",
-        ),
-        AutofillEvent(
-            user_id=uuid.uuid4(),
-            host="test.io",
-            schema_hash="test",
-            final_map={},
-            suggested_map={},
-            edit_stats={"total_chars_added": 5, "total_chars_deleted": 0},  # 5 total
-            duration_ms=2000,
-            status="ok",
-        ),
-        AutofillEvent(
-            user_id=uuid.uuid4(),
-            host="test.io",
-            schema_hash="test",
-            final_map={},
-            suggested_map={},
-            edit_stats={"total_chars_added": 0, "total_chars_deleted": 0},  # 0 total
-            duration_ms=1500,
-            status="validation_failed",  # Not ok!
-        ),
-    ]
+    for added, deleted, duration, status in [
+        (10, 5, 1000, "ok"),  # 15 total
+        (5, 0, 2000, "ok"),  # 5 total
+        (0, 0, 1500, "validation_failed"),  # Not ok!
+    ]:
+        db_session.add(
+            AutofillEvent(
+                user_id=uuid.uuid4(),
+                host="stats.io",
+                schema_hash="test",
+                final_map={},
+                suggested_map={},
+                edit_stats={
+                    "total_chars_added": added,
+                    "total_chars_deleted": deleted,
+                },
+                duration_ms=duration,
+                status=status,
+            )
+        )
+    db_session.commit()
 
-    success_rate, avg_edit_chars, avg_duration_ms = _compute_stats(events)
+    aggregate_autofill_profiles(db_session, days=0)
+    db_session.commit()
+
+    profile = (
+        db_session.query(FormProfile)
+        .filter_by(host="stats.io", schema_hash="test")
+        .one()
+    )
 
     # 2 out of 3 succeeded
-    assert success_rate == pytest.approx(2.0 / 3.0)
+    assert profile.success_rate == pytest.approx(2.0 / 3.0)
 
     # Total edits: 15 + 5 + 0 = 20, average = 20/3 = 6.67
-    assert avg_edit_chars == pytest.approx(20.0 / 3.0)
+    assert profile.avg_edit_chars == pytest.approx(20.0 / 3.0)
 
     # Total duration: 1000 + 2000 + 1500 = 4500, average = 1500
-    assert avg_duration_ms == 1500
+    assert profile.avg_duration_ms == 1500
 
 
 @pytest.mark.skipif(not IS_POSTGRES, reason="Requires PostgreSQL")
@@ -307,3 +276,106 @@ def test_aggregator_works_on_sqlite(db_session: Session):
 
     # Function should exist and be callable
     assert callable(aggregate_autofill_profiles)
+
+
+@pytest.mark.skipif(not IS_POSTGRES, reason="Requires PostgreSQL")
+def test_apply_event_deltas_merges_into_existing_profile(db_session: Session):
+    """
+    Sync-time deltas merge with the profile's running averages and votes.
+
+    Given: A profile built from 2 events by the aggregator
+    When: Applying a delta batch of 2 more events
+    Then: Averages equal a full recompute over all 4 events
+    """
+    from app.autofill_aggregator import apply_event_deltas
+
+    def event(final_map, added, duration, status="ok"):
+        return {
+            "final_map": final_map,
+            "edit_stats": {"total_chars_added": added, "total_chars_deleted": 0},
+            "duration_ms": duration,
+            "status": status,
+        }
+
+    for ev in [event({"q1": "first_name"}, 0, 1000), event({"q1": "given"}, 4, 1000)]:
+        db_session.add(
+            AutofillEvent(user_id=uuid.uuid4(), host="delta.io", schema_hash="s1", **ev)
+        )
+    db_session.commit()
+    aggregate_autofill_profiles(db_session, days=0)
+    db_session.commit()
+
+    profile = apply_event_deltas(
+        db_session,
+        "delta.io",
+        "s1",
+        [
+            event({"q1": "first_name"}, 8, 3000, status="error"),
+            event({"q2": "email"}, 0, 3000),
+        ],
+    )
+    db_session.commit()
+
+    assert profile.event_count == 4
+    assert profile.success_rate == pytest.approx(0.75)
+    assert profile.avg_edit_chars == pytest.approx(3.0)  # (0 + 4 + 8 + 0) / 4
+    assert profile.avg_duration_ms == 2000
+    assert profile.fields == {"q1": "first_name", "q2": "email"}
+    assert profile.field_votes["q1"] == {"first_name": 2, "given": 1}
+
+
+@pytest.mark.skipif(not IS_POSTGRES, reason="Requires PostgreSQL")
+def test_nightly_run_agrees_with_sync_deltas(db_session: Session):
+    """
+    The nightly pass covers the same history as sync-time deltas.
+
+    Given: A form with a 60-day-old event and a delta-maintained profile
+    When: Running the nightly aggregation with days=30
+    Then: The profile's stats are unchanged (old events still count)
+    """
+    from datetime import datetime, timedelta
+
+    from app.autofill_aggregator import apply_event_deltas
+
+    events = [
+        {
+            "final_map": {"q1": "first_name"},
+            "edit_stats": {"total_chars_added": 6, "total_chars_deleted": 0},
+            "duration_ms": 3000,
+            "status": "error",
+        },
+        {
+            "final_map": {"q1": "first_name"},
+            "edit_stats": {"total_chars_added": 0, "total_chars_deleted": 0},
+            "duration_ms": 1000,
+            "status": "ok",
+        },
+    ]
+    now = datetime.utcnow()
+    for ev, created_at in zip(events, [now - timedelta(days=60), now]):
+        db_session.add(
+            AutofillEvent(
+                user_id=uuid.uuid4(),
+                host="window.io",
+                schema_hash="s1",
+                suggested_map={},
+                created_at=created_at,
+                **ev,
+            )
+        )
+        apply_event_deltas(db_session, "window.io", "s1", [ev])
+    db_session.commit()
+
+    aggregate_autofill_profiles(db_session, days=30)
+    db_session.commit()
+
+    profile = (
+        db_session.query(FormProfile)
+        .filter_by(host="window.io", schema_hash="s1")
+        .one()
+    )
+    assert profile.event_count == 2
+    assert profile.success_rate == pytest.approx(0.5)
+    assert profile.avg_edit_chars == pytest.approx(3.0)
+    assert profile.avg_duration_ms == 2000
+    assert profile.field_votes == {"q1": {"first_name": 2}}
@@ -328,3 +328,97 @@ async def test_opportunities_pagination_works(
     second_page_companies = set(item["company"] for item in data)
     # Pages should not overlap
     assert len(first_page_companies & second_page_companies) == 0
+
+
+@pytest.mark.asyncio
+async def test_opportunities_keyset_cursor_pages(
+    async_client, db_session, test_user_email, auth_headers
+):
+    """Following X-Next-Cursor walks every opportunity exactly once."""
+
+    for i in range(5):
+        db_session.add(
+            Email(
+                subject=f"Interview {i}",
+                sender=f"hr{i}@company{i}.com",
+                body_text="Interview opportunity",
+                owner_email=test_user_email,
+                received_at=datetime.now(timezone.utc),
+                category="interview_invite",
+                company=f"Company{i}",
+                role=f"Role{i}",
+                thread_id=f"thread-cursor-{i}",
+            )
+        )
+    db_session.commit()
+
+    seen = []
+    params = {"limit": 2}
+    while True:
+        resp = await async_client.get(
+            "/api/opportunities", params=params, headers=auth_headers
+        )
+        assert resp.status_code == 200
+        seen.extend(item["company"] for item in resp.json())
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        params = {"limit": 2, "cursor": cursor}
+
+    assert sorted(seen) == [f"Company{i}" for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_opportunities_cursor_pins_the_first_page_clock(
+    async_client, db_session, test_user_email, auth_headers, monkeypatch
+):
+    """Priorities that age between pages do not repeat or drop rows."""
+    from datetime import timedelta
+
+    from app.routers import opportunities
+
+    start = datetime.now(timezone.utc)
+    clock = {"now": start}
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return clock["now"]
+
+    monkeypatch.setattr(opportunities, "datetime", FrozenDatetime)
+
+    # High priority for the first request, medium a day later
+    for i, age in enumerate([timedelta(days=2, hours=12), timedelta(days=2, hours=13)]):
+        db_session.add(
+            Email(
+                subject=f"Intro call {i}",
+                sender=f"recruiter{i}@agency{i}.com",
+                body_text="Recruiter outreach",
+                owner_email=test_user_email,
+                received_at=start - age,
+                category="recruiter_outreach",
+                company=f"Agency{i}",
+                role=f"Role{i}",
+                thread_id=f"thread-clock-{i}",
+            )
+        )
+    db_session.commit()
+
+    first = await async_client.get(
+        "/api/opportunities", params={"limit": 1}, headers=auth_headers
+    )
+    assert [item["priority"] for item in first.json()] == ["high"]
+
+    clock["now"] = start + timedelta(days=1)
+    second = await async_client.get(
+        "/api/opportunities",
+        params={"limit": 1, "cursor": first.headers["X-Next-Cursor"]},
+        headers=auth_headers,
+    )
+
+    assert second.status_code == 200
+    assert [item["company"] for item in first.json() + second.json()] == [
+        "Agency0",
+        "Agency1",
+    ]
+    assert second.json()[0]["priority"] == "high"
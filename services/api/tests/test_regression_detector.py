@@ -7,8 +7,12 @@ Tests:
 - Threshold enforcement
 """
 
+from datetime import datetime, timedelta
+
 import pytest
 from unittest.mock import Mock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
 
 from app.guard.regression_detector import RegressionDetector, MetricsStore
 from app.models import AgentAuditLog
@@ -18,60 +22,57 @@ class TestMetricsStore:
     """Test metrics aggregation."""
 
     @pytest.fixture
-    def mock_db(self):
-        """Mock database session."""
-        return Mock()
-
-    def test_window_stats_separates_v1_v2(self, mock_db):
+    def db(self):
+        """In-memory database with the audit log table."""
+        engine = create_engine("sqlite://")
+        AgentAuditLog.__table__.create(engine)
+        with Session(engine) as session:
+            yield session
+
+    @staticmethod
+    def _add_runs(db, selected, latencies):
+        start = datetime(2025, 1, 1)
+        offset = db.query(AgentAuditLog).count()
+        for i, latency in enumerate(latencies, offset):
+            db.add(
+                AgentAuditLog(
+                    run_id=f"run-{i}",
+                    agent="planner",
+                    objective="test",
+                    status="succeeded",
+                    started_at=start + timedelta(seconds=i),
+                    duration_ms=latency,
+                    plan={"planner_meta": {"selected": selected}},
+                )
+            )
+        db.commit()
+
+    def test_window_stats_separates_v1_v2(self, db):
         """Should correctly separate V1 and V2 runs."""
-        store = MetricsStore(mock_db)
-
-        # Mock runs
-        v1_run = Mock(spec=AgentAuditLog)
-        v1_run.status = "succeeded"
-        v1_run.plan = {"planner_meta": {"selected": "v1"}}
-        v1_run.duration_ms = 500.0
-
-        v2_run = Mock(spec=AgentAuditLog)
-        v2_run.status = "succeeded"
-        v2_run.plan = {"planner_meta": {"selected": "v2"}}
-        v2_run.duration_ms = 1200.0
-
-        mock_db.query.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
-            v1_run,
-            v2_run,
-        ]
+        store = MetricsStore(db)
+        self._add_runs(db, "v1", [500.0])
+        self._add_runs(db, "v2", [1200.0])
 
         stats = store.window_stats(window_runs=10)
 
         assert stats["v1"]["samples"] == 1
         assert stats["v2"]["samples"] == 1
 
-    def test_window_stats_computes_aggregates(self, mock_db):
+    def test_window_stats_computes_aggregates(self, db):
         """Should compute quality, latency, cost aggregates."""
-        store = MetricsStore(mock_db)
+        store = MetricsStore(db)
 
-        # Mock V2 runs with varying latencies
-        runs = []
-        for latency in [100, 200, 500, 1000, 2000]:
-            run = Mock(spec=AgentAuditLog)
-            run.status = "succeeded"
-            run.plan = {"planner_meta": {"selected": "v2"}}
-            run.duration_ms = float(latency)
-            runs.append(run)
-
-        mock_db.query.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = runs
+        # V2 runs with varying latencies
+        self._add_runs(db, "v2", [100.0, 200.0, 500.0, 1000.0, 2000.0])
 
         stats = store.window_stats(window_runs=10)
 
         assert stats["v2"]["samples"] == 5
         assert stats["v2"]["latency_p95_ms"] > 1000  # p95 should be high
 
-    def test_window_stats_handles_no_runs(self, mock_db):
+    def test_window_stats_handles_no_runs(self, db):
         """Should handle case with no runs."""
-        store = MetricsStore(mock_db)
-
-        mock_db.query.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = []
+        store = MetricsStore(db)
 
         stats = store.window_stats(window_runs=10)
 
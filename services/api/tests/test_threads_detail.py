@@ -161,3 +161,82 @@ def test_get_thread_detail_snippet(client, test_thread, db_session):
     assert (
         "most recent" in data["snippet"].lower() or "Third message" in data["snippet"]
     )
+
+
+@pytest.fixture
+def long_thread(db_session: Session):
+    """Create a thread whose latest message has an oversized body."""
+    from app.routes_threads import BODY_PREVIEW_CHARS
+
+    thread_id = "thread-long"
+    db_session.add_all(
+        [
+            Email(
+                gmail_id="long-1",
+                thread_id=thread_id,
+                subject="Offer details",
+                sender="recruiter@example.com",
+                recipient="test@example.com",
+                body_text="x" * (BODY_PREVIEW_CHARS + 500),
+                received_at=datetime(2025, 1, 2, 10, 0, 0, tzinfo=timezone.utc),
+            ),
+            Email(
+                gmail_id="long-2",
+                thread_id=thread_id,
+                subject="Intro",
+                sender="recruiter@example.com",
+                recipient="test@example.com",
+                body_text="Short intro",
+                received_at=datetime(2025, 1, 1, 10, 0, 0, tzinfo=timezone.utc),
+            ),
+        ]
+    )
+    db_session.commit()
+    return thread_id
+
+
+def test_get_thread_detail_truncates_bodies(client, long_thread, db_session):
+    """Long bodies are cut server-side and fetched per message on demand."""
+    from app.routes_threads import BODY_PREVIEW_CHARS
+
+    data = client.get(f"/api/threads/{long_thread}").json()
+    latest, oldest = data["messages"]
+
+    assert latest["bodyTruncated"] is True
+    assert len(latest["bodyText"]) == BODY_PREVIEW_CHARS
+    assert oldest["bodyTruncated"] is False
+    assert oldest["bodyText"] == "Short intro"
+
+    body = client.get(f"/api/threads/{long_thread}/messages/{latest['id']}/body")
+    assert body.status_code == 200
+    assert len(body.json()["bodyText"]) == BODY_PREVIEW_CHARS + 500
+
+    missing = client.get(f"/api/threads/other-thread/messages/{latest['id']}/body")
+    assert missing.status_code == 404
+
+
+def test_get_thread_detail_etag_not_modified(client, long_thread, db_session):
+    """Unchanged threads answer If-None-Match with 304; new messages change the ETag."""
+    first = client.get(f"/api/threads/{long_thread}")
+    etag = first.headers["etag"]
+
+    cached = client.get(f"/api/threads/{long_thread}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    db_session.add(
+        Email(
+            gmail_id="long-3",
+            thread_id=long_thread,
+            subject="Re: Offer details",
+            sender="test@example.com",
+            body_text="Thanks!",
+            received_at=datetime(2025, 1, 3, 10, 0, 0, tzinfo=timezone.utc),
+        )
+    )
+    db_session.commit()
+
+    changed = client.get(f"/api/threads/{long_thread}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert len(changed.json()["messages"]) == 3
@@ -0,0 +1,166 @@
+"""
+Unit tests for the two-tier AsyncCache in app.utils.cache.
+
+Redis is replaced by an in-memory fake implementing the handful of commands
+the cache uses.
+"""
+
+import asyncio
+
+import pytest
+
+from app.utils import cache as cache_module
+from app.utils.cache import AsyncCache
+
+pytestmark = pytest.mark.unit
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.ops.append((name, args, kwargs))
+
+        return queue
+
+    async def execute(self):
+        return [
+            await getattr(self.redis, name)(*args, **kwargs)
+            for name, args, kwargs in self.ops
+        ]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.gets = 0
+        self.fail = False
+
+    async def get(self, key):
+        self.gets += 1
+        if self.fail:
+            raise ConnectionError("redis down")
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def sadd(self, key, *members):
+        self.data.setdefault(key, set()).update(members)
+
+    async def expire(self, key, seconds):
+        return True
+
+    async def smembers(self, key):
+        return set(self.data.get(key, set()))
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        if self.fail:
+            raise ConnectionError("redis down")
+        return FakePipeline(self)
+
+
+class Loader:
+    def __init__(self, value="fresh", delay=0.0):
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"value": self.value, "n": self.calls}
+
+
+async def test_concurrent_misses_share_one_computation():
+    cache = AsyncCache(redis_client=None)
+    load = Loader(delay=0.01)
+
+    results = await asyncio.gather(
+        *[cache.get_or_set("facets:x", 60, load) for _ in range(10)]
+    )
+
+    assert load.calls == 1
+    assert all(r == {"value": "fresh", "n": 1} for r in results)
+
+
+async def test_local_tier_fronts_shared_redis():
+    redis = FakeRedis()
+    worker_a = AsyncCache(redis_client=redis)
+    worker_b = AsyncCache(redis_client=redis)
+    load = Loader()
+
+    await worker_a.get_or_set("profile:summary:60", 60, load)
+    gets = redis.gets
+    await worker_a.get_or_set("profile:summary:60", 60, load)
+    assert redis.gets == gets  # served in-process
+
+    # Another worker finds the value in Redis instead of recomputing
+    assert await worker_b.get_or_set("profile:summary:60", 60, load) == {
+        "value": "fresh",
+        "n": 1,
+    }
+    assert load.calls == 1
+
+
+async def test_expiring_entry_is_refreshed_in_background(monkeypatch):
+    cache = AsyncCache(redis_client=None)
+    await cache.set("metrics:x", "old", ttl=10, delta=5.0)
+    load = Loader()
+
+    # rand -> 0: no early refresh this far from expiry
+    monkeypatch.setattr(cache_module.random, "random", lambda: 0.0)
+    assert await cache.get_or_set("metrics:x", 10, load) == "old"
+    assert load.calls == 0
+
+    # rand -> ~1: a slow-to-compute value is refreshed before it expires
+    monkeypatch.setattr(cache_module.random, "random", lambda: 0.9999)
+    assert await cache.get_or_set("metrics:x", 10, load) == "old"
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    assert load.calls == 1
+    assert (await cache.get("metrics:x")).value == {"value": "fresh", "n": 1}
+
+
+async def test_invalidate_tags_clears_both_tiers():
+    redis = FakeRedis()
+    cache = AsyncCache(redis_client=redis)
+    await cache.set("labels:stats", {"total": 1}, 60, tags=("email_categories",))
+    await cache.set("metrics:other", {"total": 2}, 60, tags=("warehouse",))
+
+    await cache.invalidate_tags("email_categories")
+
+    assert await cache.get("labels:stats") is None
+    assert "labels:stats" not in redis.data
+    assert (await cache.get("metrics:other")).value == {"total": 2}
+
+
+async def test_errors_are_not_cached_and_redis_failures_degrade():
+    redis = FakeRedis()
+    redis.fail = True
+    cache = AsyncCache(redis_client=redis)
+
+    async def boom():
+        raise RuntimeError("bq down")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_set("metrics:x", 60, boom)
+
+    load = Loader()
+    assert await cache.get_or_set("metrics:x", 60, load) == {"value": "fresh", "n": 1}
+    assert await cache.get_or_set("metrics:x", 60, load) == {"value": "fresh", "n": 1}
+    assert load.calls == 1
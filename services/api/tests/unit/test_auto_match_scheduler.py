@@ -0,0 +1,181 @@
+"""
+Unit tests for the concurrent per-user auto-match scheduler.
+
+Role matching is faked at the slice level: each fake user owns a number of
+unmatched opportunities and every slice "matches" up to the quota. A slice
+may report opportunities as processed without saving them, like role_match
+does for its LLM fallback.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services import opportunity_auto_match as auto_match
+from app.utils.backfill import Checkpoint
+
+pytestmark = pytest.mark.unit
+
+
+class FakeSession:
+    def __init__(self):
+        self.closed = False
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+class FakeMatcher:
+    def __init__(self, pending, fail=(), unsaved=(), saves_per_slice=None):
+        self.pending = dict(pending)
+        self.fail = set(fail)
+        self.unsaved = set(unsaved)
+        self.saves_per_slice = saves_per_slice
+        self.slices = []
+        self.active = 0
+        self.max_active = 0
+        self.sessions_in_use = set()
+
+    async def __call__(self, db, owner_email, limit):
+        assert db not in self.sessions_in_use  # one session per worker
+        self.sessions_in_use.add(db)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(0.001)
+            self.slices.append(owner_email)
+            if owner_email in self.fail:
+                raise RuntimeError("llm down")
+            processed = min(limit, self.pending[owner_email])
+            if owner_email not in self.unsaved:
+                self.pending[owner_email] -= min(
+                    processed, self.saves_per_slice or processed
+                )
+            return processed
+        finally:
+            self.active -= 1
+            self.sessions_in_use.discard(db)
+
+
+@pytest.fixture
+def sessions():
+    return []
+
+
+@pytest.fixture
+def run(monkeypatch, sessions):
+    def install(pending, **kwargs):
+        matcher = FakeMatcher(pending, **kwargs)
+        monkeypatch.setattr(
+            auto_match, "_users_with_active_resumes", lambda db: sorted(pending)
+        )
+        monkeypatch.setattr(auto_match, "_match_slice", matcher)
+        monkeypatch.setattr(
+            auto_match, "_unmatched_count", lambda db, owner: matcher.pending[owner]
+        )
+
+        def factory():
+            session = FakeSession()
+            sessions.append(session)
+            return session
+
+        return matcher, factory
+
+    return install
+
+
+async def test_heavy_user_does_not_block_others(run):
+    matcher, factory = run({"a-heavy": 100, "b": 3, "c": 2})
+
+    total = await auto_match.auto_match_all_opportunities(
+        None, session_factory=factory, concurrency=1, user_quota=10
+    )
+
+    assert total == 105
+    # Every user gets a turn before the heavy user's second slice
+    assert matcher.slices[:4] == ["a-heavy", "b", "c", "a-heavy"]
+    assert all(n == 0 for n in matcher.pending.values())
+
+
+async def test_concurrency_budget_and_session_per_worker(run, sessions):
+    matcher, factory = run({f"user{i}": 25 for i in range(10)})
+
+    total = await auto_match.auto_match_all_opportunities(
+        None, session_factory=factory, concurrency=3, user_quota=5
+    )
+
+    assert total == 250
+    assert matcher.max_active == 3
+    assert len(sessions) == 3
+    assert all(session.closed for session in sessions)
+
+
+async def test_failed_user_is_skipped(run, sessions):
+    matcher, factory = run({"a": 5, "b": 5}, fail={"a"})
+
+    total = await auto_match.auto_match_all_opportunities(
+        None, session_factory=factory, concurrency=1, user_quota=10
+    )
+
+    assert total == 5
+    assert matcher.slices.count("a") == 1
+    assert sessions[0].rollbacks == 1
+
+
+async def test_resumes_from_checkpoint(run, tmp_path):
+    path = str(tmp_path / "auto_match.json")
+    interrupted = Checkpoint(path=path, counters={"processed": 7}, completed=["a"])
+    interrupted.save()
+    matcher, factory = run({"a": 7, "b": 4})
+
+    total = await auto_match.auto_match_all_opportunities(
+        None, session_factory=factory, checkpoint=Checkpoint.load(path)
+    )
+
+    assert total == 11
+    assert "a" not in matcher.slices
+    saved = Checkpoint.load(path)
+    assert saved.done and sorted(saved.completed) == ["a", "b"]
+
+    # A finished checkpoint starts a new run
+    matcher, factory = run({"a": 1, "b": 0})
+    total = await auto_match.auto_match_all_opportunities(
+        None, session_factory=factory, checkpoint=Checkpoint.load(path)
+    )
+    assert total == 1
+    assert "a" in matcher.slices
+
+
+async def test_unsaved_matches_do_not_requeue_the_user(run):
+    """Fallback results count as processed but leave the backlog as it was."""
+    matcher, factory = run({"a": 30, "b": 3}, unsaved={"a"})
+
+    total = await auto_match.auto_match_all_opportunities(
+        None, session_factory=factory, concurrency=1, user_quota=10
+    )
+
+    assert total == 3
+    assert matcher.slices.count("a") == 1
+    assert matcher.pending == {"a": 30, "b": 0}
+
+
+async def test_slices_per_user_are_capped(run, tmp_path):
+    matcher, factory = run({"a": 100, "b": 2}, saves_per_slice=1)
+    checkpoint = Checkpoint(path=str(tmp_path / "auto_match.json"))
+
+    total = await auto_match.auto_match_all_opportunities(
+        None,
+        session_factory=factory,
+        concurrency=1,
+        user_quota=10,
+        max_slices=5,
+        checkpoint=checkpoint,
+    )
+
+    assert matcher.slices.count("a") == 5
+    assert total == 7
+    assert sorted(Checkpoint.load(checkpoint.path).completed) == ["a", "b"]
@@ -0,0 +1,162 @@
+"""
+Unit tests for the BigQuery result cache behind /metrics/profile.
+
+BigQuery is replaced by a fake client that records the SQL and parameters it
+receives; the shared cache runs without Redis.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import metrics_profile
+from app.services import bq_result_cache
+from app.services.bq_result_cache import (
+    BQResultCache,
+    last_refresh_before,
+    next_refresh_after,
+    result_key,
+)
+from app.utils.cache import AsyncCache
+
+pytestmark = pytest.mark.unit
+
+
+class FakeClock:
+    def __init__(self):
+        # 2026-03-10 12:00 UTC
+        self.now = datetime(2026, 3, 10, 12, tzinfo=timezone.utc).timestamp()
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(bq_result_cache, "time", fake)
+    monkeypatch.setattr(bq_result_cache, "WAREHOUSE_REFRESH_UTC", "05:00")
+    return fake
+
+
+class Runner:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, sql, params):
+        self.calls.append((sql, params))
+        return [{"n": len(self.calls)}]
+
+
+class FakeField:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeResult(list):
+    def __init__(self, rows):
+        super().__init__(tuple(row.values()) for row in rows)
+        self.schema = [FakeField(name) for name in rows[0]] if rows else []
+
+
+class FakeBigQueryClient:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def query(self, sql, job_config=None):
+        params = {p.name: p.value for p in job_config.query_parameters or []}
+        self.queries.append((sql, params if job_config else None))
+        return self
+
+    def result(self):
+        return FakeResult(self.rows)
+
+
+def test_key_ignores_formatting_but_not_parameters():
+    sql = "SELECT day\nFROM t\n  LIMIT @days;"
+
+    assert result_key(sql, {"days": 7}) == result_key(
+        "SELECT day FROM t LIMIT @days", {"days": 7}
+    )
+    assert result_key(sql, {"days": 7}) != result_key(sql, {"days": 30})
+
+
+def test_refresh_boundaries_follow_nightly_schedule(clock):
+    boundary = datetime(2026, 3, 10, 5, tzinfo=timezone.utc).timestamp()
+
+    assert last_refresh_before(clock.now) == boundary
+    assert next_refresh_after(clock.now) == boundary + 24 * 3600
+    assert last_refresh_before(boundary - 1) == boundary - 24 * 3600
+
+
+async def test_stale_results_are_served_while_revalidating(clock):
+    run = Runner()
+    results = BQResultCache(run, store=AsyncCache(redis_client=None))
+
+    first = await asyncio.gather(*[results.fetch("SELECT 1") for _ in range(5)])
+    assert len(run.calls) == 1
+    assert [r.rows for r in first] == [[{"n": 1}]] * 5
+    assert not first[0].stale
+
+    # Fresh until the next nightly refresh
+    clock.now += 12 * 3600
+    assert (await results.fetch("SELECT 1")).rows == [{"n": 1}]
+    assert len(run.calls) == 1
+
+    clock.now += 6 * 3600
+    stale = await results.fetch("SELECT 1")
+    assert stale.stale and stale.rows == [{"n": 1}]
+    await asyncio.sleep(0.05)
+
+    assert len(run.calls) == 2
+    refreshed = await results.fetch("SELECT 1")
+    assert refreshed.rows == [{"n": 2}] and not refreshed.stale
+    assert refreshed.as_of == clock.now
+
+
+async def test_refresh_all_reruns_only_outdated_mart_queries(clock):
+    run = Runner()
+    results = BQResultCache(run, store=AsyncCache(redis_client=None))
+    await results.fetch("SELECT mart")
+    await results.fetch("SELECT staging", max_age=60)
+
+    # Nothing to do before the next boundary
+    assert await results.refresh_all() == 0
+
+    clock.now = next_refresh_after(clock.now) + 30
+    assert await results.refresh_all() == 1
+    assert [sql for sql, _ in run.calls] == ["SELECT mart", "SELECT staging"] + [
+        "SELECT mart"
+    ]
+
+    # Already refreshed since the boundary (e.g. by another worker)
+    assert await results.refresh_all() == 0
+
+
+def test_endpoint_reports_as_of_and_caches_query(clock, monkeypatch):
+    client = FakeBigQueryClient(
+        [{"day": datetime(2026, 3, 9, tzinfo=timezone.utc), "messages_count": 4}]
+    )
+    monkeypatch.setattr(metrics_profile, "USE_WAREHOUSE", True)
+    monkeypatch.setattr(metrics_profile, "get_bq_client", lambda: client)
+    monkeypatch.setattr(
+        metrics_profile,
+        "results",
+        BQResultCache(metrics_profile._run_query, store=AsyncCache(redis_client=None)),
+    )
+    app = FastAPI()
+    app.include_router(metrics_profile.router)
+    http = TestClient(app)
+
+    body = http.get("/metrics/profile/activity_daily?days=7").json()
+    http.get("/metrics/profile/activity_daily?days=7")
+
+    assert body["rows"] == [{"day": "2026-03-09T00:00:00+00:00", "messages_count": 4}]
+    assert body["as_of"] == "2026-03-10T12:00:00+00:00"
+    assert body["stale"] is False
+    assert len(client.queries) == 1
+    assert client.queries[0][1] == {"days": 7}
@@ -0,0 +1,152 @@
+"""
+Pure helpers of app.core.email_partitions (naming, bounds, index rewrites)
+and the Postgres-only guards. The conversion itself runs against Postgres in
+tests/integration/test_email_partitions_pg.py.
+"""
+
+from datetime import date, datetime, timezone
+from unittest import mock
+
+import pytest
+from sqlalchemy import create_engine
+
+from app import scheduler
+from app.core import email_partitions as ep
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.mark.parametrize(
+    "month, delta, expected",
+    [
+        (date(2025, 1, 1), 1, date(2025, 2, 1)),
+        (date(2025, 12, 1), 1, date(2026, 1, 1)),
+        (date(2025, 3, 1), -3, date(2024, 12, 1)),
+        (date(2025, 6, 1), 24, date(2027, 6, 1)),
+    ],
+)
+def test_add_months(month, delta, expected):
+    assert ep.add_months(month, delta) == expected
+
+
+def test_partition_names_round_trip():
+    name = ep.partition_name(ep.month_start(datetime(2025, 11, 30, 23, 59)))
+
+    assert name == "emails_p2025_11"
+    assert ep.partition_month(name) == date(2025, 11, 1)
+    assert ep.partition_month(ep.DEFAULT_PARTITION) is None
+    assert ep.partition_month("emails_archive_2025_11") is None
+
+
+def test_partition_bounds_are_utc_months():
+    ddl = ep.partition_ddl("emails", date(2025, 12, 1))
+
+    assert ddl == (
+        "CREATE TABLE emails_p2025_12 PARTITION OF emails "
+        "FOR VALUES FROM ('2025-12-01 00:00:00+00') TO ('2026-01-01 00:00:00+00')"
+    )
+
+
+def test_unique_indexes_get_the_partition_key():
+    name, ddl = ep.partitioned_index_ddl(
+        "CREATE UNIQUE INDEX ix_emails_gmail_id ON public.emails "
+        "USING btree (gmail_id)",
+        ep.STAGING,
+    )
+
+    assert name == "ix_emails_gmail_id__p"
+    assert ddl == (
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_emails_gmail_id__p "
+        "ON emails_partitioned USING btree (gmail_id, received_at)"
+    )
+
+
+def test_other_indexes_are_copied_as_is():
+    _, ddl = ep.partitioned_index_ddl(
+        "CREATE INDEX idx_emails_search ON public.emails "
+        "USING btree (subject, sender, recipient) WHERE (quarantined = false)",
+        ep.STAGING,
+    )
+    _, ordered = ep.partitioned_index_ddl(
+        "CREATE UNIQUE INDEX ix_x ON public.emails USING btree (received_at DESC, id)",
+        ep.STAGING,
+    )
+
+    assert ddl == (
+        "CREATE INDEX IF NOT EXISTS idx_emails_search__p ON emails_partitioned "
+        "USING btree (subject, sender, recipient) WHERE (quarantined = false)"
+    )
+    assert "(received_at DESC, id)" in ordered
+
+
+def test_partial_and_expression_unique_indexes():
+    _, ddl = ep.partitioned_index_ddl(
+        "CREATE UNIQUE INDEX ix_y ON public.emails USING btree (lower(sender)) "
+        "WHERE (owner_email IS NOT NULL)",
+        ep.STAGING,
+    )
+
+    assert ddl.endswith(
+        "USING btree (lower(sender), received_at) WHERE (owner_email IS NOT NULL)"
+    )
+
+
+def test_long_index_names_stay_within_postgres_limit():
+    name, _ = ep.partitioned_index_ddl(
+        f"CREATE INDEX {'x' * 63} ON public.emails USING btree (subject)",
+        ep.STAGING,
+    )
+
+    assert len(name) <= 63
+
+
+def test_unparseable_index_definition_is_rejected():
+    with pytest.raises(ValueError):
+        ep.partitioned_index_ddl("CREATE INDEX weird", ep.STAGING)
+
+
+def test_inbound_foreign_keys_point_at_the_key_table():
+    ddl = ep.repointed_fk_ddl(
+        "FOREIGN KEY (email_id) REFERENCES emails(id) ON DELETE CASCADE"
+    )
+    qualified = ep.repointed_fk_ddl(
+        "FOREIGN KEY (last_email_id) REFERENCES public.emails(id) NOT VALID"
+    )
+
+    assert ddl == (
+        "FOREIGN KEY (email_id) REFERENCES email_keys(id) ON DELETE CASCADE "
+        "NOT VALID"
+    )
+    assert qualified == (
+        "FOREIGN KEY (last_email_id) REFERENCES email_keys(id) NOT VALID"
+    )
+    with pytest.raises(ValueError):
+        ep.repointed_fk_ddl("FOREIGN KEY (user_id) REFERENCES users(id)")
+
+
+def test_key_trigger_reads_the_table_it_is_installed_on():
+    staging = ep._keys_sync_ddl(ep.STAGING)
+    swapped = ep._keys_sync_ddl(ep.PARENT)
+
+    assert "FROM emails_partitioned WHERE id = OLD.id" in staging
+    assert "FROM emails WHERE id = OLD.id" in swapped
+    # A second row with the same id is rejected, a moved row is not
+    assert "count(*) FROM emails WHERE id = NEW.id) > 1" in swapped
+
+
+def test_partition_job_is_a_no_op_on_sqlite():
+    sqlite = create_engine("sqlite://")
+    with mock.patch("app.db.engine", sqlite), mock.patch.object(
+        ep, "ensure_partitions"
+    ) as ensure:
+        scheduler.job_manage_email_partitions()
+
+    assert not ensure.called
+    with sqlite.connect() as conn:
+        assert not ep.is_postgres(conn)
+
+
+def test_month_start_of_aware_datetime():
+    assert ep.month_start(datetime(2026, 2, 28, 23, tzinfo=timezone.utc)) == date(
+        2026, 2, 1
+    )
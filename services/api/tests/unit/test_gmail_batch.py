@@ -0,0 +1,381 @@
+"""
+Batched Gmail label changes (app.core.gmail_batch) and the executors and
+bulk inbox endpoints that use them.
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest import mock
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from app.core import executors
+from app.core.gmail_batch import (
+    ARCHIVE,
+    GmailModifyBatcher,
+    ModifyRequest,
+    TokenBucket,
+    add_label,
+    move_to,
+)
+from app.routers import inbox_actions
+
+pytestmark = pytest.mark.unit
+
+USER = "alice@example.com"
+
+
+def _http_error(status, message="error"):
+    content = json.dumps({"error": {"code": status, "message": message}})
+    return HttpError(httplib2.Response({"status": status}), content.encode())
+
+
+class _Call:
+    def __init__(self, fn):
+        self._fn = fn
+
+    def execute(self):
+        return self._fn()
+
+
+class FakeLabels:
+    """``users.labels``: user labels by name, IDs like Gmail's ``Label_N``."""
+
+    def __init__(self, names=()):
+        self.ids = {name: f"Label_{n}" for n, name in enumerate(names, 1)}
+        self.list_calls = 0
+        self.created = []
+
+    def list(self, userId):
+        self.list_calls += 1
+        labels = [{"id": i, "name": name} for name, i in self.ids.items()]
+        return _Call(lambda: {"labels": labels})
+
+    def create(self, userId, body):
+        self.created.append(body["name"])
+        self.ids[body["name"]] = f"Label_{len(self.ids) + 1}"
+        return _Call(lambda: {"id": self.ids[body["name"]], "name": body["name"]})
+
+
+class FakeGmail:
+    """Records modify/batchModify calls; fails on ``bad`` ids and ``throttle``.
+
+    Like Gmail, rejects the whole request when a label is not a label ID.
+    """
+
+    def __init__(self, bad=(), throttle=0):
+        self.bad = set(bad)
+        self.throttle = throttle
+        self.batch_calls = []
+        self.single_calls = []
+        self.label_api = FakeLabels()
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def labels(self):
+        return self.label_api
+
+    def _maybe_fail(self, ids, body):
+        if self.throttle:
+            self.throttle -= 1
+            raise _http_error(429)
+        known = set(self.label_api.ids.values()) | {"INBOX", "SPAM"}
+        for label in body["addLabelIds"] + body["removeLabelIds"]:
+            if label not in known and not label.startswith("CATEGORY_"):
+                raise _http_error(400, f"Invalid label: {label}")
+        if self.bad & set(ids):
+            raise _http_error(400, "Invalid id value")
+        return {}
+
+    def batchModify(self, userId, body):
+        self.batch_calls.append(body)
+        return _Call(lambda: self._maybe_fail(body["ids"], body))
+
+    def modify(self, userId, id, body):
+        self.single_calls.append(id)
+        return _Call(lambda: self._maybe_fail([id], body))
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    """Records statements; SELECTs return ``rows`` (emails as stored)."""
+
+    statements = []
+    rows = []
+
+    def execute(self, statement, params=None):
+        FakeSession.statements.append((str(statement), params))
+        return FakeResult(FakeSession.rows if "SELECT" in str(statement) else [])
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeES:
+    """Fails ``missing`` docs; ``foreign`` docs are no-ops, as the script does."""
+
+    def __init__(self, missing=(), foreign=()):
+        self.missing = set(missing)
+        self.foreign = set(foreign)
+        self.bulk_calls = []
+
+    def bulk(self, operations, refresh=None):
+        self.bulk_calls.append(operations)
+        items = []
+        for op in operations[::2]:
+            doc_id = op["update"]["_id"]
+            error = {"reason": "document missing"} if doc_id in self.missing else None
+            result = "noop" if doc_id in self.foreign else "updated"
+            items.append({"update": {"_id": doc_id, "error": error, "result": result}})
+        return {"errors": bool(self.missing), "items": items}
+
+
+@pytest.fixture
+def fakes():
+    FakeSession.statements, FakeSession.rows = [], []
+    gmail, es, sleeps = FakeGmail(), FakeES(), []
+    batcher = GmailModifyBatcher(
+        service_for=lambda user: gmail,
+        session_factory=FakeSession,
+        es_client=es,
+        index="emails",
+        quota_units_per_second=1e9,
+        sleep=sleeps.append,
+    )
+    yield SimpleNamespace(gmail=gmail, es=es, sleeps=sleeps, batcher=batcher)
+    batcher.close()
+
+
+def _archive(n, prefix="m"):
+    return [ModifyRequest(USER, f"{prefix}{i}", ARCHIVE) for i in range(n)]
+
+
+def test_5000_archives_cost_at_most_5_calls_per_backend(fakes):
+    outcomes = fakes.batcher.execute(_archive(5_000), timeout=30)
+
+    assert all(o.ok and not o.mirror_error for o in outcomes)
+    assert len(fakes.gmail.batch_calls) <= 5
+    assert fakes.gmail.single_calls == []
+    # Per batch: the UPDATE and the opportunity_state refresh query
+    assert len(FakeSession.statements) <= 2 * 5
+    assert len(fakes.es.bulk_calls) <= 5
+    batched = sorted(i for body in fakes.gmail.batch_calls for i in body["ids"])
+    assert batched == sorted(f"m{i}" for i in range(5_000))
+    assert fakes.gmail.batch_calls[0]["removeLabelIds"] == ["INBOX"]
+    sql, params = FakeSession.statements[0]
+    assert "WHERE gmail_id = ANY(:ids)" in sql and params["remove"] == ["INBOX"]
+
+
+def test_requests_batch_per_user_and_change(fakes):
+    requests = [
+        ModifyRequest(USER, "a1", ARCHIVE),
+        ModifyRequest("bob@example.com", "b1", ARCHIVE),
+        ModifyRequest(USER, "a2", add_label("Receipts")),
+        ModifyRequest(USER, "a3", ARCHIVE),
+    ]
+
+    fakes.batcher.execute(requests, timeout=10)
+
+    groups = sorted(
+        (tuple(b["ids"]), tuple(b["addLabelIds"])) for b in fakes.gmail.batch_calls
+    )
+    assert groups == [(("a1", "a3"), ())]
+    assert sorted(fakes.gmail.single_calls) == ["a2", "b1"]
+
+
+def test_partial_failures_are_isolated_retried_and_reported(fakes):
+    fakes.gmail.bad = {"m17", "m901", "m2500"}
+    fakes.gmail.throttle = 2
+    fakes.es.missing = {"m3"}
+
+    outcomes = {o.gmail_id: o for o in fakes.batcher.execute(_archive(3_000))}
+
+    failed = {i for i, o in outcomes.items() if not o.ok}
+    assert failed == {"m17", "m901", "m2500"}
+    assert "HTTP 400" in outcomes["m17"].error
+    assert outcomes["m3"].ok and "document missing" in outcomes["m3"].mirror_error
+    # 429s were backed off, not reported
+    assert len(fakes.sleeps) == 2
+    # Individual calls only around the failing ids
+    assert len(fakes.gmail.single_calls) <= 2 * len(failed)
+    # Failed ids never reach the local mirror
+    mirrored = {op["update"]["_id"] for ops in fakes.es.bulk_calls for op in ops[::2]}
+    assert mirrored.isdisjoint(failed) and len(mirrored) == 2_997
+
+
+def test_persistent_throttling_fails_after_retries(fakes):
+    fakes.gmail.throttle = 10_000
+    fakes.batcher.max_retries = 2
+
+    [outcome] = fakes.batcher.execute(_archive(1), timeout=10)
+
+    assert not outcome.ok and "HTTP 429" in outcome.error
+    assert len(fakes.sleeps) == 2
+    assert fakes.es.bulk_calls == []
+
+
+def test_users_without_gmail_get_local_changes_only(fakes):
+    fakes.batcher.service_for = lambda user: None
+    fakes.es.missing = {"m1"}
+
+    outcomes = fakes.batcher.execute(_archive(3), timeout=10)
+
+    assert [o.ok for o in outcomes] == [True, False, True]
+    assert fakes.gmail.batch_calls == [] and len(fakes.es.bulk_calls) == 1
+
+
+def test_token_bucket_paces_to_quota():
+    now, sleeps = [0.0], []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(250, clock=lambda: now[0], sleep=sleep)
+    for _ in range(15):  # 750 units: 250 up front, then 2s of refill
+        bucket.acquire(50)
+
+    assert sum(sleeps) == pytest.approx(2.0)
+
+
+def test_execute_action_enqueues_and_waits_for_its_outcome(fakes):
+    pa = SimpleNamespace(
+        action=SimpleNamespace(value="label_email"),
+        email_id=7,
+        params={"label": "Receipts"},
+    )
+    with mock.patch.object(executors, "get_batcher", return_value=fakes.batcher):
+        with mock.patch.object(
+            executors, "_resolve_emails", return_value={7: ("g7", USER)}
+        ):
+            assert executors.execute_action(pa) == (True, None)
+            fakes.gmail.bad = {"g7"}
+            assert executors.execute_action(pa)[0] is False
+
+    assert fakes.gmail.single_calls == ["g7", "g7"]
+    missing = SimpleNamespace(**{**vars(pa), "params": {}})
+    assert executors.execute_action(missing) == (False, "Missing 'label' param")
+
+
+def test_bulk_inbox_endpoint_uses_the_batcher(fakes):
+    fakes.gmail.bad = {"m1"}
+    req = inbox_actions.BulkActionRequest(message_ids=["m0", "m1", "x9", "m2"])
+    owned = mock.Mock(return_value=["m0", "m1", "m2"])
+
+    with mock.patch.object(inbox_actions, "get_batcher", return_value=fakes.batcher):
+        with mock.patch.object(inbox_actions, "ES_ENABLED", True):
+            with mock.patch.object(inbox_actions, "_owned_message_ids", owned):
+                res = asyncio.run(
+                    inbox_actions.bulk_quarantine(req, user_email=USER, db=None)
+                )
+
+    # Someone else's message is failed without reaching any backend
+    owned.assert_called_once_with(None, USER, ["m0", "m1", "x9", "m2"])
+    assert res.updated == ["m0", "m2"] and res.failed == ["m1", "x9"]
+    assert fakes.gmail.batch_calls[0]["ids"] == ["m0", "m1", "m2"]
+    [ops] = fakes.es.bulk_calls
+    assert ops[1]["script"]["params"]["fields"]["quarantined"] is True
+    assert ops[1]["script"]["params"]["owner"] == USER
+    sql, params = FakeSession.statements[0]
+    assert "quarantined = :set_quarantined" in sql
+    assert "owner_email = :owner" in sql and params["owner"] == USER
+
+
+def test_label_names_are_resolved_to_ids_once_per_account(fakes):
+    fakes.gmail.label_api = FakeLabels(["Receipts"])
+    requests = [ModifyRequest(USER, f"m{i}", add_label("Receipts")) for i in range(3)]
+    requests += [ModifyRequest(USER, f"n{i}", move_to("Archive")) for i in range(2)]
+
+    outcomes = fakes.batcher.execute(requests, timeout=10)
+    fakes.batcher.execute([ModifyRequest(USER, "m9", add_label("Archive"))], timeout=10)
+
+    assert all(o.ok for o in outcomes)
+    bodies = {tuple(b["ids"]): b for b in fakes.gmail.batch_calls}
+    assert bodies[("m0", "m1", "m2")]["addLabelIds"] == ["Label_1"]
+    assert bodies[("n0", "n1")]["addLabelIds"] == ["Label_2"]
+    assert bodies[("n0", "n1")]["removeLabelIds"] == ["INBOX"]
+    assert fakes.gmail.label_api.created == ["Archive"]
+    assert fakes.gmail.label_api.list_calls == 2  # first lookup, then the miss
+    # The local mirror stores label IDs, like Gmail sync
+    assert any(p["add"] == ["Label_1"] for _, p in FakeSession.statements)
+
+
+def test_request_wide_errors_fail_the_batch_without_splitting(fakes):
+    fakes.batcher._label_ids[USER] = {"Stale": "Label_404"}  # deleted in Gmail
+
+    outcomes = fakes.batcher.execute(
+        [ModifyRequest(USER, f"m{i}", add_label("Stale")) for i in range(250)],
+        timeout=10,
+    )
+
+    assert not any(o.ok for o in outcomes)
+    assert "Invalid label" in outcomes[0].error
+    assert len(fakes.gmail.batch_calls) == 1 and fakes.gmail.single_calls == []
+    assert FakeSession.statements == [] and fakes.es.bulk_calls == []
+    # Re-resolved (and created) on the next batch
+    [outcome] = fakes.batcher.execute(
+        [ModifyRequest(USER, "m0", add_label("Stale"))], timeout=10
+    )
+    assert outcome.ok and fakes.gmail.label_api.created == ["Stale"]
+
+
+def test_label_changes_refresh_opportunity_state(fakes):
+    """The raw UPDATE skips the ORM listener; the batch re-derives the state."""
+
+    def row(id, labels, state):
+        values = dict(
+            id=id,
+            subject="Interview next week",
+            sender="recruiter@acme.example",
+            body_text="",
+            labels=labels,
+            category=None,
+            opportunity_state=state,
+        )
+        return SimpleNamespace(_mapping=values, **values)
+
+    FakeSession.rows = [
+        row(1, ["CATEGORY_PROMOTIONS"], "heuristic"),
+        row(2, ["INBOX"], "heuristic"),
+    ]
+    fakes.batcher.execute(
+        [ModifyRequest(USER, g, add_label("CATEGORY_PROMOTIONS")) for g in "ab"],
+        timeout=10,
+    )
+
+    sql = [statement for statement, _ in FakeSession.statements]
+    assert sql[0].startswith("UPDATE emails SET labels")
+    assert "is_real_opportunity IS NULL" in sql[1]
+    assert FakeSession.statements[2] == (
+        "UPDATE emails SET opportunity_state = :state WHERE id = :id",
+        [{"id": 1, "state": "excluded"}],
+    )
+
+
+def test_search_index_updates_skip_other_owners_documents(fakes):
+    fakes.es.foreign = {"m1"}
+
+    outcomes = fakes.batcher.execute(_archive(2), timeout=10)
+
+    assert outcomes[0].mirror_error is None
+    assert outcomes[1].mirror_error == f"es: not owned by {USER}"
@@ -0,0 +1,303 @@
+"""
+Coordinated scheduler runs (app.core.job_locks): several simulated API
+workers share one SQLite database (or a fake Redis) and race for each
+trigger; each trigger must run exactly once and never overlap itself.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import pytest
+from apscheduler.triggers.cron import CronTrigger
+from sqlalchemy import create_engine
+
+from app import scheduler
+from app.core import job_locks as jl
+from app.models import JobLease
+
+pytestmark = pytest.mark.unit
+
+WORKERS = 4
+T0 = datetime(2026, 1, 5, 2, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def backend(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'leases.db'}")
+    JobLease.__table__.create(engine)
+    yield jl.LeaseTableBackend(engine)
+    engine.dispose()
+
+
+class FakeRedis:
+    """The commands RedisLockBackend uses; the scripts run as Python."""
+
+    def __init__(self):
+        self.values = {}
+        self.expires = {}
+        self.hashes = {}
+        self.lock = threading.Lock()
+
+    def _live(self, key):
+        if key in self.expires and self.expires[key] <= time.monotonic():
+            self.values.pop(key, None)
+            self.expires.pop(key, None)
+        return self.values.get(key)
+
+    def set(self, key, value, nx=False, px=None):
+        with self.lock:
+            if nx and self._live(key) is not None:
+                return None
+            self.values[key] = str(value).encode()
+            if px:
+                self.expires[key] = time.monotonic() + px / 1000
+            return True
+
+    def get(self, key):
+        with self.lock:
+            return self._live(key)
+
+    def hset(self, key, mapping):
+        with self.lock:
+            self.hashes.setdefault(key, {}).update(
+                {k.encode(): str(v).encode() for k, v in mapping.items()}
+            )
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def register_script(self, source):
+        def script(keys, args):
+            with self.lock:
+                if self._live(keys[0]) != str(args[0]).encode():
+                    return 0
+                if "PEXPIRE" in source:
+                    self.expires[keys[0]] = time.monotonic() + int(args[1]) / 1000
+                else:
+                    del self.values[keys[0]]
+                return 1
+
+        return script
+
+
+@pytest.fixture(params=["lease_table", "redis"])
+def any_backend(request, backend):
+    if request.param == "redis":
+        return jl.RedisLockBackend(FakeRedis())
+    return backend
+
+
+def race(coordinators, job_id, func, slot):
+    """Start every worker's run for ``slot`` at once; their outcomes."""
+    barrier = threading.Barrier(len(coordinators))
+    outcomes = [None] * len(coordinators)
+
+    def worker(i):
+        barrier.wait()
+        outcomes[i] = coordinators[i].run(job_id, func, slot)
+
+    threads = [
+        threading.Thread(target=worker, args=(i,)) for i in range(len(coordinators))
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return outcomes
+
+
+def test_each_trigger_runs_exactly_once_across_workers(any_backend):
+    coordinators = [
+        jl.JobCoordinator(any_backend, holder=f"worker-{i}") for i in range(WORKERS)
+    ]
+    runs = []
+
+    def job():
+        runs.append(threading.current_thread().name)
+        time.sleep(0.05)
+
+    for n in range(3):
+        slot = T0 + timedelta(minutes=15 * n)
+        outcomes = race(coordinators, "watch_incidents", job, slot)
+
+        assert len(runs) == n + 1
+        assert outcomes.count(jl.OK) == 1
+        assert set(outcomes) <= {jl.OK, jl.LOCKED, jl.CLAIMED}
+        # A worker whose timer fires after the run finished still skips it
+        assert coordinators[0].run("watch_incidents", job, slot) == jl.CLAIMED
+
+    assert len(runs) == 3
+
+
+def test_long_run_never_overlaps_itself(any_backend):
+    """The lease outlives its TTL while the job runs, via renewals."""
+    first = jl.JobCoordinator(any_backend, holder="worker-0", ttl=0.3)
+    second = jl.JobCoordinator(any_backend, holder="worker-1", ttl=0.3)
+    started, release = threading.Event(), threading.Event()
+    running, overlaps = [], []
+
+    def job():
+        if running:
+            overlaps.append(True)
+        running.append(True)
+        started.set()
+        release.wait(5)
+        running.pop()
+
+    slow = threading.Thread(target=first.run, args=("sweep", job, T0))
+    slow.start()
+    started.wait(5)
+    outcomes = []
+    for minute in range(1, 4):  # Next triggers, long past the TTL
+        time.sleep(0.3)
+        outcomes.append(second.run("sweep", job, T0 + timedelta(minutes=minute)))
+    release.set()
+    slow.join()
+
+    assert outcomes == [jl.LOCKED] * 3
+    assert not overlaps
+    assert second.run("sweep", job, T0 + timedelta(minutes=4)) == jl.OK
+
+
+def test_failures_are_recorded_and_release_the_lease(any_backend):
+    coordinator = jl.JobCoordinator(any_backend, holder="worker-0")
+
+    def broken():
+        raise RuntimeError("boom")
+
+    assert coordinator.run("canary", broken, T0) == jl.FAILED
+    status = coordinator.status("canary")
+    assert status["last_status"] == jl.FAILED
+    assert status["lock_holder"] is None
+    assert status["last_success_at"] is None
+
+    assert coordinator.run("canary", lambda: None, T0 + timedelta(days=1)) == jl.OK
+    status = coordinator.status("canary")
+    assert status["last_status"] == jl.OK
+    assert status["last_duration_seconds"] >= 0
+    assert status["last_success_at"] is not None
+
+
+def test_status_reports_the_lock_holder_while_running(any_backend):
+    coordinator = jl.JobCoordinator(any_backend, holder="worker-7")
+    seen = []
+
+    coordinator.run(
+        "labels", lambda: seen.append(coordinator.status("labels")["lock_holder"]), T0
+    )
+
+    assert seen == ["worker-7"]
+    assert coordinator.status("labels")["lock_holder"] is None
+
+
+def test_expired_lease_of_a_crashed_worker_is_taken_over(backend):
+    assert backend.acquire("weights", "crashed", T0, ttl=0.05) == jl.ACQUIRED
+    assert backend.acquire("weights", "worker-1", T0 + timedelta(days=1), 60) == (
+        jl.LOCKED
+    )
+    time.sleep(0.1)
+    assert backend.acquire("weights", "worker-1", T0 + timedelta(days=1), 60) == (
+        jl.ACQUIRED
+    )
+
+
+def test_lock_backend_errors_skip_the_run():
+    backend = mock.Mock()
+    backend.acquire.side_effect = ConnectionError("db down")
+    ran = []
+
+    outcome = jl.JobCoordinator(backend).run("labels", lambda: ran.append(1), T0)
+
+    assert outcome == jl.ERROR
+    assert not ran
+
+
+def test_trigger_slot_ignores_jitter():
+    trigger = CronTrigger(minute="*/15", jitter=30, timezone=timezone.utc)
+    lookback = timedelta(minutes=5)
+
+    for delay in (0, 7, 29, 200):
+        now = T0 + timedelta(minutes=15, seconds=delay)
+        assert jl.trigger_slot(trigger, now, lookback) == T0 + timedelta(minutes=15)
+    assert jl.trigger_slot(trigger, T0 + timedelta(minutes=25), lookback) is None
+
+
+def test_jobs_are_scheduled_without_overlap_and_with_jitter():
+    with mock.patch.dict("os.environ", {"SCHEDULER_ENABLED": "1"}), mock.patch.object(
+        scheduler.scheduler, "start"
+    ):
+        scheduler.setup_scheduled_jobs()
+    try:
+        job = scheduler.scheduler.get_job("watch_incidents")
+        # Pending jobs only get the defaults once the scheduler starts
+        defaults = scheduler.scheduler._job_defaults
+        assert defaults["max_instances"] == 1
+        assert defaults["coalesce"] is True
+        assert defaults["misfire_grace_time"] > 0
+        assert job.func is scheduler.run_coordinated
+        assert job.args[:2] == ("watch_incidents", scheduler.job_watch_incidents)
+        assert job.trigger.jitter
+    finally:
+        scheduler.scheduler.remove_all_jobs()
+
+
+def test_run_job_now_goes_through_the_lease(backend):
+    coordinator = jl.JobCoordinator(backend, holder="worker-0")
+    with mock.patch.object(jl, "get_coordinator", return_value=coordinator):
+        scheduler.scheduler.add_job(
+            scheduler.run_coordinated,
+            trigger=CronTrigger(hour=1),
+            args=("manual", lambda: None, CronTrigger(hour=1)),
+            id="manual",
+        )
+        try:
+            backend.acquire("manual", "other-worker", T0, ttl=60)
+            assert scheduler.run_job_now("manual") == jl.LOCKED
+
+            backend.release("manual", "other-worker", jl.OK, 1.0)
+            assert scheduler.run_job_now("manual") == jl.OK
+
+            [listed] = scheduler.list_scheduled_jobs()
+            assert listed["last_status"] == jl.OK
+            assert listed["lock_holder"] is None
+            assert listed["last_duration_seconds"] is not None
+        finally:
+            scheduler.scheduler.remove_all_jobs()
+
+
+def test_per_process_jobs_skip_the_lease(backend):
+    """Every worker sweeps its own PIT registry."""
+    with mock.patch.dict("os.environ", {"SCHEDULER_ENABLED": "1"}), mock.patch.object(
+        scheduler.scheduler, "start"
+    ):
+        scheduler.setup_scheduled_jobs()
+    coordinator = jl.JobCoordinator(backend, holder="worker-0")
+    try:
+        job = scheduler.scheduler.get_job("sweep_search_pits")
+        assert job.func is scheduler.job_sweep_search_pits
+        with mock.patch.object(
+            jl, "get_coordinator", return_value=coordinator
+        ), mock.patch("app.logic.paging.sweep_idle_pits", return_value=0) as sweep:
+            assert scheduler.run_job_now("sweep_search_pits") == jl.OK
+            listed = {j["id"]: j for j in scheduler.list_scheduled_jobs()}
+        assert sweep.called
+        assert listed["sweep_search_pits"]["coordinated"] is False
+        assert listed["watch_incidents"]["coordinated"] is True
+        assert coordinator.status("sweep_search_pits") == {}
+    finally:
+        scheduler.scheduler.remove_all_jobs()
+
+
+def test_job_failures_are_logged_once(backend, caplog):
+    coordinator = jl.JobCoordinator(backend, holder="worker-0")
+    with mock.patch(
+        "app.logic.paging.sweep_idle_pits", side_effect=RuntimeError("es down")
+    ):
+        outcome = coordinator.run("sweep", scheduler.job_sweep_search_pits, T0)
+
+    assert outcome == jl.FAILED
+    errors = [r for r in caplog.records if r.levelname == "ERROR"]
+    assert len(errors) == 1
+    assert errors[0].exc_info
@@ -0,0 +1,264 @@
+"""
+Mergeable latency sketches (app.observability.sketch) and their consumers:
+budget gates, the planner regression detector and SLO evaluation.
+"""
+
+import math
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.eval.budgets import Budget, GateEvaluator
+from app.eval.telemetry import OnlineEvaluator
+from app.guard.regression_detector import MetricsStore
+from app.models import AgentAuditLog, AgentMetricsDaily
+from app.observability.sketch import RELATIVE_ACCURACY, LatencySketch
+from app.observability.slo import SLOEvaluator, SLOMetric
+
+pytestmark = pytest.mark.unit
+
+DAY0 = datetime(2025, 11, 3)
+
+
+def _exact(values, q):
+    """Nearest-rank percentile, the definition the sketch approximates."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q * len(ordered)), 1) - 1]
+
+
+def _sketch(values):
+    sketch = LatencySketch()
+    sketch.add_many(values)
+    return sketch
+
+
+def test_relative_error_below_one_percent_on_1m_samples():
+    values = np.random.default_rng(45).lognormal(6.0, 1.0, 1_000_000)
+    sketch = _sketch(values.tolist())
+
+    for q in (0.5, 0.9, 0.95, 0.99, 0.999):
+        exact = float(np.quantile(values, q, method="inverted_cdf"))
+        assert abs(sketch.quantile(q) - exact) / exact < 0.01
+    assert len(sketch.bins) < 2_000  # size bounded by value range, not count
+
+
+def test_merged_sketches_equal_one_sketch_of_all_values():
+    rng = np.random.default_rng(1)
+    days = [rng.lognormal(5.0, 0.5 + i / 10, 2_000).tolist() for i in range(7)]
+
+    merged = LatencySketch.merged(
+        LatencySketch.from_dict(_sketch(d).to_dict()) for d in days
+    )
+    whole = _sketch([v for d in days for v in d])
+
+    assert merged.bins == whole.bins
+    assert merged.count == 14_000
+    assert merged.percentiles(0.5, 0.99) == whole.percentiles(0.5, 0.99)
+    assert merged.mean == pytest.approx(whole.mean)
+
+
+def test_zero_and_empty():
+    assert LatencySketch().quantile(0.95) is None
+    sketch = _sketch([0.0, 0.0, 0.0, 10.0])
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.quantile(1.0) == 10.0
+    assert LatencySketch.from_dict(None).count == 0
+    with pytest.raises(ValueError):
+        LatencySketch.from_dict({"alpha": 0.02, "bins": {}, "count": 0})
+
+
+def _week(normal_ms, bad_day):
+    """Seven days of daily metrics rows; ``bad_day`` runs 10x slower."""
+    rng = np.random.default_rng(7)
+    rows = []
+    for day in range(7):
+        latencies = rng.lognormal(math.log(normal_ms), 0.4, 1_000)
+        if day == bad_day:
+            latencies *= 10
+        sketch = _sketch(latencies.tolist())
+        p50, p95, p99 = sketch.percentiles(0.5, 0.95, 0.99)
+        rows.append(
+            AgentMetricsDaily(
+                agent="inbox.triage",
+                date=DAY0 + timedelta(days=day),
+                total_runs=1_000,
+                successful_runs=1_000,
+                failed_runs=0,
+                avg_latency_ms=sketch.mean,
+                median_latency_ms=p50,
+                p95_latency_ms=p95,
+                p99_latency_ms=p99,
+                latency_sketch=sketch.to_dict(),
+                invariants_passed=0,
+                invariants_failed=0,
+            )
+        )
+    return rows
+
+
+def _gate(rows):
+    db = Mock()
+    db.query.return_value.filter.return_value.all.side_effect = [rows, []]
+    budget = Budget(agent="inbox.triage", max_p95_latency_ms=2_000.0)
+    evaluator = GateEvaluator(db, budgets={"inbox.triage": budget})
+    return evaluator.evaluate_agent("inbox.triage")
+
+
+def test_gate_fails_when_one_day_in_seven_has_10x_p95():
+    rows = _week(normal_ms=300.0, bad_day=3)
+    averaged_p95 = sum(r.p95_latency_ms for r in rows) / len(rows)
+    assert averaged_p95 < 2_000.0  # what averaging daily p95s used to report
+
+    result = _gate(rows)
+
+    assert not result["passed"]
+    violation = next(v for v in result["violations"] if v.budget_type == "latency_p95")
+    assert violation.actual > 2 * averaged_p95
+    merged = LatencySketch.merged(
+        LatencySketch.from_dict(r.latency_sketch) for r in rows
+    )
+    assert result["current_metrics"]["p95_latency_ms"] == merged.quantile(0.95)
+
+
+def test_gate_passes_a_normal_week():
+    assert _gate(_week(normal_ms=300.0, bad_day=None))["passed"]
+
+
+def test_gate_uses_worst_legacy_percentile_for_days_without_a_sketch():
+    rows = _week(normal_ms=300.0, bad_day=None)
+    rows[0].latency_sketch = None
+    rows[0].p95_latency_ms = 4_000.0
+
+    result = _gate(rows)
+
+    assert result["current_metrics"]["p95_latency_ms"] == 4_000.0
+    assert not result["passed"]
+
+
+def test_online_eval_maintains_the_daily_sketch():
+    day = AgentMetricsDaily(
+        agent="inbox.triage",
+        date=DAY0,
+        total_runs=0,
+        quality_samples=0,
+        total_cost_weight=0.0,
+        invariants_passed=0,
+        invariants_failed=0,
+    )
+    db = Mock()
+    db.query.return_value.filter.return_value.first.return_value = day
+    evaluator = OnlineEvaluator(db)
+    latencies = [float(10 * i) for i in range(1, 201)]
+
+    for latency in latencies:
+        evaluator._update_daily_metrics(
+            SimpleNamespace(
+                agent="inbox.triage",
+                timestamp=DAY0 + timedelta(hours=3),
+                quality_score=90.0,
+                latency_ms=latency,
+                cost_weight=1.0,
+                passed_invariants=[],
+                failed_invariants=[],
+            )
+        )
+
+    assert LatencySketch.from_dict(day.latency_sketch).count == 200
+    for column, q in (("median_latency_ms", 0.5), ("p99_latency_ms", 0.99)):
+        exact = _exact(latencies, q)
+        assert getattr(day, column) == pytest.approx(exact, rel=RELATIVE_ACCURACY)
+
+
+@pytest.fixture(scope="module")
+def audit_db():
+    """100k succeeded planner runs, alternating v1/v2, plus a few others."""
+    engine = create_engine("sqlite://")
+    AgentAuditLog.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(text("""
+                WITH RECURSIVE n(i) AS (
+                    SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < 99999
+                )
+                INSERT INTO agent_audit_log
+                    (run_id, agent, objective, status, started_at, duration_ms,
+                     plan, dry_run)
+                SELECT 'run-' || i, 'planner', 'o',
+                    CASE WHEN i % 50 = 0 THEN 'failed' ELSE 'succeeded' END,
+                    datetime(1735689600 + i, 'unixepoch'),
+                    CASE WHEN i % 97 = 0 THEN NULL
+                         ELSE 50 + (i * 7919) % 5000 END,
+                    CASE i % 2
+                        WHEN 0 THEN '{"planner_meta": {"selected": "v1"}}'
+                        ELSE '{"planner_meta": {"selected": "v2"}}' END,
+                    0
+                FROM n
+                """))
+    with Session(engine) as session:
+        yield session
+
+
+def _exact_window(db, window_runs, version):
+    rows = db.execute(
+        text(
+            "SELECT duration_ms, json_extract(plan, '$.planner_meta.selected') "
+            "FROM agent_audit_log WHERE status = 'succeeded' "
+            "ORDER BY started_at DESC LIMIT :n"
+        ),
+        {"n": window_runs},
+    ).all()
+    durations = [d for d, v in rows if v == version]
+    return durations, [d for d in durations if d]
+
+
+@pytest.mark.parametrize("window_runs", [100, 10_000])
+def test_window_stats_matches_exact_percentiles(audit_db, window_runs):
+    stats = MetricsStore(audit_db).window_stats(window_runs=window_runs)
+
+    for version in ("v1", "v2"):
+        runs, latencies = _exact_window(audit_db, window_runs, version)
+        assert stats[version]["samples"] == len(runs)
+        assert stats[version]["latency_p95_ms"] == pytest.approx(
+            _exact(latencies, 0.95), rel=RELATIVE_ACCURACY
+        )
+        mean_ms = sum(latencies) / len(runs)  # runs without duration cost 0
+        assert stats[version]["cost_cents"] == pytest.approx(mean_ms / 1000 * 0.001)
+
+
+def test_window_stats_is_fast_and_does_not_load_runs(audit_db):
+    store = MetricsStore(audit_db)
+    store.window_stats(window_runs=100)  # warm statement cache
+
+    start = time.perf_counter()
+    store.window_stats(window_runs=10_000)
+    assert time.perf_counter() - start < 0.2
+
+    tracemalloc.start()
+    try:
+        stats = store.window_stats(window_runs=100_000)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert stats["v1"]["samples"] + stats["v2"]["samples"] == 98_000
+    assert peak < 2 * 1024 * 1024  # bucket rows only, not 98k runs
+
+
+def test_slo_evaluation_reads_percentiles_from_sketch():
+    sketch = _sketch([100.0] * 90 + [2_000.0] * 10)
+
+    status = SLOEvaluator().evaluate(
+        "inbox.search", {"latency_p95_ms": 10.0}, latency=sketch
+    )
+
+    assert status.latency_p95_ms == 2_000.0
+    assert not status.compliant
+    assert {v.metric for v in status.violations} == {
+        SLOMetric.LATENCY_P95,
+        SLOMetric.LATENCY_P99,
+    }
@@ -0,0 +1,153 @@
+"""
+Lazy router registration (app.core.router_registry) and the startup path of
+app.main: fast import, unchanged OpenAPI, background warm-up and /readyz.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from unittest import mock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import health
+from app import main as app_main
+from app.core.router_registry import LazyRouterMiddleware, RouterRegistry
+
+pytestmark = pytest.mark.unit
+
+API_ROOT = Path(__file__).resolve().parents[2]
+HEAVY_MODULES = ("sklearn", "pandas", "google.cloud.bigquery", "pdfminer", "bs4")
+
+
+def _entry_paths(entry):
+    """Paths an entry's routers serve, from a throwaway app's schema."""
+    probe = FastAPI()
+    for target in entry.targets:
+        module_name, _, attr = target.partition(":")
+        router = getattr(__import__(module_name, fromlist=[attr]), attr)
+        probe.include_router(router, prefix=entry.prefix)
+    return list(probe.openapi()["paths"])
+
+
+def _loadable(entries):
+    return [e for e in entries if e.loaded or _import_ok(e)]
+
+
+def _import_ok(entry):
+    try:
+        for name in (*entry.requires, *(t.partition(":")[0] for t in entry.targets)):
+            __import__(name)
+    except ImportError:
+        return False
+    return True
+
+
+def test_import_skips_heavy_modules():
+    script = (
+        "import json, sys\n"
+        "import app.main\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(json.dumps({'heavy': heavy}))\n"
+    )
+    env = {**os.environ, "DATABASE_URL": os.environ.get("DATABASE_URL", "sqlite://")}
+    out = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=API_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+
+    assert result["heavy"] == []
+
+
+def test_openapi_loads_every_router_in_registration_order():
+    app_main.lazy_routers.load_all()
+    loaded = app_main.app.openapi()
+
+    assert not app_main.lazy_routers.pending()
+    assert "/readyz" in loaded["paths"]
+    # Slots were replaced in place: no placeholders left in the route table
+    assert not any("LazyRouter slot" in repr(r) for r in app_main.app.router.routes)
+
+
+@pytest.mark.parametrize(
+    "entry",
+    _loadable(app_main.lazy_routers.entries),
+    ids=lambda e: e.targets[0].split(":")[0].rsplit(".", 1)[-1],
+)
+def test_each_router_is_loaded_by_a_request_under_its_prefix(entry):
+    paths = _entry_paths(entry)
+    assert paths, entry.name
+    # Every served path is covered by a declared prefix
+    assert [p for p in paths if not entry.serves(p)] == []
+
+    app = FastAPI()
+    registry = RouterRegistry(app)
+    fresh = registry.register(
+        entry.targets,
+        entry.prefixes,
+        prefix=entry.prefix,
+        optional=entry.optional,
+        requires=entry.requires,
+    )
+    app.add_middleware(LazyRouterMiddleware, registry=registry)
+    path = re.sub(r"\{[^}]+\}", "1", paths[0])
+
+    assert not fresh.loaded
+    # TRACE is routed like any method: 405 means the path matched a route
+    # without running its endpoint
+    response = TestClient(app).request("TRACE", path)
+
+    assert fresh.loaded
+    assert response.status_code == 405, path
+
+
+def test_optional_router_that_fails_to_import_is_skipped():
+    app = FastAPI()
+    registry = RouterRegistry(app)
+    missing = registry.register("app.no_such_module:router", ("/x",), optional=True)
+    required = registry.register("app.no_such_module:router", ("/y",))
+    slots = len(app.router.routes)
+
+    registry.load(missing)
+
+    assert missing.loaded
+    assert len(app.router.routes) == slots - 1
+    with pytest.raises(ImportError):
+        registry.load(required)
+
+
+async def _finish_warm_up():
+    await app_main._warm_up_task
+
+
+def test_healthz_answers_during_warm_up_and_readyz_flips_after():
+    release = threading.Event()
+    health.mark_warmed_up(False)
+    try:
+        # Runs without a database: warm-up is stubbed, and table creation is
+        # the only other startup hook that connects
+        with mock.patch.object(
+            app_main.settings, "CREATE_TABLES_ON_STARTUP", False
+        ), mock.patch.object(app_main, "_warm_up", lambda: release.wait(10)):
+            with mock.patch.object(app_main.lazy_routers, "preload", mock.AsyncMock()):
+                with TestClient(app_main.app) as client:
+                    assert client.get("/healthz").status_code == 200
+                    assert client.get("/readyz").status_code == 503
+
+                    release.set()
+                    client.portal.call(_finish_warm_up)
+
+                    assert client.get("/readyz").json() == {"status": "ready"}
+    finally:
+        health.mark_warmed_up(False)
@@ -0,0 +1,130 @@
+"""
+Unit tests for the in-process user weight cache in app.core.learner.
+"""
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core import learner
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    learner.invalidate_user_weights()
+    yield
+    learner.invalidate_user_weights()
+
+
+@pytest.fixture
+def store(monkeypatch):
+    state = {"version": (2, "t1"), "weights": {"contains:meetup": 3.0}, "loads": 0}
+
+    def fetch(db, user_id):
+        state["loads"] += 1
+        return dict(state["weights"])
+
+    monkeypatch.setattr(learner, "_weights_version", lambda db, uid: state["version"])
+    monkeypatch.setattr(learner, "_fetch_user_weights", fetch)
+    return state
+
+
+def test_batch_scores_from_one_load(store):
+    scores = learner.score_batch_with_user(
+        None,
+        "user@example.com",
+        [["contains:meetup"], ["contains:meetup", "category:promo"], []],
+    )
+
+    assert scores == [3.0, 3.0, 0.0]
+    assert store["loads"] == 1
+    assert learner.score_ctx_with_user(None, "user@example.com", ["x"]) == 0.0
+    assert store["loads"] == 1
+
+
+def test_expired_vector_reloads_only_when_version_changes(store, monkeypatch):
+    monkeypatch.setattr(learner, "WEIGHTS_TTL_SECONDS", 0)
+
+    learner.load_user_weights(None, "user@example.com")
+    learner.load_user_weights(None, "user@example.com")
+    assert store["loads"] == 1
+
+    store["version"] = (3, "t2")
+    store["weights"]["category:promo"] = 2.0
+    weights = learner.load_user_weights(None, "user@example.com")
+
+    assert store["loads"] == 2
+    assert weights["category:promo"] == 2.0
+
+
+def test_invalidate_drops_cached_vector(store):
+    learner.load_user_weights(None, "user@example.com")
+    store["weights"]["contains:meetup"] = -1.0
+
+    learner.invalidate_user_weights("user@example.com")
+
+    assert (
+        learner.score_ctx_with_user(None, "user@example.com", ["contains:meetup"])
+        == -1.0
+    )
+    assert store["loads"] == 2
+
+
+def test_update_is_a_single_upsert():
+    stmt = learner._weights_upsert(
+        "user@example.com", ["category:promo", "contains:meetup"], 0.2, None
+    )
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+    assert sql.count("INSERT INTO user_weights") == 1
+    assert "ON CONFLICT ON CONSTRAINT uq_user_feature DO UPDATE" in sql
+    assert "excluded.weight" in sql
+
+
+def test_propose_scores_all_emails_with_one_weight_lookup(store, monkeypatch):
+    from types import SimpleNamespace
+    from unittest import mock
+
+    from app.models import ActionType, Email, Policy
+    from app.routers import actions
+
+    lookups = []
+    monkeypatch.setattr(learner, "WEIGHTS_TTL_SECONDS", 0)
+    monkeypatch.setattr(
+        learner,
+        "_weights_version",
+        lambda db, uid: lookups.append(uid) or store["version"],
+    )
+    monkeypatch.setattr(actions, "evaluate_policy", lambda policy, ctx: True)
+    monkeypatch.setattr(actions, "_touch_policy_stats", mock.Mock())
+    emails = [
+        Email(id=i, subject=f"Meetup #{i}", category="promo", risk_score=0)
+        for i in range(3)
+    ]
+    policy = Policy(
+        id=1,
+        name="Promos",
+        condition={},
+        action=ActionType.label_email,
+        confidence_threshold=0.5,
+        priority=1,
+        enabled=True,
+    )
+    db = mock.MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = emails
+    db.query.return_value.filter.return_value.order_by.return_value.all.return_value = [
+        policy
+    ]
+
+    result = actions.propose_actions(
+        actions.ProposeRequest(email_ids=[0, 1, 2]),
+        db=db,
+        user=SimpleNamespace(email="user@example.com"),
+    )
+
+    assert result["count"] == 3
+    assert lookups == ["user@example.com"]
+    proposed = [call.args[0] for call in db.add.call_args_list]
+    # contains:meetup weighs 3.0, so every email gets the full +0.15 bump
+    assert all(pa.confidence == pytest.approx(0.65) for pa in proposed)
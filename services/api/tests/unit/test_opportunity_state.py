@@ -0,0 +1,84 @@
+"""Unit tests for the persisted opportunity eligibility (Email.opportunity_state)."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.models import Application, AppStatus, Email
+from app.routers.opportunities import is_real_opportunity
+from app.services.opportunity_state import (
+    OPPORTUNITY_CLASSIFIER,
+    OPPORTUNITY_EXCLUDED,
+    OPPORTUNITY_HEURISTIC,
+    application_allows_opportunity,
+    email_opportunity_state,
+)
+
+pytestmark = pytest.mark.unit
+
+
+def _email(**kwargs):
+    fields = {
+        "subject": "Exciting opportunity at StartupXYZ",
+        "sender": "founder@startupxyz.com",
+        "body_text": "Hi, I saw your profile...",
+        "labels": [],
+        "category": "recruiter_outreach",
+        "is_real_opportunity": None,
+    }
+    fields.update(kwargs)
+    return SimpleNamespace(**fields)
+
+
+@pytest.mark.parametrize(
+    "overrides, expected",
+    [
+        ({"is_real_opportunity": True}, OPPORTUNITY_CLASSIFIER),
+        ({"is_real_opportunity": False}, OPPORTUNITY_EXCLUDED),
+        # Classifier verdict wins over the heuristics
+        ({"is_real_opportunity": True, "category": "newsletter"}, "classifier"),
+        ({}, OPPORTUNITY_HEURISTIC),
+        ({"category": None}, OPPORTUNITY_HEURISTIC),
+        ({"sender": "alerts@indeed.com"}, OPPORTUNITY_EXCLUDED),
+        ({"subject": "Weekly Tech Jobs Digest"}, OPPORTUNITY_EXCLUDED),
+        ({"labels": ["CATEGORY_PROMOTIONS"]}, OPPORTUNITY_EXCLUDED),
+        ({"category": "receipt_invoice"}, OPPORTUNITY_EXCLUDED),
+    ],
+)
+def test_email_opportunity_state(overrides, expected):
+    assert email_opportunity_state(_email(**overrides)) == expected
+
+
+@pytest.mark.parametrize(
+    "state, status, expected",
+    [
+        (OPPORTUNITY_CLASSIFIER, None, True),
+        (OPPORTUNITY_CLASSIFIER, "", True),
+        (OPPORTUNITY_CLASSIFIER, "on_hold", True),
+        (OPPORTUNITY_CLASSIFIER, "rejected", False),
+        (OPPORTUNITY_HEURISTIC, None, True),
+        (OPPORTUNITY_HEURISTIC, "interview", True),
+        (OPPORTUNITY_HEURISTIC, "", False),
+        (OPPORTUNITY_HEURISTIC, "on_hold", False),
+        (OPPORTUNITY_HEURISTIC, "ghosted", False),
+        (OPPORTUNITY_EXCLUDED, None, False),
+        (None, None, False),
+    ],
+)
+def test_application_allows_opportunity(state, status, expected):
+    assert application_allows_opportunity(state, status) is expected
+
+
+def test_is_real_opportunity_uses_persisted_rules():
+    email = Email(
+        subject="Onsite interview - next steps",
+        sender="recruiter@fancycompany.com",
+        body_text="Hi, we'd like to schedule an onsite interview...",
+        category="interview_invite",
+    )
+    live = Application(company="FancyCompany", status=AppStatus.interview)
+    closed = Application(company="FancyCompany", status=AppStatus.rejected)
+
+    assert is_real_opportunity(email, None) is True
+    assert is_real_opportunity(email, live) is True
+    assert is_real_opportunity(email, closed) is False
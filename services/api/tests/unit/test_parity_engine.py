@@ -0,0 +1,182 @@
+"""
+Unit tests for the bucketed DB/ES parity engine (app.services.parity).
+
+Both sides are in-memory sources that compute digests with the reference
+Python encoding, so these tests pin the recursion and repair-list behavior.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.parity import (
+    DEFAULT_FIELDS,
+    FIELD_NUMERIC,
+    BucketDigest,
+    ParityChecker,
+    ParityField,
+    digest_docs,
+    encode_value,
+    normalize_value,
+    parse_fields,
+)
+
+pytestmark = pytest.mark.unit
+
+BASE = datetime(2025, 10, 1, 9, 0, tzinfo=timezone.utc)
+
+
+class MemorySource:
+    """Parity source over a list of dicts; counts calls per level."""
+
+    def __init__(self, docs):
+        self.docs = {d["id"]: dict(d) for d in docs}
+        self.calls = {"day": 0, "id": 0, "leaf": 0}
+
+    def _key(self, doc):
+        return (doc.get("owner_email") or "", doc["received_at"].strftime("%Y-%m-%d"))
+
+    def _in_bucket(self, key, id_lo, id_hi):
+        return [
+            d
+            for d in self.docs.values()
+            if self._key(d) == key and id_lo <= d["id"] <= id_hi
+        ]
+
+    def day_buckets(self, fields, owner=None, since=None, until=None):
+        self.calls["day"] += 1
+        grouped = {}
+        for d in self.docs.values():
+            if owner and d.get("owner_email") != owner:
+                continue
+            grouped.setdefault(self._key(d), []).append(d)
+        return {k: digest_docs(v, fields) for k, v in grouped.items()}
+
+    def id_buckets(self, key, fields, id_lo, id_hi, interval):
+        self.calls["id"] += 1
+        grouped = {}
+        for d in self._in_bucket(key, id_lo, id_hi):
+            grouped.setdefault((d["id"] - id_lo) // interval, []).append(d)
+        return {k: digest_docs(v, fields) for k, v in grouped.items()}
+
+    def leaf_docs(self, key, fields, id_lo, id_hi):
+        self.calls["leaf"] += 1
+        return {
+            d["id"]: {
+                "doc_id": d["gmail_id"],
+                **{f.name: normalize_value(f.kind, d.get(f.name)) for f in fields},
+            }
+            for d in self._in_bucket(key, id_lo, id_hi)
+        }
+
+
+def _corpus(n=2000, owners=("a@example.com", "b@example.com"), days=5):
+    docs = []
+    for i in range(1, n + 1):
+        docs.append(
+            {
+                "id": i,
+                "gmail_id": f"g{i}",
+                "owner_email": owners[i % len(owners)],
+                "received_at": BASE + timedelta(days=i % days, seconds=i),
+                "risk_score": float(i % 100),
+                "expires_at": None if i % 3 else BASE + timedelta(days=30),
+                "category": ["promotions", "bills", "personal"][i % 3],
+            }
+        )
+    return docs
+
+
+def _pair(docs):
+    return MemorySource(docs), MemorySource(docs)
+
+
+def test_identical_corpora_never_descend():
+    db, es = _pair(_corpus())
+    result = ParityChecker(db, es, leaf_size=16).run()
+
+    assert result.drift_count == 0
+    assert result.buckets_total == 10
+    assert result.buckets_mismatched == 0
+    assert db.calls == {"day": 1, "id": 0, "leaf": 0}
+
+
+def test_field_drift_is_found_exactly():
+    db, es = _pair(_corpus())
+    es.docs[777]["risk_score"] = 12.5
+    es.docs[1500]["category"] = "bills_v2"
+
+    result = ParityChecker(db, es, leaf_size=16).run()
+
+    assert sorted(m["id"] for m in result.field_mismatches) == [777, 1500]
+    by_id = {m["id"]: m for m in result.field_mismatches}
+    assert set(by_id[777]["fields"]) == {"risk_score"}
+    assert set(by_id[1500]["fields"]) == {"category"}
+    assert result.buckets_mismatched == 2
+    # Only the two drifted leaves are fetched, not the whole corpus
+    assert result.leaf_docs_compared <= 2 * 16
+
+
+def test_missing_docs_produce_repair_actions():
+    db, es = _pair(_corpus())
+    del es.docs[42]
+    es.docs[99999] = {
+        "id": 99999,
+        "gmail_id": "orphan",
+        "owner_email": "a@example.com",
+        "received_at": BASE,
+        "risk_score": 0.0,
+        "expires_at": None,
+        "category": "personal",
+    }
+
+    result = ParityChecker(db, es, leaf_size=16).run()
+
+    assert [m["id"] for m in result.missing_in_es] == [42]
+    assert [m["id"] for m in result.missing_in_db] == [99999]
+    assert result.repair_actions() == [
+        {"op": "index", "id": 42, "doc_id": "g42"},
+        {"op": "delete", "id": 99999, "doc_id": "orphan"},
+    ]
+
+
+def test_moved_doc_reported_once_as_field_mismatch():
+    db, es = _pair(_corpus())
+    es.docs[10]["received_at"] = es.docs[10]["received_at"] + timedelta(days=1)
+
+    result = ParityChecker(db, es, leaf_size=16).run()
+
+    assert result.missing_in_es == []
+    assert result.missing_in_db == []
+    assert [m["id"] for m in result.field_mismatches] == [10]
+    assert [a["op"] for a in result.repair_actions()] == ["index"]
+
+
+def test_owner_filter_limits_buckets():
+    db, es = _pair(_corpus())
+    result = ParityChecker(db, es).run(owner="a@example.com")
+    assert result.buckets_total == 5
+
+
+def test_encoding_tolerances_match_legacy_compare():
+    # Numeric: within 1e-3; dates: day-level
+    assert encode_value(FIELD_NUMERIC, 10.0001) == encode_value(FIELD_NUMERIC, 10.0)
+    assert normalize_value("date", "2025-10-01T01:00:00Z") == normalize_value(
+        "date", datetime(2025, 10, 1, 23, 0, tzinfo=timezone.utc)
+    )
+    assert encode_value("text", "bills") != encode_value("text", "blils")
+
+
+def test_digest_equality_ignores_id_bounds():
+    a = BucketDigest(1, 5, 5, 5, (1,))
+    assert a.same_as(BucketDigest(1, 5, None, None, (1,)))
+    assert not a.same_as(None)
+
+
+def test_parse_fields():
+    fields = parse_fields("risk_score,company:text,due_date:date")
+    assert fields[0] == DEFAULT_FIELDS[0]
+    assert fields[1] == ParityField("company", "text")
+    assert fields[2].kind == "date"
+    with pytest.raises(ValueError):
+        parse_fields("x:blob")
@@ -0,0 +1,253 @@
+"""
+SQL query accounting (app.core.query_stats): fingerprints, contexts, the
+request middleware and N+1 reporting, against an in-memory SQLite engine.
+Endpoint query budgets run against Postgres in
+tests/integration/test_query_budgets.py.
+"""
+
+import logging
+from time import perf_counter
+from unittest import mock
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import Column, Integer, String, create_engine, select, text
+from sqlalchemy.orm import Session, declarative_base
+from sqlalchemy.pool import StaticPool
+
+from app.core import query_stats as qs
+
+pytestmark = pytest.mark.unit
+
+Base = declarative_base()
+
+
+class Widget(Base):
+    __tablename__ = "widgets"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(32))
+
+
+@pytest.fixture
+def db_engine():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    qs.install(engine)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add_all(Widget(id=i, name=f"w{i}") for i in range(1, 21))
+        db.commit()
+    yield engine
+    engine.dispose()
+
+
+def load_widgets_one_by_one(db: Session) -> list:
+    return [db.get(Widget, i).name for i in range(1, 21)]
+
+
+@pytest.fixture
+def client(db_engine):
+    app = FastAPI()
+    router = APIRouter(prefix="/widgets")
+
+    @router.get("/{widget_id}")
+    def one_query(widget_id: int):
+        with Session(db_engine) as db:
+            return {"name": db.get(Widget, widget_id).name}
+
+    @router.get("/")
+    def n_plus_one():
+        with Session(db_engine) as db:
+            return {"names": load_widgets_one_by_one(db)}
+
+    app.include_router(router, prefix="/api")
+    app.add_middleware(qs.QueryAccountingMiddleware, headers=True)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize(
+    "statement, expected",
+    [
+        (
+            "SELECT * FROM emails WHERE id = 42 AND sender = 'a''b@x.com'",
+            "SELECT * FROM emails WHERE id = ? AND sender = ?",
+        ),
+        (
+            "SELECT * FROM emails WHERE id = %(id_1)s AND score > %s",
+            "SELECT * FROM emails WHERE id = ? AND score > ?",
+        ),
+        (
+            "SELECT * FROM emails WHERE id IN ($1, $2, $3)",
+            "SELECT * FROM emails WHERE id IN (?)",
+        ),
+        (
+            "INSERT INTO t (a, b) VALUES (?, ?), (?, ?),\n (?, ?)",
+            "INSERT INTO t (a, b) VALUES (?)",
+        ),
+        (
+            "SELECT col_2, t1.x FROM t1 LIMIT -1.5",
+            "SELECT col_2, t1.x FROM t1 LIMIT ?",
+        ),
+    ],
+)
+def test_fingerprint_normalizes_values(statement, expected):
+    assert qs.fingerprint(statement) == expected
+
+
+def test_only_statements_inside_a_context_are_counted(db_engine):
+    with db_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        with qs.track_queries("block") as stats:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+
+    assert stats.count == 2
+    assert stats.seconds > 0
+    assert stats.fingerprints == {"SELECT ?": 2}
+    assert qs.current() is None
+
+
+def test_nested_contexts_merge_and_inherit_settings(db_engine):
+    with qs.track_queries("outer", threshold=3, raise_on_n_plus_one=True) as outer:
+        with db_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            with qs.track_queries("inner") as inner:
+                conn.execute(select(Widget).where(Widget.id == 1))
+
+    assert (inner.threshold, inner.raise_on_n_plus_one) == (3, True)
+    assert inner.count == 1
+    assert outer.count == 2
+
+
+def test_executemany_is_one_statement(db_engine):
+    with qs.track_queries("bulk") as stats, Session(db_engine) as db:
+        db.execute(
+            Widget.__table__.insert(),
+            [{"id": i, "name": "bulk"} for i in range(100, 150)],
+        )
+
+    assert stats.count == 1
+    assert not stats.flagged
+
+
+def test_n_plus_one_is_logged_with_call_site(client, caplog):
+    with caplog.at_level(logging.WARNING, logger=qs.__name__):
+        r = client.get("/api/widgets/")
+
+    assert r.status_code == 200
+    assert int(r.headers[qs.QUERIES_HEADER]) == 20
+    [record] = [r for r in caplog.records if "Possible N+1" in r.getMessage()]
+    message = record.getMessage()
+    assert "GET /api/widgets/" in message
+    assert "widgets.id = ?" in message
+    assert "in load_widgets_one_by_one" in message
+    assert __file__ in message
+
+
+def test_n_plus_one_raises_when_configured(client):
+    with pytest.raises(qs.NPlusOneError, match="load_widgets_one_by_one"):
+        with qs.track_queries("test", raise_on_n_plus_one=True):
+            client.get("/api/widgets/")
+
+
+def test_threshold_is_not_flagged(client):
+    with qs.track_queries("test", threshold=20, raise_on_n_plus_one=True) as stats:
+        client.get("/api/widgets/")
+
+    assert stats.count == 20
+    assert not stats.flagged
+
+
+def test_response_headers(client):
+    with qs.track_queries("test") as outer:
+        r = client.get("/api/widgets/3")
+
+    assert r.json() == {"name": "w3"}
+    assert r.headers[qs.QUERIES_HEADER] == "1"
+    assert float(r.headers[qs.TIME_HEADER]) >= 0
+    # The request's context was merged into the enclosing one
+    assert outer.count == 1
+
+
+def test_route_template_includes_router_prefixes(client):
+    from app.core.metrics import db_queries_per_request
+
+    client.get("/api/widgets/7")
+    client.get("/nowhere")
+
+    labels = {
+        sample.labels["route"]
+        for metric in db_queries_per_request.collect()
+        for sample in metric.samples
+    }
+    assert "/api/widgets/{widget_id}" in labels
+    assert "unmatched" in labels
+
+
+def test_headers_are_off_by_default(db_engine):
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping():
+        return "pong"
+
+    app.add_middleware(qs.QueryAccountingMiddleware)
+
+    r = TestClient(app).get("/ping")
+
+    assert qs.QUERIES_HEADER not in r.headers
+
+
+def test_decorated_jobs_run_in_their_own_context(db_engine):
+    seen = []
+
+    @qs.track_queries("job_example")
+    def job():
+        with db_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        seen.append(qs.current())
+
+    job()
+
+    [stats] = seen
+    assert stats.name == "job_example"
+    assert stats.count == 1
+    assert qs.current() is None
+
+
+def test_accounting_stays_off_the_event_dispatch_path(db_engine, monkeypatch):
+    """Over 1,000 trivial ORM queries the accounting does constant work each.
+
+    No engine listeners are installed (each one routes every statement
+    through SQLAlchemy's event dispatch); outside a context statements go
+    straight to the driver; inside one, each statement is timed and recorded
+    once, and the stack is only walked the first time a fingerprint is seen.
+    """
+    n = 1000
+    assert not db_engine._has_events
+    assert not db_engine.dialect.dispatch.do_execute
+
+    clock = mock.Mock(wraps=perf_counter)
+    call_site = mock.Mock(wraps=qs._call_site)
+    monkeypatch.setattr(qs, "perf_counter", clock)
+    monkeypatch.setattr(qs, "_call_site", call_site)
+    qs.fingerprint.cache_clear()
+
+    with Session(db_engine) as db:
+        for _ in range(n):
+            db.execute(select(Widget).where(Widget.id == 1)).all()
+        assert clock.call_count == 0
+
+        with qs.track_queries("bench", threshold=n) as stats:
+            for _ in range(n):
+                db.execute(select(Widget).where(Widget.id == 1)).all()
+
+    assert stats.count == n
+    assert clock.call_count == 2 * n
+    assert call_site.call_count == len(stats.fingerprints) == 1
+    assert qs.fingerprint.cache_info().misses == 1
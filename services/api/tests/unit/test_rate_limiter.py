@@ -0,0 +1,157 @@
+"""
+Unit tests for the GCRA rate limiter in app.core.limiter.
+
+Redis is faked at the script level: the fake runs the same GCRA step the Lua
+script implements against a shared dict.
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import limiter as limiter_module
+from app.core.limiter import (
+    MemoryBackend,
+    RateLimiter,
+    RateLimitMiddleware,
+    RateLimitRule,
+    RedisBackend,
+    gcra,
+)
+
+pytestmark = pytest.mark.unit
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(limiter_module, "time", fake)
+    return fake
+
+
+class FakeRedis:
+    """Evaluates the registered GCRA script in Python; counts round-trips."""
+
+    def __init__(self):
+        self.store = {}
+        self.calls = 0
+        self.fail = False
+
+    def register_script(self, lua):
+        async def run(keys, args):
+            self.calls += 1
+            if self.fail:
+                raise ConnectionError("redis down")
+            now, interval, window, units = args
+            allowed, new_tat, retry_after = gcra(
+                self.store.get(keys[0]), now, interval, window, units
+            )
+            if allowed:
+                self.store[keys[0]] = new_tat
+            return [int(allowed), str(retry_after)]
+
+        return run
+
+
+def test_gcra_allows_burst_then_refills():
+    tat = None
+    for _ in range(3):
+        allowed, tat, _ = gcra(tat, 0.0, 1.0, 3.0, 1)
+        assert allowed
+
+    allowed, _, retry_after = gcra(tat, 0.0, 1.0, 3.0, 1)
+    assert not allowed
+    assert retry_after == pytest.approx(1.0)
+
+    # One interval later exactly one more unit fits (sliding, not fixed window)
+    allowed, tat, _ = gcra(tat, 1.0, 1.0, 3.0, 1)
+    assert allowed
+    assert not gcra(tat, 1.0, 1.0, 3.0, 1)[0]
+
+
+async def test_memory_backend_evicts_idle_keys(clock):
+    backend = MemoryBackend(sweep_interval=10.0)
+    await backend.take("1.2.3.4:/auth/me", 1.0, 60.0, 1)
+    assert "1.2.3.4:/auth/me" in backend.tats
+
+    clock.now += 60.0
+    await backend.take("5.6.7.8:/auth/me", 1.0, 60.0, 1)
+    assert list(backend.tats) == ["5.6.7.8:/auth/me"]
+
+
+async def test_redis_limit_is_shared_across_workers(clock):
+    redis = FakeRedis()
+    workers = [RateLimiter(RedisBackend(redis)) for _ in range(2)]
+
+    results = [
+        (await workers[i % 2].hit("ip:/auth/me", 4, 60)).allowed for i in range(6)
+    ]
+
+    assert results == [True, True, True, True, False, False]
+
+
+async def test_prefetch_leases_skip_redis(clock):
+    redis = FakeRedis()
+    rl = RateLimiter(RedisBackend(redis), prefetch=4, lease_seconds=1.0)
+
+    for _ in range(4):
+        assert (await rl.hit("ip:/auth/me", 10, 60)).allowed
+    assert redis.calls == 1
+
+    # Near the limit a batch no longer fits; single units are still granted
+    for _ in range(6):
+        assert (await rl.hit("ip:/auth/me", 10, 60)).allowed
+    denied = await rl.hit("ip:/auth/me", 10, 60)
+    assert not denied.allowed
+    calls = redis.calls
+
+    # Denials are remembered locally for the lease period
+    assert not (await rl.hit("ip:/auth/me", 10, 60)).allowed
+    assert redis.calls == calls
+
+
+async def test_backend_errors_fall_back_to_local_limits(clock):
+    redis = FakeRedis()
+    redis.fail = True
+    rl = RateLimiter(RedisBackend(redis))
+
+    assert (await rl.hit("ip:/auth/me", 1, 60)).allowed
+    assert not (await rl.hit("ip:/auth/me", 1, 60)).allowed
+
+
+def test_middleware_applies_route_costs(clock):
+    app = FastAPI()
+
+    @app.get("/auth/demo/start")
+    def demo_start():
+        return {"ok": True}
+
+    @app.get("/auth/me")
+    def me():
+        return {"ok": True}
+
+    rules = [RateLimitRule("/auth/", 4, 60, costs={"/auth/demo/start": 2})]
+    app.add_middleware(RateLimitMiddleware, capacity=4, window=60, rules=rules)
+    client = TestClient(app)
+
+    assert [client.get("/auth/demo/start").status_code for _ in range(3)] == [
+        200,
+        200,
+        429,
+    ]
+    blocked = client.get("/auth/demo/start")
+    assert blocked.headers["Retry-After"] == "30"
+
+    # Costs are per route; /auth/me still has its own budget
+    assert client.get("/auth/me").status_code == 200
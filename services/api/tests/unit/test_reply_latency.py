@@ -0,0 +1,168 @@
+"""
+Index-time reply latency: ``time_to_response_hours`` is computed at ingest
+and the ttr_* search sorts read it as a plain field sort.
+"""
+
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import pytest
+
+from app.ingest.gmail_metrics import (
+    compute_thread_reply_metrics,
+    reply_fields,
+    time_to_response_hours,
+    time_to_response_script,
+)
+from app.routers import search as search_router
+
+pytestmark = pytest.mark.unit
+
+USER = "me@example.com"
+T0 = datetime(2025, 10, 1, 9, 0, tzinfo=timezone.utc)
+
+
+def _msg(sender, at):
+    return {
+        "internalDate": str(int(at.timestamp() * 1000)),
+        "payload": {"headers": [{"name": "From", "value": sender}]},
+    }
+
+
+def _legacy_script_key(doc, order):
+    """The painless ``_script`` sort key the ttr sorts used before."""
+    missing = 9.22e18
+    no_reply = -9.22e18 if order == "desc" else 9.22e18
+    if not doc.get("received_at"):
+        return missing
+    if not doc.get("first_user_reply_at"):
+        return no_reply
+    r = datetime.fromisoformat(doc["received_at"]).replace(tzinfo=timezone.utc)
+    f = datetime.fromisoformat(doc["first_user_reply_at"])
+    if f < r:
+        return missing
+    return (f - r).total_seconds() / 3600.0
+
+
+def _field_sort(docs, order):
+    """ES field sort on time_to_response_hours with missing values last."""
+    present = [d for d in docs if d.get("time_to_response_hours") is not None]
+    absent = [d for d in docs if d.get("time_to_response_hours") is None]
+    present.sort(key=lambda d: d["time_to_response_hours"], reverse=order == "desc")
+    return present + absent
+
+
+def _fixture_mailbox():
+    """Threads answered after 1..30h, plus every third thread never answered."""
+    docs = []
+    for i in range(30):
+        received = T0 + timedelta(hours=i)
+        thread = [_msg("recruiter@acme.com", received)]
+        if i % 3 != 0:
+            thread.append(_msg(USER, received + timedelta(hours=i + 1, minutes=i)))
+        metrics = compute_thread_reply_metrics(thread, USER)
+        for raw in thread:
+            at = datetime.fromtimestamp(int(raw["internalDate"]) / 1000, timezone.utc)
+            received_at = at.replace(tzinfo=None)  # ingest stores naive UTC
+            docs.append(
+                {
+                    "gmail_id": f"m{len(docs)}",
+                    "received_at": received_at.isoformat(),
+                    **reply_fields(received_at, metrics),
+                }
+            )
+    return docs
+
+
+def test_time_to_response_hours():
+    assert time_to_response_hours(T0, T0 + timedelta(minutes=90)) == 1.5
+    assert time_to_response_hours("2025-10-01T09:00:00", "2025-10-01T11:00:00Z") == 2
+    assert time_to_response_hours(T0, None) is None
+    assert time_to_response_hours(None, T0) is None
+    # reply predates this message (later inbound in an answered thread)
+    assert time_to_response_hours(T0, T0 - timedelta(hours=1)) is None
+
+
+def test_field_sort_matches_legacy_script_sort():
+    docs = _fixture_mailbox()
+    assert any(d["time_to_response_hours"] is None for d in docs)
+
+    for order in ("asc", "desc"):
+        legacy = sorted(
+            docs,
+            key=lambda d: _legacy_script_key(d, order),
+            reverse=order == "desc",
+        )
+        assert [d["gmail_id"] for d in _field_sort(docs, order)] == [
+            d["gmail_id"] for d in legacy
+        ]
+
+
+def test_backfill_script_sets_the_same_field():
+    script = time_to_response_script("ctx._source.replied = true;")
+
+    assert script.index("long toMillis") < script.index("ctx._source.replied")
+    assert "ctx._source.time_to_response_hours =" in script
+
+
+class _CapturingES:
+    def __init__(self, hits):
+        self.hits = hits
+        self.body = None
+
+    def search(self, index=None, body=None, **kwargs):
+        self.body = body
+        return {"hits": {"total": {"value": len(self.hits)}, "hits": self.hits}}
+
+
+def _search(sort):
+    return search_router.search(
+        request=None,
+        q="interview",
+        size=10,
+        scale="7d",
+        labels=None,
+        date_from=None,
+        date_to=None,
+        replied=None,
+        sort=sort,
+        label_filter=None,
+        company=None,
+        source=None,
+        categories=None,
+        hide_expired=False,
+        risk_min=None,
+        risk_max=None,
+        quarantined=None,
+        cursor=None,
+        user_email=USER,
+    )
+
+
+@pytest.mark.parametrize("sort,order", [("ttr_asc", "asc"), ("ttr_desc", "desc")])
+def test_ttr_sort_is_a_field_sort(sort, order):
+    hit = {
+        "_id": "m1",
+        "_score": None,
+        "_source": {
+            "gmail_id": "m1",
+            "received_at": "2025-10-01T09:00:00",
+            "first_user_reply_at": "2025-10-01T12:00:00+00:00",
+            "time_to_response_hours": 3.0,
+            "replied": True,
+        },
+    }
+    fake = _CapturingES([hit])
+    with mock.patch.multiple(search_router, es=fake, ES_ENABLED=True):
+        resp = _search(sort)
+
+    # Primary key; the pagination tiebreaker follows it
+    assert fake.body["sort"][0] == {
+        "time_to_response_hours": {
+            "order": order,
+            "missing": "_last",
+            "unmapped_type": "float",
+        }
+    }
+    assert "_script" not in str(fake.body)
+    assert resp.hits[0].time_to_response_hours == 3.0
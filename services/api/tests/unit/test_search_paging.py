@@ -0,0 +1,254 @@
+"""
+Deep pagination (app.logic.paging) against a fake ES client that implements
+point-in-time snapshots and ``search_after`` semantics.
+"""
+
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import pytest
+from elasticsearch import NotFoundError
+from fastapi import Response
+
+from app.logic.paging import (
+    NEXT_CURSOR_HEADER,
+    InvalidCursor,
+    Pager,
+    PitRegistry,
+    decode_cursor,
+    encode_cursor,
+)
+from app.routers import inbox_actions
+
+pytestmark = pytest.mark.unit
+
+T0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+BODY = {"query": {"match_all": {}}, "sort": [{"received_at": {"order": "desc"}}]}
+
+
+class FakePitES:
+    """
+    In-memory ES: the query is ignored (every doc matches), sorting honours
+    numeric/date fields in either order and keyword fields ascending, and
+    ``search_after`` resumes strictly after the given sort values.
+    """
+
+    def __init__(self, docs):
+        self.docs = list(docs)
+        self.pits = {}
+        self.requests = []
+        self._opened = 0
+        self._orders = {}
+
+    def open_point_in_time(self, index, keep_alive):
+        self._opened += 1
+        pit_id = f"pit-{self._opened}"
+        self.pits[pit_id] = list(self.docs)
+        return {"id": pit_id}
+
+    def close_point_in_time(self, id):
+        self.pits.pop(id, None)
+        return {"succeeded": True}
+
+    @staticmethod
+    def _value(src, field):
+        if field == "_score":
+            return 1.0
+        value = src.get(field)
+        if field == "received_at" and value is not None:
+            return int(datetime.fromisoformat(value).timestamp() * 1000)
+        return value
+
+    def _ordered(self, snapshot_key, docs, sort):
+        cache_key = (snapshot_key, repr(sort), len(docs))
+        if cache_key not in self._orders:
+            fields = [
+                (c, "desc") if c == "_score" else next(iter(c.items())) for c in sort
+            ]
+            fields = [(f, o if isinstance(o, str) else o["order"]) for f, o in fields]
+
+            def key(src):
+                out = []
+                for field, order in fields:
+                    value = self._value(src, field)
+                    if order == "desc":
+                        assert not isinstance(value, str), "keyword desc unsupported"
+                        value = -value if value is not None else None
+                    out.append((value is None, value or 0))
+                return out
+
+            ordered = sorted(docs, key=key)
+            values = [[self._value(d, f) for f, _ in fields] for d in ordered]
+            index = {repr(v): i for i, v in enumerate(values)}
+            self._orders[cache_key] = (ordered, values, index)
+        return self._orders[cache_key]
+
+    def search(self, index=None, body=None, **kwargs):
+        self.requests.append(body)
+        pit = body.get("pit")
+        if pit:
+            if pit["id"] not in self.pits:
+                raise NotFoundError("search_context_missing_exception", None, {})
+            snapshot_key, docs = pit["id"], self.pits[pit["id"]]
+        else:
+            snapshot_key, docs = ("live", len(self.docs)), self.docs
+        ordered, values, index_of = self._ordered(snapshot_key, docs, body["sort"])
+        start = 0
+        if "search_after" in body:
+            start = index_of[repr(body["search_after"])] + 1
+        end = start + body["size"]
+        hits = [
+            {"_id": src["gmail_id"], "_source": src, "sort": values[i]}
+            for i, src in enumerate(ordered[start:end], start)
+        ]
+        res = {"hits": {"total": {"value": len(docs)}, "hits": hits}}
+        if pit:
+            res["pit_id"] = pit["id"]
+        return res
+
+
+def _docs(n, start=0):
+    # Seven docs per minute, so the gmail_id tiebreaker decides within a minute
+    return [
+        {
+            "gmail_id": f"g{i:06d}",
+            "received_at": (T0 + timedelta(minutes=i // 7)).isoformat(),
+            "risk_score": i % 100,
+        }
+        for i in range(start, start + n)
+    ]
+
+
+def _pages(es, body, size, registry, user="u@example.com", keep=None):
+    cursor, pages = None, []
+    while True:
+        pager = Pager(
+            es, "emails", user=user, scope="test", cursor=cursor, registry=registry
+        )
+        page = pager.fetch(body, size, keep)
+        pages.append(page)
+        cursor = page.next_cursor
+        if not cursor:
+            return pages
+
+
+def test_pages_through_50k_docs_exactly_once():
+    es = FakePitES(_docs(50_000))
+    registry = PitRegistry()
+
+    pages = _pages(es, BODY, 100, registry)
+
+    seen = [h["_id"] for p in pages for h in p.hits]
+    assert len(pages) == 500
+    assert len(seen) == len(set(seen)) == 50_000
+    # Constant-cost requests: no from/offset, same size, PIT after page 1
+    assert all("from" not in r and r["size"] == 101 for r in es.requests)
+    assert all("pit" in r and "search_after" in r for r in es.requests[1:])
+    # Last page closed the PIT
+    assert es.pits == {} and len(registry) == 0
+
+
+def test_later_pages_read_a_snapshot():
+    es = FakePitES(_docs(1_000))
+    registry = PitRegistry()
+    first = Pager(es, "emails", user="u", scope="test", registry=registry)
+    page = first.fetch(BODY, 100)
+    second = Pager(
+        es, "emails", user="u", scope="test", cursor=page.next_cursor, registry=registry
+    )
+    page = second.fetch(BODY, 100)
+
+    es.docs.extend(_docs(50, start=5_000))  # newer mail arrives mid-listing
+    cursor, seen = page.next_cursor, 200
+    while cursor:
+        pager = Pager(
+            es, "emails", user="u", scope="test", cursor=cursor, registry=registry
+        )
+        page = pager.fetch(BODY, 100)
+        seen += len(page.hits)
+        cursor = page.next_cursor
+    assert seen == 1_000
+
+
+def test_python_filter_refills_short_pages():
+    es = FakePitES(_docs(300))
+    keep = lambda hit: hit["_source"]["risk_score"] % 3 == 0  # noqa: E731
+
+    pages = _pages(es, BODY, 10, PitRegistry(), keep=keep)
+
+    assert all(len(p.hits) == 10 for p in pages[:-1])
+    seen = [h["_id"] for p in pages for h in p.hits]
+    expected = [d["gmail_id"] for d in _docs(300) if d["risk_score"] % 3 == 0]
+    assert sorted(seen) == sorted(expected)
+    assert len(seen) == len(set(seen))
+
+
+def test_expired_pit_is_reopened_at_the_same_position():
+    es = FakePitES(_docs(500))
+    registry = PitRegistry()
+    cursor, seen = None, []
+    while True:
+        pager = Pager(
+            es, "emails", user="u", scope="test", cursor=cursor, registry=registry
+        )
+        page = pager.fetch(BODY, 50)
+        seen += [h["_id"] for h in page.hits]
+        cursor = page.next_cursor
+        if not cursor:
+            break
+        registry.sweep(idle_seconds=0)  # user went idle; sweeper closed the PIT
+        assert es.pits == {}
+
+    assert len(seen) == len(set(seen)) == 500
+
+
+def test_cursor_is_bound_to_user_listing_and_query():
+    es = FakePitES(_docs(50))
+    page = Pager(es, "emails", user="u", scope="search").fetch(BODY, 10)
+    cursor = page.next_cursor
+
+    with pytest.raises(InvalidCursor):
+        Pager(es, "emails", user="other", scope="search", cursor=cursor)
+    with pytest.raises(InvalidCursor):
+        Pager(es, "emails", user="u", scope="tracker", cursor=cursor)
+    with pytest.raises(InvalidCursor):
+        other_query = {**BODY, "query": {"term": {"labels": "UNREAD"}}}
+        Pager(es, "emails", user="u", scope="search", cursor=cursor).fetch(
+            other_query, 10
+        )
+
+    state = decode_cursor(cursor)
+    state.search_after = ["forged"]
+    forged = encode_cursor(state).split(".")[0] + "." + cursor.split(".")[1]
+    with pytest.raises(InvalidCursor):
+        decode_cursor(forged)
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor")
+
+
+async def test_inbox_actions_pages_with_cursor_header():
+    docs = _docs(120)
+    for i, d in enumerate(docs):
+        d.update(sender="Shop <deals@shop.com>", subject=f"Deal {i}", labels=["UNREAD"])
+        d["muted"] = i % 4 == 0  # legacy flag, handled in ES and in Python
+    es = FakePitES(docs)
+
+    cursor, rows = None, []
+    with mock.patch.multiple(inbox_actions, es=es, ES_ENABLED=True):
+        while True:
+            response = Response()
+            page = await inbox_actions.get_inbox_actions(
+                response=response,
+                mode="review",
+                limit=25,
+                cursor=cursor,
+                user_email="u@example.com",
+            )
+            rows += page
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if not cursor:
+                break
+
+    assert len(rows) == 90
+    assert len({r.message_id for r in rows}) == 90
+    assert not any(r.muted for r in rows)
@@ -0,0 +1,77 @@
+"""
+Unit tests for the style-stats rollup accumulators and the cache in front of
+autofill_aggregator._compute_all_style_stats.
+"""
+
+from unittest import mock
+
+import pytest
+
+from app import autofill_aggregator as agg
+
+pytestmark = pytest.mark.unit
+
+
+def _tables():
+    return agg.StyleStatsTables(form={}, family={}, segment={}, profile_segments={})
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    agg.invalidate_style_stats_cache()
+    yield
+    agg.invalidate_style_stats_cache()
+
+
+def test_accumulator_rollup_matches_stats():
+    acc = agg._new_acc()
+    # (runs, helpful, unhelpful, edit_sum, edit_count) per grouped row
+    agg._add_acc(acc, (4, 3, 1, 40, 4))
+    agg._add_acc(acc, (2, 0, 2, None, 0))
+
+    stats = agg._acc_to_stats("bullets_v1", acc)
+
+    assert stats.total_runs == 6
+    assert stats.helpful == 3
+    assert stats.unhelpful == 3
+    assert stats.helpful_ratio == pytest.approx(0.5)
+    # Average is over runs that reported edit_chars
+    assert stats.avg_edit_chars == pytest.approx(10.0)
+
+
+def test_cache_reuses_tables_until_invalidated(monkeypatch):
+    computed = []
+
+    def compute(db, lookback_days):
+        computed.append(lookback_days)
+        return _tables()
+
+    monkeypatch.setattr(agg, "_compute_all_style_stats", compute)
+    db = mock.Mock()
+
+    first = agg.get_style_stats_tables(db, 30)
+    assert agg.get_style_stats_tables(db, 30) is first
+    assert computed == [30]
+    # A hit runs no freshness query
+    assert db.method_calls == []
+
+    # Different window is cached separately
+    agg.get_style_stats_tables(db, 7)
+    assert computed == [30, 7]
+
+    # Explicit invalidation (learning sync) forces a recompute
+    agg.invalidate_style_stats_cache()
+    assert agg.get_style_stats_tables(db, 30) is not first
+    assert computed == [30, 7, 30]
+
+
+def test_cache_expires_after_ttl(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(agg, "_compute_all_style_stats", lambda db, d: _tables())
+    monkeypatch.setattr(agg.time, "monotonic", lambda: clock[0])
+
+    first = agg.get_style_stats_tables(None, 30)
+    clock[0] += agg.STYLE_STATS_CACHE_TTL_SECONDS - 1
+    assert agg.get_style_stats_tables(None, 30) is first
+    clock[0] += 2
+    assert agg.get_style_stats_tables(None, 30) is not first
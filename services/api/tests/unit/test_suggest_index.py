@@ -0,0 +1,227 @@
+"""
+Per-user autocomplete index (app.logic.suggest_index) and the /suggest
+router's local-first lookup.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import pytest
+
+from app.logic import suggest_index
+from app.logic.suggest_index import SuggestIndexRegistry, UserSuggestIndex
+from app.routers import suggest as suggest_router
+
+pytestmark = pytest.mark.unit
+
+T0 = datetime(2025, 10, 1, tzinfo=timezone.utc)
+ALICE = "alice@example.com"
+BOB = "bob@example.com"
+
+
+def _email(owner, subject, sender, company=None, days=0, body=""):
+    return {
+        "owner_email": owner,
+        "subject": subject,
+        "sender": sender,
+        "company": company,
+        "body_text": body,
+        "received_at": (T0 + timedelta(days=days)).isoformat(),
+    }
+
+
+class FakeSuggestES:
+    """Answers the build aggregation and the owner-filtered fallback query."""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.bodies = []
+
+    def search(self, index=None, body=None, **kwargs):
+        self.bodies.append(body)
+        if "aggs" in body:
+            return self._aggregate(body["query"]["term"]["owner_email.keyword"], body)
+        owner = body["query"]["bool"]["filter"][0]["term"]["owner_email.keyword"]
+        q = body["query"]["bool"]["should"][0]["match_phrase_prefix"]["subject"]
+        hits = []
+        for d in self.docs:
+            if d["owner_email"] != owner:
+                continue
+            matched = []
+            if d["subject"].lower().startswith(q["query"].lower()):
+                matched.append("subject")
+            if q["query"].lower() in d["body_text"].lower():
+                matched.append("body")
+            if matched:
+                hits.append({"_source": d, "matched_queries": matched})
+        return {"hits": {"hits": hits[: body["size"]]}}
+
+    def _aggregate(self, owner, body):
+        fields = {"subject.raw": "subject", "sender.keyword": "sender"}
+        aggs = {}
+        for name, agg in body["aggs"].items():
+            field = fields.get(agg["terms"]["field"], agg["terms"]["field"])
+            counts, last = defaultdict(int), {}
+            for d in self.docs:
+                if d["owner_email"] == owner and d.get(field):
+                    at = datetime.fromisoformat(d["received_at"]).timestamp() * 1000
+                    counts[d[field]] += 1
+                    last[d[field]] = max(last.get(d[field], 0), at)
+            aggs[name] = {
+                "buckets": [
+                    {"key": k, "doc_count": n, "last": {"value": last[k]}}
+                    for k, n in counts.items()
+                ]
+            }
+        return {"hits": {"hits": []}, "aggregations": aggs}
+
+
+MAILBOX = [
+    _email(ALICE, "Interview at Acme", "Acme Recruiting <jobs@acme.com>", "Acme"),
+    _email(ALICE, "Interview follow-up", "Acme Recruiting <jobs@acme.com>", "Acme"),
+    _email(ALICE, "Invoice for October", "Billing <billing@shop.com>", days=3),
+    _email(BOB, "Interview with Initech", "Initech HR <hr@initech.com>", "Initech"),
+    _email(BOB, "Invitation: offsite", "Bob's Boss <boss@initech.com>"),
+]
+
+
+def _suggest(q, user, limit=3):
+    return suggest_router.suggest(q=q, limit=limit, user_email=user)
+
+
+@pytest.fixture
+def registry():
+    reg = SuggestIndexRegistry()
+    with mock.patch.object(suggest_router, "suggest_indexes", reg):
+        yield reg
+
+
+def test_ranks_prefix_matches_by_frequency_and_recency():
+    idx = UserSuggestIndex()
+    idx.add("Interview at Acme", seen=T0)
+    idx.add("Interview at Initech", count=4, seen=T0)
+    idx.add("Interview prep", seen=T0 + timedelta(days=30))
+    idx.add("Invoice", count=10, seen=T0)
+
+    assert idx.lookup("interv", 3) == [
+        "Interview prep",  # four half-lives newer beats 4x as frequent
+        "Interview at Initech",
+        "Interview at Acme",
+    ]
+    assert idx.lookup("INTERVIEW  at", 5) == [
+        "Interview at Initech",
+        "Interview at Acme",
+    ]
+    assert idx.lookup("zz", 5) == []
+
+
+def test_wide_prefix_results_follow_updates():
+    idx = UserSuggestIndex()
+    with idx.bulk():
+        for i in range(suggest_index.WIDE_PREFIX + 50):
+            idx.add(f"Interview round {i}", seen=T0)
+    assert len(idx.lookup("interview", 3)) == 3  # memoized
+
+    idx.add("Interview with Globex", seen=T0 + timedelta(days=1))
+
+    assert idx.lookup("interview", 3)[0] == "Interview with Globex"
+    assert idx.lookup("interview w", 3) == ["Interview with Globex"]
+
+
+def test_per_user_cap_drops_lowest_scores():
+    idx = UserSuggestIndex(max_entries=100)
+    for i in range(150):
+        idx.add(f"subject {i:03d}", seen=T0 + timedelta(hours=i))
+
+    assert len(idx) <= 100
+    assert idx.lookup("subject 149", 1) == ["subject 149"]
+    assert idx.lookup("subject 000", 1) == []
+
+
+def test_lru_across_users_bounds_total_entries():
+    es = FakeSuggestES(
+        [_email(u, f"Subject {i}", "X <x@x.com>") for u in "abc" for i in range(10)]
+    )
+    reg = SuggestIndexRegistry(max_total_entries=25)
+    for user in "abc":
+        reg.lookup(es, "emails", user, "sub", 3)
+
+    assert "a" not in reg and "b" in reg and "c" in reg
+    assert reg.total_entries() <= 25
+
+
+def test_suggestions_never_cross_users(registry):
+    es = FakeSuggestES(MAILBOX)
+    with mock.patch.multiple(suggest_router, es=es, ES_ENABLED=True):
+        alice = _suggest("in", ALICE, limit=10)
+        bob = _suggest("in", BOB, limit=10)
+
+    alice_words = " ".join(alice["suggestions"] + alice["body_prefix"])
+    bob_words = " ".join(bob["suggestions"] + bob["body_prefix"])
+    assert "Acme" in alice_words and "Initech" not in alice_words
+    assert "Initech" in bob_words and "Acme" not in bob_words
+    # Every ES request (build and fallback) was scoped to the owner
+    assert all("owner_email.keyword" in str(b) for b in es.bodies)
+    assert "suggest" not in str(es.bodies)
+
+
+def test_local_hits_skip_es(registry):
+    es = FakeSuggestES(MAILBOX)
+    with mock.patch.multiple(suggest_router, es=es, ES_ENABLED=True):
+        first = _suggest("interview", ALICE, limit=2)
+        builds = len(es.bodies)
+        second = _suggest("inv", ALICE, limit=1)
+
+    assert first["suggestions"] == ["Interview at Acme", "Interview follow-up"]
+    assert builds == 1  # one aggregation, no fallback query
+    assert second["suggestions"] == ["Invoice for October"]
+    assert len(es.bodies) == builds
+
+
+def test_body_text_queries_go_to_es(registry):
+    es = FakeSuggestES(
+        [_email(ALICE, "Re: call", "A <a@a.com>", body="can we move the call to 3pm")]
+    )
+    with mock.patch.multiple(suggest_router, es=es, ES_ENABLED=True):
+        res = _suggest("move the call to", ALICE)
+
+    assert len(es.bodies) == 1 and "aggs" not in es.bodies[0]
+    assert res["body_prefix"] == ["Re: call"]
+
+
+def test_ingested_emails_appear_without_rebuild(registry):
+    es = FakeSuggestES(MAILBOX)
+    with mock.patch.multiple(suggest_router, es=es, ES_ENABLED=True):
+        _suggest("interview", ALICE)
+        searches = len(es.bodies)
+
+        registry.add_emails(
+            ALICE,
+            [
+                _email(ALICE, "Offer letter from Globex", "Globex <hr@globex.com>"),
+                _email(ALICE, "Offer call", "Globex <hr@globex.com>", "Globex"),
+            ],
+        )
+        res = _suggest("glob", ALICE, limit=1)
+
+    assert res["suggestions"] == ["Globex"]
+    assert len(es.bodies) == searches
+    assert registry.lookup(es, "emails", ALICE, "offer l", 1) == [
+        "Offer letter from Globex"
+    ]
+    assert registry.lookup(es, "emails", BOB, "offer", 5) == []
+
+
+def test_emails_ingested_during_a_build_are_kept():
+    reg = SuggestIndexRegistry()
+    es = FakeSuggestES(MAILBOX)
+    build = suggest_index.build_user_index
+
+    def racing_build(*args):
+        idx = build(*args)
+        reg.add_emails(ALICE, [_email(ALICE, "Late arrival", "L <l@l.com>")])
+        return idx
+
+    with mock.patch.object(suggest_index, "build_user_index", racing_build):
+        assert reg.lookup(es, "emails", ALICE, "late", 1) == ["Late arrival"]
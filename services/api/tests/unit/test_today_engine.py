@@ -0,0 +1,152 @@
+"""
+Unit tests for the shared-scan Today triage engine (app.agent.today).
+
+Elasticsearch is faked at the msearch level; no LLM, Redis or DB is used.
+"""
+
+import pytest
+
+from app.agent import today as today_module
+from app.agent.orchestrator import MailboxAgentOrchestrator
+
+pytestmark = pytest.mark.unit
+
+
+def _hit(gmail_id, thread_id, subject, sender="recruiter@acme.com", risk=0):
+    return {
+        "_id": gmail_id,
+        "_source": {
+            "gmail_id": gmail_id,
+            "thread_id": thread_id,
+            "subject": subject,
+            "sender": sender,
+            "received_at": "2026-10-01T10:00:00",
+            "body_text": f"Body of {subject}",
+            "risk_score": risk,
+            "labels": ["INBOX"],
+        },
+    }
+
+
+def _response(*hits):
+    return {"hits": {"total": {"value": len(hits)}, "hits": list(hits)}}
+
+
+class FakeES:
+    """Records msearch calls and answers by the searched query text."""
+
+    calls = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def msearch(self, searches):
+        FakeES.calls.append(searches)
+        responses = []
+        for body in searches[1::2]:
+            must = body["query"]["bool"]["must"][0]
+            query = must.get("multi_match", {}).get("query", "*")
+            if query == "Show followups":
+                responses.append(
+                    _response(_hit("m1", "t1", "Re: Interview"), _hit("m2", "t2", "Hi"))
+                )
+            elif query == "Show bills":
+                responses.append({"error": {"type": "search_phase_execution"}})
+            elif query == "Get my follow-up queue":
+                responses.append(_response(_hit("m1", "t1", "Re: Interview")))
+            elif query == "*":
+                responses.append(
+                    _response(_hit("m9", "t9", "Verify", "x@phish.example", risk=90))
+                )
+            else:
+                responses.append(_response())
+        return {"responses": responses}
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    monkeypatch.setattr(today_module, "ES_ENABLED", True)
+    monkeypatch.setattr(today_module, "AsyncElasticsearch", FakeES)
+    monkeypatch.setattr(
+        today_module,
+        "lookup_applications_by_thread",
+        lambda db, thread_ids, max_results: [
+            {"id": 7, "status": "interview", "thread_id": "t1"}
+        ],
+    )
+    monkeypatch.setattr(today_module, "SessionLocal", lambda: _NullSession())
+    FakeES.calls = []
+    today_module._today_cache.clear()
+    yield today_module.TodayTriageEngine(MailboxAgentOrchestrator())
+    today_module._today_cache.clear()
+
+
+class _NullSession:
+    def close(self):
+        pass
+
+
+async def test_all_intents_come_from_one_msearch(engine):
+    result = await engine.run("user@example.com", 30)
+
+    assert len(FakeES.calls) == 1
+    # Six intents + follow-up queue + security_scan's recent window
+    assert len(FakeES.calls[0]) == 2 * 8
+
+    by_intent = {r["intent"]: r for r in result["intents"]}
+    assert list(by_intent) == list(today_module.TODAY_INTENTS)
+
+    followups = by_intent["followups"]
+    assert followups["summary"] == {"count": 2, "time_window_days": 30}
+    enriched = [t for t in followups["threads"] if t["threadId"] == "t1"][0]
+    assert enriched["applicationId"] == 7
+
+    # A failed search degrades to an empty card set, like the tool did
+    assert by_intent["bills"]["summary"]["count"] == 0
+    assert by_intent["bills"]["threads"] == []
+
+    # No suspicious search hits -> security_scan falls back to recent mail
+    assert by_intent["suspicious"]["summary"]["count"] == 1
+
+    queue = result["followup_queue"]
+    assert [t["thread_id"] for t in queue["threads"]] == ["t1"]
+
+
+async def test_results_are_cached_until_invalidated(engine):
+    first = await engine.run("user@example.com", 30)
+    second = await engine.run("user@example.com", 30)
+
+    assert second is first
+    assert len(FakeES.calls) == 1
+
+    today_module.invalidate_today_cache("user@example.com")
+    await engine.run("user@example.com", 30)
+
+    assert len(FakeES.calls) == 2
+
+
+async def test_cache_is_bounded_and_drops_expired_entries(engine, monkeypatch):
+    monkeypatch.setattr(today_module, "TODAY_CACHE_MAX_ENTRIES", 2)
+    for user in ("a@example.com", "b@example.com", "c@example.com"):
+        await engine.run(user, 30)
+
+    # Least recently used user evicted
+    assert list(today_module._today_cache) == [
+        ("b@example.com", 30),
+        ("c@example.com", 30),
+    ]
+
+    monkeypatch.setattr(today_module, "TODAY_CACHE_TTL_SECONDS", 0)
+    await engine.run("d@example.com", 7)  # Stored already expired
+    monkeypatch.setattr(today_module, "TODAY_CACHE_TTL_SECONDS", 60)
+    await engine.run("e@example.com", 7)
+
+    # Expired entries are pruned on write, not only when their key returns
+    assert list(today_module._today_cache) == [
+        ("c@example.com", 30),
+        ("e@example.com", 7),
+    ]